@@ -462,10 +462,11 @@ def admin_purge_observations(
 ):
     """Admin: purge AIS observations older than the configured retention window."""
     from app.models.ais_observation import AISObservation
+    from app.modules.observation_store import purge_old_observations
 
     deleted = AISObservation.purge_old(db)
     db.commit()
-    return {"deleted": deleted}
+    return {"deleted": deleted + purge_old_observations()}
 
 
 # ---------------------------------------------------------------------------
@@ -126,6 +126,7 @@ def delete_archive(
     from pathlib import Path
 
     from app.models.ais_archive_batch import AisArchiveBatch
+    from app.modules.archive_manifest import delete_manifest
 
     batch = db.query(AisArchiveBatch).filter(AisArchiveBatch.batch_id == batch_id).first()
     if not batch:
@@ -137,6 +138,7 @@ def delete_archive(
         if p.exists():
             p.unlink()
 
+    delete_manifest(db, batch_id)
     db.delete(batch)
     db.commit()
     return {"batch_id": batch_id, "deleted": True}
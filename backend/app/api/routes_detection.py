@@ -44,8 +44,14 @@ def detect_gaps(
 ):
     """Run AIS gap detection over the specified date range."""
     from app.modules.gap_detector import run_gap_detection
+    from app.modules.track_store import TrackStore
 
-    return run_gap_detection(db, date_from=date_from, date_to=date_to)
+    return run_gap_detection(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        track_store=TrackStore.for_dates(db, date_from, date_to),
+    )
 
 
 @router.post("/spoofing/detect", tags=["detection"])
@@ -795,6 +801,9 @@ def get_corridor_activity(
     granularity: str = Query("week", description="day, week, or month"),
     date_from: date | None = None,
     date_to: date | None = None,
+    include_traffic: bool = Query(
+        False, description="Add distinct vessels with AIS positions in the corridor's bbox"
+    ),
     db: Session = Depends(get_db),
 ):
     """Time-series activity for a corridor: gap counts, vessel counts, avg risk."""
@@ -823,21 +832,7 @@ def get_corridor_activity(
         )
 
     dialect_name = db.bind.dialect.name if db.bind else "sqlite"
-
-    if dialect_name == "postgresql":
-        if granularity == "day":
-            bucket = func.to_char(AISGapEvent.gap_start_utc, "YYYY-MM-DD")
-        elif granularity == "week":
-            bucket = func.to_char(AISGapEvent.gap_start_utc, 'IYYY-"W"IW')
-        else:
-            bucket = func.to_char(AISGapEvent.gap_start_utc, "YYYY-MM")
-    else:
-        if granularity == "day":
-            bucket = func.strftime("%Y-%m-%d", AISGapEvent.gap_start_utc)
-        elif granularity == "week":
-            bucket = func.strftime("%Y-W%W", AISGapEvent.gap_start_utc)
-        else:
-            bucket = func.strftime("%Y-%m", AISGapEvent.gap_start_utc)
+    bucket = _period_bucket(dialect_name, granularity, AISGapEvent.gap_start_utc)
 
     rows = (
         q.group_by(bucket)
@@ -851,15 +846,72 @@ def get_corridor_activity(
         .all()
     )
 
-    return [
-        {
+    periods = {
+        row.period: {
             "period_start": row.period,
             "gap_count": row.gap_count,
             "distinct_vessels": row.distinct_vessels,
             "avg_risk_score": round(float(row.avg_risk), 1) if row.avg_risk else 0.0,
         }
         for row in rows
-    ]
+    }
+    if not include_traffic:
+        return list(periods.values())
+
+    traffic = _corridor_traffic(db, corridor, dialect_name, granularity, date_from, date_to)
+    for period in traffic.keys() - periods.keys():
+        periods[period] = {
+            "period_start": period,
+            "gap_count": 0,
+            "distinct_vessels": 0,
+            "avg_risk_score": 0.0,
+        }
+    for period, entry in periods.items():
+        entry["ais_vessels"] = traffic.get(period, 0)
+    return [periods[p] for p in sorted(periods)]
+
+
+def _period_bucket(dialect_name: str, granularity: str, column):
+    """Period label expression (day / ISO-ish week / month) for ``column``."""
+    if dialect_name == "postgresql":
+        if granularity == "day":
+            return func.to_char(column, "YYYY-MM-DD")
+        if granularity == "week":
+            return func.to_char(column, 'IYYY-"W"IW')
+        return func.to_char(column, "YYYY-MM")
+    if granularity == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if granularity == "week":
+        return func.strftime("%Y-W%W", column)
+    return func.strftime("%Y-%m", column)
+
+
+def _corridor_traffic(
+    db: Session,
+    corridor,
+    dialect_name: str,
+    granularity: str,
+    date_from: date | None,
+    date_to: date | None,
+) -> dict[str, int]:
+    """Distinct vessels per period with AIS positions inside the corridor's bbox."""
+    from app.models.ais_point import AISPoint
+    from app.modules.spatial_index import BBox, point_filter
+    from app.utils.geo import parse_wkt_bbox
+
+    bounds = parse_wkt_bbox(corridor.geometry) if corridor.geometry else None
+    if bounds is None:
+        return {}
+    start = datetime(date_from.year, date_from.month, date_from.day) if date_from else None
+    end = datetime(date_to.year, date_to.month, date_to.day, 23, 59, 59) if date_to else None
+    bucket = _period_bucket(dialect_name, granularity, AISPoint.timestamp_utc)
+    rows = (
+        db.query(bucket.label("period"), func.count(func.distinct(AISPoint.vessel_id)))
+        .filter(point_filter(db, BBox(*bounds), start, end))
+        .group_by(bucket)
+        .all()
+    )
+    return {period: count for period, count in rows}
 
 
 # ─── Dark Vessel Detections ───────────────────────────────────────────────────
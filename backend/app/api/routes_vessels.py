@@ -107,8 +107,11 @@ def search_vessels(
             )
         )
 
+    from app.modules.track_summary import load_track_summaries
+
     total = q.count()
     vessels = q.offset(skip).limit(limit).all()
+    summaries = load_track_summaries(db, [v.vessel_id for v in vessels])
     results = []
     for v in vessels:
         last_gap = (
@@ -127,6 +130,7 @@ def search_vessels(
         # Compute effective_score: prefer gap score (even 0), fall back to stub score
         # IMPORTANT: use is-not-None check, NOT truthiness (last_risk_score=0 is valid)
         effective = last_risk if last_risk is not None else stub_score
+        summary = summaries.get(v.vessel_id)
         entry = {
             "vessel_id": v.vessel_id,
             "mmsi": v.mmsi,
@@ -139,6 +143,8 @@ def search_vessels(
             "watchlist_status": on_watchlist,
             "watchlist_stub_score": stub_score,
             "effective_score": effective,
+            "last_position": _last_position(summary),
+            "ais_point_count": summary.point_count if summary else None,
         }
         if v.vessel_id in matched_via_alias:
             entry["matched_via_absorbed_mmsi"] = matched_via_alias[v.vessel_id]
@@ -146,6 +152,18 @@ def search_vessels(
     return {"items": results, "total": total}
 
 
+def _last_position(summary) -> dict | None:
+    """Last known position from a vessel's track summary."""
+    if summary is None:
+        return None
+    return {
+        "lat": summary.last_lat,
+        "lon": summary.last_lon,
+        "time": summary.last_point_utc.isoformat(),
+        "source": summary.last_source,
+    }
+
+
 @router.get("/vessels/{vessel_id}/track.geojson", tags=["vessels"])
 def get_vessel_track_geojson(
     vessel_id: int,
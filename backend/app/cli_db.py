@@ -144,3 +144,16 @@ def restore(
     else:
         typer.echo("ERROR: Unsupported database type", err=True)
         raise typer.Exit(1)
+
+
+@app.command("rebuild-spatial-index")
+def rebuild_spatial_index():
+    """Rebuild the AIS point / dark detection spatial index (SPATIAL_INDEX_ENABLED)."""
+    from app.database import engine
+    from app.modules.spatial_index import ensure_spatial_index, spatial_index_enabled
+
+    if not spatial_index_enabled(engine):
+        typer.echo("Spatial index is disabled (set SPATIAL_INDEX_ENABLED=true).")
+        raise typer.Exit(1)
+    ensure_spatial_index(engine, rebuild=True)
+    typer.echo("Spatial index rebuilt")
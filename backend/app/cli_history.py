@@ -159,6 +159,9 @@ def history_backfill(
         "--corridor-filter/--no-corridor-filter",
         help="Only import within corridor bounding boxes (NOAA)",
     ),
+    workers: int = typer.Option(
+        0, "--workers", help="Parser processes per day file (DMA; 0 = DMA_IMPORT_WORKERS)"
+    ),
 ):
     """Backfill historical data for a specific source and date range."""
     if source not in _HISTORY_SOURCES:
@@ -215,7 +218,7 @@ def history_backfill(
         elif source == "dma":
             from app.modules.dma_client import fetch_and_import_dma
 
-            stats = fetch_and_import_dma(db, start_date, end_date)
+            stats = fetch_and_import_dma(db, start_date, end_date, workers=workers or None)
             console.print(
                 f"  {stats['days_processed']} days processed, "
                 f"{stats['points_imported']:,} points imported, "
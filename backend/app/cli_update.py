@@ -118,6 +118,16 @@ def update(
     check_identity: bool = typer.Option(
         False, "--check-identity", help="Show merge readiness diagnostic after detection"
     ),
+    full_recompute: bool = typer.Option(
+        False,
+        "--full-recompute",
+        help="Drop detector checkpoints and rescan the whole analysis window",
+    ),
+    workers: int | None = typer.Option(
+        None,
+        "--workers",
+        help="Run per-vessel detectors in N processes (0 = all cores, 1 = serial)",
+    ),
 ):
     """Refresh data and re-run analysis (daily)."""
     import time as _time
@@ -175,6 +185,12 @@ def update(
                     console.print(f"[yellow]Vessel enrichment: {e}[/yellow]")
 
         # Phase 3: Detection (always runs)
+        if full_recompute:
+            from app.modules.detector_checkpoints import reset_checkpoints
+
+            removed = reset_checkpoints(db)
+            db.commit()
+            console.print(f"[dim]Dropped {removed} detector checkpoint(s)[/dim]")
         with console.status("[bold]Analyzing vessel behavior..."):
             try:
                 from app.modules.dark_vessel_discovery import discover_dark_vessels
@@ -184,6 +200,7 @@ def update(
                     start_date=start_date.isoformat(),
                     end_date=end.isoformat(),
                     skip_fetch=True,
+                    workers=workers,
                 )
             except Exception as e:
                 console.print(f"[yellow]Detection had issues: {e}[/yellow]")
@@ -191,10 +208,13 @@ def update(
         # Phase 3b: Purge stale AIS observations (rolling window)
         try:
             from app.models.ais_observation import AISObservation
+            from app.modules.observation_store import purge_old_observations
 
             deleted = AISObservation.purge_old(db)
             if deleted:
                 db.commit()
+            deleted += purge_old_observations()
+            if deleted:
                 console.print(f"[dim]Purged {deleted} stale AIS observation(s)[/dim]")
         except Exception as e:
             console.print(f"[yellow]Observation purge: {e}[/yellow]")
@@ -399,6 +399,23 @@ def score_stubs():
         db.close()
 
 
+@app.command("rebuild-track-summaries")
+def rebuild_track_summaries_cmd():
+    """Recompute every vessel's track summary from ais_points."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        from app.modules.track_summary import rebuild_track_summaries
+
+        with console.status("[bold]Rebuilding track summaries..."):
+            written = rebuild_track_summaries(db)
+            db.commit()
+        console.print(f"[green]Track summaries rebuilt:[/green] {written} vessels")
+    finally:
+        db.close()
+
+
 @app.command("evaluate-detector")
 def evaluate_detector(
     name: str = typer.Argument(..., help="Detector name (e.g. gap_detector, spoofing_detector)"),
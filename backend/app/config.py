@@ -17,6 +17,38 @@ class Settings(BaseSettings):
     # ── Database ────────────────────────────────────────────────────────────
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    # PostgreSQL only: range-partition ais_points by month and ais_observations
+    # by day; init_db converts existing tables (see app/modules/pg_partitions.py)
+    PG_PARTITIONING_ENABLED: bool = False
+    PG_PARTITION_MONTHS_AHEAD: int = 3
+    # Spatial index over ais_points / dark_vessel_detections (SQLite R*Tree,
+    # PostgreSQL GiST); init_db builds it (see app/modules/spatial_index.py)
+    SPATIAL_INDEX_ENABLED: bool = False
+    # Rebuild cached corridor/dark-zone geometry indexes after this many seconds,
+    # picking up edits made by other processes (see app/modules/corridor_index.py)
+    ZONE_INDEX_MAX_AGE_S: int = 300
+    # Same for the cached port proximity index (see app/modules/port_index.py)
+    PORT_INDEX_MAX_AGE_S: int = 300
+    # Load AIS columns once per discover_dark_vessels run and share them with the
+    # detectors that accept a track store (see app/modules/track_store.py)
+    PIPELINE_TRACK_STORE_ENABLED: bool = True
+    # Pipeline gap/spoofing/stale/loitering/STS detection reads only AIS points
+    # added since each detector's per-vessel watermark, plus the detector's
+    # lookback (see app/modules/detector_checkpoints.py)
+    DETECTOR_CHECKPOINTS_ENABLED: bool = False
+    # Extra overlap re-read before the earliest new point, on top of each
+    # detector's own lookback
+    DETECTOR_CHECKPOINT_OVERLAP_HOURS: float = 1.0
+    # PostgreSQL: while other transactions are in flight, checkpoints only
+    # advance to points ingested at least this long ago, since ids are not
+    # committed in order
+    DETECTOR_CHECKPOINT_COMMIT_MARGIN_MINUTES: float = 10.0
+    # Run the pipeline's per-vessel detectors over vessel_id shards in a process
+    # pool, committing from the parent only (see app/modules/sharded_detection.py;
+    # PostgreSQL only)
+    DETECTOR_SHARDING_ENABLED: bool = False
+    # Worker processes for sharded detection; 0 uses every CPU core
+    DETECTOR_WORKERS: int = 0
     MAX_UPLOAD_SIZE_MB: int = 500
     MAX_QUERY_LIMIT: int = 500
 
@@ -61,6 +93,7 @@ class Settings(BaseSettings):
     KYSTVERKET_PORT: int = 5631
     # DMA (Danish Maritime Authority) historical AIS
     DMA_ENABLED: bool = True
+    DMA_IMPORT_WORKERS: int = 1  # >1: parse each day file in this many processes
     # BarentsWatch (Norwegian EEZ) AIS REST API
     BARENTSWATCH_ENABLED: bool = False
     BARENTSWATCH_CLIENT_ID: str = ""
@@ -76,10 +109,35 @@ class Settings(BaseSettings):
     COLLECT_BARENTSWATCH_INTERVAL: int = 1800  # 30 min
     COLLECT_DATALASTIC_INTERVAL: int = 3600  # 60 min
     COLLECT_RETENTION_DAYS: int = 90
+    # Single writer for scheduler collectors (app.modules.ingest_writer): collectors
+    # submit point batches, one thread coalesces them into large transactions
+    COLLECT_INGEST_WRITER_ENABLED: bool = True
+    COLLECT_INGEST_WRITER_QUEUE_BATCHES: int = 64
+    COLLECT_INGEST_WRITER_MAX_POINTS: int = 20_000
+    COLLECT_INGEST_WRITER_LINGER_SECONDS: float = 1.0
     DATA_FETCH_TIMEOUT: float = 120.0
 
+    # ── Bulk Ingest ─────────────────────────────────────────────────────────
+    INGEST_BULK_ENABLED: bool = False  # set-based CSV + NOAA ingest (app.modules.bulk_ingest)
+    # Vessels kept in the row path's recent-point cache (app.modules.point_state_cache); 0 = off
+    INGEST_POINT_CACHE_SIZE: int = 10_000
+    # PostgreSQL COPY fast path for bulk point/observation writes (app.modules.pg_copy);
+    # batches smaller than INGEST_PG_COPY_MIN_ROWS keep executemany
+    INGEST_PG_COPY_ENABLED: bool = True
+    INGEST_PG_COPY_MIN_ROWS: int = 1_000
+    # Per-vessel track summaries maintained at ingest (app.modules.track_summary); off =
+    # summaries are neither written nor read
+    TRACK_SUMMARY_ENABLED: bool = True
+
     # ── AIS Data Retention ──────────────────────────────────────────────────
     AIS_OBSERVATION_RETENTION_HOURS: int = 72
+    # Write raw cross-receiver observations to append-only Parquet segments
+    # instead of the ais_observations table (see app/modules/observation_store.py)
+    AIS_OBSERVATION_STORE_ENABLED: bool = False
+    # Must be shared by all ingesting and detecting processes (docker-compose: appdata volume)
+    AIS_OBSERVATION_STORE_DIR: str = "data/observations"
+    AIS_OBSERVATION_STORE_FLUSH_ROWS: int = 20_000  # buffered rows per segment write
+    AIS_OBSERVATION_STORE_FLUSH_SECONDS: int = 60  # max age of buffered rows
     RETENTION_DAYS_REALTIME: int = 90
     RETENTION_DAYS_HISTORICAL: int | None = None  # None = keep forever
 
@@ -267,6 +325,11 @@ class Settings(BaseSettings):
     AISSTREAM_WORKER_RECONNECT_DELAY_S: int = 5
     AISSTREAM_WORKER_MAX_RECONNECT_ATTEMPTS: int = 100
     AISSTREAM_WORKER_STATS_INTERVAL_S: int = 60
+    # Pipeline bounds: raw messages waiting for decode (oldest dropped when full),
+    # points per write batch, and decoded batches waiting for the writer thread
+    AISSTREAM_WORKER_QUEUE_SIZE: int = 20_000
+    AISSTREAM_WORKER_BATCH_MAX_POINTS: int = 5_000
+    AISSTREAM_WORKER_WRITE_QUEUE_BATCHES: int = 4
 
     # ── OFAC SDN Sync ────────────────────────────────────────────────────
     OFAC_SDN_WEBHOOK_ON_NEW: bool = True
@@ -389,6 +452,8 @@ class Settings(BaseSettings):
     ARCHIVE_BATCH_SIZE: int = 50000
     ARCHIVE_STORAGE_DIR: str = "data/archives"
     ARCHIVE_MAX_AGE_DAYS: int | None = None
+    # Serve track reads from archived Parquet files as well as ais_points
+    ARCHIVE_TIERED_READS: bool = True
 
     # ── Spire Maritime AIS ────────────────────────────────────────────────────────
     SPIRE_AIS_API_KEY: str | None = None
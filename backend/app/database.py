@@ -44,13 +44,38 @@ def get_db() -> Generator[Session, None, None]:
 
 def init_db() -> None:
     """Create all tables. Called on first run or after migrations."""
+    from sqlalchemy import inspect as sa_inspect
+
     from app.models import Base  # noqa: F401 — ensure all models are registered
 
+    new_summaries = not sa_inspect(engine).has_table("vessel_track_summaries")
     Base.metadata.create_all(bind=engine)
     _run_migrations()
+    if new_summaries:
+        _backfill_track_summaries(SessionLocal)
+    if settings.PG_PARTITIONING_ENABLED:
+        from app.modules.pg_partitions import ensure_partitioned
+
+        ensure_partitioned(engine)
+    if settings.SPATIAL_INDEX_ENABLED:
+        from app.modules.spatial_index import ensure_spatial_index
+
+        ensure_spatial_index(engine)
     _seed_admin_user(SessionLocal)
 
 
+def _backfill_track_summaries(session_factory) -> None:
+    """Build vessel track summaries for points stored before the table existed."""
+    from app.modules.track_summary import rebuild_track_summaries
+
+    db = session_factory()
+    try:
+        rebuild_track_summaries(db)
+        db.commit()
+    finally:
+        db.close()
+
+
 def _seed_admin_user(session_factory) -> None:
     """Create default admin analyst if table is empty and ADMIN_PASSWORD is set."""
     if not settings.ADMIN_PASSWORD:
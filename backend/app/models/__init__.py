@@ -1,6 +1,7 @@
 """Import all models to register them with SQLAlchemy metadata."""
 
 from app.models.ais_archive_batch import AisArchiveBatch
+from app.models.ais_archive_manifest import AisArchiveManifest
 from app.models.ais_observation import AISObservation
 from app.models.ais_point import AISPoint
 from app.models.alert_edit_lock import AlertEditLock
@@ -22,6 +23,7 @@ from app.models.corridor_scoring_override import CorridorScoringOverride
 from app.models.crea_voyage import CreaVoyage
 from app.models.dark_zone import DarkZone
 from app.models.data_coverage_window import DataCoverageWindow
+from app.models.detector_checkpoint import DetectorCheckpoint
 from app.models.draught_event import DraughtChangeEvent
 from app.models.evidence_card import EvidenceCard
 from app.models.export_run import ExportRun
@@ -80,6 +82,8 @@ from app.models.vessel_history import VesselHistory
 from app.models.vessel_owner import VesselOwner
 from app.models.vessel_scoring_state import VesselScoringState
 from app.models.vessel_similarity_result import VesselSimilarityResult
+from app.models.vessel_track_source_count import VesselTrackSourceCount
+from app.models.vessel_track_summary import VesselTrackSummary
 from app.models.vessel_watchlist import VesselWatchlist
 from app.models.webhook import Webhook
 from app.models.worker_heartbeat import WorkerHeartbeat
@@ -162,6 +166,7 @@ __all__ = [
     "SanctionsPropagation",
     # v4.3
     "AisArchiveBatch",
+    "AisArchiveManifest",
     "AlertGroup",
     "ExportRun",
     "ExportSubscription",
@@ -173,4 +178,7 @@ __all__ = [
     "VerificationChecklistItem",
     "VesselScoringState",
     "VesselSimilarityResult",
+    "VesselTrackSourceCount",
+    "VesselTrackSummary",
+    "DetectorCheckpoint",
 ]
@@ -0,0 +1,44 @@
+"""AisArchiveManifest entity — per-row-group index over archived AIS files."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AisArchiveManifest(Base):
+    """Statistics for one row group of an archive file.
+
+    Lets history lookups skip files that cannot contain a vessel, time range
+    or area without opening them.  ``vessel_bloom`` is a Bloom filter over
+    the row group's vessel_ids (see ``app.modules.archive_manifest``).
+    """
+
+    __tablename__ = "ais_archive_manifest"
+    __table_args__ = (Index("ix_ais_archive_manifest_ts", "ts_min", "ts_max"),)
+
+    entry_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    batch_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("ais_archive_batches.batch_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    row_group: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    ts_min: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    ts_max: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    lat_min: Mapped[float] = mapped_column(Float, nullable=False)
+    lat_max: Mapped[float] = mapped_column(Float, nullable=False)
+    lon_min: Mapped[float] = mapped_column(Float, nullable=False)
+    lon_max: Mapped[float] = mapped_column(Float, nullable=False)
+    # Sorted distinct source names in the row group
+    sources: Mapped[list] = mapped_column(JSON, nullable=False)
+    vessel_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    vessel_bloom: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    bloom_hashes: Mapped[int] = mapped_column(Integer, nullable=False)
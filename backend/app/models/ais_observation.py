@@ -11,10 +11,10 @@ from __future__ import annotations
 
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
+from sqlalchemy import Column, Float, Index, Integer, String, Text
 from sqlalchemy.orm import Session
 
-from app.models.base import Base
+from app.models.base import Base, UTCDateTime
 
 
 class AISObservation(Base):
@@ -25,8 +25,8 @@ class AISObservation(Base):
     source = Column(
         String(50), nullable=False
     )  # "aisstream", "kystverket", "digitraffic", "aishub"
-    received_utc = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
-    timestamp_utc = Column(DateTime, nullable=False)
+    received_utc = Column(UTCDateTime, nullable=False, default=lambda: datetime.now(UTC))
+    timestamp_utc = Column(UTCDateTime, nullable=False)
     lat = Column(Float, nullable=False)
     lon = Column(Float, nullable=False)
     sog = Column(Float, nullable=True)
@@ -55,5 +55,11 @@ class AISObservation(Base):
 
             hours = settings.AIS_OBSERVATION_RETENTION_HOURS
         cutoff = datetime.now(UTC) - timedelta(hours=hours)
-        count = db.query(AISObservation).filter(AISObservation.received_utc < cutoff).delete()
+        count = 0
+        from app.modules import pg_partitions
+
+        if pg_partitions.partitioning_active(db, "ais_observations"):
+            # Whole days past the cutoff go by DETACH + DROP
+            count += pg_partitions.drop_partitions_before(db, "ais_observations", cutoff)
+        count += db.query(AISObservation).filter(AISObservation.received_utc < cutoff).delete()
         return count
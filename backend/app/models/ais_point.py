@@ -17,7 +17,7 @@ from sqlalchemy import (
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.base import AISClassEnum, Base
+from app.models.base import AISClassEnum, Base, UTCDateTime
 
 
 class AISPoint(Base):
@@ -35,7 +35,7 @@ class AISPoint(Base):
     vessel_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("vessels.vessel_id"), nullable=False, index=True
     )
-    timestamp_utc: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    timestamp_utc: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False, index=True)
     lat: Mapped[float] = mapped_column(Float, nullable=False)
     lon: Mapped[float] = mapped_column(Float, nullable=False)
     sog: Mapped[float | None] = mapped_column(Float, nullable=True)
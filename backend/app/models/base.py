@@ -3,14 +3,36 @@
 from __future__ import annotations
 
 import enum
+from datetime import UTC
 
+from sqlalchemy import DateTime
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.types import TypeDecorator
 
 
 class Base(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator):
+    """Naive-UTC ``DateTime`` that also accepts timezone-aware values.
+
+    Aware parameters are converted to naive UTC before binding, so a filter
+    such as ``timestamp_utc >= now(UTC) - 7d`` is sent as a plain
+    ``timestamp`` on PostgreSQL.  Without that the column is cast to
+    ``timestamptz`` for the comparison, which defeats index range scans and
+    partition pruning.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and getattr(value, "tzinfo", None) is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+
 class AISClassEnum(enum.StrEnum):
     A = "A"
     B = "B"
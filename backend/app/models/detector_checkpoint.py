@@ -0,0 +1,32 @@
+"""DetectorCheckpoint entity — per-detector, per-vessel incremental detection watermark."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, UTCDateTime
+
+
+class DetectorCheckpoint(Base):
+    """How far a detector has processed a vessel's rows in ``ais_points``.
+
+    Written and read by ``app.modules.detector_checkpoints``; points with an
+    ``ais_point_id`` above ``last_ais_point_id`` have not been seen by the
+    detector yet.  Rows written under a different ``config_hash`` are ignored.
+    """
+
+    __tablename__ = "detector_checkpoints"
+
+    detector: Mapped[str] = mapped_column(String(50), primary_key=True)
+    vessel_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("vessels.vessel_id", ondelete="CASCADE"), primary_key=True
+    )
+    last_ais_point_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Latest timestamp_utc / ingested_at among the points processed so far
+    last_point_utc: Mapped[datetime | None] = mapped_column(UTCDateTime, nullable=True)
+    last_ingested_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    config_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
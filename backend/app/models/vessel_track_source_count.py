@@ -0,0 +1,20 @@
+"""VesselTrackSourceCount entity — per-vessel, per-source ais_points counts."""
+
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class VesselTrackSourceCount(Base):
+    """Point count of one source for one vessel; backs ``dominant_source``."""
+
+    __tablename__ = "vessel_track_source_counts"
+
+    vessel_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("vessels.vessel_id", ondelete="CASCADE"), primary_key=True
+    )
+    source: Mapped[str] = mapped_column(String(100), primary_key=True)
+    point_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,60 @@
+"""VesselTrackSummary entity — per-vessel aggregates over ais_points."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, event
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.models.base import Base, UTCDateTime
+
+
+class VesselTrackSummary(Base):
+    """First/last point, point count, bounding box and dominant source of a
+    vessel's rows in ``ais_points``.
+
+    Maintained at ingest time and rebuilt after merges, archiving and
+    retention pruning (see ``app.modules.track_summary``).  Archived points
+    are not counted.
+    """
+
+    __tablename__ = "vessel_track_summaries"
+
+    vessel_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("vessels.vessel_id", ondelete="CASCADE"), primary_key=True
+    )
+    point_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    first_point_utc: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    first_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    first_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    last_point_utc: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False, index=True)
+    last_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    last_lon: Mapped[float] = mapped_column(Float, nullable=False)
+    last_sog: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_cog: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_nav_status: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    last_source: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    lat_min: Mapped[float] = mapped_column(Float, nullable=False)
+    lat_max: Mapped[float] = mapped_column(Float, nullable=False)
+    lon_min: Mapped[float] = mapped_column(Float, nullable=False)
+    lon_max: Mapped[float] = mapped_column(Float, nullable=False)
+    # Source with the most points (ties: alphabetical), from vessel_track_source_counts
+    dominant_source: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+# Points written through the ORM (row-path ingest, per-point collectors) are
+# folded into the summaries by the flush that inserts them.
+@event.listens_for(Session, "before_flush")
+def _collect_track_points(session, flush_context, instances):
+    from app.modules.track_summary import collect_flush_points
+
+    collect_flush_points(session)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _write_track_points(session, flush_context):
+    from app.modules.track_summary import write_flush_points
+
+    write_flush_points(session)
@@ -3,17 +3,21 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
 import os
+import re
+import shutil
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 import polars as pl
-from sqlalchemy import or_, select, text
+from sqlalchemy import and_, delete, exists, func, or_, select, text
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.ais_archive_batch import AisArchiveBatch
+from app.utils.timestamps import naive_utc
 
 logger = logging.getLogger(__name__)
 
@@ -40,27 +44,6 @@ _AIS_POINT_COLUMNS = [
 ]
 
 
-def _get_protected_point_ids(db: Session) -> set[int]:
-    """Return AIS point IDs referenced by gap events (FK-protected)."""
-    from app.models.gap_event import AISGapEvent
-
-    referenced = db.execute(
-        select(AISGapEvent.start_point_id, AISGapEvent.end_point_id).where(
-            or_(
-                AISGapEvent.start_point_id.isnot(None),
-                AISGapEvent.end_point_id.isnot(None),
-            )
-        )
-    ).fetchall()
-    protected: set[int] = set()
-    for row in referenced:
-        if row[0]:
-            protected.add(row[0])
-        if row[1]:
-            protected.add(row[1])
-    return protected
-
-
 def _compute_sha256(file_path: str | Path) -> str:
     """Compute SHA-256 hex digest of a file."""
     h = hashlib.sha256()
@@ -70,19 +53,183 @@ def _compute_sha256(file_path: str | Path) -> str:
     return h.hexdigest()
 
 
-def _points_to_dataframe(points: list) -> pl.DataFrame:
-    """Convert list of AISPoint ORM objects to a Polars DataFrame."""
+# Parquet schema for archived points.  Explicit so every part file of a run
+# agrees even when a page happens to be all-null in some column.
+_AIS_POINT_SCHEMA = {
+    "ais_point_id": pl.Int64,
+    "vessel_id": pl.Int64,
+    "timestamp_utc": pl.Datetime("us"),
+    "lat": pl.Float64,
+    "lon": pl.Float64,
+    "sog": pl.Float64,
+    "cog": pl.Float64,
+    "heading": pl.Float64,
+    "nav_status": pl.Int64,
+    "ais_class": pl.String,
+    "sog_delta": pl.Float64,
+    "cog_delta": pl.Float64,
+    "source": pl.String,
+    "raw_payload_ref": pl.String,
+    "draught": pl.Float64,
+    "destination": pl.String,
+    "ingested_at": pl.Datetime("us"),
+    "source_timestamp_utc": pl.Datetime("us"),
+}
+
+_CHECKPOINT_FILE = "checkpoint.json"
+
+
+def _pending_dir(storage_dir: str, source: str | None) -> Path:
+    """Working directory holding the part files and checkpoint of one run."""
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", source) if source else "_all"
+    return Path(storage_dir) / "ais_points" / "_pending" / name
+
+
+def _read_checkpoint(pending: Path) -> dict | None:
+    path = pending / _CHECKPOINT_FILE
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable archive checkpoint %s", path)
+        return None
+
+
+def _write_checkpoint(pending: Path, state: dict) -> None:
+    tmp = pending / (_CHECKPOINT_FILE + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, pending / _CHECKPOINT_FILE)
+
+
+def _archivable_filter(cutoff: datetime, max_id: int, source: str | None) -> list:
+    """WHERE terms for points this run may archive and delete.
+
+    Gap-event references are excluded with NOT EXISTS anti-joins rather than
+    a materialised NOT IN list, and ``max_id`` pins the run to the points
+    that existed when it started.
+    """
+    from app.models.ais_point import AISPoint
+    from app.models.gap_event import AISGapEvent
+
+    terms = [
+        AISPoint.timestamp_utc < cutoff,
+        AISPoint.ais_point_id <= max_id,
+        ~exists().where(AISGapEvent.start_point_id == AISPoint.ais_point_id),
+        ~exists().where(AISGapEvent.end_point_id == AISPoint.ais_point_id),
+    ]
+    if source:
+        terms.append(AISPoint.source == source)
+    return terms
+
+
+def _key_after(ts: datetime, point_id: int):
+    from app.models.ais_point import AISPoint
+
+    return or_(
+        AISPoint.timestamp_utc > ts,
+        and_(AISPoint.timestamp_utc == ts, AISPoint.ais_point_id > point_id),
+    )
+
+
+def _key_through(ts: datetime, point_id: int):
+    from app.models.ais_point import AISPoint
+
+    return or_(
+        AISPoint.timestamp_utc < ts,
+        and_(AISPoint.timestamp_utc == ts, AISPoint.ais_point_id <= point_id),
+    )
+
+
+def _fetch_page(db: Session, terms: list, after: tuple | None, limit: int) -> pl.DataFrame:
+    """Next ``limit`` archivable points in (timestamp_utc, ais_point_id) order."""
+    from app.models.ais_point import AISPoint
+
+    cols = [AISPoint.__table__.c[name] for name in _AIS_POINT_COLUMNS]
+    stmt = select(*cols).where(*terms)
+    if after is not None:
+        stmt = stmt.where(_key_after(*after))
+    stmt = stmt.order_by(AISPoint.timestamp_utc, AISPoint.ais_point_id).limit(limit)
+
+    class_idx = _AIS_POINT_COLUMNS.index("ais_class")
     rows = []
-    for p in points:
-        row = {}
-        for col in _AIS_POINT_COLUMNS:
-            val = getattr(p, col, None)
-            # Convert enums to string
-            if hasattr(val, "value"):
-                val = val.value
-            row[col] = val
+    for row in db.execute(stmt):
+        row = list(row)
+        if row[class_idx] is not None and hasattr(row[class_idx], "value"):
+            row[class_idx] = row[class_idx].value
         rows.append(row)
-    return pl.DataFrame(rows)
+    return pl.DataFrame(rows, schema=_AIS_POINT_SCHEMA, orient="row")
+
+
+def _delete_through(
+    db: Session, terms: list, through: tuple, after: tuple | None, skip: list | None = None
+) -> int:
+    """Range-delete archivable points with keys in ``(after, through]``.
+
+    Rows in ``skip`` partitions (``[name, lo, hi]``) are left for
+    :func:`_drop_partitions` to remove wholesale.
+    """
+    from app.models.ais_point import AISPoint
+
+    stmt = delete(AISPoint).where(*terms, _key_through(*through))
+    if after is not None:
+        stmt = stmt.where(_key_after(*after))
+    if skip:
+        stmt = stmt.where(
+            ~or_(
+                *(
+                    and_(
+                        AISPoint.timestamp_utc >= datetime.fromisoformat(lo),
+                        AISPoint.timestamp_utc < datetime.fromisoformat(hi),
+                    )
+                    for _, lo, hi in skip
+                )
+            )
+        )
+    return db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def _droppable_partitions(
+    db: Session, cutoff: datetime, source: str | None, max_id: int
+) -> list[list[str]]:
+    """``ais_points`` partitions this run will archive completely (PostgreSQL only).
+
+    Their rows are not range-deleted page by page; the whole partition is
+    detached and dropped when the batch is committed.
+    """
+    from app.modules import pg_partitions
+
+    if not pg_partitions.partitioning_active(db, "ais_points"):
+        return []
+    keep_sql, params = pg_partitions.points_keep_condition(only_source=source, max_id=max_id)
+    return [
+        [p.name, p.lo.isoformat(), p.hi.isoformat()]
+        for p in pg_partitions.droppable_partitions(db, "ais_points", cutoff, keep_sql, params)
+    ]
+
+
+def _drop_partitions(db: Session, terms: list, state: dict) -> None:
+    """Drop the partitions recorded as droppable, or range-delete them if that changed."""
+    from app.models.ais_point import AISPoint
+    from app.modules import pg_partitions
+
+    if not state.get("drop_partitions"):
+        return
+    keep_sql, params = pg_partitions.points_keep_condition(
+        only_source=state["source"], max_id=state["max_id"]
+    )
+    for name, lo, hi in state["drop_partitions"]:
+        if pg_partitions.drop_partition(db, "ais_points", name, keep_sql, params) is None:
+            # Rows to keep arrived since the run started: delete only what was archived
+            db.execute(
+                delete(AISPoint)
+                .where(
+                    *terms,
+                    AISPoint.timestamp_utc >= datetime.fromisoformat(lo),
+                    AISPoint.timestamp_utc < datetime.fromisoformat(hi),
+                )
+                .execution_options(synchronize_session=False)
+            )
 
 
 def archive_old_points(
@@ -92,6 +239,22 @@ def archive_old_points(
 ) -> AisArchiveBatch:
     """Archive AIS points older than cutoff_date to compressed Parquet.
 
+    Points are streamed in ``ARCHIVE_BATCH_SIZE`` pages using keyset
+    pagination on ``(timestamp_utc, ais_point_id)``, so memory stays bounded
+    by one page.  Each page is written to a part file, recorded in a
+    checkpoint, range-deleted from the database and committed before the
+    next page is read.  Once the scan is exhausted the parts are merged into
+    a single archive file and the AisArchiveBatch record is written.
+
+    A run interrupted part-way is resumed by the next call with the same
+    ``source``: its original cutoff and id snapshot are reused, the already
+    archived key range is deleted again (a no-op unless that delete was
+    lost) and the scan continues after the last checkpointed key.
+
+    With a partitioned ``ais_points`` (``PG_PARTITIONING_ENABLED``), monthly
+    partitions whose rows are all archived by this run are detached and
+    dropped in the final transaction instead of being range-deleted.
+
     Args:
         db: Database session.
         cutoff_date: Points with timestamp_utc < cutoff_date are archived.
@@ -102,32 +265,81 @@ def archive_old_points(
     """
     from app.models.ais_archive_batch import AisArchiveBatch
     from app.models.ais_point import AISPoint
+    from app.modules.archive_manifest import add_manifest_entries, row_group_stats
+    from app.modules.track_summary import rebuild_summaries_before
 
-    protected_ids = _get_protected_point_ids(db)
     batch_size = getattr(settings, "ARCHIVE_BATCH_SIZE", 50000)
+    compression = getattr(settings, "ARCHIVE_COMPRESSION", "gzip")
+    storage_dir = getattr(settings, "ARCHIVE_STORAGE_DIR", "data/archives")
+    pending = _pending_dir(storage_dir, source)
+
+    state = _read_checkpoint(pending)
+    if state and state.get("batch_id") and db.get(AisArchiveBatch, state["batch_id"]):
+        # Previous run committed its record but did not get to clean up
+        shutil.rmtree(pending, ignore_errors=True)
+        state = None
+
+    if state:
+        cutoff = datetime.fromisoformat(state["cutoff"])
+        logger.info(
+            "Resuming interrupted archive run (source=%s, cutoff=%s, %d rows done)",
+            source,
+            cutoff,
+            state["rows"],
+        )
+    else:
+        shutil.rmtree(pending, ignore_errors=True)
+        cutoff = naive_utc(cutoff_date)
+        max_id = db.execute(select(func.max(AISPoint.ais_point_id))).scalar() or 0
+        state = {
+            "cutoff": cutoff.isoformat(),
+            "source": source,
+            "max_id": max_id,
+            "last_ts": None,
+            "last_id": None,
+            "rows": 0,
+            "ts_min": None,
+            "ts_max": None,
+            "parts": [],
+            "row_groups": [],
+            "drop_partitions": _droppable_partitions(db, cutoff, source, max_id),
+        }
+
+    terms = _archivable_filter(cutoff, state["max_id"], source)
+    last_key = None
+    if state["last_id"] is not None:
+        last_key = (datetime.fromisoformat(state["last_ts"]), state["last_id"])
+        _delete_through(db, terms, last_key, None, state["drop_partitions"])
+        db.commit()
 
-    # Build base query
-    q = db.query(AISPoint).filter(AISPoint.timestamp_utc < cutoff_date)
-    if source:
-        q = q.filter(AISPoint.source == source)
-    if protected_ids:
-        q = q.filter(AISPoint.ais_point_id.notin_(protected_ids))
-
-    # Order for deterministic batching
-    q = q.order_by(AISPoint.timestamp_utc)
-
-    all_points = []
-    offset = 0
     while True:
-        batch = q.limit(batch_size).offset(offset).all()
-        if not batch:
+        df = _fetch_page(db, terms, last_key, batch_size)
+        if df.is_empty():
             break
-        all_points.extend(batch)
-        offset += len(batch)
 
-    if not all_points:
+        pending.mkdir(parents=True, exist_ok=True)
+        part = pending / f"part_{len(state['parts']):06d}.parquet"
+        tmp = part.with_suffix(".tmp")
+        df.write_parquet(str(tmp), compression="zstd")
+        os.replace(tmp, part)
+
+        first_ts = df["timestamp_utc"][0]
+        page_key = (df["timestamp_utc"][-1], df["ais_point_id"][-1])
+        state["parts"].append(part.name)
+        state["row_groups"].append(row_group_stats(df))
+        state["rows"] += len(df)
+        state["ts_min"] = state["ts_min"] or first_ts.isoformat()
+        state["ts_max"] = page_key[0].isoformat()
+        state["last_ts"], state["last_id"] = page_key[0].isoformat(), page_key[1]
+        _write_checkpoint(pending, state)
+
+        _delete_through(db, terms, page_key, last_key, state["drop_partitions"])
+        db.commit()
+        last_key = page_key
+
+    now = datetime.now(UTC)
+    if not state["rows"]:
         # Create a record indicating empty archive
-        now = datetime.now(UTC)
         batch_record = AisArchiveBatch(
             archive_date=now,
             date_range_start=cutoff_date,
@@ -135,7 +347,7 @@ def archive_old_points(
             row_count=0,
             file_path="",
             file_size_bytes=0,
-            compression=getattr(settings, "ARCHIVE_COMPRESSION", "gzip"),
+            compression=compression,
             checksum_sha256="",
             status="completed",
             source_filter=source,
@@ -143,23 +355,18 @@ def archive_old_points(
         )
         db.add(batch_record)
         db.commit()
+        shutil.rmtree(pending, ignore_errors=True)
         return batch_record
 
-    # Convert to DataFrame
-    df = _points_to_dataframe(all_points)
-
-    # Determine date range
-    date_range_start = min(p.timestamp_utc for p in all_points)
-    date_range_end = max(p.timestamp_utc for p in all_points)
+    date_range_start = datetime.fromisoformat(state["ts_min"])
+    date_range_end = datetime.fromisoformat(state["ts_max"])
 
     # Create batch record first to get batch_id
-    now = datetime.now(UTC)
-    compression = getattr(settings, "ARCHIVE_COMPRESSION", "gzip")
     batch_record = AisArchiveBatch(
         archive_date=now,
         date_range_start=date_range_start,
         date_range_end=date_range_end,
-        row_count=len(all_points),
+        row_count=state["rows"],
         file_path="",  # will update after write
         file_size_bytes=0,
         compression=compression,
@@ -172,7 +379,6 @@ def archive_old_points(
     db.flush()  # get batch_id
 
     # Build file path
-    storage_dir = getattr(settings, "ARCHIVE_STORAGE_DIR", "data/archives")
     year = date_range_start.strftime("%Y")
     month = date_range_start.strftime("%m")
     archive_dir = Path(storage_dir) / "ais_points" / year / month
@@ -182,11 +388,14 @@ def archive_old_points(
     file_name = f"batch_{batch_record.batch_id}{ext}"
     file_path = archive_dir / file_name
 
-    # Write Parquet
-    if compression == "gzip":
-        df.write_parquet(str(file_path), compression="gzip")
-    else:
-        df.write_parquet(str(file_path), compression="zstd")
+    # Merge the parts with a streaming sink: one row group per page, matching
+    # the manifest entries collected in the loop
+    parts = [str(pending / name) for name in state["parts"]]
+    pl.scan_parquet(parts).sink_parquet(
+        str(file_path),
+        compression="gzip" if compression == "gzip" else "zstd",
+        row_group_size=batch_size,
+    )
 
     # Compute checksum and file size
     checksum = _compute_sha256(file_path)
@@ -196,20 +405,18 @@ def archive_old_points(
     batch_record.file_size_bytes = file_size
     batch_record.checksum_sha256 = checksum
 
-    # Delete archived points from DB
-    point_ids = [p.ais_point_id for p in all_points]
-    # Delete in batches to avoid huge IN clauses
-    for i in range(0, len(point_ids), batch_size):
-        chunk = point_ids[i : i + batch_size]
-        db.query(AISPoint).filter(AISPoint.ais_point_id.in_(chunk)).delete(
-            synchronize_session=False
-        )
+    add_manifest_entries(db, batch_record.batch_id, state["row_groups"])
+    _drop_partitions(db, terms, state)
+    rebuild_summaries_before(db, cutoff)
 
+    state["batch_id"] = batch_record.batch_id
+    _write_checkpoint(pending, state)
     db.commit()
+    shutil.rmtree(pending, ignore_errors=True)
 
     logger.info(
         "Archived %d AIS points to %s (%d bytes, SHA-256=%s)",
-        len(all_points),
+        state["rows"],
         file_path,
         file_size,
         checksum[:16] + "...",
@@ -231,6 +438,7 @@ def restore_archive_batch(db: Session, batch_id: int) -> int:
     """
     from app.models.ais_archive_batch import AisArchiveBatch
     from app.models.ais_point import AISPoint
+    from app.modules.track_summary import rebuild_track_summaries
 
     batch = db.query(AisArchiveBatch).filter(AisArchiveBatch.batch_id == batch_id).first()
     if not batch:
@@ -279,6 +487,7 @@ def restore_archive_batch(db: Session, batch_id: int) -> int:
             stmt = sqlite_insert(AISPoint.__table__).values(chunk).on_conflict_do_nothing()
             db.execute(stmt)
 
+    rebuild_track_summaries(db, {r["vessel_id"] for r in new_rows})
     batch.status = "restored"
     db.commit()
 
@@ -321,6 +530,8 @@ def cleanup_expired_archives(db: Session, max_age_days: int) -> int:
         .all()
     )
 
+    from app.modules.archive_manifest import delete_manifest
+
     deleted = 0
     for batch in expired:
         # Remove file
@@ -328,6 +539,7 @@ def cleanup_expired_archives(db: Session, max_age_days: int) -> int:
             p = Path(batch.file_path)
             if p.exists():
                 p.unlink()
+        delete_manifest(db, batch.batch_id)
         db.delete(batch)
         deleted += 1
 
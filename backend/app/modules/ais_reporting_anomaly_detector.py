@@ -171,8 +171,7 @@ def _load_corridor_geometries(db: Session) -> list[tuple[int, str, object]]:
 
     Returns list of (corridor_id, corridor_name, shapely_geometry).
     """
-    from app.modules.corridor_correlator import _geometry_wkt
-    from app.utils.geo import load_geometry
+    from app.modules.corridor_index import zone_geometry
 
     corridors = (
         db.query(Corridor)
@@ -185,15 +184,11 @@ def _load_corridor_geometries(db: Session) -> list[tuple[int, str, object]]:
 
     result = []
     for c in corridors:
-        wkt = _geometry_wkt(c.geometry)
-        if wkt is None:
+        geom = zone_geometry(c.geometry)
+        if geom is None or not geom.is_area:
+            logger.debug("No polygon geometry for corridor %s", c.name)
             continue
-        try:
-            shape = load_geometry(wkt)
-            if shape is not None:
-                result.append((c.corridor_id, c.name, shape))
-        except Exception:
-            logger.debug("Failed to parse geometry for corridor %s", c.name)
+        result.append((c.corridor_id, c.name, geom.shape))
     return result
 
 
@@ -369,15 +364,15 @@ def run_reporting_anomaly_detection(db: Session) -> dict:
     cutoff = datetime.now(UTC) - timedelta(hours=WINDOW_HOURS)
 
     # Get vessels with enough AIS data
-    vessel_ids = (
+    selected = (
         db.query(AISPoint.vessel_id)
         .filter(AISPoint.timestamp_utc >= cutoff)
         .group_by(AISPoint.vessel_id)
         .having(func.count(AISPoint.ais_point_id) >= thresholds["min_points_for_analysis"])
-        .limit(BATCH_SIZE)
-        .all()
+        # A stable batch across runs
+        .order_by(AISPoint.vessel_id)
     )
-    vessel_ids = [v[0] for v in vessel_ids]
+    vessel_ids = [v[0] for v in selected.limit(BATCH_SIZE).all()]
 
     checked = 0
     skipped = 0
@@ -17,7 +17,7 @@ import logging
 import time
 from collections.abc import Callable
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pybreaker
 from sqlalchemy.exc import IntegrityError
@@ -27,6 +27,10 @@ from app.config import settings
 from app.modules.circuit_breakers import breakers
 from app.modules.normalize import is_non_vessel_mmsi, parse_timestamp_flexible
 
+if TYPE_CHECKING:
+    from app.models.vessel import Vessel
+    from app.modules.identity_changes import IdentityChangeBatch
+
 logger = logging.getLogger(__name__)
 
 
@@ -272,21 +276,43 @@ def _ais_type_to_string(type_code: int) -> str | None:
     return f"Type {type_code}"
 
 
-def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dict]) -> dict:
-    """Ingest a batch of AIS points and static data updates into the DB.
+def _apply_static_updates(
+    db: Session,
+    static_updates: dict[str, dict],
+    identity_changes: IdentityChangeBatch,
+    vessels: dict[str, Vessel] | None = None,
+) -> int:
+    """Apply ShipStaticData updates: create unseen vessels, track identity changes.
 
-    Returns {"points_stored": int, "vessels_updated": int}.
+    ``vessels`` is a preloaded {mmsi: Vessel} map; without it each MMSI is
+    looked up individually.  Vessels created here are added to ``vessels``.
+    Returns the number of vessels created or updated.
     """
     from app.models.ais_point import AISPoint
     from app.models.vessel import Vessel
-    from app.modules.ingest import _parse_timestamp, _track_field_change
+    from app.modules.ingest import _track_field_change
+    from app.modules.track_summary import load_track_summaries
+
+    # Latest point time per vessel, for the destination/draught backfill below
+    last_point_utc: dict[int, datetime] = {}
+    if vessels is not None:
+        voyage_ids = [
+            vessels[mmsi].vessel_id
+            for mmsi, sdata in static_updates.items()
+            if mmsi in vessels and (sdata.get("destination") or sdata.get("draught"))
+        ]
+        if voyage_ids:
+            last_point_utc = {
+                vid: summary.last_point_utc
+                for vid, summary in load_track_summaries(db, voyage_ids).items()
+            }
 
-    stored = 0
     vessels_updated = 0
-
-    # Apply static data updates (vessel metadata from ShipStaticData messages)
     for mmsi, sdata in static_updates.items():
-        vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
+        if vessels is not None:
+            vessel = vessels.get(mmsi)
+        else:
+            vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
         if not vessel:
             # Create vessel from static data even without a position report —
             # enables watchlist matching for vessels seen in the streaming window.
@@ -313,6 +339,8 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
                 vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
                 if not vessel:
                     continue
+            if vessels is not None:
+                vessels[mmsi] = vessel
             vessels_updated += 1
             continue
         if vessel:
@@ -335,6 +363,7 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
                         sdata["vessel_type"],
                         ts,
                         "aisstream",
+                        identity_changes,
                     )
                 vessel.vessel_type = sdata["vessel_type"]
                 changed = True
@@ -343,7 +372,14 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
             if sdata.get("callsign") and sdata["callsign"] != vessel.callsign:
                 if vessel.callsign:
                     _track_field_change(
-                        db, vessel, "callsign", vessel.callsign, sdata["callsign"], ts, "aisstream"
+                        db,
+                        vessel,
+                        "callsign",
+                        vessel.callsign,
+                        sdata["callsign"],
+                        ts,
+                        "aisstream",
+                        identity_changes,
                     )
                 vessel.callsign = sdata["callsign"]
                 changed = True
@@ -352,19 +388,29 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
             if sdata.get("vessel_name") and sdata["vessel_name"] != vessel.name:
                 if vessel.name:
                     _track_field_change(
-                        db, vessel, "name", vessel.name, sdata["vessel_name"], ts, "aisstream"
+                        db,
+                        vessel,
+                        "name",
+                        vessel.name,
+                        sdata["vessel_name"],
+                        ts,
+                        "aisstream",
+                        identity_changes,
                     )
                 vessel.name = sdata["vessel_name"]
                 changed = True
 
             # Store destination/draught on latest AIS point for this vessel
             if sdata.get("destination") or sdata.get("draught"):
-                latest_point = (
-                    db.query(AISPoint)
-                    .filter(AISPoint.vessel_id == vessel.vessel_id)
-                    .order_by(AISPoint.timestamp_utc.desc())
-                    .first()
-                )
+                latest_q = db.query(AISPoint).filter(AISPoint.vessel_id == vessel.vessel_id)
+                latest_point = None
+                if vessel.vessel_id in last_point_utc:
+                    # Point lookup on (vessel_id, timestamp_utc) instead of a sort
+                    latest_point = latest_q.filter(
+                        AISPoint.timestamp_utc == last_point_utc[vessel.vessel_id]
+                    ).first()
+                if latest_point is None:
+                    latest_point = latest_q.order_by(AISPoint.timestamp_utc.desc()).first()
                 if latest_point:
                     if sdata.get("destination") and not latest_point.destination:
                         latest_point.destination = sdata["destination"]
@@ -374,6 +420,26 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
             if changed:
                 vessels_updated += 1
 
+    return vessels_updated
+
+
+def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dict]) -> dict:
+    """Ingest a batch of AIS points and static data updates into the DB.
+
+    Returns {"points_stored": int, "vessels_updated": int}.
+    """
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.ingest import _parse_timestamp
+
+    stored = 0
+    identity_changes = IdentityChangeBatch()
+
+    # Apply static data updates (vessel metadata from ShipStaticData messages)
+    vessels_updated = _apply_static_updates(db, static_updates, identity_changes)
+    identity_changes.flush(db)
+
     # Ingest position reports
     for pt in points:
         mmsi = str(pt["mmsi"])
@@ -455,9 +521,10 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
 
         # Dual-write to AIS observations for cross-receiver detection
         try:
-            from app.models.ais_observation import AISObservation
+            from app.modules.observation_store import add_observation
 
-            obs = AISObservation(
+            add_observation(
+                db,
                 mmsi=mmsi,
                 timestamp_utc=ts,
                 lat=float(pt["lat"]),
@@ -468,7 +535,6 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
                 draught=draught_val,
                 source="aisstream",
             )
-            db.add(obs)
         except Exception:
             logger.debug("AIS observation write failed", exc_info=True)
 
@@ -476,6 +542,41 @@ def _ingest_batch(db: Session, points: list[dict], static_updates: dict[str, dic
     return {"points_stored": stored, "vessels_updated": vessels_updated}
 
 
+def _ingest_batch_bulk(
+    db: Session,
+    points: list[dict],
+    static_updates: dict[str, dict],
+    vessel_ids: dict[str, int],
+) -> dict:
+    """Set-based variant of ``_ingest_batch`` for the long-running worker.
+
+    ``vessel_ids`` is the caller's MMSI -> vessel_id map, kept across batches.
+    Static updates are applied to vessels loaded with one IN query; points go
+    through ``ingest_writer.write_point_batch`` (set-based vessel resolution,
+    (vessel, timestamp) dedup, executemany writes).
+
+    Does NOT commit.  Returns {"points_stored": int, "vessels_updated": int}.
+    """
+    from app.modules.bulk_ingest import load_vessels_by_mmsi
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.ingest_writer import write_point_batch
+
+    vessels_updated = 0
+    if static_updates:
+        identity_changes = IdentityChangeBatch()
+        static_vessels = load_vessels_by_mmsi(db, list(static_updates))
+        vessels_updated = _apply_static_updates(
+            db, static_updates, identity_changes, static_vessels
+        )
+        identity_changes.flush(db)
+        vessel_ids.update({mmsi: v.vessel_id for mmsi, v in static_vessels.items()})
+
+    result = write_point_batch(
+        db, points, vessel_ids, static_updates=static_updates, default_source="aisstream"
+    )
+    return {"points_stored": result["points_stored"], "vessels_updated": vessels_updated}
+
+
 async def stream_ais(
     api_key: str,
     bounding_boxes: list[list[list[float]]],
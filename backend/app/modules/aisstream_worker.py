@@ -3,6 +3,23 @@
 Connects to aisstream.io via WebSocket and continuously ingests AIS data.
 Designed to run as a standalone background process (not inside FastAPI).
 
+Ingest is a three-stage pipeline so a slow database never stalls the socket:
+
+1. The WebSocket reader only timestamps raw messages and puts them on a
+   bounded asyncio queue (``AISSTREAM_WORKER_QUEUE_SIZE``).  When the queue
+   is full the oldest message is dropped and counted — memory stays bounded.
+2. The decode stage parses and maps messages into the point/static buffers
+   and cuts a batch every ``batch_interval`` seconds or
+   ``AISSTREAM_WORKER_BATCH_MAX_POINTS`` points.
+3. A dedicated writer thread takes batches from a small bounded queue
+   (``AISSTREAM_WORKER_WRITE_QUEUE_BATCHES``) and writes them with
+   ``aisstream_client._ingest_batch_bulk`` using an MMSI -> vessel_id map
+   preloaded once and kept across batches.  While that queue is full the
+   decode stage waits, and the reader's queue absorbs (then sheds) load.
+
+Queue depths, dropped messages, write duration and ingest lag (socket
+receipt of a batch's oldest message to its commit) are on ``/health``.
+
 Usage:
     radiancefleet worker start
 """
@@ -12,9 +29,12 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import queue
 import signal
 import sys
+import threading
 import time
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any
 
@@ -25,6 +45,16 @@ logger = logging.getLogger(__name__)
 # aisstream.io WebSocket endpoint
 _WS_URL = settings.AISSTREAM_WS_URL
 
+# How often the decode stage retries handing a batch to a full writer queue
+_WRITE_QUEUE_POLL_S = 0.05
+
+
+@dataclass
+class _Batch:
+    points: list[dict]
+    static: dict[str, dict]
+    first_received: float  # time.monotonic() of the oldest message in the batch
+
 
 class AisstreamWorker:
     """Long-running WebSocket worker for aisstream.io AIS data ingestion."""
@@ -36,12 +66,16 @@ class AisstreamWorker:
         health_port: int = settings.AISSTREAM_WORKER_HEALTH_PORT,
         batch_interval: int = settings.AISSTREAM_BATCH_INTERVAL,
         stats_interval: int = settings.AISSTREAM_WORKER_STATS_INTERVAL_S,
+        queue_size: int = settings.AISSTREAM_WORKER_QUEUE_SIZE,
+        batch_max_points: int = settings.AISSTREAM_WORKER_BATCH_MAX_POINTS,
+        write_queue_batches: int = settings.AISSTREAM_WORKER_WRITE_QUEUE_BATCHES,
     ) -> None:
         self.api_key = api_key
         self.bounding_boxes = bounding_boxes
         self.health_port = health_port
         self.batch_interval = batch_interval
         self.stats_interval = stats_interval
+        self.batch_max_points = batch_max_points
 
         # Shutdown coordination
         self._shutdown_event: asyncio.Event | None = None
@@ -57,11 +91,27 @@ class AisstreamWorker:
             "connected": False,
             "start_time": None,
             "last_batch_time": None,
+            "messages_dropped": 0,
+            "last_write_seconds": None,
+            "ingest_lag_seconds": None,
         }
+        self._stats_lock = threading.Lock()
 
-        # Buffers
+        # Stage 1 -> 2: raw messages with their receipt time
+        self._raw_queue: asyncio.Queue[tuple[float, str | bytes]] = asyncio.Queue(
+            maxsize=queue_size
+        )
+
+        # Stage 2 buffers (the batch being assembled)
         self._point_buffer: list[dict] = []
         self._static_buffer: dict[str, dict] = {}
+        self._buffer_since: float | None = None
+
+        # Stage 2 -> 3: decoded batches for the writer thread
+        self._write_queue: queue.Queue[_Batch | None] = queue.Queue(maxsize=write_queue_batches)
+        self._writer_thread: threading.Thread | None = None
+        # MMSI -> vessel_id, loaded on the first write and owned by the writer
+        self._vessel_ids: dict[str, int] | None = None
 
     # ------------------------------------------------------------------
     # Public entry
@@ -73,9 +123,11 @@ class AisstreamWorker:
         self.stats["start_time"] = time.time()
 
         self._setup_signal_handlers()
+        self._start_writer()
 
         health_task = asyncio.create_task(self._health_server())
         ws_task = asyncio.create_task(self._ws_loop())
+        decode_task = asyncio.create_task(self._decode_loop())
         stats_task = asyncio.create_task(self._stats_logger())
 
         logger.info(
@@ -87,19 +139,25 @@ class AisstreamWorker:
         try:
             await self._shutdown_event.wait()
         finally:
+            import contextlib
+
             logger.info("Shutdown signal received — draining buffers")
             ws_task.cancel()
+            decode_task.cancel()
             stats_task.cancel()
+            for t in (ws_task, decode_task):
+                with contextlib.suppress(asyncio.CancelledError):
+                    await t
 
-            # Flush remaining buffers
+            # Decode what the reader queued, flush the last batch, let the writer finish
+            self._drain_raw_queue()
             await self._flush_buffers()
+            await self._stop_writer()
 
             health_task.cancel()
 
             # Suppress CancelledError from tasks
-            import contextlib
-
-            for t in (ws_task, stats_task, health_task):
+            for t in (stats_task, health_task):
                 with contextlib.suppress(asyncio.CancelledError):
                     await t
 
@@ -133,11 +191,9 @@ class AisstreamWorker:
     # ------------------------------------------------------------------
 
     async def _ws_loop(self) -> None:
-        """Connect to aisstream.io and process messages with auto-reconnect."""
+        """Connect to aisstream.io and queue raw messages with auto-reconnect."""
         import websockets
 
-        from app.modules.aisstream_client import _map_position_report, _map_static_data
-
         subscription = {
             "APIKey": self.api_key,
             "BoundingBoxes": self.bounding_boxes,
@@ -148,7 +204,6 @@ class AisstreamWorker:
             ],
         }
 
-        last_flush = time.monotonic()
         reconnect_delay = settings.AISSTREAM_WORKER_RECONNECT_DELAY_S
         attempts = 0
 
@@ -163,32 +218,7 @@ class AisstreamWorker:
                     async for raw_msg in ws:
                         if self._shutdown_event.is_set():
                             break
-
-                        try:
-                            msg = json.loads(raw_msg)
-                        except json.JSONDecodeError:
-                            self.stats["errors"] += 1
-                            continue
-
-                        self.stats["messages_received"] += 1
-                        msg_type = msg.get("MessageType", "")
-
-                        if msg_type in ("PositionReport", "StandardClassBPositionReport"):
-                            pt = _map_position_report(msg, msg_type=msg_type)
-                            if pt:
-                                self._point_buffer.append(pt)
-                        elif msg_type == "ShipStaticData":
-                            sd = _map_static_data(msg)
-                            if sd:
-                                self._static_buffer[sd["mmsi"]] = sd
-
-                        # Periodic batch flush
-                        now = time.monotonic()
-                        if now - last_flush >= self.batch_interval and (
-                            self._point_buffer or self._static_buffer
-                        ):
-                            await self._flush_buffers()
-                            last_flush = now
+                        self._enqueue_raw(raw_msg)
 
             except asyncio.CancelledError:
                 self.stats["connected"] = False
@@ -221,41 +251,172 @@ class AisstreamWorker:
 
         self.stats["connected"] = False
 
+    def _enqueue_raw(self, raw_msg: str | bytes) -> None:
+        """Queue a raw message without blocking; drop the oldest when full."""
+        self.stats["messages_received"] += 1
+        item = (time.monotonic(), raw_msg)
+        try:
+            self._raw_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._raw_queue.get_nowait()
+            self._raw_queue.put_nowait(item)
+            self.stats["messages_dropped"] += 1
+
+    # ------------------------------------------------------------------
+    # Decode stage
+    # ------------------------------------------------------------------
+
+    async def _decode_loop(self) -> None:
+        """Decode queued messages into the buffers and cut batches for the writer."""
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.batch_interval - (time.monotonic() - last_flush))
+            try:
+                received_at, raw_msg = await asyncio.wait_for(self._raw_queue.get(), timeout)
+            except TimeoutError:
+                pass
+            else:
+                self._decode(received_at, raw_msg)
+
+            now = time.monotonic()
+            if (
+                now - last_flush >= self.batch_interval
+                or len(self._point_buffer) >= self.batch_max_points
+            ):
+                if self._point_buffer or self._static_buffer:
+                    await self._flush_buffers()
+                last_flush = now
+
+    def _decode(self, received_at: float, raw_msg: str | bytes) -> None:
+        """Parse one raw message into the point or static buffer."""
+        from app.modules.aisstream_client import _map_position_report, _map_static_data
+
+        try:
+            msg = json.loads(raw_msg)
+        except (json.JSONDecodeError, TypeError):
+            self.stats["errors"] += 1
+            return
+
+        msg_type = msg.get("MessageType", "")
+        if msg_type in ("PositionReport", "StandardClassBPositionReport"):
+            pt = _map_position_report(msg, msg_type=msg_type)
+            if not pt:
+                return
+            self._point_buffer.append(pt)
+        elif msg_type == "ShipStaticData":
+            sd = _map_static_data(msg)
+            if not sd:
+                return
+            self._static_buffer[sd["mmsi"]] = sd
+        else:
+            return
+        if self._buffer_since is None:
+            self._buffer_since = received_at
+
+    def _drain_raw_queue(self) -> None:
+        """Decode everything still queued (used at shutdown)."""
+        while not self._raw_queue.empty():
+            self._decode(*self._raw_queue.get_nowait())
+
     # ------------------------------------------------------------------
-    # Buffer flushing
+    # Buffer flushing / writer thread
     # ------------------------------------------------------------------
 
     async def _flush_buffers(self) -> None:
-        """Flush point and static buffers to DB via thread pool."""
+        """Hand the buffered batch to the writer thread.
+
+        Waits while the writer queue is full (backpressure).  Without a
+        running writer the batch is written inline in a worker thread.
+        """
         if not self._point_buffer and not self._static_buffer:
             return
 
-        points = list(self._point_buffer)
-        static = dict(self._static_buffer)
+        batch = _Batch(
+            points=list(self._point_buffer),
+            static=dict(self._static_buffer),
+            first_received=self._buffer_since or time.monotonic(),
+        )
         self._point_buffer.clear()
         self._static_buffer.clear()
+        self._buffer_since = None
+
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            await asyncio.to_thread(self._write_batch, batch)
+            return
+
+        try:
+            while True:
+                try:
+                    self._write_queue.put_nowait(batch)
+                    return
+                except queue.Full:
+                    await asyncio.sleep(_WRITE_QUEUE_POLL_S)
+        except asyncio.CancelledError:
+            # Hand the batch back so the shutdown drain still writes it
+            self._point_buffer[:0] = batch.points
+            for mmsi, sd in batch.static.items():
+                self._static_buffer.setdefault(mmsi, sd)
+            self._buffer_since = batch.first_received
+            raise
+
+    def _start_writer(self) -> None:
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="aisstream-writer", daemon=True
+        )
+        self._writer_thread.start()
+
+    async def _stop_writer(self) -> None:
+        """Let the writer finish queued batches, then join it."""
+        if self._writer_thread is None:
+            return
+        await asyncio.to_thread(self._write_queue.put, None)
+        await asyncio.to_thread(self._writer_thread.join)
+        self._writer_thread = None
+
+    def _writer_loop(self) -> None:
+        """Writer thread: write batches until the None sentinel arrives."""
+        while True:
+            batch = self._write_queue.get()
+            if batch is None:
+                return
+            self._write_batch(batch)
 
+    def _write_batch(self, batch: _Batch) -> None:
+        """Write one batch and record its outcome in the stats."""
+        started = time.monotonic()
         try:
-            result = await asyncio.to_thread(self._ingest_sync, points, static)
+            result = self._ingest_sync(batch.points, batch.static)
+        except Exception as exc:
+            logger.error("Batch ingestion error: %s", exc)
+            with self._stats_lock:
+                self.stats["batch_errors"] += 1
+            return
+        finished = time.monotonic()
+        with self._stats_lock:
             self.stats["points_stored"] += result["points_stored"]
             self.stats["vessels_updated"] += result["vessels_updated"]
             self.stats["batches"] += 1
             self.stats["last_batch_time"] = time.time()
-        except Exception as exc:
-            logger.error("Batch ingestion error: %s", exc)
-            self.stats["batch_errors"] += 1
+            self.stats["last_write_seconds"] = round(finished - started, 3)
+            self.stats["ingest_lag_seconds"] = round(finished - batch.first_received, 3)
 
-    @staticmethod
-    def _ingest_sync(points: list[dict], static: dict[str, dict]) -> dict:
-        """Run synchronous DB ingestion in a thread."""
+    def _ingest_sync(self, points: list[dict], static: dict[str, dict]) -> dict:
+        """Write a batch in its own session and commit (runs off the event loop)."""
         from app.database import SessionLocal
-        from app.modules.aisstream_client import _ingest_batch
+        from app.models.vessel import Vessel
+        from app.modules.aisstream_client import _ingest_batch_bulk
 
         db = SessionLocal()
         try:
-            return _ingest_batch(db, points, static)
+            if self._vessel_ids is None:
+                self._vessel_ids = dict(db.query(Vessel.mmsi, Vessel.vessel_id).all())
+            result = _ingest_batch_bulk(db, points, static, self._vessel_ids)
+            db.commit()
+            return result
         except Exception:
             db.rollback()
+            # The map may hold ids of vessels created in the rolled-back transaction
+            self._vessel_ids = None
             raise
         finally:
             db.close()
@@ -264,28 +425,38 @@ class AisstreamWorker:
     # Health endpoint
     # ------------------------------------------------------------------
 
+    def health_snapshot(self) -> dict[str, Any]:
+        """Body of the ``/health`` response: counters plus pipeline depth and lag."""
+        uptime = time.time() - self.stats["start_time"] if self.stats["start_time"] else 0
+        return {
+            "status": "ok",
+            "messages_received": self.stats["messages_received"],
+            "points_stored": self.stats["points_stored"],
+            "vessels_updated": self.stats["vessels_updated"],
+            "batches": self.stats["batches"],
+            "batch_errors": self.stats["batch_errors"],
+            "connected": self.stats["connected"],
+            "uptime_seconds": round(uptime, 1),
+            "last_batch_time": (
+                datetime.fromtimestamp(self.stats["last_batch_time"], tz=UTC).isoformat()
+                if self.stats["last_batch_time"]
+                else None
+            ),
+            "queue_depth": self._raw_queue.qsize(),
+            "queue_capacity": self._raw_queue.maxsize,
+            "buffered_points": len(self._point_buffer),
+            "write_queue_depth": self._write_queue.qsize(),
+            "messages_dropped": self.stats["messages_dropped"],
+            "last_write_seconds": self.stats["last_write_seconds"],
+            "ingest_lag_seconds": self.stats["ingest_lag_seconds"],
+        }
+
     async def _health_server(self) -> None:
         """Run a lightweight HTTP health endpoint using aiohttp."""
         from aiohttp import web
 
         async def health_handler(_request: web.Request) -> web.Response:
-            uptime = time.time() - self.stats["start_time"] if self.stats["start_time"] else 0
-            body = {
-                "status": "ok",
-                "messages_received": self.stats["messages_received"],
-                "points_stored": self.stats["points_stored"],
-                "vessels_updated": self.stats["vessels_updated"],
-                "batches": self.stats["batches"],
-                "batch_errors": self.stats["batch_errors"],
-                "connected": self.stats["connected"],
-                "uptime_seconds": round(uptime, 1),
-                "last_batch_time": (
-                    datetime.fromtimestamp(self.stats["last_batch_time"], tz=UTC).isoformat()
-                    if self.stats["last_batch_time"]
-                    else None
-                ),
-            }
-            return web.json_response(body)
+            return web.json_response(self.health_snapshot())
 
         app = web.Application()
         app.router.add_get("/health", health_handler)
@@ -321,11 +492,15 @@ class AisstreamWorker:
 
                 uptime = time.time() - self.stats["start_time"] if self.stats["start_time"] else 0
                 logger.info(
-                    "Worker stats: %d msgs, %d pts stored, %d batches, connected=%s, uptime=%.0fs",
+                    "Worker stats: %d msgs, %d pts stored, %d batches, connected=%s, "
+                    "queue=%d, dropped=%d, lag=%ss, uptime=%.0fs",
                     self.stats["messages_received"],
                     self.stats["points_stored"],
                     self.stats["batches"],
                     self.stats["connected"],
+                    self._raw_queue.qsize(),
+                    self.stats["messages_dropped"],
+                    self.stats["ingest_lag_seconds"],
                     uptime,
                 )
         except asyncio.CancelledError:
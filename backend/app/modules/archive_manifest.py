@@ -0,0 +1,237 @@
+"""Manifest index over archived AIS Parquet files.
+
+``archive_old_points`` writes one row group per page of points; for each
+row group it records the timestamp range, lat/lon bounding box, source set
+and a Bloom filter over vessel_ids in ``ais_archive_manifest``.  History
+lookups ask :func:`candidate_files` which files can possibly hold matching
+rows and only open those — a single-vessel or single-area query over years
+of archives touches a handful of files instead of all of them.
+
+Bloom filters are sized for ``_BLOOM_FP_RATE`` false positives and never
+give false negatives, so pruning is always safe.  Archive files written
+before the manifest existed have no entries; they are kept as candidates
+(filtered by the batch date range only) until :func:`index_archive_file`
+backfills them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import polars as pl
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+_BLOOM_FP_RATE = 0.01
+_BLOOM_MIN_BITS = 64
+
+# (lat_min, lon_min, lat_max, lon_max)
+BBox = tuple[float, float, float, float]
+
+
+# ── Bloom filter ────────────────────────────────────────────────────────────
+
+
+def _bloom_positions(vessel_id: int, n_bits: int, n_hashes: int) -> list[int]:
+    digest = hashlib.blake2b(int(vessel_id).to_bytes(8, "little", signed=True), digest_size=16)
+    raw = digest.digest()
+    h1 = int.from_bytes(raw[:8], "little")
+    h2 = int.from_bytes(raw[8:], "little") | 1
+    return [(h1 + i * h2) % n_bits for i in range(n_hashes)]
+
+
+def build_bloom(vessel_ids: set[int], fp_rate: float = _BLOOM_FP_RATE) -> tuple[bytes, int]:
+    """Bloom filter over ``vessel_ids``; returns (bit array, hash count)."""
+    n = max(len(vessel_ids), 1)
+    n_bits = max(_BLOOM_MIN_BITS, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+    n_bits = (n_bits + 7) // 8 * 8
+    n_hashes = max(1, round(n_bits / n * math.log(2)))
+    bits = bytearray(n_bits // 8)
+    for vid in vessel_ids:
+        for pos in _bloom_positions(vid, n_bits, n_hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+    return bytes(bits), n_hashes
+
+
+def bloom_contains(bits: bytes, n_hashes: int, vessel_id: int) -> bool:
+    """False only if ``vessel_id`` is definitely not in the filter."""
+    n_bits = len(bits) * 8
+    return all(
+        bits[pos >> 3] & (1 << (pos & 7)) for pos in _bloom_positions(vessel_id, n_bits, n_hashes)
+    )
+
+
+# ── Building ────────────────────────────────────────────────────────────────
+
+
+def row_group_stats(df: pl.DataFrame) -> dict[str, Any]:
+    """Manifest statistics for one row group of archived points.
+
+    Returned values are JSON-serialisable (the bloom filter is hex) so the
+    archiver can keep them in its checkpoint until the batch is committed.
+    """
+    vessel_ids = set(df["vessel_id"].drop_nulls().unique().to_list())
+    bits, n_hashes = build_bloom(vessel_ids)
+    return {
+        "row_count": len(df),
+        "ts_min": df["timestamp_utc"].min().isoformat(),
+        "ts_max": df["timestamp_utc"].max().isoformat(),
+        "lat_min": df["lat"].min(),
+        "lat_max": df["lat"].max(),
+        "lon_min": df["lon"].min(),
+        "lon_max": df["lon"].max(),
+        "sources": sorted(df["source"].drop_nulls().unique().to_list()),
+        "vessel_count": len(vessel_ids),
+        "vessel_bloom": bits.hex(),
+        "bloom_hashes": n_hashes,
+    }
+
+
+def add_manifest_entries(db: Session, batch_id: int, row_groups: list[dict[str, Any]]) -> int:
+    """Insert manifest rows for ``batch_id`` from :func:`row_group_stats` output."""
+    from app.models.ais_archive_manifest import AisArchiveManifest
+
+    offset = 0
+    for i, stats in enumerate(row_groups):
+        db.add(
+            AisArchiveManifest(
+                batch_id=batch_id,
+                row_group=i,
+                row_offset=offset,
+                row_count=stats["row_count"],
+                ts_min=datetime.fromisoformat(stats["ts_min"]),
+                ts_max=datetime.fromisoformat(stats["ts_max"]),
+                lat_min=stats["lat_min"],
+                lat_max=stats["lat_max"],
+                lon_min=stats["lon_min"],
+                lon_max=stats["lon_max"],
+                sources=stats["sources"],
+                vessel_count=stats["vessel_count"],
+                vessel_bloom=bytes.fromhex(stats["vessel_bloom"]),
+                bloom_hashes=stats["bloom_hashes"],
+            )
+        )
+        offset += stats["row_count"]
+    return len(row_groups)
+
+
+def delete_manifest(db: Session, batch_id: int) -> None:
+    """Remove a batch's manifest rows (call before deleting the batch)."""
+    from app.models.ais_archive_manifest import AisArchiveManifest
+
+    db.execute(delete(AisArchiveManifest).where(AisArchiveManifest.batch_id == batch_id))
+
+
+def index_archive_file(db: Session, batch, row_group_size: int = 50000) -> int:
+    """Backfill manifest rows for an archive written before the manifest existed.
+
+    The file is read in ``row_group_size`` slices; returns the entry count.
+    """
+    delete_manifest(db, batch.batch_id)
+    lf = pl.scan_parquet(batch.file_path)
+    row_groups = []
+    offset = 0
+    while offset < batch.row_count:
+        df = lf.slice(offset, row_group_size).collect()
+        if df.is_empty():
+            break
+        row_groups.append(row_group_stats(df))
+        offset += len(df)
+    return add_manifest_entries(db, batch.batch_id, row_groups)
+
+
+# ── Querying ────────────────────────────────────────────────────────────────
+
+
+def candidate_files(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    vessel_ids: list[int] | None = None,
+    bbox: BBox | None = None,
+    source: str | None = None,
+) -> list[str]:
+    """Paths of completed archive files that may hold matching points.
+
+    A file is a candidate when its batch date range overlaps [start, end] and
+    at least one of its row groups overlaps the range and ``bbox``, lists
+    ``source`` and passes the Bloom filter for one of ``vessel_ids``.
+    Files without manifest entries are always candidates.
+    """
+    from app.models.ais_archive_batch import AisArchiveBatch
+    from app.models.ais_archive_manifest import AisArchiveManifest
+
+    start = naive_utc(start) if start is not None else None
+    end = naive_utc(end) if end is not None else None
+
+    stmt = select(AisArchiveBatch.batch_id, AisArchiveBatch.file_path).where(
+        AisArchiveBatch.status == "completed",
+        AisArchiveBatch.row_count > 0,
+        AisArchiveBatch.file_path != "",
+    )
+    if start is not None:
+        stmt = stmt.where(AisArchiveBatch.date_range_end >= start)
+    if end is not None:
+        stmt = stmt.where(AisArchiveBatch.date_range_start <= end)
+    batches = db.execute(stmt.order_by(AisArchiveBatch.date_range_start)).all()
+    if not batches:
+        return []
+
+    batch_ids = [b[0] for b in batches]
+    indexed = set(
+        db.execute(
+            select(AisArchiveManifest.batch_id)
+            .where(AisArchiveManifest.batch_id.in_(batch_ids))
+            .distinct()
+        ).scalars()
+    )
+
+    entries = select(
+        AisArchiveManifest.batch_id,
+        AisArchiveManifest.sources,
+        AisArchiveManifest.vessel_bloom,
+        AisArchiveManifest.bloom_hashes,
+    ).where(AisArchiveManifest.batch_id.in_(batch_ids))
+    if start is not None:
+        entries = entries.where(AisArchiveManifest.ts_max >= start)
+    if end is not None:
+        entries = entries.where(AisArchiveManifest.ts_min <= end)
+    if bbox is not None:
+        lat_min, lon_min, lat_max, lon_max = bbox
+        entries = entries.where(
+            AisArchiveManifest.lat_max >= lat_min,
+            AisArchiveManifest.lat_min <= lat_max,
+            AisArchiveManifest.lon_max >= lon_min,
+            AisArchiveManifest.lon_min <= lon_max,
+        )
+
+    matching: set[int] = set()
+    for batch_id, sources, bits, n_hashes in db.execute(entries):
+        if batch_id in matching:
+            continue
+        if source is not None and source not in sources:
+            continue
+        if vessel_ids is not None and not any(
+            bloom_contains(bits, n_hashes, vid) for vid in vessel_ids
+        ):
+            continue
+        matching.add(batch_id)
+
+    files = []
+    for batch_id, path in batches:
+        if batch_id in indexed and batch_id not in matching:
+            continue
+        if Path(path).exists():
+            files.append(path)
+        else:
+            logger.warning("Archive file missing, skipped: %s", path)
+    return files
@@ -122,6 +122,12 @@ def fetch_barentswatch_tracks(
 
     vessels_seen: set[str] = set()
 
+    from app.modules.ingest_writer import get_ingest_writer
+
+    # Under the collection scheduler, points are handed to the shared ingest writer
+    writer = get_ingest_writer()
+    pending: list[dict] | None = [] if writer is not None else None
+
     try:
         with httpx.Client(timeout=_TIMEOUT) as client:
             headers = {"Authorization": f"Bearer {token}"}
@@ -161,6 +167,7 @@ def fetch_barentswatch_tracks(
                                 is_non_vessel_mmsi,
                                 Vessel,
                                 AISPoint,
+                                pending,
                             )
 
                     except httpx.HTTPStatusError as e:
@@ -202,13 +209,20 @@ def fetch_barentswatch_tracks(
                         is_non_vessel_mmsi,
                         Vessel,
                         AISPoint,
+                        pending,
                     )
 
+        if pending:
+            writer.submit(pending)
+            stats["points_imported"] += len(pending)
         db.commit()
 
     except Exception as e:
         logger.error("BarentsWatch fetch failed: %s", e)
         stats["errors"] += 1
+        if writer is None:
+            # Direct-path points only land with the final commit, which never ran
+            stats["points_imported"] = 0
 
     stats["vessels_seen"] = len(vessels_seen)
     logger.info(
@@ -231,8 +245,14 @@ def _ingest_barentswatch_feature(
     is_non_vessel_mmsi,
     Vessel,
     AISPoint,
+    pending=None,
 ):
-    """Ingest a single GeoJSON feature from BarentsWatch."""
+    """Ingest a single GeoJSON feature from BarentsWatch.
+
+    When ``pending`` is a list the normalized point is appended to it for the
+    ingest writer instead of being written through ``db``; the caller counts
+    those points once the writer accepts them.
+    """
     try:
         props = feat.get("properties", {}) if isinstance(feat, dict) else {}
         geom = feat.get("geometry", {}) if isinstance(feat, dict) else {}
@@ -271,6 +291,23 @@ def _ingest_barentswatch_feature(
 
         vessels_seen.add(mmsi)
 
+        if pending is not None:
+            pending.append(
+                {
+                    "mmsi": mmsi,
+                    "timestamp_utc": timestamp,
+                    "lat": lat,
+                    "lon": lon,
+                    "sog": float(sog) if sog is not None else None,
+                    "cog": float(cog) if cog is not None else None,
+                    "heading": float(heading) if heading is not None and heading != 511 else None,
+                    "draught": float(draught) if draught is not None else None,
+                    "ais_class": "A",
+                    "source": "barentswatch",
+                }
+            )
+            return
+
         # Upsert vessel
         vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
         if not vessel:
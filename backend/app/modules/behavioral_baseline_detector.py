@@ -31,12 +31,15 @@ import json
 import logging
 import math
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from sqlalchemy.orm import Session
 
 from app.config import settings
 
+if TYPE_CHECKING:
+    from app.modules.compact_track import CompactTrack
+
 logger = logging.getLogger(__name__)
 
 # ── Constants ────────────────────────────────────────────────────────────────
@@ -364,20 +367,15 @@ def _score_to_tier(deviation_score: float) -> tuple[str, float]:
 
 def _fetch_position_data(
     db: Session, vessel_id: int, start: datetime, end: datetime
-) -> list[Any]:
-    """Fetch AIS points for a vessel in a time range."""
-    from app.models.ais_point import AISPoint
+) -> CompactTrack:
+    """Fetch AIS points (live and archived) for a vessel in a time range.
 
-    return (
-        db.query(AISPoint)
-        .filter(
-            AISPoint.vessel_id == vessel_id,
-            AISPoint.timestamp_utc >= start,
-            AISPoint.timestamp_utc <= end,
-        )
-        .order_by(AISPoint.timestamp_utc)
-        .all()
-    )
+    Only speed and timestamps are read, so the track is loaded as columns
+    rather than hydrated ``AISPoint`` rows.
+    """
+    from app.modules.compact_track import read_compact_track
+
+    return read_compact_track(db, vessel_id, start, end)
 
 
 def _fetch_gap_events(
@@ -0,0 +1,564 @@
+"""Set-based bulk AIS ingest.
+
+The row-by-row path in ``app.modules.ingest`` issues an MMSI lookup, a ±10s
+near-duplicate query, a previous-point query and two observation inserts per
+row.  This module does the same work per *frame*:
+
+1. Validate every row (``validate_ais_row`` — same error strings).
+2. Resolve every MMSI with one chunked ``IN`` query; create missing vessels
+   with a single flush.
+3. Prefetch the existing points that can collide with the frame (±10s of the
+   frame's time span) plus each vessel's latest point before it.
+4. Match rows to existing points with an as-of join, dedup in-file bursts and
+   compute ``sog_delta``/``cog_delta`` from a per-vessel ``shift`` window.
+5. Write points, observations and source-quality replacements with
+   executemany.
+
+Rows of each vessel are resolved in timestamp order (stable on file order),
+so for time-ordered input — every export format we ingest — the
+accepted/rejected/replaced/ignored counts match the row-by-row path.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import polars as pl
+from sqlalchemy import and_, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.ais_point import AISPoint
+from app.models.vessel import Vessel
+from app.modules.observation_store import add_observations
+from app.modules.pg_copy import insert_ais_points, update_ais_points
+
+logger = logging.getLogger(__name__)
+
+# 4.4: multi-receiver dedup window (must match ingest._create_ais_point)
+_DEDUP_WINDOW = timedelta(seconds=10)
+
+# Keep IN-lists under SQLite's bound-parameter limit
+_IN_CHUNK = 900
+
+
+def _chunks(seq: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def ingest_normalized_frame(
+    db: Session,
+    df: pl.DataFrame,
+    *,
+    default_source: str = "csv_import",
+) -> dict[str, Any]:
+    """Ingest a frame produced by ``normalize_ais_dataframe`` in bulk.
+
+    Does NOT commit — the caller owns the transaction (as with the row path).
+
+    Returns {"accepted", "rejected", "replaced", "ignored", "errors"}.
+    """
+    from app.modules.ingest import _parse_timestamp
+    from app.modules.normalize import validate_ais_row
+
+    rejected = 0
+    errors: list[str] = []
+    rows: list[dict] = []
+    timestamps: list[datetime] = []
+
+    for row in df.iter_rows(named=True):
+        error = validate_ais_row(row)
+        if error:
+            logger.warning("Rejected AIS record: %s | row: %s", error, row)
+            errors.append(error)
+            rejected += 1
+            continue
+        ts = _parse_timestamp(row)
+        if ts is None:
+            logger.warning("Skipped row: unparseable timestamp | row: %s", row)
+            errors.append("Unparseable timestamp — row skipped")
+            rejected += 1
+            continue
+        rows.append(row)
+        timestamps.append(ts)
+
+    if not rows:
+        return {"accepted": 0, "rejected": rejected, "replaced": 0, "ignored": 0, "errors": errors}
+
+    vessels, created = _resolve_vessels(db, rows, timestamps)
+    source_timestamps = _apply_vessel_rows(db, rows, timestamps, vessels, created)
+
+    counts = _write_points(
+        db,
+        rows,
+        timestamps,
+        source_timestamps,
+        [vessels[r["mmsi"]].vessel_id for r in rows],
+        {vessels[mmsi].vessel_id for mmsi in created},
+        default_source=default_source,
+    )
+    counts["rejected"] = rejected
+    counts["errors"] = errors
+    logger.debug("Bulk ingest: %s", {k: v for k, v in counts.items() if k != "errors"})
+    return counts
+
+
+# ---------------------------------------------------------------------------
+# Vessels
+# ---------------------------------------------------------------------------
+
+
+def load_vessels_by_mmsi(db: Session, mmsis: Sequence[str]) -> dict[str, Vessel]:
+    """Return {mmsi: Vessel} for every MMSI that already exists (chunked IN query)."""
+    found: dict[str, Vessel] = {}
+    for chunk in _chunks(list(mmsis)):
+        for vessel in db.query(Vessel).filter(Vessel.mmsi.in_(chunk)).all():
+            found[vessel.mmsi] = vessel
+    return found
+
+
+def _resolve_vessels(
+    db: Session, rows: list[dict], timestamps: list[datetime]
+) -> tuple[dict[str, Vessel], set[str]]:
+    """Load existing vessels and create the missing ones from their first row.
+
+    Returns ({mmsi: Vessel}, MMSIs created by this call).
+    """
+    from app.modules.ingest import _new_vessel_from_row
+
+    mmsis = list(dict.fromkeys(r["mmsi"] for r in rows))
+    vessels = load_vessels_by_mmsi(db, mmsis)
+
+    pending: dict[str, Vessel] = {}
+    for row, ts in zip(rows, timestamps, strict=True):
+        mmsi = row["mmsi"]
+        if mmsi not in vessels and mmsi not in pending:
+            pending[mmsi] = _new_vessel_from_row(mmsi, row, ts)
+
+    if pending:
+        try:
+            with db.begin_nested():
+                db.add_all(pending.values())
+                db.flush()
+        except IntegrityError:
+            # A concurrent writer created some of these MMSIs — resolve one by one.
+            logger.info("Bulk vessel insert conflicted; falling back to per-MMSI upsert")
+            for mmsi in list(pending):
+                existing = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
+                if existing is not None:
+                    vessels[mmsi] = existing
+                    del pending[mmsi]
+                    continue
+                first_idx = next(i for i, r in enumerate(rows) if r["mmsi"] == mmsi)
+                fresh = _new_vessel_from_row(mmsi, rows[first_idx], timestamps[first_idx])
+                with db.begin_nested():
+                    db.add(fresh)
+                    db.flush()
+                pending[mmsi] = fresh
+        vessels.update(pending)
+
+    return vessels, set(pending)
+
+
+def _apply_vessel_rows(
+    db: Session,
+    rows: list[dict],
+    timestamps: list[datetime],
+    vessels: dict[str, Vessel],
+    created: set[str],
+) -> list[datetime | None]:
+    """Replay identity updates and freshness tracking in file order.
+
+    The first row of a newly created vessel only seeds it (as in the row path);
+    every later row goes through ``_apply_vessel_row``, with identity changes
+    written as one batch at the end.  Returns the per-row source timestamps.
+    """
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.ingest import (
+        _apply_vessel_row,
+        _check_sog_class_limit,
+        _row_source_timestamp,
+        _touch_last_received,
+    )
+
+    identity_changes = IdentityChangeBatch()
+    source_timestamps: list[datetime | None] = []
+    seeded: set[str] = set()
+    for row, ts in zip(rows, timestamps, strict=True):
+        mmsi = row["mmsi"]
+        vessel = vessels[mmsi]
+        if mmsi in created and mmsi not in seeded:
+            seeded.add(mmsi)
+        else:
+            _apply_vessel_row(db, vessel, row, ts, identity_changes)
+        source_ts = _row_source_timestamp(row, ts)
+        _touch_last_received(vessel, source_ts)
+        _check_sog_class_limit(vessel, row.get("sog"))
+        source_timestamps.append(source_ts)
+    identity_changes.flush(db)
+    return source_timestamps
+
+
+# ---------------------------------------------------------------------------
+# Points
+# ---------------------------------------------------------------------------
+
+
+def _prefetch_existing(
+    db: Session, vessel_ids: list[int], lo: datetime, hi: datetime
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Load existing points that can collide with [lo, hi], and each vessel's
+    latest point before ``lo`` (the delta baseline)."""
+    window_rows: list[tuple] = []
+    before_rows: list[tuple] = []
+    for chunk in _chunks(vessel_ids):
+        window_rows.extend(
+            db.execute(
+                select(
+                    AISPoint.ais_point_id,
+                    AISPoint.vessel_id,
+                    AISPoint.timestamp_utc,
+                    AISPoint.source,
+                    AISPoint.sog,
+                    AISPoint.cog,
+                )
+                .where(
+                    AISPoint.vessel_id.in_(chunk),
+                    AISPoint.timestamp_utc >= lo,
+                    AISPoint.timestamp_utc <= hi,
+                )
+                .order_by(AISPoint.ais_point_id)
+            ).all()
+        )
+        latest = (
+            select(AISPoint.vessel_id, func.max(AISPoint.timestamp_utc).label("max_ts"))
+            .where(AISPoint.vessel_id.in_(chunk), AISPoint.timestamp_utc < lo)
+            .group_by(AISPoint.vessel_id)
+            .subquery()
+        )
+        before_rows.extend(
+            db.execute(
+                select(AISPoint.vessel_id, AISPoint.timestamp_utc, AISPoint.sog, AISPoint.cog).join(
+                    latest,
+                    and_(
+                        AISPoint.vessel_id == latest.c.vessel_id,
+                        AISPoint.timestamp_utc == latest.c.max_ts,
+                    ),
+                )
+            ).all()
+        )
+
+    window = pl.DataFrame(
+        window_rows,
+        schema={
+            "ais_point_id": pl.Int64,
+            "vessel_id": pl.Int64,
+            "ts": pl.Datetime("us"),
+            "source": pl.Utf8,
+            "sog": pl.Float64,
+            "cog": pl.Float64,
+        },
+        orient="row",
+    )
+    before = pl.DataFrame(
+        before_rows,
+        schema={
+            "vessel_id": pl.Int64,
+            "ts": pl.Datetime("us"),
+            "sog": pl.Float64,
+            "cog": pl.Float64,
+        },
+        orient="row",
+    )
+    return window, before
+
+
+def _match_existing(frame: pl.DataFrame, existing: pl.DataFrame) -> pl.DataFrame:
+    """Attach the nearest existing point within ±10s of each row (as-of join)."""
+    if existing.is_empty():
+        return frame.with_columns(
+            pl.lit(None, dtype=pl.Int64).alias("match_id"),
+            pl.lit(None, dtype=pl.Datetime("us")).alias("match_ts"),
+        )
+    right = (
+        existing.select(
+            "vessel_id",
+            pl.col("ts"),
+            pl.col("ts").alias("match_ts"),
+            pl.col("ais_point_id").alias("match_id"),
+        )
+        .unique(subset=["vessel_id", "ts"], keep="first", maintain_order=True)
+        .sort("ts")
+    )
+    return (
+        frame.sort("ts")
+        .join_asof(
+            right,
+            on="ts",
+            by="vessel_id",
+            strategy="nearest",
+            tolerance=_DEDUP_WINDOW,
+            check_sortedness=False,
+        )
+        .sort(["vessel_id", "ts", "row_idx"])
+    )
+
+
+def _apply_replacement(target: dict, row: dict, values: tuple, source: str | None) -> None:
+    """Mirror the exact-timestamp source-quality replacement of ``_create_ais_point``."""
+    sog_val, cog_val, heading_val, draught_val, destination_val = values
+    target["lat"] = float(row["lat"])
+    target["lon"] = float(row["lon"])
+    target["sog"] = sog_val
+    target["cog"] = cog_val
+    target["heading"] = heading_val
+    target["nav_status"] = row.get("nav_status")
+    if "ais_class" in row:
+        target["ais_class"] = row["ais_class"]
+    # Preserve existing destination/draught (fill-if-empty)
+    if draught_val is not None:
+        target["draught"] = draught_val
+    if destination_val:
+        target["destination"] = destination_val
+    target["source"] = source
+
+
+def _write_points(
+    db: Session,
+    rows: list[dict],
+    timestamps: list[datetime],
+    source_timestamps: list[datetime | None],
+    vessel_ids: list[int],
+    new_vessel_ids: set[int],
+    *,
+    default_source: str,
+) -> dict[str, Any]:
+    """Dedup, compute deltas and bulk-write points for validated rows."""
+    from app.modules.ingest import _is_higher_quality_source, _point_values
+
+    values = [_point_values(r) for r in rows]
+    sources = [r.get("source", default_source) for r in rows]
+
+    frame = pl.DataFrame(
+        {"row_idx": range(len(rows)), "vessel_id": vessel_ids, "ts": timestamps},
+        schema={"row_idx": pl.Int64, "vessel_id": pl.Int64, "ts": pl.Datetime("us")},
+    )
+    lo = min(timestamps) - _DEDUP_WINDOW
+    hi = max(timestamps) + _DEDUP_WINDOW
+    prior_ids = sorted({v for v in vessel_ids if v not in new_vessel_ids})
+    existing, before = _prefetch_existing(db, prior_ids, lo, hi)
+    frame = _match_existing(frame, existing)
+
+    existing_source = dict(
+        zip(existing["ais_point_id"].to_list(), existing["source"].to_list(), strict=True)
+    )
+    replacements: dict[int, dict] = {}
+    accepted: list[dict] = []
+    replaced = 0
+    ignored = 0
+
+    # Sequential pass in (vessel, ts) order — each row only looks at the
+    # previous accepted row of its vessel, so this is a single O(n) sweep.
+    last_vessel: int | None = None
+    last_kept: dict | None = None
+    for row_idx, vessel_id, ts, match_id, match_ts in frame.select(
+        "row_idx", "vessel_id", "ts", "match_id", "match_ts"
+    ).iter_rows():
+        row = rows[row_idx]
+        new_source = sources[row_idx]
+        if vessel_id != last_vessel:
+            last_vessel = vessel_id
+            last_kept = None
+
+        if match_id is not None:
+            target = replacements.get(match_id)
+            current_source = target["source"] if target else existing_source[match_id]
+            if match_ts == ts and _is_higher_quality_source(new_source, current_source):
+                if target is None:
+                    target = replacements[match_id] = {"ais_point_id": match_id}
+                _apply_replacement(target, row, values[row_idx], new_source)
+                replaced += 1
+            else:
+                ignored += 1
+            continue
+
+        if last_kept is not None and ts - last_kept["timestamp_utc"] <= _DEDUP_WINDOW:
+            if last_kept["timestamp_utc"] == ts and _is_higher_quality_source(
+                new_source, last_kept["source"]
+            ):
+                _apply_replacement(last_kept, row, values[row_idx], new_source)
+                replaced += 1
+            else:
+                ignored += 1
+            continue
+
+        sog_val, cog_val, heading_val, draught_val, destination_val = values[row_idx]
+        last_kept = {
+            "vessel_id": vessel_id,
+            "timestamp_utc": ts,
+            "lat": float(row["lat"]),
+            "lon": float(row["lon"]),
+            "sog": sog_val,
+            "cog": cog_val,
+            "heading": heading_val,
+            "nav_status": row.get("nav_status"),
+            "ais_class": row.get("ais_class", "A"),
+            "source": new_source,
+            "draught": draught_val,
+            "destination": destination_val,
+            "source_timestamp_utc": source_timestamps[row_idx],
+            "_own_sog": sog_val,
+            "_own_cog": cog_val,
+        }
+        accepted.append(last_kept)
+
+    _fill_deltas(accepted, existing, before, replacements)
+
+    now = datetime.now(UTC)
+    for point in accepted:
+        point.pop("_own_sog")
+        point.pop("_own_cog")
+        point["ingested_at"] = now
+
+    # COPY + INSERT ... ON CONFLICT / UPDATE ... FROM on Postgres, executemany elsewhere
+    insert_ais_points(db, accepted)
+    update_ais_points(db, replacements.values())
+    _record_summaries(db, accepted, replacements, existing)
+
+    # Raw observation for cross-receiver comparison (no dedup) — one per valid row
+    observations = [
+        {
+            "mmsi": row["mmsi"],
+            "source": sources[i] or "unknown",
+            "timestamp_utc": timestamps[i],
+            "lat": float(row["lat"]),
+            "lon": float(row["lon"]),
+            "sog": values[i][0],
+            "cog": values[i][1],
+            "heading": values[i][2],
+            "draught": values[i][3],
+            "received_utc": now,
+        }
+        for i, row in enumerate(rows)
+    ]
+    add_observations(db, observations)
+
+    return {"accepted": len(accepted), "replaced": replaced, "ignored": ignored}
+
+
+def _record_summaries(
+    db: Session,
+    accepted: list[dict],
+    replacements: dict[int, dict],
+    existing: pl.DataFrame,
+) -> None:
+    """Fold the written points and replacements into the vessel track summaries."""
+    from app.modules.track_summary import TrackSummaryBatch
+
+    batch = TrackSummaryBatch()
+    batch.add_rows(accepted)
+    if replacements:
+        stored = {
+            pid: (vid, ts, source)
+            for pid, vid, ts, source in existing.select(
+                "ais_point_id", "vessel_id", "ts", "source"
+            ).iter_rows()
+            if pid in replacements
+        }
+        for pid, target in replacements.items():
+            vessel_id, ts, old_source = stored[pid]
+            batch.replace(
+                vessel_id,
+                ts,
+                old_source,
+                target["lat"],
+                target["lon"],
+                sog=target.get("sog"),
+                cog=target.get("cog"),
+                nav_status=target.get("nav_status"),
+                source=target.get("source"),
+            )
+    batch.flush(db)
+
+
+def _fill_deltas(
+    accepted: list[dict],
+    existing: pl.DataFrame,
+    before: pl.DataFrame,
+    replacements: dict[int, dict],
+) -> None:
+    """Set sog_delta/cog_delta on accepted points from the previous point per vessel.
+
+    Previous-point values come from a ``shift(1).over(vessel_id)`` window over
+    existing + accepted points; replaced existing points contribute their new
+    values, exactly as the row path would observe them.
+    """
+    from app.modules.ingest import _motion_deltas
+
+    if not accepted:
+        return
+    patched = existing.select("ais_point_id", "vessel_id", "ts", "sog", "cog")
+    if replacements:
+        repl = pl.DataFrame(
+            [
+                {"ais_point_id": pid, "sog_new": r.get("sog"), "cog_new": r.get("cog")}
+                for pid, r in replacements.items()
+            ],
+            schema={"ais_point_id": pl.Int64, "sog_new": pl.Float64, "cog_new": pl.Float64},
+        )
+        patched = (
+            patched.join(repl, on="ais_point_id", how="left")
+            .with_columns(
+                pl.when(pl.col("ais_point_id").is_in(list(replacements)))
+                .then(pl.col("sog_new"))
+                .otherwise(pl.col("sog"))
+                .alias("sog"),
+                pl.when(pl.col("ais_point_id").is_in(list(replacements)))
+                .then(pl.col("cog_new"))
+                .otherwise(pl.col("cog"))
+                .alias("cog"),
+            )
+            .drop("sog_new", "cog_new")
+        )
+
+    new_points = pl.DataFrame(
+        {
+            "idx": range(len(accepted)),
+            "vessel_id": [p["vessel_id"] for p in accepted],
+            "ts": [p["timestamp_utc"] for p in accepted],
+            "sog": [p["sog"] for p in accepted],
+            "cog": [p["cog"] for p in accepted],
+        },
+        schema={
+            "idx": pl.Int64,
+            "vessel_id": pl.Int64,
+            "ts": pl.Datetime("us"),
+            "sog": pl.Float64,
+            "cog": pl.Float64,
+        },
+    )
+    prior = pl.concat(
+        [
+            before.with_columns(pl.lit(None, dtype=pl.Int64).alias("idx")),
+            patched.drop("ais_point_id").with_columns(pl.lit(None, dtype=pl.Int64).alias("idx")),
+        ],
+        how="diagonal",
+    ).select("idx", "vessel_id", "ts", "sog", "cog")
+    combined = (
+        pl.concat([prior, new_points], how="vertical")
+        .sort(["vessel_id", "ts"], maintain_order=True)
+        .with_columns(
+            pl.col("sog").shift(1).over("vessel_id").alias("prev_sog"),
+            pl.col("cog").shift(1).over("vessel_id").alias("prev_cog"),
+        )
+        .filter(pl.col("idx").is_not_null())
+    )
+    for idx, prev_sog, prev_cog in combined.select("idx", "prev_sog", "prev_cog").iter_rows():
+        point = accepted[idx]
+        point["sog_delta"], point["cog_delta"] = _motion_deltas(
+            prev_sog, prev_cog, point["_own_sog"], point["_own_cog"]
+        )
@@ -5,6 +5,9 @@ Design decisions:
 - Absolute scheduling (next_run = now + interval before callback, sleep remainder after)
 - Non-daemon threads with shutdown_event for clean termination
 - Each source gets its own SessionLocal() (thread-safe)
+- Point writes go through one IngestWriter thread (COLLECT_INGEST_WRITER_ENABLED):
+  collectors submit batches instead of committing, so they never queue on the
+  SQLite write lock and sources are deduplicated against each other
 - Digitraffic downsampled to 1 point per 30 min per vessel
 - Retention pruning: DELETE FROM ais_points WHERE timestamp_utc < now - 90d
 """
@@ -44,6 +47,9 @@ class CollectionScheduler:
         self._requested_sources = sources
         self._shutdown_event = threading.Event()
         self._threads: list[threading.Thread] = []
+        self._writer = None
+        self._partition_lock = threading.Lock()
+        self._partitions_checked_at = 0.0
 
     def start(self, duration_seconds: int = 0):
         """Start collection. duration_seconds=0 means run indefinitely."""
@@ -67,6 +73,8 @@ class CollectionScheduler:
             f"{duration_seconds}s" if duration_seconds else "indefinite",
         )
 
+        self._start_writer()
+
         # Calculate absolute deadline
         deadline = time.monotonic() + duration_seconds if duration_seconds > 0 else None
 
@@ -87,6 +95,7 @@ class CollectionScheduler:
                 t.join(timeout=remaining + 5)
             else:
                 t.join()
+        self._stop_writer()
 
     def stop(self):
         """Signal all threads to stop and wait for completion."""
@@ -95,6 +104,23 @@ class CollectionScheduler:
         for t in self._threads:
             t.join(timeout=30)
         self._threads.clear()
+        self._stop_writer()
+
+    def _start_writer(self):
+        """Start the shared ingest writer the collectors submit to."""
+        from app.modules.ingest_writer import IngestWriter, ingest_writer_enabled
+
+        if self._writer is not None or not ingest_writer_enabled():
+            return
+        self._writer = IngestWriter(self._db_factory)
+        self._writer.start()
+
+    def _stop_writer(self):
+        """Drain and stop the ingest writer (after the collectors have stopped)."""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.stop()
+            logger.info("Ingest writer stopped: %s", writer.stats)
 
     def _source_loop(
         self,
@@ -146,6 +172,7 @@ class CollectionScheduler:
             # Retention pruning
             self._prune_old_points(source_name)
             self._prune_old_observations()
+            self._maintain_partitions()
 
             # Absolute-time sleep: wait until next_run
             remaining = next_run - time.monotonic()
@@ -216,16 +243,44 @@ class CollectionScheduler:
         db = self._db_factory()
         try:
             from app.models.ais_observation import AISObservation
+            from app.modules.observation_store import purge_old_observations
 
             deleted = AISObservation.purge_old(db)
             if deleted:
                 db.commit()
                 logger.info("Purged %d stale AIS observations", deleted)
+            dropped = purge_old_observations()
+            if dropped:
+                logger.info("Dropped %d stale AIS observations from the Parquet store", dropped)
         except Exception as e:
             logger.warning("AIS observation purge failed: %s", e)
         finally:
             db.close()
 
+    _PARTITION_CHECK_SECONDS = 3600
+
+    def _maintain_partitions(self):
+        """Pre-create upcoming PostgreSQL partitions (at most hourly, one thread)."""
+        if time.monotonic() - self._partitions_checked_at < self._PARTITION_CHECK_SECONDS:
+            return
+        if not self._partition_lock.acquire(blocking=False):
+            return
+        db = self._db_factory()
+        try:
+            from app.modules import pg_partitions
+
+            self._partitions_checked_at = time.monotonic()
+            for table in pg_partitions.PARTITIONED_TABLES:
+                if pg_partitions.partitioning_active(db, table):
+                    pg_partitions.ensure_partitions(db, table)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning("Partition maintenance failed: %s", e)
+        finally:
+            db.close()
+            self._partition_lock.release()
+
     # Sources that store historical/archive data — never pruned
     ARCHIVE_SOURCES = {"noaa", "dma", "gfw", "barentswatch_historical"}
 
@@ -280,7 +335,22 @@ class CollectionScheduler:
             )
             if protected_ids:
                 q = q.filter(AISPoint.ais_point_id.notin_(protected_ids))
-            deleted = q.delete(synchronize_session=False)
+            deleted = 0
+            from app.modules import pg_partitions
+
+            if pg_partitions.partitioning_active(db, "ais_points"):
+                # Months holding only prunable rows are dropped whole
+                keep_sql, params = pg_partitions.points_keep_condition(
+                    keep_sources=self.ARCHIVE_SOURCES
+                )
+                deleted += pg_partitions.drop_partitions_before(
+                    db, "ais_points", cutoff, keep_sql, params
+                )
+            deleted += q.delete(synchronize_session=False)
+            if deleted:
+                from app.modules.track_summary import rebuild_summaries_before
+
+                rebuild_summaries_before(db, cutoff)
             db.commit()
             if deleted:
                 logger.info(
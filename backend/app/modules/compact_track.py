@@ -0,0 +1,289 @@
+"""Compact columnar tracks for hot per-vessel loops.
+
+Detectors typically load a vessel's history as a list of ``AISPoint`` ORM
+instances only to read timestamp, position, speed and course.  Each
+instance carries every column, SQLAlchemy instance state and an identity
+map entry — well over a kilobyte per point.  A :class:`CompactTrack` keeps
+the same fields in parallel typed ``array`` buffers:
+
+===============  ===========  ======
+field            typecode     bytes
+===============  ===========  ======
+epoch seconds    ``q``        8 (4 when delta-encoded)
+lat / lon        ``f``        4 + 4
+sog / cog        ``f``        4 + 4
+nav_status       ``b``        1
+===============  ===========  ======
+
+— about 25 bytes per point.  Missing sog/cog are stored as NaN and a
+missing nav_status as -1; both read back as None.  Positions and speeds
+are float32 (≈1 m, 1e-6 kn resolution) and timestamps whole seconds, which
+is all AIS carries anyway.
+
+Iterating a track yields :class:`TrackPoint` tuples with the familiar
+attribute names (``timestamp_utc``, ``lat``, ``sog``, ...), so per-point
+code written against ``AISPoint`` works unchanged.  Loaders select plain
+column tuples — no ORM hydration.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.utils.timestamps import naive_utc
+
+_EPOCH = datetime(1970, 1, 1)
+_NAN = float("nan")
+_COLUMNS = ("vessel_id", "timestamp_utc", "lat", "lon", "sog", "cog", "nav_status")
+
+
+class TrackPoint(NamedTuple):
+    """One point of a :class:`CompactTrack`; attribute-compatible with ``AISPoint``."""
+
+    vessel_id: int
+    timestamp_utc: datetime
+    lat: float
+    lon: float
+    sog: float | None
+    cog: float | None
+    nav_status: int | None
+
+
+def to_epoch(ts: datetime) -> int:
+    """Whole epoch seconds of a naive-UTC (or aware) datetime."""
+    return (naive_utc(ts) - _EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(seconds: int) -> datetime:
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def _opt(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class CompactTrack:
+    """One vessel's points as parallel typed arrays, ordered by timestamp.
+
+    With ``delta=True`` timestamps are kept as a base value plus int32
+    deltas from the previous point, halving their footprint; random access
+    then decodes the timestamp column first (iteration does not).
+    """
+
+    __slots__ = (
+        "vessel_id",
+        "delta",
+        "_t0",
+        "_last",
+        "_ts",
+        "lat",
+        "lon",
+        "sog",
+        "cog",
+        "nav_status",
+    )
+
+    def __init__(self, vessel_id: int, *, delta: bool = False) -> None:
+        self.vessel_id = vessel_id
+        self.delta = delta
+        self._t0: int | None = None
+        self._last = 0
+        self._ts = array("i" if delta else "q")
+        self.lat = array("f")
+        self.lon = array("f")
+        self.sog = array("f")
+        self.cog = array("f")
+        self.nav_status = array("b")
+
+    # ── Building ─────────────────────────────────────────────────────────────
+
+    def append(
+        self,
+        ts: datetime | int,
+        lat: float,
+        lon: float,
+        sog: float | None = None,
+        cog: float | None = None,
+        nav_status: int | None = None,
+    ) -> None:
+        """Append a point; ``ts`` is a datetime or epoch seconds, not before the last."""
+        epoch = ts if isinstance(ts, int) else to_epoch(ts)
+        if self.delta:
+            if self._t0 is None:
+                self._t0 = epoch
+                self._ts.append(0)
+            else:
+                self._ts.append(epoch - self._last)
+            self._last = epoch
+        else:
+            self._ts.append(epoch)
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.sog.append(_NAN if sog is None else sog)
+        self.cog.append(_NAN if cog is None else cog)
+        self.nav_status.append(
+            -1 if nav_status is None or not 0 <= nav_status < 128 else nav_status
+        )
+
+    @classmethod
+    def from_points(cls, vessel_id: int, points: Iterable, *, delta: bool = False) -> CompactTrack:
+        """Build from objects with AISPoint attributes (already time-ordered)."""
+        track = cls(vessel_id, delta=delta)
+        for p in points:
+            track.append(p.timestamp_utc, p.lat, p.lon, p.sog, p.cog, p.nav_status)
+        return track
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def epoch_seconds(self) -> array:
+        """Timestamps as epoch seconds (decoded copy when delta-encoded)."""
+        if not self.delta:
+            return self._ts
+        if self._t0 is None:
+            return array("q")
+        return array("q", accumulate(self._ts, initial=self._t0))[1:]
+
+    def __iter__(self) -> Iterator[TrackPoint]:
+        if self.delta:
+            epochs = accumulate(self._ts, initial=self._t0 or 0)
+            next(epochs)  # the base itself; the first delta is 0
+        else:
+            epochs = iter(self._ts)
+        vid = self.vessel_id
+        for t, lat, lon, sog, cog, nav in zip(
+            epochs, self.lat, self.lon, self.sog, self.cog, self.nav_status, strict=False
+        ):
+            yield TrackPoint(
+                vid, from_epoch(t), lat, lon, _opt(sog), _opt(cog), None if nav < 0 else nav
+            )
+
+    def __getitem__(self, i: int) -> TrackPoint:
+        t = self.epoch_seconds()[i]
+        nav = self.nav_status[i]
+        return TrackPoint(
+            self.vessel_id,
+            from_epoch(t),
+            self.lat[i],
+            self.lon[i],
+            _opt(self.sog[i]),
+            _opt(self.cog[i]),
+            None if nav < 0 else nav,
+        )
+
+    def between(self, start: datetime | None = None, end: datetime | None = None) -> CompactTrack:
+        """Sub-track with ``start <= timestamp_utc <= end`` (binary search)."""
+        epochs = self.epoch_seconds()
+        lo = 0 if start is None else bisect_left(epochs, to_epoch(start))
+        hi = len(epochs) if end is None else bisect_right(epochs, to_epoch(end))
+        out = CompactTrack(self.vessel_id, delta=self.delta)
+        for t, lat, lon, sog, cog, nav in zip(
+            epochs[lo:hi],
+            self.lat[lo:hi],
+            self.lon[lo:hi],
+            self.sog[lo:hi],
+            self.cog[lo:hi],
+            self.nav_status[lo:hi],
+            strict=True,
+        ):
+            out.append(t, lat, lon, _opt(sog), _opt(cog), None if nav < 0 else nav)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        cols = (self._ts, self.lat, self.lon, self.sog, self.cog, self.nav_status)
+        return sum(len(c) * c.itemsize for c in cols)
+
+    def __repr__(self) -> str:
+        return f"CompactTrack(vessel_id={self.vessel_id}, points={len(self)}, nbytes={self.nbytes})"
+
+
+# ── Loaders ─────────────────────────────────────────────────────────────────
+
+
+def _point_select(start: datetime | None, end: datetime | None):
+    from app.models.ais_point import AISPoint
+
+    cols = [AISPoint.__table__.c[name] for name in _COLUMNS]
+    stmt = select(*cols)
+    if start is not None:
+        stmt = stmt.where(AISPoint.timestamp_utc >= start)
+    if end is not None:
+        stmt = stmt.where(AISPoint.timestamp_utc <= end)
+    return stmt
+
+
+def load_compact_tracks(
+    db: Session,
+    vessel_ids: Iterable[int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    delta: bool = False,
+) -> dict[int, CompactTrack]:
+    """Compact tracks for ``vessel_ids`` (all vessels if None) from ``ais_points``.
+
+    One streamed SELECT ordered by (vessel_id, timestamp_utc); rows are
+    appended straight into the arrays without creating ORM objects.
+    """
+    from app.models.ais_point import AISPoint
+
+    stmt = _point_select(start, end)
+    if vessel_ids is not None:
+        stmt = stmt.where(AISPoint.vessel_id.in_(list(vessel_ids)))
+    stmt = stmt.order_by(AISPoint.vessel_id, AISPoint.timestamp_utc)
+
+    tracks: dict[int, CompactTrack] = {}
+    track = None
+    for vid, ts, lat, lon, sog, cog, nav in db.execute(stmt.execution_options(yield_per=10_000)):
+        if track is None or track.vessel_id != vid:
+            track = tracks[vid] = CompactTrack(vid, delta=delta)
+        track.append(ts, lat, lon, sog, cog, nav)
+    return tracks
+
+
+def read_compact_track(
+    db: Session,
+    vessel_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    delta: bool = False,
+) -> CompactTrack:
+    """One vessel's compact track in [start, end] from the database and archives.
+
+    The compact counterpart of ``track_reader.read_track``: archived rows
+    come from the same manifest-pruned Parquet scans, as columns.
+    """
+    from app.models.ais_point import AISPoint
+    from app.modules.track_reader import scan_archives, tiered_reads_enabled
+
+    rows: list[tuple] = []
+    if tiered_reads_enabled():
+        lf = scan_archives(db, start, end, vessel_ids=[vessel_id])
+        if lf is not None:
+            rows = lf.select(_COLUMNS).sort("timestamp_utc").collect().rows()
+
+    stmt = _point_select(start, end).where(AISPoint.vessel_id == vessel_id)
+    hot = db.execute(stmt.order_by(AISPoint.timestamp_utc)).all()
+    if rows and hot and rows[-1][1] > hot[0][1]:
+        rows = sorted([*rows, *hot], key=lambda r: r[1])
+    else:
+        rows.extend(hot)
+
+    track = CompactTrack(vessel_id, delta=delta)
+    for _, ts, lat, lon, sog, cog, nav in rows:
+        track.append(ts, lat, lon, sog, cog, nav)
+    return track
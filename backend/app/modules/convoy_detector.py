@@ -23,6 +23,7 @@ import logging
 import math
 from collections import defaultdict
 from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Session
 
@@ -32,7 +33,10 @@ from app.models.convoy_event import ConvoyEvent
 from app.models.corridor import Corridor
 from app.models.vessel import Vessel
 from app.modules.risk_scoring import load_scoring_config
-from app.utils.geo import haversine_nm, parse_wkt_bbox
+from app.utils.geo import haversine_nm
+
+if TYPE_CHECKING:
+    from app.modules.track_store import TrackStore
 
 logger = logging.getLogger(__name__)
 
@@ -85,10 +89,11 @@ def _convoy_score(duration_hours: float, config: dict | None = None) -> int:
 
 
 def _parse_wkt_bbox(geometry_value: object) -> tuple[float, float, float, float] | None:
-    """Thin wrapper around :func:`app.utils.geo.parse_wkt_bbox`."""
-    if geometry_value is None:
-        return None
-    return parse_wkt_bbox(str(geometry_value))
+    """(min_lon, min_lat, max_lon, max_lat) from the shared, cached corridor geometry parse."""
+    from app.modules.corridor_index import zone_geometry
+
+    geom = zone_geometry(geometry_value)
+    return geom.bounds if geom is not None else None
 
 
 def _in_bbox(lat: float, lon: float, bbox: tuple[float, float, float, float]) -> bool:
@@ -142,6 +147,7 @@ def detect_convoys(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
 ) -> dict:
     """Detect convoy events — pairs of vessels moving together in formation.
 
@@ -149,6 +155,7 @@ def detect_convoys(
         db: Active SQLAlchemy session.
         date_from: Inclusive start date filter on AIS timestamps (UTC).
         date_to: Inclusive end date filter on AIS timestamps (UTC).
+        track_store: Shared pipeline TrackStore to read points from, if any.
 
     Returns:
         {"convoy_events_created": N}
@@ -167,16 +174,21 @@ def detect_convoys(
             corridor_bboxes.append((c, bbox))
 
     # Load AIS points
-    query = db.query(AISPoint).order_by(AISPoint.timestamp_utc)
-    if date_from:
-        query = query.filter(
-            AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
-        )
-    if date_to:
-        query = query.filter(
-            AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
-        )
-    points = query.all()
+    if track_store is not None:
+        from app.modules.track_store import day_bounds
+
+        points = track_store.points_many(None, *day_bounds(date_from, date_to))
+    else:
+        query = db.query(AISPoint).order_by(AISPoint.timestamp_utc)
+        if date_from:
+            query = query.filter(
+                AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
+            )
+        if date_to:
+            query = query.filter(
+                AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
+            )
+        points = query.all()
 
     if not points:
         return {"convoy_events_created": 0}
@@ -5,17 +5,16 @@ the gap's start and end AIS points and tests that line against every corridor (a
 dark zone) polygon stored in the database.
 
 Spatial query strategy:
-  Shapely intersection: loads WKT geometry into Shapely objects, buffers by
-  BBOX_TOLERANCE_DEG (~0.1° ≈ 6-11 km), and tests whether the gap trajectory
-  LineString intersects (or is contained by) the buffered polygon.  This correctly
-  detects transit trajectories that pass through a corridor without either endpoint
-  being inside it.
+  Shapely intersection: polygons buffered by BBOX_TOLERANCE_DEG (~0.1° ≈ 6-11 km)
+  are tested against the gap trajectory LineString.  This correctly detects transit
+  trajectories that pass through a corridor without either endpoint being inside it.
+  Parsing, buffering and the STRtree candidate search live in
+  :mod:`app.modules.corridor_index`, cached across calls.
 """
 
 from __future__ import annotations
 
 import logging
-import re
 
 from sqlalchemy.orm import Session
 
@@ -23,6 +22,12 @@ from app.models.ais_point import AISPoint
 from app.models.corridor import Corridor
 from app.models.dark_zone import DarkZone
 from app.models.gap_event import AISGapEvent
+from app.modules.corridor_index import (
+    ZoneEntry,
+    ZoneIndex,
+    corridor_index,
+    dark_zone_index,
+)
 from app.utils.geo import parse_wkt_bbox
 
 logger = logging.getLogger(__name__)
@@ -50,54 +55,6 @@ def _point_in_bbox(
     ) <= lat <= (max_lat + tolerance)
 
 
-def _geometry_wkt(geometry_value: object) -> str | None:
-    """Extract a plain WKT string from a geometry column value.
-
-    The column is now plain Text storing WKT directly, so this is a simple
-    pass-through with validation.
-    """
-    if geometry_value is None:
-        return None
-    raw = str(geometry_value)
-    if "POLYGON" in raw.upper() or "MULTIPOLYGON" in raw.upper():
-        match = re.search(r"((?:MULTI)?POLYGON\s*\(.*)", raw, re.IGNORECASE | re.DOTALL)
-        if match:
-            return match.group(1)
-    return None
-
-
-# ── Spatial query ─────────────────────────────────────────────────────────────
-
-
-def _intersecting_rows(
-    db: Session,
-    start_lat: float,
-    start_lon: float,
-    end_lat: float,
-    end_lon: float,
-    model: type,
-) -> list:
-    """Return model rows whose geometry intersects the gap trajectory line."""
-    from shapely.geometry import LineString
-
-    from app.utils.geo import load_geometry
-
-    candidates = db.query(model).filter(model.geometry.isnot(None)).all()
-    trajectory = LineString([(start_lon, start_lat), (end_lon, end_lat)])
-    matches: list = []
-    for row in candidates:
-        wkt = _geometry_wkt(row.geometry)
-        if wkt is None:
-            continue
-        try:
-            shape = load_geometry(wkt)
-        except Exception:  # noqa: S112
-            continue
-        if shape and shape.buffer(BBOX_TOLERANCE_DEG).intersects(trajectory):
-            matches.append(row)
-    return matches
-
-
 # ── AIS point loader ──────────────────────────────────────────────────────────
 
 
@@ -123,62 +80,56 @@ def _load_gap_endpoints(db: Session, gap: AISGapEvent) -> tuple[AISPoint, AISPoi
 
 # ── Public API ────────────────────────────────────────────────────────────────
 
+# Max bound parameters per IN (...) — below SQLite's 999 limit
+_IN_CHUNK = 900
 
-def find_corridor_for_gap(db: Session, gap: AISGapEvent) -> Corridor | None:
-    """Find the highest-risk corridor that the gap trajectory intersects.
 
-    Tests the gap's start/end AIS point coordinates against all corridor
-    polygon bounding boxes.  If multiple corridors match, the one with the
-    highest ``risk_weight`` is returned.  Returns None when no match is found
-    or when the gap has no associated AIS points.
-    """
+def _best_corridor(entries: list[ZoneEntry]) -> ZoneEntry | None:
+    """Highest ``risk_weight`` wins; the first such zone in row order on ties."""
+    return max(entries, key=lambda e: e.risk_weight) if entries else None
+
+
+def _first_dark_zone(entries: list[ZoneEntry]) -> ZoneEntry | None:
+    """Lowest ``zone_id`` as a stable tie-breaker."""
+    return min(entries, key=lambda e: e.zone_id) if entries else None
+
+
+def _gap_matches(db: Session, gap: AISGapEvent, index: ZoneIndex) -> list[ZoneEntry]:
+    if not len(index):
+        return []
     endpoints = _load_gap_endpoints(db, gap)
     if endpoints is None:
-        return None
-
+        return []
     start_pt, end_pt = endpoints
-    matches = _intersecting_rows(
-        db,
-        start_lat=start_pt.lat,
-        start_lon=start_pt.lon,
-        end_lat=end_pt.lat,
-        end_lon=end_pt.lon,
-        model=Corridor,
+    return index.intersecting(
+        start_pt.lat, start_pt.lon, end_pt.lat, end_pt.lon, BBOX_TOLERANCE_DEG
     )
 
-    if not matches:
-        return None
 
-    return max(matches, key=lambda c: c.risk_weight)
+def find_corridor_for_gap(db: Session, gap: AISGapEvent) -> Corridor | None:
+    """Find the highest-risk corridor that the gap trajectory intersects.
+
+    Tests the straight line between the gap's start/end AIS points against
+    every corridor polygon (buffered by ``BBOX_TOLERANCE_DEG``).  If multiple
+    corridors match, the one with the highest ``risk_weight`` is returned.
+    Returns None when no match is found or when the gap has no associated AIS
+    points.
+    """
+    best = _best_corridor(_gap_matches(db, gap, corridor_index(db)))
+    return db.get(Corridor, best.zone_id) if best is not None else None
 
 
 def find_dark_zone_for_gap(db: Session, gap: AISGapEvent) -> DarkZone | None:
-    """Find the dark zone whose polygon bbox the gap trajectory intersects.
+    """Find the dark zone whose polygon the gap trajectory intersects.
 
-    Uses the same bounding-box approach as ``find_corridor_for_gap`` but
-    queries the ``dark_zones`` table.
+    Uses the same trajectory test as ``find_corridor_for_gap`` but against
+    the ``dark_zones`` table.
 
     If multiple dark zones match, the one with the lowest primary key
     (zone_id) is returned as a stable tie-breaker.
     """
-    endpoints = _load_gap_endpoints(db, gap)
-    if endpoints is None:
-        return None
-
-    start_pt, end_pt = endpoints
-    matches = _intersecting_rows(
-        db,
-        start_lat=start_pt.lat,
-        start_lon=start_pt.lon,
-        end_lat=end_pt.lat,
-        end_lon=end_pt.lon,
-        model=DarkZone,
-    )
-
-    if not matches:
-        return None
-
-    return min(matches, key=lambda z: z.zone_id)
+    best = _first_dark_zone(_gap_matches(db, gap, dark_zone_index(db)))
+    return db.get(DarkZone, best.zone_id) if best is not None else None
 
 
 def find_corridor_for_point(db: Session, lat: float, lon: float) -> Corridor | None:
@@ -187,26 +138,23 @@ def find_corridor_for_point(db: Session, lat: float, lon: float) -> Corridor | N
     Used for GFW gap events where we only have off-position coordinates
     (no start/end AIS point pair).
     """
-    from shapely.geometry import Point
-
-    from app.utils.geo import load_geometry
-
-    corridors = db.query(Corridor).filter(Corridor.geometry.isnot(None)).all()
-    pt = Point(lon, lat)
-    matches = []
-    for c in corridors:
-        wkt = _geometry_wkt(c.geometry)
-        if wkt is None:
-            continue
-        try:
-            shape = load_geometry(wkt)
-        except Exception:  # noqa: S112
-            continue
-        if shape and shape.buffer(BBOX_TOLERANCE_DEG).contains(pt):
-            matches.append(c)
-    if not matches:
-        return None
-    return max(matches, key=lambda c: c.risk_weight)
+    best = _best_corridor(corridor_index(db).containing(lat, lon, BBOX_TOLERANCE_DEG))
+    return db.get(Corridor, best.zone_id) if best is not None else None
+
+
+def _load_positions(db: Session, point_ids: set[int]) -> dict[int, tuple[float, float]]:
+    """Map ais_point_id -> (lat, lon) for the given ids."""
+    ids = sorted(point_ids)
+    positions: dict[int, tuple[float, float]] = {}
+    for i in range(0, len(ids), _IN_CHUNK):
+        rows = (
+            db.query(AISPoint.ais_point_id, AISPoint.lat, AISPoint.lon)
+            .filter(AISPoint.ais_point_id.in_(ids[i : i + _IN_CHUNK]))
+            .all()
+        )
+        for point_id, lat, lon in rows:
+            positions[point_id] = (lat, lon)
+    return positions
 
 
 def correlate_all_uncorrelated_gaps(db: Session) -> dict:
@@ -214,11 +162,15 @@ def correlate_all_uncorrelated_gaps(db: Session) -> dict:
 
     For every AISGapEvent with ``corridor_id=None``:
       - Resolves the gap's trajectory from its start/end AIS points.
-      - Calls ``find_corridor_for_gap`` to assign ``corridor_id``.
+      - Assigns ``corridor_id`` from the highest-risk intersecting corridor
+        (as ``find_corridor_for_gap``).
       - Checks whether the matched corridor is a jamming zone
         (``is_jamming_zone=True``) and, if so, sets ``in_dark_zone=True``.
-      - Independently calls ``find_dark_zone_for_gap`` to populate
-        ``dark_zone_id`` and set ``in_dark_zone=True``.
+      - Independently populates ``dark_zone_id`` (as ``find_dark_zone_for_gap``)
+        and sets ``in_dark_zone=True``.
+
+    Endpoints are loaded in chunks and every trajectory is tested against the
+    cached corridor / dark-zone indexes in one vectorised pass.
 
     Persists all updates in a single ``db.commit()`` at the end.
 
@@ -232,24 +184,41 @@ def correlate_all_uncorrelated_gaps(db: Session) -> dict:
     """
     uncorrelated_gaps = db.query(AISGapEvent).filter(AISGapEvent.corridor_id.is_(None)).all()
 
-    correlated_count = 0
-    dark_zone_count = 0
+    positions = _load_positions(
+        db,
+        {
+            pid
+            for gap in uncorrelated_gaps
+            for pid in (gap.start_point_id, gap.end_point_id)
+            if pid is not None
+        },
+    )
+    located = [
+        (gap, positions[gap.start_point_id], positions[gap.end_point_id])
+        for gap in uncorrelated_gaps
+        if gap.start_point_id in positions and gap.end_point_id in positions
+    ]
+    segments = [(s[0], s[1], e[0], e[1]) for _, s, e in located]
+    corridor_hits = corridor_index(db).intersecting_many(segments, BBOX_TOLERANCE_DEG)
+    dark_zone_hits = dark_zone_index(db).intersecting_many(segments, BBOX_TOLERANCE_DEG)
 
-    for gap in uncorrelated_gaps:
-        corridor = find_corridor_for_gap(db, gap)
+    correlated_count = 0
+    for (gap, _, _), corridors, dark_zones in zip(
+        located, corridor_hits, dark_zone_hits, strict=True
+    ):
+        corridor = _best_corridor(corridors)
         if corridor is not None:
-            gap.corridor_id = corridor.corridor_id
+            gap.corridor_id = corridor.zone_id
             correlated_count += 1
             if corridor.is_jamming_zone:
                 gap.in_dark_zone = True
 
-        dark_zone = find_dark_zone_for_gap(db, gap)
+        dark_zone = _first_dark_zone(dark_zones)
         if dark_zone is not None:
             gap.dark_zone_id = dark_zone.zone_id
             gap.in_dark_zone = True
 
-        if gap.in_dark_zone:
-            dark_zone_count += 1
+    dark_zone_count = sum(1 for gap in uncorrelated_gaps if gap.in_dark_zone)
 
     db.commit()
 
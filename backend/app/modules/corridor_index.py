@@ -0,0 +1,305 @@
+"""Process-wide geometry index over corridors and dark zones.
+
+Corridor and dark-zone polygons change a few times a month but are tested
+against every gap, loitering run and AIS position.  This module parses each
+WKT once and keeps, per database engine and table, a :class:`ZoneIndex`:
+
+- a shapely ``STRtree`` over the raw geometries, used to pick candidates by
+  envelope (which is also exactly the "bbox ± tolerance" test several
+  detectors use);
+- prepared, pre-buffered polygons per buffer distance (built lazily), used
+  for exact point-in-zone and segment-intersects tests.
+
+Invalidation: ORM inserts/updates/deletes of ``Corridor`` / ``DarkZone``
+drop every cached index at flush, and again when that session commits or
+rolls back.  Writes made by another process are picked up once an index is
+older than ``ZONE_INDEX_MAX_AGE_S``.
+
+:func:`zone_geometry` is the shared WKT → geometry/bounds parse (LRU cached
+by WKT text) for callers that work from corridor rows they already hold.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import re
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import shapely
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models.corridor import Corridor
+from app.models.dark_zone import DarkZone
+from app.utils.geo import load_geometry, parse_wkt_bbox
+
+logger = logging.getLogger(__name__)
+
+# Default polygon buffer (degrees, ~6-11 km) for point/segment tests
+BUFFER_DEG: float = 0.1
+
+_POLYGON_RE = re.compile(r"((?:MULTI)?POLYGON\s*\(.*)", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass(frozen=True)
+class ZoneGeometry:
+    shape: BaseGeometry
+    bounds: tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+    is_area: bool  # polygon WKT — only these take part in point/segment tests
+
+
+@dataclass(frozen=True)
+class ZoneEntry:
+    """Snapshot of the row attributes lookups rank by."""
+
+    zone_id: int
+    zone_type: str | None
+    risk_weight: Any
+    is_jamming_zone: bool
+
+
+@lru_cache(maxsize=4096)
+def _parse_zone_geometry(raw: str) -> ZoneGeometry | None:
+    match = _POLYGON_RE.search(raw) if "POLYGON" in raw.upper() else None
+    shape = None
+    with contextlib.suppress(Exception):  # fall back to the regex bbox below
+        shape = load_geometry(match.group(1) if match else raw)
+    if shape is None or shape.is_empty:
+        bbox = parse_wkt_bbox(raw)
+        if bbox is None:
+            return None
+        return ZoneGeometry(shapely.box(*bbox), bbox, False)
+    return ZoneGeometry(shape, tuple(shape.bounds), match is not None)
+
+
+def zone_geometry(geometry_value: object) -> ZoneGeometry | None:
+    """Parsed geometry for a corridor/dark-zone ``geometry`` column value.
+
+    Unparseable WKT falls back to the bbox of its coordinate pairs (as
+    :func:`app.utils.geo.parse_wkt_bbox` always did); such zones only answer
+    bbox queries.
+    """
+    if geometry_value is None:
+        return None
+    return _parse_zone_geometry(str(geometry_value))
+
+
+def _type_value(value: Any) -> str | None:
+    value = getattr(value, "value", value)
+    return None if value is None else str(value)
+
+
+class ZoneIndex:
+    """Immutable spatial index over one table's zones, in row order."""
+
+    def __init__(self, entries: Sequence[ZoneEntry], geometries: Sequence[ZoneGeometry]):
+        self.entries = list(entries)
+        self._geometries = list(geometries)
+        self._tree = STRtree([g.shape for g in self._geometries])
+        self._areas: dict[float, Any] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any], model: type) -> ZoneIndex:
+        pk = sa_inspect(model).primary_key[0].key
+        entries: list[ZoneEntry] = []
+        geometries: list[ZoneGeometry] = []
+        for row in rows:
+            geom = zone_geometry(row.geometry)
+            if geom is None:
+                continue
+            entries.append(
+                ZoneEntry(
+                    zone_id=getattr(row, pk),
+                    zone_type=_type_value(
+                        getattr(row, "corridor_type", None) or getattr(row, "zone_type", None)
+                    ),
+                    risk_weight=getattr(row, "risk_weight", None),
+                    is_jamming_zone=bool(getattr(row, "is_jamming_zone", False)),
+                )
+            )
+            geometries.append(geom)
+        return cls(entries, geometries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def bounds(self) -> tuple[float, float, float, float] | None:
+        """Merged (min_lon, min_lat, max_lon, max_lat) of every zone."""
+        if not self._geometries:
+            return None
+        boxes = [g.bounds for g in self._geometries]
+        return (
+            min(b[0] for b in boxes),
+            min(b[1] for b in boxes),
+            max(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
+
+    def _area_shapes(self, buffer_deg: float):
+        shapes = self._areas.get(buffer_deg)
+        if shapes is None:
+            empty = shapely.Polygon()
+            shapes = shapely.buffer(
+                [g.shape if g.is_area else empty for g in self._geometries], buffer_deg
+            )
+            shapely.prepare(shapes)
+            self._areas[buffer_deg] = shapes
+        return shapes
+
+    def _candidates(self, min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+        # A two-point multipoint's envelope is the query box, degenerate or not
+        envelope = shapely.multipoints([(min_lon, min_lat), (max_lon, max_lat)])
+        return sorted(int(i) for i in self._tree.query(envelope))
+
+    def _select(self, indices: Iterable[int], zone_types: Iterable[str] | None):
+        if zone_types is None:
+            return [self.entries[i] for i in indices]
+        wanted = {_type_value(t) for t in zone_types}
+        return [self.entries[i] for i in indices if self.entries[i].zone_type in wanted]
+
+    def in_bbox(
+        self,
+        lat: float,
+        lon: float,
+        tolerance: float = 0.0,
+        zone_types: Iterable[str] | None = None,
+    ) -> list[ZoneEntry]:
+        """Zones whose bounding box, expanded by ``tolerance`` degrees, holds the point."""
+        if not self.entries:
+            return []
+        t = tolerance
+        return self._select(self._candidates(lon - t, lat - t, lon + t, lat + t), zone_types)
+
+    def containing(
+        self,
+        lat: float,
+        lon: float,
+        buffer_deg: float = BUFFER_DEG,
+        zone_types: Iterable[str] | None = None,
+    ) -> list[ZoneEntry]:
+        """Zones whose polygon, buffered by ``buffer_deg``, contains the point."""
+        if not self.entries:
+            return []
+        b = buffer_deg
+        shapes = self._area_shapes(b)
+        hits = [
+            i
+            for i in self._candidates(lon - b, lat - b, lon + b, lat + b)
+            if shapely.contains_xy(shapes[i], lon, lat)
+        ]
+        return self._select(hits, zone_types)
+
+    def intersecting(
+        self,
+        start_lat: float,
+        start_lon: float,
+        end_lat: float,
+        end_lon: float,
+        buffer_deg: float = BUFFER_DEG,
+    ) -> list[ZoneEntry]:
+        """Zones whose buffered polygon intersects the straight segment."""
+        return self.intersecting_many([(start_lat, start_lon, end_lat, end_lon)], buffer_deg)[0]
+
+    def intersecting_many(
+        self,
+        segments: Sequence[tuple[float, float, float, float]],
+        buffer_deg: float = BUFFER_DEG,
+    ) -> list[list[ZoneEntry]]:
+        """Vectorised :meth:`intersecting` for (start_lat, start_lon, end_lat, end_lon) rows."""
+        results: list[list[int]] = [[] for _ in segments]
+        if not self.entries or not segments:
+            return [[] for _ in segments]
+        b = buffer_deg
+        lines = shapely.linestrings([[(s[1], s[0]), (s[3], s[2])] for s in segments])
+        envelopes = shapely.multipoints(
+            [
+                [
+                    (min(s[1], s[3]) - b, min(s[0], s[2]) - b),
+                    (max(s[1], s[3]) + b, max(s[0], s[2]) + b),
+                ]
+                for s in segments
+            ]
+        )
+        seg_idx, zone_idx = self._tree.query(envelopes)
+        shapes = self._area_shapes(b)
+        hits = shapely.intersects(shapes[zone_idx], lines[seg_idx])
+        for s, z, hit in zip(seg_idx, zone_idx, hits, strict=True):
+            if hit:
+                results[int(s)].append(int(z))
+        return [self._select(sorted(r), None) for r in results]
+
+
+# ── Process-wide cache ──────────────────────────────────────────────────────
+
+# engine -> {table: (generation, built_at, index)}
+_indexes: WeakKeyDictionary[Any, dict[str, tuple[int, float, ZoneIndex]]] = WeakKeyDictionary()
+_generation = 0
+
+
+def invalidate_zone_indexes() -> None:
+    """Drop every cached index; the next lookup rebuilds from the database."""
+    global _generation
+    _generation += 1
+
+
+def zone_index(db: Session, model: type) -> ZoneIndex:
+    """Cached :class:`ZoneIndex` for ``model`` (``Corridor`` or ``DarkZone``)."""
+    bind = db.get_bind()
+    engine = getattr(bind, "engine", bind)
+    cached = _indexes.setdefault(engine, {})
+    name = model.__tablename__
+    max_age = getattr(settings, "ZONE_INDEX_MAX_AGE_S", 300)
+    entry = cached.get(name)
+    now = time.monotonic()
+    if entry is not None and entry[0] == _generation and now - entry[1] < max_age:
+        return entry[2]
+
+    generation = _generation
+    rows = db.query(model).filter(model.geometry.isnot(None)).all()
+    index = ZoneIndex.from_rows(rows, model)
+    cached[name] = (generation, now, index)
+    logger.debug("Built %s geometry index (%d zones)", name, len(index))
+    return index
+
+
+def corridor_index(db: Session) -> ZoneIndex:
+    return zone_index(db, Corridor)
+
+
+def dark_zone_index(db: Session) -> ZoneIndex:
+    return zone_index(db, DarkZone)
+
+
+def _zone_written(mapper, connection, target) -> None:
+    invalidate_zone_indexes()
+    session = object_session(target)
+    if session is not None:
+        session.info["zone_index_dirty"] = True
+
+
+for _model in (Corridor, DarkZone):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _zone_written)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session) -> None:
+    # Another session may have rebuilt from pre-commit data since the flush
+    if session.info.pop("zone_index_dirty", False):
+        invalidate_zone_indexes()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction) -> None:
+    if session.info.pop("zone_index_dirty", False):
+        invalidate_zone_indexes()
@@ -4,7 +4,8 @@ Detects when the same MMSI reports inconsistent positions across different
 AIS data sources within a short time window. This is a statistical signal
 for AIS handshake (identity swap) and fake port call spoofing.
 
-Requires multi-source AIS data in the ais_observations table.
+Requires multi-source AIS data in the ais_observations table (or the
+Parquet observation store when AIS_OBSERVATION_STORE_ENABLED is set).
 """
 
 from __future__ import annotations
@@ -15,10 +16,10 @@ from datetime import date, datetime, timedelta
 
 from sqlalchemy.orm import Session
 
-from app.models.ais_observation import AISObservation
 from app.models.base import SpoofingTypeEnum
 from app.models.spoofing_anomaly import SpoofingAnomaly
 from app.models.vessel import Vessel
+from app.modules.observation_store import load_observations
 from app.utils.geo import haversine_nm
 
 logger = logging.getLogger(__name__)
@@ -41,28 +42,17 @@ def detect_cross_receiver_anomalies(
         {"anomalies_created": N, "mmsis_checked": M}
     """
     # Load observations within date range
-    query = db.query(AISObservation).order_by(AISObservation.mmsi, AISObservation.timestamp_utc)
-    query = query.filter(
-        AISObservation.timestamp_utc.isnot(None),
-        AISObservation.lat.isnot(None),
-        AISObservation.lon.isnot(None),
+    observations = load_observations(
+        db,
+        start=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        end=datetime.combine(date_to, datetime.max.time()) if date_to else None,
     )
-    if date_from:
-        query = query.filter(
-            AISObservation.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
-        )
-    if date_to:
-        query = query.filter(
-            AISObservation.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
-        )
-
-    observations = query.all()
     if not observations:
         logger.info("Cross-receiver: no observations found.")
         return {"anomalies_created": 0, "mmsis_checked": 0}
 
     # Group by MMSI
-    by_mmsi: dict[str, list[AISObservation]] = defaultdict(list)
+    by_mmsi: dict[str, list] = defaultdict(list)
     for obs in observations:
         by_mmsi[obs.mmsi].append(obs)
 
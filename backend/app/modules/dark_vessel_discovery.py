@@ -36,6 +36,7 @@ def auto_hunt_dark_vessels(
     """
     from app.models.gap_event import AISGapEvent
     from app.models.stubs import DarkVesselDetection
+    from app.modules.spatial_index import bbox_around, detection_filter
     from app.modules.vessel_hunt import (
         create_search_mission,
         create_target_profile,
@@ -129,7 +130,9 @@ def auto_hunt_dark_vessels(
                 db.query(DarkVesselDetection)
                 .filter(
                     DarkVesselDetection.ais_match_result == "unmatched",
-                    DarkVesselDetection.detection_time_utc.between(
+                    detection_filter(
+                        db,
+                        bbox_around(sts.mean_lat, sts.mean_lon, 1.0),
                         sts.start_time_utc - timedelta(hours=2),
                         sts.end_time_utc + timedelta(hours=2),
                     ),
@@ -290,6 +293,7 @@ def discover_dark_vessels(
     end_date: str,
     skip_fetch: bool = False,
     min_gap_score: int = 50,
+    workers: int | None = None,
 ) -> dict:
     """Full dark vessel discovery pipeline orchestrator.
 
@@ -313,6 +317,8 @@ def discover_dark_vessels(
         end_date: ISO date string.
         skip_fetch: Skip steps 1-2 (use existing data).
         min_gap_score: Min score for auto-hunt.
+        workers: Processes for the per-vessel detectors (0: all cores, 1: serial);
+            defaults to the DETECTOR_SHARDING_ENABLED / DETECTOR_WORKERS settings.
 
     Returns dict with run_status, steps, top_alerts.
     """
@@ -340,6 +346,10 @@ def discover_dark_vessels(
     def _run_step(name: str, fn, *args, hard: bool = False, **kwargs) -> Any:
         """Execute a pipeline step with failure policy."""
         try:
+            # A callable track_store is resolved here so that building or
+            # refreshing the shared store falls under the step's failure policy
+            if callable(kwargs.get("track_store")):
+                kwargs["track_store"] = kwargs["track_store"]()
             step_result = fn(*args, **kwargs)
             result["steps"][name] = {"status": "ok", "detail": str(step_result)}
             return step_result
@@ -403,16 +413,52 @@ def discover_dark_vessels(
     else:
         result["steps"]["vessel_enrichment"] = {"status": "skipped", "detail": "--skip-fetch"}
 
+    # AIS columns for the run window, read once on first use and shared by the
+    # point-based detectors below. Steps pass these helpers uncalled so that
+    # _run_step builds/refreshes the store inside its try.
+    track_stores: list = []
+
+    def _track_store():
+        """The run's track store, after picking up points written since its load."""
+        if not settings.PIPELINE_TRACK_STORE_ENABLED:
+            return None
+        if not track_stores:
+            from app.modules.track_store import TrackStore
+
+            track_stores.append(TrackStore.for_dates(db, date_from, date_to))
+        else:
+            track_stores[0].refresh()
+        return track_stores[0]
+
+    from app.modules.sharded_detection import resolve_workers, run_sharded
+
+    # With detector checkpoints the per-vessel detectors only read the points
+    # around each vessel's new data, which beats loading the whole window
+    incremental = settings.DETECTOR_CHECKPOINTS_ENABLED
+    # Processes for the per-vessel detectors; workers cannot share the track store
+    n_workers = resolve_workers(workers)
+
+    def _detector_track_store():
+        """Track store for the per-vessel detectors: none when incremental or sharded."""
+        return None if incremental or n_workers > 1 else _track_store()
+
+    def _run_detector_step(name: str, fn, *, hard: bool = False, **kwargs) -> Any:
+        """_run_step for a per-vessel detector, sharded across worker processes if enabled."""
+        if n_workers > 1:
+            return _run_step(name, run_sharded, db, fn, workers=n_workers, hard=hard, **kwargs)
+        return _run_step(name, fn, db, hard=hard, **kwargs)
+
     # Step 3: Gap detection (HARD)
     try:
         from app.modules.gap_detector import run_gap_detection
 
-        _run_step(
+        _run_detector_step(
             "gap_detection",
             run_gap_detection,
-            db,
             date_from=date_from,
             date_to=date_to,
+            track_store=_detector_track_store,
+            incremental=incremental,
             hard=True,
         )
     except Exception:
@@ -447,12 +493,13 @@ def discover_dark_vessels(
     # Step 4: Spoofing detection (SOFT)
     from app.modules.gap_detector import run_spoofing_detection
 
-    _run_step(
+    _run_detector_step(
         "spoofing_detection",
         run_spoofing_detection,
-        db,
         date_from=date_from,
         date_to=date_to,
+        track_store=_detector_track_store,
+        incremental=incremental,
     )
 
     # Step 4a: Stale AIS detection (SOFT, feature-gated)
@@ -466,6 +513,8 @@ def discover_dark_vessels(
                 db,
                 date_from=date_from,
                 date_to=date_to,
+                track_store=_detector_track_store,
+                incremental=incremental,
             )
         except ImportError:
             result["steps"]["stale_ais_detection"] = {
@@ -496,7 +545,7 @@ def discover_dark_vessels(
         try:
             from app.modules.track_naturalness_detector import run_track_naturalness_detection
 
-            _run_step("track_naturalness", run_track_naturalness_detection, db)
+            _run_detector_step("track_naturalness", run_track_naturalness_detection)
         except ImportError:
             result["steps"]["track_naturalness"] = {
                 "status": "skipped",
@@ -507,12 +556,13 @@ def discover_dark_vessels(
     try:
         from app.modules.loitering_detector import run_loitering_detection
 
-        _run_step(
+        _run_detector_step(
             "loitering_detection",
             run_loitering_detection,
-            db,
             date_from=date_from,
             date_to=date_to,
+            track_store=_detector_track_store,
+            incremental=incremental,
         )
     except ImportError:
         result["steps"]["loitering_detection"] = {
@@ -530,6 +580,8 @@ def discover_dark_vessels(
             db,
             date_from=date_from,
             date_to=date_to,
+            track_store=_detector_track_store,
+            incremental=incremental,
         )
     except ImportError:
         result["steps"]["sts_detection"] = {"status": "skipped", "detail": "module not available"}
@@ -734,6 +786,7 @@ def discover_dark_vessels(
                 db,
                 date_from=date_from,
                 date_to=date_to,
+                track_store=_track_store,
             )
             _run_step("floating_storage", detect_floating_storage, db)
             _run_step("arctic_no_ice_class", detect_arctic_no_ice_class, db)
@@ -846,7 +899,7 @@ def discover_dark_vessels(
         try:
             from app.modules.vessel_fingerprint import run_fingerprint_computation
 
-            _run_step("fingerprint_computation", run_fingerprint_computation, db)
+            _run_detector_step("fingerprint_computation", run_fingerprint_computation)
         except ImportError:
             result["steps"]["fingerprint_computation"] = {
                 "status": "skipped",
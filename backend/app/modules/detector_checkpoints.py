@@ -0,0 +1,417 @@
+"""Per-detector, per-vessel watermarks for incremental detection.
+
+Pipeline detectors rescan every vessel's points in the run window on every
+run and rely on per-event duplicate checks to keep reruns idempotent, so the
+nightly run costs the size of the window rather than of the day's new data.
+With ``DETECTOR_CHECKPOINTS_ENABLED`` a detector instead builds a
+:class:`CheckpointPlan` at the start of its run:
+
+- ``detector_checkpoints`` holds, per (detector, vessel), the highest
+  ``ais_point_id`` the detector has processed, the latest point timestamp and
+  ``ingested_at`` among those points, and a hash of the detector's
+  configuration.  Points with a higher id are *new*.
+- A vessel without new points is skipped.  One with new points is rescanned
+  from its earliest new point minus the detector's declared lookback
+  (:class:`DetectorSpec`) and ``DETECTOR_CHECKPOINT_OVERLAP_HOURS``; detectors
+  that compare consecutive points also re-read the point before it.
+- A vessel without a checkpoint, or whose checkpoint was written under another
+  configuration (a listed setting or the detector's ``version`` changed), is
+  recomputed over the whole run window.  :func:`reset_checkpoints` forces the
+  same.
+- After its final commit the detector calls :meth:`CheckpointPlan.advance`,
+  which moves the watermark of every vessel in scope to the id high-water mark
+  read when the plan was built; points written during the run are new next
+  time.
+
+Ids come from a sequence, which hands them out at insert time rather than in
+commit order: on PostgreSQL a transaction still in flight when the plan is
+built may later commit points *below* the high-water mark, which the run never
+saw.  The plan therefore checks the current snapshot for other in-flight
+transactions (``pg_snapshot_xip``); if there are any, the watermark recorded
+by :meth:`~CheckpointPlan.advance` is lowered to the highest id among points
+ingested more than ``DETECTOR_CHECKPOINT_COMMIT_MARGIN_MINUTES`` ago (or with
+no ``ingested_at``), i.e. it assumes ingest transactions commit within that
+margin of stamping their rows' ``ingested_at``.  That id is found by walking
+the primary key down from the high-water mark, so only the margin's points are
+read.  Points between the two marks are rescanned next run.
+SQLite runs one write transaction at a time, so its high-water mark is exact.
+
+The detectors' duplicate checks still apply, so rescanning the overlap is
+safe.  Merges reassign old points to the canonical vessel and drop both
+vessels' checkpoints.  Source-quality replacements update a point in place and
+keep its id; they are seen when the vessel is next rescanned over that period.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, bindparam, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.ais_point import AISPoint
+from app.models.detector_checkpoint import DetectorCheckpoint
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+# Keep IN-lists under SQLite's bound-parameter limit
+_IN_CHUNK = 900
+
+
+def _chunks(seq: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def checkpoints_enabled() -> bool:
+    return bool(getattr(settings, "DETECTOR_CHECKPOINTS_ENABLED", False))
+
+
+def _writers_in_flight(db: Session) -> bool:
+    """True if other transactions that may still commit AIS points are running."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    in_flight = select(func.count()).select_from(
+        func.pg_snapshot_xip(func.pg_current_snapshot()).table_valued("xid")
+    )
+    return bool(db.scalar(in_flight))
+
+
+def _committed_high_water(db: Session, high_water: int) -> int:
+    """The highest id at or below ``high_water`` that no in-flight transaction can undercut."""
+    if not high_water or not _writers_in_flight(db):
+        return high_water
+    margin = timedelta(minutes=getattr(settings, "DETECTOR_CHECKPOINT_COMMIT_MARGIN_MINUTES", 0.0))
+    cutoff = naive_utc(datetime.now(UTC)) - margin
+    # Walk the primary key down from high_water: only points ingested within
+    # the margin are visited.  Points without ingested_at predate the column.
+    safe = db.scalar(
+        select(AISPoint.ais_point_id)
+        .where(
+            AISPoint.ais_point_id <= high_water,
+            or_(AISPoint.ingested_at.is_(None), AISPoint.ingested_at < cutoff),
+        )
+        .order_by(AISPoint.ais_point_id.desc())
+        .limit(1)
+    )
+    logger.info("Writers in flight: checkpoint watermark lowered from %d to %s", high_water, safe)
+    return safe or 0
+
+
+@dataclass(frozen=True)
+class DetectorSpec:
+    """What a detector needs from its checkpoints.
+
+    ``lookback`` is the context re-read before a vessel's earliest new point;
+    ``previous_point`` also re-reads the point before it, however old.
+    Changing a setting named in ``config_keys``, a value in ``params`` or
+    ``version`` recomputes every vessel.
+    """
+
+    name: str
+    lookback: timedelta = timedelta(0)
+    previous_point: bool = False
+    config_keys: tuple[str, ...] = ()
+    params: dict[str, Any] = field(default_factory=dict)
+    version: int = 1
+
+    def config_hash(self) -> str:
+        config = {key: getattr(settings, key, None) for key in self.config_keys}
+        canonical = json.dumps(
+            {"version": self.version, "settings": config, "params": self.params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CheckpointPlan:
+    """Which vessels a detector run must process, and from when.
+
+    Build with :func:`plan_detector_run`.  ``vessel_id in plan`` tells whether
+    a vessel needs processing; :meth:`start` narrows a vessel's scan window.
+    """
+
+    def __init__(self, db: Session, spec: DetectorSpec, vessel_ids: Iterable[int]) -> None:
+        self.db = db
+        self.spec = spec
+        self.config_hash = spec.config_hash()
+        self.scope = sorted(set(vessel_ids))
+        self.high_water = db.query(func.max(AISPoint.ais_point_id)).scalar() or 0
+        # What advance() records; below high_water while other transactions may
+        # still commit lower ids (see the module docstring)
+        self.committed_high_water = _committed_high_water(db, self.high_water)
+        # vessel_id -> scan start; None recomputes the whole window
+        self._since: dict[int, datetime | None] = {}
+        # vessel_id -> (latest timestamp_utc, latest ingested_at) of its new points
+        self._latest: dict[int, tuple[datetime | None, datetime | None]] = {}
+        self._skipped: set[int] = set()
+        self._build()
+
+    def __contains__(self, vessel_id: int) -> bool:
+        return vessel_id in self._since
+
+    @property
+    def vessel_ids(self) -> list[int]:
+        return sorted(self._since)
+
+    def select(self, vessels: Iterable[Any]) -> list[Any]:
+        """The objects of ``vessels`` (anything with a ``vessel_id``) that need processing."""
+        return [v for v in vessels if v.vessel_id in self._since]
+
+    def skip(self, vessel_id: int) -> None:
+        """Leave the vessel's checkpoint untouched, e.g. after its detection failed."""
+        self._since.pop(vessel_id, None)
+        self._latest.pop(vessel_id, None)
+        self._skipped.add(vessel_id)
+
+    def since(self, vessel_id: int) -> datetime | None:
+        """Earliest timestamp the vessel must be rescanned from (None: everything)."""
+        return self._since.get(vessel_id)
+
+    def start(self, vessel_id: int, start: datetime | None) -> datetime | None:
+        """``start`` narrowed to the vessel's rescan window."""
+        since = self._since.get(vessel_id)
+        if since is None:
+            return start
+        return since if start is None else max(start, since)
+
+    def fleet_start(self, start: datetime | None) -> datetime | None:
+        """``start`` narrowed to the earliest rescan window of any vessel in the plan.
+
+        For detectors that compare vessels with each other and so read every
+        vessel in scope over the same period.
+        """
+        if not self._since or any(since is None for since in self._since.values()):
+            return start
+        since = min(self._since.values())
+        return since if start is None else max(start, since)
+
+    def advance(self) -> None:
+        """Record the run as complete for every vessel in scope.  Does NOT commit.
+
+        Inside :func:`deferred_advances` the writes are queued instead.
+        """
+        rebuilt = tuple(sorted(vid for vid, since in self._since.items() if since is None))
+        pending = PendingAdvance(
+            detector=self.spec.name,
+            config_hash=self.config_hash,
+            high_water=self.committed_high_water,
+            kept=tuple(sorted(set(self.scope) - set(rebuilt) - self._skipped)),
+            rebuilt=rebuilt,
+            latest=tuple(
+                (vid, ts, ingested)
+                for vid, (ts, ingested) in sorted(self._latest.items())
+                if vid not in rebuilt
+            ),
+        )
+        if _deferred is not None:
+            _deferred.append(pending)
+            return
+        apply_advance(self.db, pending)
+
+    def _build(self) -> None:
+        db = self.db
+        spec = self.spec
+        stored: dict[int, int] = {}
+        for chunk in _chunks(self.scope):
+            rows = db.query(
+                DetectorCheckpoint.vessel_id,
+                DetectorCheckpoint.last_ais_point_id,
+                DetectorCheckpoint.config_hash,
+            ).filter(
+                DetectorCheckpoint.detector == spec.name,
+                DetectorCheckpoint.vessel_id.in_(chunk),
+            )
+            for vid, last_id, config_hash in rows:
+                if config_hash == self.config_hash:
+                    stored[vid] = last_id
+        for vid in self.scope:
+            if vid not in stored:
+                self._since[vid] = None
+        if not stored:
+            return
+
+        # Points above the lowest watermark; per vessel, only ids above its own
+        # watermark count as new, but the earliest timestamp is taken over all
+        # of them, which can only widen the rescan
+        low = min(stored.values())
+        fresh = (
+            select(
+                AISPoint.vessel_id.label("vessel_id"),
+                func.min(AISPoint.timestamp_utc).label("first_ts"),
+                func.max(AISPoint.ais_point_id).label("max_id"),
+                func.max(AISPoint.timestamp_utc).label("last_ts"),
+                func.max(AISPoint.ingested_at).label("last_ingested"),
+            )
+            .where(AISPoint.ais_point_id > low, AISPoint.ais_point_id <= self.high_water)
+            .group_by(AISPoint.vessel_id)
+        )
+        lookback = spec.lookback + timedelta(
+            hours=getattr(settings, "DETECTOR_CHECKPOINT_OVERLAP_HOURS", 0.0)
+        )
+        for vid, first_ts, max_id, last_ts, last_ingested in db.execute(fresh):
+            last_id = stored.get(vid)
+            if last_id is None or max_id <= last_id:
+                continue
+            self._since[vid] = first_ts - lookback
+            self._latest[vid] = (last_ts, last_ingested)
+
+        if spec.previous_point and self._latest:
+            sub = fresh.subquery()
+            previous = (
+                select(sub.c.vessel_id, func.max(AISPoint.timestamp_utc))
+                .join(
+                    AISPoint,
+                    and_(
+                        AISPoint.vessel_id == sub.c.vessel_id,
+                        AISPoint.timestamp_utc < sub.c.first_ts,
+                    ),
+                )
+                .group_by(sub.c.vessel_id)
+            )
+            for vid, prev_ts in db.execute(previous):
+                since = self._since.get(vid)
+                if since is not None and prev_ts is not None and prev_ts < since:
+                    self._since[vid] = prev_ts
+
+
+@dataclass(frozen=True)
+class PendingAdvance:
+    """The checkpoint writes of one :meth:`CheckpointPlan.advance` call."""
+
+    detector: str
+    config_hash: str
+    high_water: int
+    # Vessels whose checkpoint is moved up (never down) / rewritten from scratch
+    kept: tuple[int, ...]
+    rebuilt: tuple[int, ...]
+    # (vessel_id, latest timestamp_utc, latest ingested_at) of the kept vessels' new points
+    latest: tuple[tuple[int, datetime | None, datetime | None], ...]
+
+
+# Set by deferred_advances(): CheckpointPlan.advance() queues its writes here
+_deferred: list[PendingAdvance] | None = None
+
+
+@contextmanager
+def deferred_advances() -> Iterator[list[PendingAdvance]]:
+    """Queue :meth:`CheckpointPlan.advance` writes instead of running them.
+
+    Used by sharded detection workers, whose writes are replayed by the parent
+    process (see :mod:`app.modules.sharded_detection`); apply the queued
+    advances with :func:`apply_advance`.
+    """
+    global _deferred
+    previous, _deferred = _deferred, []
+    try:
+        yield _deferred
+    finally:
+        _deferred = previous
+
+
+def apply_advance(db: Session, pending: PendingAdvance) -> None:
+    """Write the checkpoints of a completed run.  Does NOT commit."""
+    table = DetectorCheckpoint.__table__
+    now = datetime.now(UTC).replace(tzinfo=None)
+    name = pending.detector
+    high_water = pending.high_water
+
+    for chunk in _chunks(pending.kept):
+        db.execute(
+            update(table)
+            .where(
+                table.c.detector == name,
+                table.c.config_hash == pending.config_hash,
+                table.c.vessel_id.in_(chunk),
+                table.c.last_ais_point_id < high_water,
+            )
+            .values(last_ais_point_id=high_water, updated_at=now)
+        )
+    if pending.latest:
+        db.execute(
+            update(table)
+            .where(table.c.detector == name, table.c.vessel_id == bindparam("vid"))
+            .values(
+                last_point_utc=func.coalesce(bindparam("ts"), table.c.last_point_utc),
+                last_ingested_at=func.coalesce(bindparam("ing"), table.c.last_ingested_at),
+            ),
+            [{"vid": vid, "ts": ts, "ing": ingested} for vid, ts, ingested in pending.latest],
+        )
+
+    for chunk in _chunks(pending.rebuilt):
+        db.execute(delete(table).where(table.c.detector == name, table.c.vessel_id.in_(chunk)))
+        watermarks = dict.fromkeys(chunk, (None, None))
+        for vid, ts, ingested in db.execute(
+            select(
+                AISPoint.vessel_id,
+                func.max(AISPoint.timestamp_utc),
+                func.max(AISPoint.ingested_at),
+            )
+            .where(AISPoint.vessel_id.in_(chunk), AISPoint.ais_point_id <= high_water)
+            .group_by(AISPoint.vessel_id)
+        ):
+            watermarks[vid] = (ts, ingested)
+        db.execute(
+            table.insert(),
+            [
+                {
+                    "detector": name,
+                    "vessel_id": vid,
+                    "last_ais_point_id": high_water,
+                    "last_point_utc": ts,
+                    "last_ingested_at": ingested,
+                    "config_hash": pending.config_hash,
+                    "updated_at": now,
+                }
+                for vid, (ts, ingested) in watermarks.items()
+            ],
+        )
+    db.flush()
+    logger.info(
+        "Detector checkpoints advanced: %s → point %d (%d vessels, %d recomputed)",
+        name,
+        high_water,
+        len(pending.kept) + len(pending.rebuilt),
+        len(pending.rebuilt),
+    )
+
+
+def plan_detector_run(db: Session, spec: DetectorSpec, vessel_ids: Iterable[int]) -> CheckpointPlan:
+    """Build the incremental plan of one detector run over ``vessel_ids``."""
+    plan = CheckpointPlan(db, spec, vessel_ids)
+    logger.info(
+        "Detector %s: %d of %d vessels to process",
+        spec.name,
+        len(plan.vessel_ids),
+        len(plan.scope),
+    )
+    return plan
+
+
+def reset_checkpoints(
+    db: Session, detector: str | None = None, vessel_ids: Iterable[int] | None = None
+) -> int:
+    """Drop checkpoints so the next run recomputes; all detectors / vessels by default.
+
+    Does NOT commit.  Returns the number of checkpoints removed.
+    """
+    table = DetectorCheckpoint.__table__
+    conditions = [] if detector is None else [table.c.detector == detector]
+    if vessel_ids is None:
+        return db.execute(delete(table).where(*conditions)).rowcount or 0
+    removed = 0
+    for chunk in _chunks(sorted(set(vessel_ids))):
+        removed += (
+            db.execute(delete(table).where(*conditions, table.c.vessel_id.in_(chunk))).rowcount or 0
+        )
+    return removed
@@ -46,7 +46,6 @@ def fetch_digitraffic_ais(
 
     from app.models.ais_point import AISPoint
     from app.models.vessel import Vessel
-    from app.modules.normalize import is_non_vessel_mmsi
     from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
 
     points = 0
@@ -63,42 +62,19 @@ def fetch_digitraffic_ais(
         features = data.get("features", [])
         logger.info("Digitraffic: received %d vessel positions", len(features))
 
+        from app.modules.ingest_writer import get_ingest_writer
+
+        writer = get_ingest_writer()
+        if writer is not None:
+            return _submit_digitraffic(db, writer, features, bbox)
+
         for feat in features:
             try:
-                props = feat.get("properties", {})
-                geom = feat.get("geometry", {})
-                coords = geom.get("coordinates", [])
-
-                mmsi = str(props.get("mmsi", ""))
-                if not mmsi or len(mmsi) != 9:
-                    continue
-                if is_non_vessel_mmsi(mmsi):
+                pt = _feature_to_point(feat, bbox)
+                if pt is None:
                     continue
-
-                lon, lat = float(coords[0]), float(coords[1])
-
-                # Filter by bbox if provided
-                if bbox:
-                    min_lat, min_lon, max_lat, max_lon = bbox
-                    if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
-                        continue
-
-                sog = props.get("sog")
-                cog = props.get("cog")
-                heading = props.get("heading")
-                ts = props.get("timestampExternal") or props.get("timestamp")
-
-                timestamp = datetime.utcnow()
-                if ts:
-                    try:
-                        if isinstance(ts, (int, float)):
-                            timestamp = datetime.utcfromtimestamp(ts / 1000)
-                        else:
-                            timestamp = datetime.fromisoformat(
-                                str(ts).replace("Z", "+00:00")
-                            ).replace(tzinfo=None)
-                    except Exception:
-                        logger.debug("Timestamp parsing failed", exc_info=True)
+                mmsi, timestamp = pt["mmsi"], pt["timestamp_utc"]
+                lat, lon = pt["lat"], pt["lon"]
 
                 vessels.add(mmsi)
 
@@ -159,9 +135,7 @@ def fetch_digitraffic_ais(
                 if existing:
                     continue
 
-                sog_val = float(sog) / 10.0 if sog is not None else None
-                cog_val = float(cog) / 10.0 if cog is not None else None
-                heading_val = float(heading) if heading is not None and heading != 511 else None
+                sog_val, cog_val, heading_val = pt["sog"], pt["cog"], pt["heading"]
 
                 point = AISPoint(
                     vessel_id=vessel.vessel_id,
@@ -179,9 +153,10 @@ def fetch_digitraffic_ais(
 
                 # Dual-write to AIS observations for cross-receiver detection
                 try:
-                    from app.models.ais_observation import AISObservation
+                    from app.modules.observation_store import add_observation
 
-                    obs = AISObservation(
+                    add_observation(
+                        db,
                         mmsi=mmsi,
                         timestamp_utc=timestamp,
                         lat=lat,
@@ -191,7 +166,6 @@ def fetch_digitraffic_ais(
                         heading=heading_val,
                         source="digitraffic",
                     )
-                    db.add(obs)
                 except Exception as exc:
                     logger.debug("AIS observation dual-write failed: %s", exc)
             except Exception:
@@ -218,6 +192,111 @@ def fetch_digitraffic_ais(
     }
 
 
+def _feature_to_point(feat: dict, bbox: tuple[float, float, float, float] | None) -> dict | None:
+    """Normalize a Digitraffic GeoJSON feature to a point dict (None = skip)."""
+    from app.modules.normalize import is_non_vessel_mmsi
+
+    props = feat.get("properties", {})
+    geom = feat.get("geometry", {})
+    coords = geom.get("coordinates", [])
+
+    mmsi = str(props.get("mmsi", ""))
+    if not mmsi or len(mmsi) != 9:
+        return None
+    if is_non_vessel_mmsi(mmsi):
+        return None
+
+    lon, lat = float(coords[0]), float(coords[1])
+
+    # Filter by bbox if provided
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return None
+
+    sog = props.get("sog")
+    cog = props.get("cog")
+    heading = props.get("heading")
+    ts = props.get("timestampExternal") or props.get("timestamp")
+
+    timestamp = datetime.utcnow()
+    if ts:
+        try:
+            if isinstance(ts, (int, float)):
+                timestamp = datetime.utcfromtimestamp(ts / 1000)
+            else:
+                timestamp = datetime.fromisoformat(str(ts).replace("Z", "+00:00")).replace(
+                    tzinfo=None
+                )
+        except Exception:
+            logger.debug("Timestamp parsing failed", exc_info=True)
+
+    return {
+        "mmsi": mmsi,
+        "timestamp_utc": timestamp,
+        "lat": lat,
+        "lon": lon,
+        "sog": float(sog) / 10.0 if sog is not None else None,
+        "cog": float(cog) / 10.0 if cog is not None else None,
+        "heading": float(heading) if heading is not None and heading != 511 else None,
+        "ais_class": "A",
+        "source": "digitraffic",
+    }
+
+
+def _submit_digitraffic(
+    db: Session, writer, features: list[dict], bbox: tuple[float, float, float, float] | None
+) -> dict:
+    """Hand a Digitraffic snapshot to the scheduler's ingest writer.
+
+    Downsampling (1 point per 30 min per vessel) is decided here with one
+    grouped read of each vessel's latest Digitraffic point; the writer does
+    vessel creation, dedup and the writes.  Downsampled positions still
+    advance their vessels' ``last_ais_received_utc``.
+    """
+    from app.modules.ingest_writer import latest_point_times
+
+    points: list[dict] = []
+    errors = 0
+    for feat in features:
+        try:
+            pt = _feature_to_point(feat, bbox)
+        except Exception:
+            errors += 1
+            continue
+        if pt is not None:
+            points.append(pt)
+
+    vessels = {pt["mmsi"] for pt in points}
+    last_seen = latest_point_times(db, list(vessels), "digitraffic")
+    kept: list[dict] = []
+    freshness: dict[str, datetime] = {}
+    for pt in points:
+        mmsi = pt["mmsi"]
+        if mmsi not in last_seen or (pt["timestamp_utc"] - last_seen[mmsi]).total_seconds() >= 1800:
+            kept.append(pt)
+        elif mmsi not in freshness or pt["timestamp_utc"] > freshness[mmsi]:
+            freshness[mmsi] = pt["timestamp_utc"]
+    downsampled = len(points) - len(kept)
+    db.rollback()  # end the read transaction before handing off
+    if kept or freshness:
+        writer.submit(kept, freshness=freshness)
+
+    logger.info(
+        "Digitraffic: %d points submitted, %d vessels, %d downsampled, %d errors",
+        len(kept),
+        len(vessels),
+        downsampled,
+        errors,
+    )
+    return {
+        "points_ingested": len(kept),
+        "vessels_seen": len(vessels),
+        "downsampled": downsampled,
+        "errors": errors,
+    }
+
+
 def fetch_digitraffic_port_calls(db: Session, mmsi: str | None = None) -> dict:
     """Fetch port call data from Digitraffic.
 
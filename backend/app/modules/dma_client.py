@@ -19,7 +19,13 @@ from __future__ import annotations
 import csv
 import io
 import logging
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, wait
 from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import httpx
 from sqlalchemy.exc import IntegrityError
@@ -27,6 +33,10 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.modules.circuit_breakers import breakers
+from app.modules.normalize import is_non_vessel_mmsi
+
+if TYPE_CHECKING:
+    from app.modules.identity_changes import IdentityChangeBatch
 
 logger = logging.getLogger(__name__)
 
@@ -103,11 +113,377 @@ def _parse_dma_timestamp(ts_str: str) -> datetime | None:
         return None
 
 
+def _parse_dma_timestamps(header: list[str], rows: list[list[str]]) -> list[datetime | None]:
+    """Parse the timestamp column of many raw DMA rows in one vectorized pass."""
+    import polars as pl
+
+    from app.modules.normalize import parse_timestamp_column
+
+    if "# Timestamp" not in header:
+        return [None] * len(rows)
+    col = header.index("# Timestamp")
+    raw = [values[col] if len(values) == len(header) else None for values in rows]
+    parsed = parse_timestamp_column(pl.Series("timestamp", raw, dtype=pl.Utf8), dayfirst=True)
+    return [ts.replace(tzinfo=UTC) if ts is not None else None for ts in parsed.to_list()]
+
+
+def _parse_dma_values(
+    header: list[str],
+    values: list[str],
+    type_filter: set[str] | None,
+    ts: datetime | None = None,
+) -> tuple[dict | None, bool]:
+    """Normalize, parse and filter one raw DMA CSV row. No database access.
+
+    ``ts`` is the row's timestamp when already parsed column-wise; without it
+    the timestamp string is parsed here.  Returns ``(point, is_error)``:
+    ``point`` is None for skipped rows, and ``is_error`` is True when the row
+    counts towards ``stats["errors"]``.
+    """
+    row = _normalize_row(header, values)
+    if row is None:
+        return None, True
+
+    # Type filter
+    if type_filter:
+        vtype = row.get("vessel_type", "").lower()
+        if not any(t in vtype for t in type_filter):
+            return None, False
+
+    mmsi = str(row.get("mmsi", "")).strip()
+    if not mmsi or len(mmsi) != 9 or not mmsi.isdigit():
+        return None, False
+    if is_non_vessel_mmsi(mmsi):
+        return None, False
+
+    # Skip "Unknown" or empty IMO values
+    imo = row.get("imo", "").strip()
+    if imo.lower() in ("unknown", "") or not imo.isdigit() or len(imo) != 7:
+        imo = None
+
+    if ts is None:
+        ts = _parse_dma_timestamp(row.get("timestamp", ""))
+    if ts is None:
+        return None, True
+
+    try:
+        lat = float(row.get("lat", ""))
+        lon = float(row.get("lon", ""))
+    except (ValueError, TypeError):
+        return None, True
+
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        return None, False
+
+    heading_raw = _safe_float(row.get("heading"))
+    return {
+        "mmsi": mmsi,
+        "imo": imo,
+        "ts": ts,
+        "lat": lat,
+        "lon": lon,
+        "sog": _safe_float(row.get("sog")),
+        "cog": _safe_float(row.get("cog")),
+        "heading": heading_raw if heading_raw is not None and heading_raw != 511 else None,
+        "draught": _safe_float(row.get("draught")),
+        "vessel_name": row.get("vessel_name") or None,
+        "callsign": row.get("callsign") or None,
+        "vessel_type": row.get("vessel_type") or None,
+        "destination": row.get("destination") or None,
+    }, False
+
+
+def _new_dma_vessel(point: dict):
+    """Build a Vessel for an MMSI first seen in DMA data."""
+    from app.models.vessel import Vessel
+    from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
+
+    derived_flag = mmsi_to_flag(point["mmsi"])
+    return Vessel(
+        mmsi=point["mmsi"],
+        imo=point["imo"],
+        name=point["vessel_name"],
+        flag=derived_flag,
+        flag_risk_category=flag_to_risk_category(derived_flag),
+        vessel_type=point["vessel_type"],
+        ais_class="A",
+        ais_source="dma",
+        callsign=point["callsign"],
+        mmsi_first_seen_utc=point["ts"],
+    )
+
+
+def _update_dma_vessel(
+    db: Session, vessel, point: dict, stats: dict, changes: IdentityChangeBatch | None = None
+) -> None:
+    """Fill missing vessel metadata from a DMA row and record identity changes."""
+    from app.modules.ingest import _track_field_change
+
+    imo, ts = point["imo"], point["ts"]
+    new_name = point["vessel_name"]
+    new_callsign = point["callsign"]
+    # Track identity changes (both old and new must be non-None)
+    if imo and vessel.imo and imo != vessel.imo:
+        _track_field_change(db, vessel, "imo", vessel.imo, imo, ts, "dma", changes)
+    if new_callsign and vessel.callsign and new_callsign != vessel.callsign:
+        _track_field_change(
+            db, vessel, "callsign", vessel.callsign, new_callsign, ts, "dma", changes
+        )
+    if new_name and vessel.name and new_name != vessel.name:
+        _track_field_change(db, vessel, "name", vessel.name, new_name, ts, "dma", changes)
+    updated = False
+    if imo and not vessel.imo:
+        vessel.imo = imo
+        updated = True
+    if new_name and not vessel.name:
+        vessel.name = new_name
+        updated = True
+    if new_callsign and not vessel.callsign:
+        vessel.callsign = new_callsign
+        updated = True
+    if point["vessel_type"] and not vessel.vessel_type:
+        vessel.vessel_type = point["vessel_type"]
+        updated = True
+    if updated:
+        stats["vessels_updated"] += 1
+
+
+def _dma_point_values(point: dict) -> dict:
+    """AISPoint column values for a parsed DMA row (vessel_id excluded)."""
+    return {
+        "timestamp_utc": point["ts"],
+        "lat": point["lat"],
+        "lon": point["lon"],
+        "sog": point["sog"],
+        "cog": point["cog"],
+        "heading": point["heading"],
+        "draught": point["draught"],
+        "destination": point["destination"],
+        "ais_class": "A",
+        "source": "dma",
+    }
+
+
+def _dma_observation_values(point: dict) -> dict:
+    """AISObservation column values for a parsed DMA row."""
+    return {
+        "mmsi": point["mmsi"],
+        "timestamp_utc": point["ts"],
+        "lat": point["lat"],
+        "lon": point["lon"],
+        "sog": point["sog"],
+        "cog": point["cog"],
+        "heading": point["heading"],
+        "draught": point["draught"],
+        "source": "dma",
+    }
+
+
+# ---------------------------------------------------------------------------
+# Parallel import: byte-range chunks parsed in worker processes
+# ---------------------------------------------------------------------------
+
+# Target size of one worker chunk of decompressed CSV
+_CHUNK_BYTES = 64 * 1024 * 1024
+# Points written per commit by the single writer (matches the row path)
+_WRITE_BATCH = 5000
+
+
+def _line_aligned_ranges(path: Path, chunk_bytes: int) -> tuple[list[str], list]:
+    """Read the CSV header and split the body into byte ranges ending on newlines.
+
+    DMA rows never contain quoted newlines, so a line boundary is always a
+    row boundary. Returns ``(header, [(start, end), ...])``.
+    """
+    size = path.stat().st_size
+    ranges: list[tuple[int, int]] = []
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # advance to the end of the current line
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    header = next(csv.reader([header_line.decode("utf-8", errors="replace")]), [])
+    return header, ranges
+
+
+def _parse_dma_chunk(
+    path: str, start: int, end: int, header: list[str], type_filter: set[str] | None
+) -> tuple[list[dict], int]:
+    """Worker entry point: parse one byte range. Returns ``(points, error_count)``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8", errors="replace")
+    rows = list(csv.reader(io.StringIO(text)))
+    timestamps = _parse_dma_timestamps(header, rows)
+    points: list[dict] = []
+    errors = 0
+    for values, ts in zip(rows, timestamps, strict=True):
+        point, error = _parse_dma_values(header, values, type_filter, ts)
+        if error:
+            errors += 1
+        elif point is not None:
+            points.append(point)
+    return points, errors
+
+
+def _import_dma_day_parallel(
+    db: Session,
+    content: bytes,
+    gzipped: bool,
+    executor: Executor,
+    type_filter: set[str] | None,
+    stats: dict,
+    max_in_flight: int = 2,
+) -> int:
+    """Parse one day file across worker processes and bulk-load it. Returns points imported.
+
+    The decompressed CSV goes to a temp file that workers read by byte range;
+    chunk results are consumed in file order so vessel metadata is applied in
+    the same sequence as the row-by-row path.  At most ``max_in_flight``
+    chunks are submitted or parsed-but-unwritten at a time, which bounds the
+    parsed rows held in this process.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dma.csv"
+        with open(path, "wb") as out:
+            if gzipped:
+                import gzip as gz_mod
+
+                with gz_mod.open(io.BytesIO(content)) as src:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+            else:
+                out.write(content)
+
+        header, ranges = _line_aligned_ranges(path, _CHUNK_BYTES)
+        pending = iter(ranges)
+        in_flight: deque[Future] = deque()
+        day_points = 0
+        try:
+            while True:
+                # Keep a bounded number of parsed chunks waiting on the writer
+                while len(in_flight) < max_in_flight:
+                    chunk = next(pending, None)
+                    if chunk is None:
+                        break
+                    in_flight.append(
+                        executor.submit(_parse_dma_chunk, str(path), *chunk, header, type_filter)
+                    )
+                if not in_flight:
+                    break
+                points, errors = in_flight.popleft().result()
+                stats["errors"] += errors
+                for i in range(0, len(points), _WRITE_BATCH):
+                    day_points += _write_dma_points(db, points[i : i + _WRITE_BATCH], stats)
+                    db.commit()
+        finally:
+            # On failure, let running chunks finish before the temp file goes
+            for future in in_flight:
+                future.cancel()
+            wait(in_flight)
+    return day_points
+
+
+def _write_dma_points(db: Session, points: list[dict], stats: dict) -> int:
+    """Bulk-load parsed DMA points: one vessel query, one dedup query, executemany inserts.
+
+    Same per-row semantics as the row path: vessels are created from the
+    first row seen, later rows fill missing metadata, and a point is skipped
+    when (vessel, timestamp) already exists. Returns points inserted.
+    """
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+    from app.modules.bulk_ingest import _chunks, load_vessels_by_mmsi
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.ingest import _touch_last_received
+    from app.modules.observation_store import add_observations
+    from app.modules.pg_copy import insert_ais_points
+    from app.modules.track_summary import record_point_rows
+
+    if not points:
+        return 0
+    vessels = load_vessels_by_mmsi(db, list(dict.fromkeys(p["mmsi"] for p in points)))
+    new: dict[str, Vessel] = {}
+    for p in points:
+        if p["mmsi"] not in vessels and p["mmsi"] not in new:
+            new[p["mmsi"]] = _new_dma_vessel(p)
+    created: set[str] = set()
+    if new:
+        try:
+            with db.begin_nested():
+                db.add_all(new.values())
+                db.flush()
+            created = set(new)
+        except IntegrityError:
+            # A concurrent writer created some of them — resolve one at a time
+            first_rows = {mmsi: next(p for p in points if p["mmsi"] == mmsi) for mmsi in new}
+            for mmsi, p in first_rows.items():
+                vessel = _new_dma_vessel(p)
+                try:
+                    with db.begin_nested():
+                        db.add(vessel)
+                        db.flush()
+                    new[mmsi] = vessel
+                    created.add(mmsi)
+                except IntegrityError:
+                    existing = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
+                    if existing is not None:
+                        new[mmsi] = existing
+                    else:
+                        del new[mmsi]
+        vessels.update(new)
+        stats["vessels_created"] += len(created)
+
+    # Existing (vessel_id, timestamp) keys the batch can collide with
+    vessel_ids = list({v.vessel_id for v in vessels.values()})
+    naive = [p["ts"].replace(tzinfo=None) for p in points]
+    seen: set[tuple[int, datetime]] = set()
+    for chunk in _chunks(vessel_ids):
+        rows = db.query(AISPoint.vessel_id, AISPoint.timestamp_utc).filter(
+            AISPoint.vessel_id.in_(chunk),
+            AISPoint.timestamp_utc >= min(naive),
+            AISPoint.timestamp_utc <= max(naive),
+        )
+        seen.update((vid, ts.replace(tzinfo=None)) for vid, ts in rows)
+
+    identity_changes = IdentityChangeBatch()
+    point_rows: list[dict] = []
+    obs_rows: list[dict] = []
+    for p, ts in zip(points, naive, strict=True):
+        vessel = vessels.get(p["mmsi"])
+        if vessel is None:
+            stats["errors"] += 1
+            continue
+        if p["mmsi"] in created:
+            created.discard(p["mmsi"])  # first row seeded the new vessel
+        else:
+            _update_dma_vessel(db, vessel, p, stats, identity_changes)
+        _touch_last_received(vessel, p["ts"])
+
+        key = (vessel.vessel_id, ts)
+        if key in seen:
+            continue
+        seen.add(key)
+        point_rows.append({"vessel_id": vessel.vessel_id, **_dma_point_values(p)})
+        obs_rows.append(_dma_observation_values(p))
+
+    identity_changes.flush(db)
+    if point_rows:
+        insert_ais_points(db, point_rows)
+        record_point_rows(db, point_rows)
+        add_observations(db, obs_rows)
+    return len(point_rows)
+
+
 def fetch_and_import_dma(
     db: Session,
     start_date: date,
     end_date: date,
     vessel_types: list[str] | None = None,
+    workers: int | None = None,
 ) -> dict:
     """Download DMA daily CSV archives and import AIS points.
 
@@ -116,6 +492,9 @@ def fetch_and_import_dma(
         start_date: First date to import (inclusive).
         end_date: Last date to import (inclusive).
         vessel_types: Optional filter list, e.g. ["Tanker"]. If None, all types imported.
+        workers: Parser processes per day file. Above 1, each decompressed file is
+            split into line-aligned byte ranges parsed in parallel and bulk-loaded
+            by this process. ``None`` reads ``DMA_IMPORT_WORKERS``.
 
     Returns:
         Stats dict with points_imported, vessels_created, vessels_updated, days_processed, errors.
@@ -130,11 +509,6 @@ def fetch_and_import_dma(
             "errors": 0,
         }
 
-    from app.models.ais_point import AISPoint
-    from app.models.vessel import Vessel
-    from app.modules.normalize import is_non_vessel_mmsi
-    from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
-
     stats = {
         "points_imported": 0,
         "vessels_created": 0,
@@ -150,252 +524,185 @@ def fetch_and_import_dma(
 
     from datetime import datetime as _dt
 
-    current = start_date
-    while current <= end_date:
-        url = _build_url(current, gzip=True)
-        logger.info("DMA: fetching %s", url)
-        day_started_at = _dt.now(UTC)
+    if workers is None:
+        workers = int(getattr(settings, "DMA_IMPORT_WORKERS", 1))
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
 
-        try:
-            with httpx.Client(timeout=120) as client:
-                resp = breakers["dma"].call(client.get, url)
-            if resp.status_code == 404:
-                # Try non-gzip fallback
-                url = _build_url(current, gzip=False)
+    try:
+        current = start_date
+        while current <= end_date:
+            url = _build_url(current, gzip=True)
+            logger.info("DMA: fetching %s", url)
+            day_started_at = _dt.now(UTC)
+
+            try:
                 with httpx.Client(timeout=120) as client:
                     resp = breakers["dma"].call(client.get, url)
-            resp.raise_for_status()
-
-            # Stream CSV line-by-line
-            header: list[str] | None = None
-            day_points = 0
+                if resp.status_code == 404:
+                    # Try non-gzip fallback
+                    url = _build_url(current, gzip=False)
+                    with httpx.Client(timeout=120) as client:
+                        resp = breakers["dma"].call(client.get, url)
+                resp.raise_for_status()
+
+                if executor is not None:
+                    day_points = _import_dma_day_parallel(
+                        db,
+                        resp.content,
+                        url.endswith(".gz"),
+                        executor,
+                        type_filter,
+                        stats,
+                        max_in_flight=2 * workers,
+                    )
+                else:
+                    day_points = _import_dma_day(db, resp, url, type_filter, stats)
 
-            if url.endswith(".gz"):
-                import gzip as gz_mod
+                db.commit()
+                stats["points_imported"] += day_points
+                stats["days_processed"] += 1
+                logger.info("DMA: %s — %d points imported", current, day_points)
 
-                lines = gz_mod.open(io.BytesIO(resp.content), "rt", encoding="utf-8")  # noqa: SIM115
-            else:
-                lines = resp.text.splitlines()
+                # Record coverage window — completed
+                try:
+                    from app.modules.coverage_tracker import record_coverage_window
+
+                    record_coverage_window(
+                        db,
+                        "dma",
+                        current,
+                        current,
+                        status="completed",
+                        points_imported=day_points,
+                        vessels_queried=0,
+                        started_at=day_started_at,
+                        finished_at=_dt.now(UTC),
+                    )
+                    db.commit()
+                except Exception as cov_exc:
+                    logger.warning("DMA coverage recording failed for %s: %s", current, cov_exc)
 
-            reader = csv.reader(lines)
-            for row_values in reader:
-                if header is None:
-                    header = row_values
-                    continue
+            except Exception as e:
+                logger.error("DMA: failed to process %s: %s", current, e)
+                stats["errors"] += 1
+                # Record coverage window — failed
+                try:
+                    from app.modules.coverage_tracker import record_coverage_window
+
+                    record_coverage_window(
+                        db,
+                        "dma",
+                        current,
+                        current,
+                        status="failed",
+                        points_imported=0,
+                        errors=1,
+                        started_at=day_started_at,
+                        finished_at=_dt.now(UTC),
+                        notes=str(e)[:500],
+                    )
+                    db.commit()
+                except Exception:
+                    logger.debug("Failed to record collection run error", exc_info=True)
 
-                row = _normalize_row(header, row_values)
-                if row is None:
-                    stats["errors"] += 1
-                    continue
+            current += timedelta(days=1)
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-                # Type filter
-                if type_filter:
-                    vtype = row.get("vessel_type", "").lower()
-                    if not any(t in vtype for t in type_filter):
-                        continue
+    logger.info(
+        "DMA import complete: %d points, %d days, %d errors",
+        stats["points_imported"],
+        stats["days_processed"],
+        stats["errors"],
+    )
+    return stats
 
-                mmsi = str(row.get("mmsi", "")).strip()
-                if not mmsi or len(mmsi) != 9 or not mmsi.isdigit():
-                    continue
-                if is_non_vessel_mmsi(mmsi):
-                    continue
 
-                # Skip "Unknown" or empty IMO values
-                imo = row.get("imo", "").strip()
-                if imo.lower() in ("unknown", "") or not imo.isdigit() or len(imo) != 7:
-                    imo = None
+def _import_dma_day(db: Session, resp, url: str, type_filter: set[str] | None, stats: dict) -> int:
+    """Single-process import of one day file, row by row. Returns points imported."""
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.ingest import _touch_last_received
 
-                ts = _parse_dma_timestamp(row.get("timestamp", ""))
-                if ts is None:
-                    stats["errors"] += 1
-                    continue
+    # Stream CSV line-by-line
+    header: list[str] | None = None
+    day_points = 0
+    identity_changes = IdentityChangeBatch()
 
-                try:
-                    lat = float(row.get("lat", ""))
-                    lon = float(row.get("lon", ""))
-                except (ValueError, TypeError):
-                    stats["errors"] += 1
-                    continue
+    if url.endswith(".gz"):
+        import gzip as gz_mod
 
-                if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-                    continue
+        lines = gz_mod.open(io.BytesIO(resp.content), "rt", encoding="utf-8")  # noqa: SIM115
+    else:
+        lines = resp.text.splitlines()
 
-                # Parse optional numeric fields
-                sog = _safe_float(row.get("sog"))
-                cog = _safe_float(row.get("cog"))
-                heading_raw = _safe_float(row.get("heading"))
-                heading = heading_raw if heading_raw is not None and heading_raw != 511 else None
-                draught = _safe_float(row.get("draught"))
+    reader = csv.reader(lines)
+    for row_values in reader:
+        if header is None:
+            header = row_values
+            continue
 
-                # Upsert vessel
+        point, error = _parse_dma_values(header, row_values, type_filter)
+        if error:
+            stats["errors"] += 1
+            continue
+        if point is None:
+            continue
+        mmsi, ts = point["mmsi"], point["ts"]
+
+        # Upsert vessel
+        vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
+        if not vessel:
+            vessel = _new_dma_vessel(point)
+            try:
+                with db.begin_nested():
+                    db.add(vessel)
+                    db.flush()
+                stats["vessels_created"] += 1
+            except IntegrityError:
                 vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
                 if not vessel:
-                    derived_flag = mmsi_to_flag(mmsi)
-                    vessel = Vessel(
-                        mmsi=mmsi,
-                        imo=imo,
-                        name=row.get("vessel_name") or None,
-                        flag=derived_flag,
-                        flag_risk_category=flag_to_risk_category(derived_flag),
-                        vessel_type=row.get("vessel_type") or None,
-                        ais_class="A",
-                        ais_source="dma",
-                        callsign=row.get("callsign") or None,
-                        mmsi_first_seen_utc=ts,
-                    )
-                    try:
-                        with db.begin_nested():
-                            db.add(vessel)
-                            db.flush()
-                        stats["vessels_created"] += 1
-                    except IntegrityError:
-                        vessel = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
-                        if not vessel:
-                            stats["errors"] += 1
-                            continue
-                else:
-                    # Update vessel metadata if we have better data
-                    # Track identity changes (both old and new must be non-None)
-                    from app.modules.ingest import _track_field_change
-
-                    _new_name = row.get("vessel_name") or None
-                    _new_callsign = row.get("callsign") or None
-                    if imo and vessel.imo and imo != vessel.imo:
-                        _track_field_change(db, vessel, "imo", vessel.imo, imo, ts, "dma")
-                    if _new_callsign and vessel.callsign and _new_callsign != vessel.callsign:
-                        _track_field_change(
-                            db, vessel, "callsign", vessel.callsign, _new_callsign, ts, "dma"
-                        )
-                    if _new_name and vessel.name and _new_name != vessel.name:
-                        _track_field_change(db, vessel, "name", vessel.name, _new_name, ts, "dma")
-                    updated = False
-                    if imo and not vessel.imo:
-                        vessel.imo = imo
-                        updated = True
-                    if row.get("vessel_name") and not vessel.name:
-                        vessel.name = row.get("vessel_name")
-                        updated = True
-                    if row.get("callsign") and not vessel.callsign:
-                        vessel.callsign = row["callsign"]
-                        updated = True
-                    if row.get("vessel_type") and not vessel.vessel_type:
-                        vessel.vessel_type = row["vessel_type"]
-                        updated = True
-                    if updated:
-                        stats["vessels_updated"] += 1
-
-                # Update data freshness tracking
-                current_ais = getattr(vessel, "last_ais_received_utc", None)
-                if current_ais is None or not isinstance(current_ais, datetime) or ts > current_ais:
-                    vessel.last_ais_received_utc = ts
-
-                # Dedup check
-                existing = (
-                    db.query(AISPoint)
-                    .filter(
-                        AISPoint.vessel_id == vessel.vessel_id,
-                        AISPoint.timestamp_utc == ts,
-                    )
-                    .first()
-                )
-                if existing:
+                    stats["errors"] += 1
                     continue
+        else:
+            _update_dma_vessel(db, vessel, point, stats, identity_changes)
+
+        # Update data freshness tracking
+        _touch_last_received(vessel, ts)
+
+        # Dedup check
+        existing = (
+            db.query(AISPoint)
+            .filter(
+                AISPoint.vessel_id == vessel.vessel_id,
+                AISPoint.timestamp_utc == ts,
+            )
+            .first()
+        )
+        if existing:
+            continue
+
+        db.add(AISPoint(vessel_id=vessel.vessel_id, **_dma_point_values(point)))
+        day_points += 1
+
+        # Dual-write to AIS observations for cross-receiver detection
+        try:
+            from app.modules.observation_store import add_observation
 
-                point = AISPoint(
-                    vessel_id=vessel.vessel_id,
-                    timestamp_utc=ts,
-                    lat=lat,
-                    lon=lon,
-                    sog=sog,
-                    cog=cog,
-                    heading=heading,
-                    draught=draught,
-                    destination=row.get("destination") or None,
-                    ais_class="A",
-                    source="dma",
-                )
-                db.add(point)
-                day_points += 1
-
-                # Dual-write to AIS observations for cross-receiver detection
-                try:
-                    from app.models.ais_observation import AISObservation
-
-                    obs = AISObservation(
-                        mmsi=mmsi,
-                        timestamp_utc=ts,
-                        lat=lat,
-                        lon=lon,
-                        sog=sog,
-                        cog=cog,
-                        heading=heading,
-                        draught=draught,
-                        source="dma",
-                    )
-                    db.add(obs)
-                except Exception as exc:
-                    logger.debug("AIS observation dual-write failed: %s", exc)
-
-                # Batch commit every 5000 points
-                if day_points % 5000 == 0:
-                    db.commit()
+            add_observation(db, **_dma_observation_values(point))
+        except Exception as exc:
+            logger.debug("AIS observation dual-write failed: %s", exc)
 
+        # Batch commit every 5000 points
+        if day_points % 5000 == 0:
+            identity_changes.flush(db)
             db.commit()
-            stats["points_imported"] += day_points
-            stats["days_processed"] += 1
-            logger.info("DMA: %s — %d points imported", current, day_points)
-
-            # Record coverage window — completed
-            try:
-                from app.modules.coverage_tracker import record_coverage_window
-
-                record_coverage_window(
-                    db,
-                    "dma",
-                    current,
-                    current,
-                    status="completed",
-                    points_imported=day_points,
-                    vessels_queried=0,
-                    started_at=day_started_at,
-                    finished_at=_dt.now(UTC),
-                )
-                db.commit()
-            except Exception as cov_exc:
-                logger.warning("DMA coverage recording failed for %s: %s", current, cov_exc)
-
-        except Exception as e:
-            logger.error("DMA: failed to process %s: %s", current, e)
-            stats["errors"] += 1
-            # Record coverage window — failed
-            try:
-                from app.modules.coverage_tracker import record_coverage_window
-
-                record_coverage_window(
-                    db,
-                    "dma",
-                    current,
-                    current,
-                    status="failed",
-                    points_imported=0,
-                    errors=1,
-                    started_at=day_started_at,
-                    finished_at=_dt.now(UTC),
-                    notes=str(e)[:500],
-                )
-                db.commit()
-            except Exception:
-                logger.debug("Failed to record collection run error", exc_info=True)
-
-        current += timedelta(days=1)
 
-    logger.info(
-        "DMA import complete: %d points, %d days, %d errors",
-        stats["points_imported"],
-        stats["days_processed"],
-        stats["errors"],
-    )
-    return stats
+    identity_changes.flush(db)
+    db.commit()
+    return day_points
 
 
 def _safe_float(val: str | None) -> float | None:
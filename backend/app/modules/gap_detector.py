@@ -9,6 +9,7 @@ from __future__ import annotations
 import logging
 import statistics
 from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple
 
 from sqlalchemy.orm import Session
 
@@ -16,10 +17,29 @@ from app.config import settings
 from app.models.ais_point import AISPoint
 from app.models.gap_event import AISGapEvent
 from app.models.vessel import Vessel
+from app.modules.detector_checkpoints import DetectorSpec, plan_detector_run
 from app.utils.geo import haversine_nm
 
+if TYPE_CHECKING:
+    from app.modules.track_store import TrackStore
+
 logger = logging.getLogger(__name__)
 
+# Vessel ids per IN (...) list; stays under SQLite's bound-parameter limit
+_IN_CHUNK = 900
+
+# Incremental-run checkpoints (see app.modules.detector_checkpoints).  All three
+# detectors compare consecutive points, so the point before a vessel's new ones
+# is always re-read.
+GAP_CHECKPOINT = DetectorSpec(
+    "gap",
+    previous_point=True,
+    config_keys=("GAP_MIN_HOURS", "CLASS_B_NOISE_FILTER_SECONDS"),
+)
+# Anchor spoofing needs the longest run: 72h
+SPOOFING_CHECKPOINT = DetectorSpec("spoofing", lookback=timedelta(hours=72), previous_point=True)
+STALE_CHECKPOINT = DetectorSpec("stale_ais", lookback=timedelta(hours=24), previous_point=True)
+
 
 from app.utils.vessel import classify_vessel_speed
 
@@ -50,66 +70,58 @@ def compute_max_distance_nm(vessel_dwt: float | None, elapsed_hours: float) -> f
 def _is_near_port(db: Session, lat: float, lon: float, radius_nm: float = 5.0) -> bool:
     """Check if a position is within radius_nm of any known major port.
 
-    Uses haversine distance against port coordinates parsed from WKT geometry.
+    Uses haversine distance against the cached port index (see
+    :mod:`app.modules.port_index`).
     """
-    from app.models.port import Port
-    from app.utils.geo import haversine_nm, load_geometry
+    from app.modules.port_index import port_index
 
-    ports = db.query(Port).filter(Port.major_port).all()
-    for port in ports:
-        pt = load_geometry(port.geometry)
-        if pt is None:
-            continue
-        if haversine_nm(lat, lon, pt.y, pt.x) <= radius_nm:
-            return True
-    return False
+    return bool(port_index(db).ports_within(lat, lon, radius_nm, major_only=True))
+
+
+def _any_near_port(
+    db: Session, positions: list[tuple[float, float]], radius_nm: float = 5.0
+) -> bool:
+    """Batch :func:`_is_near_port`: True if any (lat, lon) is near a major port."""
+    from app.modules.port_index import port_index
+
+    return any(port_index(db).ports_within_many(positions, radius_nm, major_only=True))
 
 
 def _is_in_anchorage_corridor(
     db: Session, lat: float, lon: float, tolerance: float | None = None
 ) -> bool:
     """Check if a position falls within any anchorage_holding corridor."""
-    from shapely.geometry import Point
-
     from app.models.base import CorridorTypeEnum
-    from app.models.corridor import Corridor
-    from app.modules.corridor_correlator import _geometry_wkt
-    from app.utils.geo import load_geometry
+    from app.modules.corridor_index import corridor_index
 
     if tolerance is None:
         tolerance = settings.ANCHORAGE_TOLERANCE_DEG
 
-    corridors = (
-        db.query(Corridor)
-        .filter(
-            Corridor.corridor_type == CorridorTypeEnum.ANCHORAGE_HOLDING,
-            Corridor.geometry.isnot(None),
+    return bool(
+        corridor_index(db).containing(
+            lat, lon, tolerance, zone_types={CorridorTypeEnum.ANCHORAGE_HOLDING}
         )
-        .all()
     )
-    pt = Point(lon, lat)
-    for c in corridors:
-        wkt = _geometry_wkt(c.geometry)
-        if wkt is None:
-            continue
-        try:
-            shape = load_geometry(wkt)
-        except Exception:  # noqa: S112
-            continue
-        if shape and shape.buffer(tolerance).contains(pt):
-            return True
-    return False
 
 
 def run_gap_detection(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    incremental: bool = False,
+    shard: tuple[int, int] | None = None,
 ) -> dict:
     """
     Run gap detection across all vessels in the specified date range.
 
-    Returns a summary dict with count of gaps detected.
+    With a ``track_store`` (see :mod:`app.modules.track_store`) the whole fleet
+    is scanned at once by :func:`detect_gaps_for_fleet`; otherwise vessels are
+    processed one by one.  With ``incremental`` only vessels with points added
+    since the last incremental run are rescanned, from just before those points
+    (see :mod:`app.modules.detector_checkpoints`).  ``shard`` limits the run to
+    one vessel shard (see :mod:`app.modules.sharded_detection`).  Returns a
+    summary dict with count of gaps detected.
     """
     from app.models.corridor import Corridor
 
@@ -121,24 +133,52 @@ def run_gap_detection(
         )
 
     vessels = db.query(Vessel).filter(Vessel.merged_into_vessel_id.is_(None)).all()
+    if shard is not None:
+        from app.modules.sharded_detection import in_shard
+
+        vessels = [v for v in vessels if in_shard(v.vessel_id, shard)]
     total_gaps = 0
+    plan = None
+    if incremental:
+        plan = plan_detector_run(db, GAP_CHECKPOINT, (v.vessel_id for v in vessels))
+        vessels = plan.select(vessels)
 
     dirty_vessel_ids: set[int] = set()
-    for vessel in vessels:
-        gaps = detect_gaps_for_vessel(db, vessel, date_from=date_from, date_to=date_to)
-        total_gaps += gaps
-        if gaps > 0:
-            dirty_vessel_ids.add(vessel.vessel_id)
+    if track_store is not None:
+        since = None if plan is None else {v.vessel_id: plan.since(v.vessel_id) for v in vessels}
+        counts = detect_gaps_for_fleet(db, vessels, date_from, date_to, track_store, since)
+        total_gaps = sum(counts.values())
+        dirty_vessel_ids = {vid for vid, gaps in counts.items() if gaps > 0}
+    else:
+        for vessel in vessels:
+            gaps = detect_gaps_for_vessel(
+                db,
+                vessel,
+                date_from=date_from,
+                date_to=date_to,
+                since=None if plan is None else plan.since(vessel.vessel_id),
+            )
+            total_gaps += gaps
+            if gaps > 0:
+                dirty_vessel_ids.add(vessel.vessel_id)
 
     # Mark vessels with new gaps as dirty for incremental scoring
     if dirty_vessel_ids:
         try:
-            from app.modules.incremental_scorer import mark_vessels_dirty_bulk
+            from app.modules.incremental_scorer import mark_vessel_dirty, mark_vessels_dirty_bulk
 
-            mark_vessels_dirty_bulk(db, dirty_vessel_ids)
+            if shard is None:
+                mark_vessels_dirty_bulk(db, dirty_vessel_ids)
+            else:
+                # Sharded workers only hand back ORM writes
+                for vessel_id in sorted(dirty_vessel_ids):
+                    mark_vessel_dirty(db, vessel_id)
             db.commit()
         except ImportError:
             pass  # incremental scorer not available
+    if plan is not None:
+        plan.advance()
+        db.commit()
 
     logger.info("Gap detection complete: %d gaps found across %d vessels", total_gaps, len(vessels))
     return {"gaps_detected": total_gaps, "vessels_processed": len(vessels)}
@@ -149,23 +189,37 @@ def detect_gaps_for_vessel(
     vessel: Vessel,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    since: datetime | None = None,
 ) -> int:
-    """Detect AIS gaps for a single vessel. Returns count of new gaps created."""
-    query = (
-        db.query(AISPoint)
-        .filter(AISPoint.vessel_id == vessel.vessel_id)
-        .order_by(AISPoint.timestamp_utc)
-    )
-    if date_from:
-        query = query.filter(
-            AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
-        )
-    if date_to:
-        query = query.filter(
-            AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
-        )
+    """Detect AIS gaps for a single vessel. Returns count of new gaps created.
+
+    ``since`` further narrows the scan to points at or after it.
+    """
+    if track_store is not None:
+        from app.modules.track_store import day_bounds
 
-    points = query.all()
+        start, end = day_bounds(date_from, date_to)
+        if since is not None:
+            start = since if start is None else max(start, since)
+        points = track_store.points(vessel.vessel_id, start, end)
+    else:
+        query = (
+            db.query(AISPoint)
+            .filter(AISPoint.vessel_id == vessel.vessel_id)
+            .order_by(AISPoint.timestamp_utc)
+        )
+        if date_from:
+            query = query.filter(
+                AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
+            )
+        if date_to:
+            query = query.filter(
+                AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
+            )
+        if since is not None:
+            query = query.filter(AISPoint.timestamp_utc >= since)
+        points = query.all()
     if len(points) < 2:
         return 0
 
@@ -197,58 +251,266 @@ def detect_gaps_for_vessel(
         if existing:
             continue
 
-        duration_minutes = int(delta_seconds / 60)
-        actual_distance = _haversine_nm(p1.lat, p1.lon, p2.lat, p2.lon)
-        duration_h = delta_seconds / 3600
-        max_distance = compute_max_distance_nm(vessel.deadweight, duration_h)
-        ratio = actual_distance / max_distance if max_distance > 0 else 0.0
+        _record_gap(db, vessel, p1, p2, delta_seconds)
+        gap_count += 1
+
+    db.commit()
+    return gap_count
+
+
+class _GapEnd(NamedTuple):
+    """Point attributes :func:`_record_gap` reads, as produced by the fleet scan."""
+
+    ais_point_id: int
+    timestamp_utc: datetime
+    lat: float
+    lon: float
+    sog: float | None
+
+
+def find_gap_candidates(columns: dict, min_gap_seconds: float, noise_seconds: float):
+    """Consecutive point pairs of every vessel that qualify as gaps, as a polars frame.
 
-        gap = AISGapEvent(
-            vessel_id=vessel.vessel_id,
-            original_vessel_id=vessel.vessel_id,  # forward provenance for scoring
-            start_point_id=p1.ais_point_id,
-            end_point_id=p2.ais_point_id,
-            gap_start_utc=p1.timestamp_utc,
-            gap_end_utc=p2.timestamp_utc,
-            duration_minutes=duration_minutes,
-            risk_score=0,  # scoring runs separately
-            status="new",
-            # Threshold is 1.1 (not PRD's 1.0) to tolerate minor GPS/timestamp rounding
-            # errors: AIS timestamps have 1-second resolution, and great-circle vs. actual
-            # sailing path differences can produce ratios up to ~1.05 for legitimate voyages.
-            # A 10% buffer prevents false positives on clean vessels while still catching
-            # physically impossible reappearances (ratio >> 1.1).
-            impossible_speed_flag=(ratio > 1.1),
-            velocity_plausibility_ratio=ratio,
-            max_plausible_distance_nm=max_distance,
-            actual_gap_distance_nm=actual_distance,
-            pre_gap_sog=p1.sog,  # captured at detection time for deterministic scoring
+    ``columns`` is :meth:`TrackStore.columns` output (rows contiguous per vessel,
+    time-ordered).  Each row is paired with the next one by a single shift; pairs
+    that cross a vessel boundary, fall under the Class B noise filter or are
+    shorter than ``min_gap_seconds`` are masked out.  Result columns:
+    ``vessel_id``, ``delta_s`` and ``start_``/``end_`` + ``ais_point_id``,
+    ``timestamp_utc``, ``lat``, ``lon``, ``sog`` (sog null when missing).
+    """
+    import numpy as np
+    import polars as pl
+
+    # The store's array buffers are wrapped without a per-value copy
+    frame = pl.DataFrame(
+        [pl.Series(name, np.frombuffer(col, dtype=col.typecode)) for name, col in columns.items()]
+    )
+    fields = ("ais_point_id", "ts_us", "lat", "lon", "sog")
+    pairs = frame.select(
+        "vessel_id",
+        *(pl.col(f).alias(f"start_{f}") for f in fields),
+        pl.col("vessel_id").shift(-1).alias("end_vessel_id"),
+        *(pl.col(f).shift(-1).alias(f"end_{f}") for f in fields),
+    ).with_columns(((pl.col("end_ts_us") - pl.col("start_ts_us")) / 1_000_000).alias("delta_s"))
+    return (
+        pairs.filter(
+            (pl.col("end_vessel_id") == pl.col("vessel_id"))
+            & (pl.col("delta_s") >= noise_seconds)
+            & (pl.col("delta_s") >= min_gap_seconds)
         )
-        db.add(gap)
-        db.flush()  # get gap_event_id
-        try:
-            from app.modules.corridor_correlator import (
-                find_corridor_for_gap,
-                find_dark_zone_for_gap,
+        .with_columns(
+            *(
+                pl.from_epoch(f"{side}_ts_us", time_unit="us").alias(f"{side}_timestamp_utc")
+                for side in ("start", "end")
+            ),
+            pl.col("start_sog").fill_nan(None),
+            pl.col("end_sog").fill_nan(None),
+        )
+        .drop("end_vessel_id", "start_ts_us", "end_ts_us")
+    )
+
+
+def _drop_recorded_gaps(db: Session, candidates):
+    """Candidates with no gap already recorded within ±10 min of their start.
+
+    Existing gaps of the candidate vessels are read in one query and matched
+    with a nearest as-of join.  Candidates of one vessel are never within the
+    window of each other unless ``GAP_MIN_HOURS`` is below 10 minutes; a
+    sequential pass then mirrors the per-vessel detector, which sees the gaps
+    it has just recorded.
+    """
+    import polars as pl
+    from sqlalchemy import select
+
+    window = timedelta(minutes=10)
+    if candidates.is_empty():
+        return candidates
+    vessel_ids = candidates["vessel_id"].unique().sort().to_list()
+    lo = candidates["start_timestamp_utc"].min() - window
+    hi = candidates["start_timestamp_utc"].max() + window
+    rows: list[tuple] = []
+    for i in range(0, len(vessel_ids), _IN_CHUNK):
+        stmt = select(AISGapEvent.vessel_id, AISGapEvent.gap_start_utc).where(
+            AISGapEvent.vessel_id.in_(vessel_ids[i : i + _IN_CHUNK]),
+            AISGapEvent.gap_start_utc >= lo,
+            AISGapEvent.gap_start_utc <= hi,
+        )
+        rows.extend(tuple(r) for r in db.execute(stmt))
+    fresh = candidates
+    if rows:
+        recorded = pl.DataFrame(
+            rows,
+            schema={"vessel_id": pl.Int64, "recorded_start": pl.Datetime("us")},
+            orient="row",
+        ).sort("recorded_start")
+        fresh = (
+            candidates.sort("start_timestamp_utc")
+            .join_asof(
+                recorded,
+                left_on="start_timestamp_utc",
+                right_on="recorded_start",
+                by="vessel_id",
+                strategy="nearest",
+                tolerance=window,
+                check_sortedness=False,
             )
+            .filter(pl.col("recorded_start").is_null())
+            .drop("recorded_start")
+        )
+    fresh = fresh.sort("vessel_id", "start_timestamp_utc")
+    if window.total_seconds() < settings.GAP_MIN_HOURS * 3600:
+        return fresh
+    keep: list[bool] = []
+    last: dict[int, datetime] = {}
+    for vid, start in zip(fresh["vessel_id"], fresh["start_timestamp_utc"], strict=True):
+        prev = last.get(vid)
+        keep.append(prev is None or start - prev > window)
+        if keep[-1]:
+            last[vid] = start
+    return fresh.filter(pl.Series(keep, dtype=pl.Boolean))
+
+
+def detect_gaps_for_fleet(
+    db: Session,
+    vessels: list[Vessel],
+    date_from: date | None = None,
+    date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    since: dict[int, datetime | None] | None = None,
+) -> dict[int, int]:
+    """Vectorized :func:`detect_gaps_for_vessel` over many vessels at once.
+
+    Time deltas, threshold masks, dedup against recorded gaps and the
+    distance/plausibility metrics are computed over the whole point set (see
+    :func:`find_gap_candidates`); only the surviving gaps are visited in Python
+    to be persisted.  ``since``
+    maps vessel_ids to the earliest gap start to report for them (None: any).
+    Returns new-gap counts keyed by vessel_id.
+    """
+    import polars as pl
 
-            corridor = find_corridor_for_gap(db, gap)
-            if corridor:
-                gap.corridor_id = corridor.corridor_id
-                if corridor.is_jamming_zone:
-                    gap.in_dark_zone = True
-            dark_zone = find_dark_zone_for_gap(db, gap)
-            if dark_zone:
-                gap.dark_zone_id = dark_zone.zone_id
-                gap.in_dark_zone = True
-        except ImportError:
-            logger.warning("Corridor correlator module not available — skipping")
+    from app.modules.track_store import TrackStore, day_bounds
+    from app.utils.geo import haversine_nm_expr
 
-        _create_movement_envelope(db, gap, vessel)
-        gap_count += 1
+    start, end = day_bounds(date_from, date_to)
+    if track_store is None:
+        track_store = TrackStore(db, start, end)
+    by_id = {v.vessel_id: v for v in vessels}
+    counts = dict.fromkeys(by_id, 0)
+
+    candidates = find_gap_candidates(
+        track_store.columns(start, end),
+        settings.GAP_MIN_HOURS * 3600,
+        settings.CLASS_B_NOISE_FILTER_SECONDS,
+    )
+    candidates = candidates.filter(candidates["vessel_id"].is_in(list(by_id)))
+    if since:
+        keep = [
+            since.get(vid) is None or start_ts >= since[vid]
+            for vid, start_ts in zip(
+                candidates["vessel_id"], candidates["start_timestamp_utc"], strict=True
+            )
+        ]
+        candidates = candidates.filter(pl.Series(keep, dtype=pl.Boolean))
+    max_speeds = pl.DataFrame(
+        {
+            "vessel_id": list(by_id),
+            "max_speed_kn": [_class_speed(v.deadweight)[0] for v in by_id.values()],
+        },
+        schema={"vessel_id": pl.Int64, "max_speed_kn": pl.Float64},
+    )
+    candidates = (
+        _drop_recorded_gaps(db, candidates)
+        .join(max_speeds, on="vessel_id", how="left", maintain_order="left")
+        .with_columns(
+            haversine_nm_expr("start_lat", "start_lon", "end_lat", "end_lon").alias(
+                "actual_distance_nm"
+            ),
+            (pl.col("max_speed_kn") * (pl.col("delta_s") / 3600)).alias("max_distance_nm"),
+        )
+        .with_columns(
+            pl.when(pl.col("max_distance_nm") > 0)
+            .then(pl.col("actual_distance_nm") / pl.col("max_distance_nm"))
+            .otherwise(0.0)
+            .alias("ratio")
+        )
+    )
+    for row in candidates.iter_rows(named=True):
+        p1, p2 = (
+            _GapEnd(*(row[f"{side}_{f}"] for f in _GapEnd._fields)) for side in ("start", "end")
+        )
+        metrics = (row["actual_distance_nm"], row["max_distance_nm"], row["ratio"])
+        _record_gap(db, by_id[row["vessel_id"]], p1, p2, row["delta_s"], metrics)
+        counts[row["vessel_id"]] += 1
 
     db.commit()
-    return gap_count
+    return counts
+
+
+def _record_gap(
+    db: Session,
+    vessel: Vessel,
+    p1,
+    p2,
+    delta_seconds: float,
+    metrics: tuple[float, float, float] | None = None,
+) -> AISGapEvent:
+    """Persist the gap p1 → p2 with plausibility metrics, corridor links and envelope.
+
+    ``metrics`` is ``(actual_distance_nm, max_distance_nm, ratio)`` when the
+    caller has already computed them; otherwise they are computed here.
+    """
+    duration_minutes = int(delta_seconds / 60)
+    if metrics is None:
+        actual_distance = _haversine_nm(p1.lat, p1.lon, p2.lat, p2.lon)
+        max_distance = compute_max_distance_nm(vessel.deadweight, delta_seconds / 3600)
+        ratio = actual_distance / max_distance if max_distance > 0 else 0.0
+    else:
+        actual_distance, max_distance, ratio = metrics
+
+    gap = AISGapEvent(
+        vessel_id=vessel.vessel_id,
+        original_vessel_id=vessel.vessel_id,  # forward provenance for scoring
+        start_point_id=p1.ais_point_id,
+        end_point_id=p2.ais_point_id,
+        gap_start_utc=p1.timestamp_utc,
+        gap_end_utc=p2.timestamp_utc,
+        duration_minutes=duration_minutes,
+        risk_score=0,  # scoring runs separately
+        status="new",
+        # Threshold is 1.1 (not PRD's 1.0) to tolerate minor GPS/timestamp rounding
+        # errors: AIS timestamps have 1-second resolution, and great-circle vs. actual
+        # sailing path differences can produce ratios up to ~1.05 for legitimate voyages.
+        # A 10% buffer prevents false positives on clean vessels while still catching
+        # physically impossible reappearances (ratio >> 1.1).
+        impossible_speed_flag=(ratio > 1.1),
+        velocity_plausibility_ratio=ratio,
+        max_plausible_distance_nm=max_distance,
+        actual_gap_distance_nm=actual_distance,
+        pre_gap_sog=p1.sog,  # captured at detection time for deterministic scoring
+    )
+    db.add(gap)
+    db.flush()  # get gap_event_id
+    try:
+        from app.modules.corridor_correlator import (
+            find_corridor_for_gap,
+            find_dark_zone_for_gap,
+        )
+
+        corridor = find_corridor_for_gap(db, gap)
+        if corridor:
+            gap.corridor_id = corridor.corridor_id
+            if corridor.is_jamming_zone:
+                gap.in_dark_zone = True
+        dark_zone = find_dark_zone_for_gap(db, gap)
+        if dark_zone:
+            gap.dark_zone_id = dark_zone.zone_id
+            gap.in_dark_zone = True
+    except ImportError:
+        logger.warning("Corridor correlator module not available — skipping")
+
+    _create_movement_envelope(db, gap, vessel)
+    return gap
 
 
 def _create_movement_envelope(db: Session, gap: AISGapEvent, vessel: Vessel) -> None:
@@ -340,6 +602,8 @@ def detect_stale_ais_data(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    incremental: bool = False,
 ) -> dict:
     """Detect repeating AIS data values (stale transponder data).
 
@@ -349,7 +613,8 @@ def detect_stale_ais_data(
     A stale transponder broadcasting frozen values while the vessel is moving
     is a strong indicator of AIS manipulation or hardware tampering.
 
-    Gated by STALE_AIS_DETECTION_ENABLED feature flag.
+    Gated by STALE_AIS_DETECTION_ENABLED feature flag.  ``incremental`` rescans
+    only vessels with new points (see :mod:`app.modules.detector_checkpoints`).
 
     Returns dict with count of anomalies detected.
     """
@@ -359,23 +624,44 @@ def detect_stale_ais_data(
     if not settings.STALE_AIS_DETECTION_ENABLED:
         return {"stale_ais_anomalies": 0, "skipped": True}
 
+    from app.modules.track_summary import load_track_summaries, may_have_points
+
     vessels = db.query(Vessel).filter(Vessel.merged_into_vessel_id.is_(None)).all()
     anomalies_created = 0
     _MIN_CONSECUTIVE = 10
     _MIN_SPAN_HOURS = 2.0
+    range_start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    range_end = datetime.combine(date_to, datetime.max.time()) if date_to else None
+    summaries = load_track_summaries(db)
+    plan = None
+    if incremental:
+        plan = plan_detector_run(db, STALE_CHECKPOINT, (v.vessel_id for v in vessels))
+        vessels = plan.select(vessels)
 
     for vessel in vessels:
-        q = (
-            db.query(AISPoint)
-            .filter(AISPoint.vessel_id == vessel.vessel_id)
-            .order_by(AISPoint.timestamp_utc)
-        )
-        if date_from:
-            q = q.filter(AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time()))
-        if date_to:
-            q = q.filter(AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time()))
-
-        points = q.all()
+        vessel_start = range_start if plan is None else plan.start(vessel.vessel_id, range_start)
+        # Skip vessels whose track summary rules out a long enough run in range
+        if not may_have_points(
+            summaries.get(vessel.vessel_id),
+            min_points=_MIN_CONSECUTIVE,
+            min_span=timedelta(hours=_MIN_SPAN_HOURS),
+            start=vessel_start,
+            end=range_end,
+        ):
+            continue
+        if track_store is not None:
+            points = track_store.points(vessel.vessel_id, vessel_start, range_end)
+        else:
+            q = (
+                db.query(AISPoint)
+                .filter(AISPoint.vessel_id == vessel.vessel_id)
+                .order_by(AISPoint.timestamp_utc)
+            )
+            if vessel_start:
+                q = q.filter(AISPoint.timestamp_utc >= vessel_start)
+            if range_end:
+                q = q.filter(AISPoint.timestamp_utc <= range_end)
+            points = q.all()
         if len(points) < _MIN_CONSECUTIVE:
             continue
 
@@ -480,15 +766,36 @@ def detect_stale_ais_data(
                         )
                         anomalies_created += 1
 
+    if plan is not None:
+        plan.advance()
     db.commit()
     logger.info("Stale AIS detection complete: %d anomalies detected", anomalies_created)
     return {"stale_ais_anomalies": anomalies_created}
 
 
+def _recorded_spoofing_keys(
+    db: Session, start: datetime | None, end: datetime | None
+) -> set[tuple[int, str, datetime]]:
+    """(vessel_id, anomaly_type, start_time_utc) of the spoofing anomalies in [start, end]."""
+    from app.models.spoofing_anomaly import SpoofingAnomaly
+
+    q = db.query(
+        SpoofingAnomaly.vessel_id, SpoofingAnomaly.anomaly_type, SpoofingAnomaly.start_time_utc
+    )
+    if start:
+        q = q.filter(SpoofingAnomaly.start_time_utc >= start)
+    if end:
+        q = q.filter(SpoofingAnomaly.start_time_utc <= end)
+    return {(vessel_id, anomaly_type, start_time) for vessel_id, anomaly_type, start_time in q}
+
+
 def run_spoofing_detection(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    incremental: bool = False,
+    shard: tuple[int, int] | None = None,
 ) -> dict:
     """
     Detect AIS spoofing anomalies.
@@ -499,27 +806,61 @@ def run_spoofing_detection(
     - slow_roll: 0.5<=SOG<=2.0 for >=12h, tanker type
     - mmsi_reuse: implied speed >30kn between consecutive points
     - nav_status_mismatch: nav_status=1 AND SOG>2kn
+
+    ``incremental`` rescans only vessels with new points, from 72h before them
+    (see :mod:`app.modules.detector_checkpoints`).  ``shard`` limits the run to
+    one vessel shard (see :mod:`app.modules.sharded_detection`).
     """
     from app.models.base import SpoofingTypeEnum
     from app.models.spoofing_anomaly import SpoofingAnomaly
     from app.models.vessel import Vessel
+    from app.modules.sharded_detection import in_shard
+    from app.modules.track_window import POSITION_TOLERANCE_DEG, TrackWindow
 
     vessels = db.query(Vessel).filter(Vessel.merged_into_vessel_id.is_(None)).all()
+    if shard is not None:
+        vessels = [v for v in vessels if in_shard(v.vessel_id, shard)]
     anomalies_created = 0
+    range_start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    range_end = datetime.combine(date_to, datetime.max.time()) if date_to else None
+    # (vessel_id, anomaly_type, start_time_utc) of every anomaly that may collide with a new one
+    recorded = _recorded_spoofing_keys(db, range_start, range_end)
+    plan = None
+    if incremental:
+        plan = plan_detector_run(db, SPOOFING_CHECKPOINT, (v.vessel_id for v in vessels))
+        vessels = plan.select(vessels)
+
+    def _add(anomaly: SpoofingAnomaly) -> None:
+        nonlocal anomalies_created
+        recorded.add((anomaly.vessel_id, anomaly.anomaly_type, anomaly.start_time_utc))
+        db.add(anomaly)
+        anomalies_created += 1
+
+    _circle_types = (
+        SpoofingTypeEnum.CIRCLE_SPOOF,
+        SpoofingTypeEnum.CIRCLE_SPOOF_STATIONARY,
+        SpoofingTypeEnum.CIRCLE_SPOOF_DELIBERATE,
+        SpoofingTypeEnum.CIRCLE_SPOOF_EQUIPMENT,
+    )
 
     for vessel in vessels:
-        q = (
-            db.query(AISPoint)
-            .filter(AISPoint.vessel_id == vessel.vessel_id)
-            .order_by(AISPoint.timestamp_utc)
-        )
-        if date_from:
-            q = q.filter(AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time()))
-        if date_to:
-            q = q.filter(AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time()))
-        points = q.all()
+        vessel_start = range_start if plan is None else plan.start(vessel.vessel_id, range_start)
+        if track_store is not None:
+            points = track_store.points(vessel.vessel_id, vessel_start, range_end)
+        else:
+            q = (
+                db.query(AISPoint)
+                .filter(AISPoint.vessel_id == vessel.vessel_id)
+                .order_by(AISPoint.timestamp_utc)
+            )
+            if vessel_start:
+                q = q.filter(AISPoint.timestamp_utc >= vessel_start)
+            if range_end:
+                q = q.filter(AISPoint.timestamp_utc <= range_end)
+            points = q.all()
         if len(points) < 2:
             continue
+        vid = vessel.vessel_id
 
         # --- Type 4: MMSI Reuse (implied speed) ---
         # Check between consecutive points for impossible implied speeds
@@ -531,22 +872,12 @@ def run_spoofing_detection(
             dist_nm = _haversine_nm(p1.lat, p1.lon, p2.lat, p2.lon)
             implied_speed = dist_nm / dt_h
             if implied_speed > 30:
-                # Check dedup
-                existing = (
-                    db.query(SpoofingAnomaly)
-                    .filter(
-                        SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                        SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.MMSI_REUSE,
-                        SpoofingAnomaly.start_time_utc == p1.timestamp_utc,
-                    )
-                    .first()
-                )
-                if existing:
+                if (vid, SpoofingTypeEnum.MMSI_REUSE, p1.timestamp_utc) in recorded:
                     continue
                 score = 55 if implied_speed > 100 else 40
-                db.add(
+                _add(
                     SpoofingAnomaly(
-                        vessel_id=vessel.vessel_id,
+                        vessel_id=vid,
                         anomaly_type=SpoofingTypeEnum.MMSI_REUSE,
                         start_time_utc=p1.timestamp_utc,
                         end_time_utc=p2.timestamp_utc,
@@ -555,21 +886,37 @@ def run_spoofing_detection(
                         evidence_json={"implied_speed_kn": implied_speed, "dist_nm": dist_nm},
                     )
                 )
-                anomalies_created += 1
 
         # --- Type 7: Dual Transmission Candidate ---
-        # Two positions from same MMSI with <30min delta but impossible speed (>30kn)
-        # within a 1h sliding window. Indicates two physical transmitters.
-        _DUAL_WINDOW_H = 1
+        # Two positions from same MMSI with <30min delta but impossible speed (>30kn).
+        # Indicates two physical transmitters.  Only partners up to 30 min after the
+        # anchor can qualify.  Slack is the distance travelled along the track minus the
+        # distance covered at 30 kn since the first point; the straight line between two
+        # points is never longer than the track between them, so a partner can only imply
+        # >30 kn if its slack exceeds the anchor's.
         _DUAL_MAX_DELTA_MIN = 30
+        _DUAL_MIN_SPEED_KN = 30
+        slack = [0.0] * len(points)
+        travelled = 0.0
+        for k in range(1, len(points)):
+            prev, cur = points[k - 1], points[k]
+            travelled += _haversine_nm(prev.lat, prev.lon, cur.lat, cur.lon)
+            elapsed_h = (cur.timestamp_utc - points[0].timestamp_utc).total_seconds() / 3600
+            slack[k] = travelled - elapsed_h * _DUAL_MIN_SPEED_KN
+        # Absorbs float rounding in the running sums and in haversine itself
+        slack_tolerance = 1e-6 + (travelled + abs(slack[-1])) * 1e-9
+        dual_window = TrackWindow(points, timedelta(minutes=_DUAL_MAX_DELTA_MIN), slack)
         for i in range(len(points)):
-            anchor_time = points[i].timestamp_utc
-            window_end = anchor_time + timedelta(hours=_DUAL_WINDOW_H)
-            for j in range(i + 1, len(points)):
-                if points[j].timestamp_utc > window_end:
-                    break
+            dual_window.slide(i)
+            if dual_window.max_value() <= slack[i] + slack_tolerance:
+                continue
+            # Beyond this delta even the farthest partner implies <= 30 kn
+            reach_s = dual_window.max_distance_nm() / _DUAL_MIN_SPEED_KN * 3600
+            for j in range(i + 1, dual_window.stop):
                 dt_s = (points[j].timestamp_utc - points[i].timestamp_utc).total_seconds()
-                if dt_s <= 0 or dt_s > _DUAL_MAX_DELTA_MIN * 60:
+                if dt_s >= reach_s:
+                    break
+                if dt_s <= 0:
                     continue
                 # Skip cross-source pairs within 120s — timing skew creates false alerts
                 pi_source = getattr(points[i], "source", None)
@@ -578,20 +925,12 @@ def run_spoofing_detection(
                     continue
                 dist_nm = _haversine_nm(points[i].lat, points[i].lon, points[j].lat, points[j].lon)
                 implied_speed = dist_nm / (dt_s / 3600)
-                if implied_speed > 30:
-                    existing_dual = (
-                        db.query(SpoofingAnomaly)
-                        .filter(
-                            SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                            SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.DUAL_TRANSMISSION,
-                            SpoofingAnomaly.start_time_utc == points[i].timestamp_utc,
-                        )
-                        .first()
-                    )
-                    if not existing_dual:
-                        db.add(
+                if implied_speed > _DUAL_MIN_SPEED_KN:
+                    key = (vid, SpoofingTypeEnum.DUAL_TRANSMISSION, points[i].timestamp_utc)
+                    if key not in recorded:
+                        _add(
                             SpoofingAnomaly(
-                                vessel_id=vessel.vessel_id,
+                                vessel_id=vid,
                                 anomaly_type=SpoofingTypeEnum.DUAL_TRANSMISSION,
                                 start_time_utc=points[i].timestamp_utc,
                                 end_time_utc=points[j].timestamp_utc,
@@ -604,25 +943,16 @@ def run_spoofing_detection(
                                 },
                             )
                         )
-                        anomalies_created += 1
                     break  # one detection per anchor point
 
         # --- Type 5: Nav Status Mismatch ---
         for p in points:
             if p.nav_status == 1 and p.sog is not None and p.sog > 2.0:
-                existing = (
-                    db.query(SpoofingAnomaly)
-                    .filter(
-                        SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                        SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.NAV_STATUS_MISMATCH,
-                        SpoofingAnomaly.start_time_utc == p.timestamp_utc,
-                    )
-                    .first()
-                )
-                if not existing:
-                    db.add(
+                key = (vid, SpoofingTypeEnum.NAV_STATUS_MISMATCH, p.timestamp_utc)
+                if key not in recorded:
+                    _add(
                         SpoofingAnomaly(
-                            vessel_id=vessel.vessel_id,
+                            vessel_id=vid,
                             anomaly_type=SpoofingTypeEnum.NAV_STATUS_MISMATCH,
                             start_time_utc=p.timestamp_utc,
                             end_time_utc=p.timestamp_utc,
@@ -630,7 +960,6 @@ def run_spoofing_detection(
                             evidence_json={"nav_status": p.nav_status, "sog": p.sog},
                         )
                     )
-                    anomalies_created += 1
 
         # --- Type 1: Anchor Spoof ---
         # Find runs where nav_status=1 for >=72h AND SOG<0.1 AND NOT near any port
@@ -648,64 +977,59 @@ def run_spoofing_detection(
                         mean_lon = sum(pt.lon for pt in anchor_run) / len(anchor_run)
                         near_port = _is_near_port(db, mean_lat, mean_lon)
                         in_anchorage = _is_in_anchorage_corridor(db, mean_lat, mean_lon)
-                        if not near_port and not in_anchorage:
-                            existing = (
-                                db.query(SpoofingAnomaly)
-                                .filter(
-                                    SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                                    SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.ANCHOR_SPOOF,
-                                    SpoofingAnomaly.start_time_utc == anchor_run[0].timestamp_utc,
+                        key = (vid, SpoofingTypeEnum.ANCHOR_SPOOF, anchor_run[0].timestamp_utc)
+                        if not near_port and not in_anchorage and key not in recorded:
+                            _add(
+                                SpoofingAnomaly(
+                                    vessel_id=vid,
+                                    anomaly_type=SpoofingTypeEnum.ANCHOR_SPOOF,
+                                    start_time_utc=anchor_run[0].timestamp_utc,
+                                    end_time_utc=anchor_run[-1].timestamp_utc,
+                                    risk_score_component=20,
+                                    evidence_json={
+                                        "run_hours": run_hours,
+                                        "mean_lat": mean_lat,
+                                        "mean_lon": mean_lon,
+                                    },
                                 )
-                                .first()
                             )
-                            if not existing:
-                                db.add(
-                                    SpoofingAnomaly(
-                                        vessel_id=vessel.vessel_id,
-                                        anomaly_type=SpoofingTypeEnum.ANCHOR_SPOOF,
-                                        start_time_utc=anchor_run[0].timestamp_utc,
-                                        end_time_utc=anchor_run[-1].timestamp_utc,
-                                        risk_score_component=20,
-                                        evidence_json={
-                                            "run_hours": run_hours,
-                                            "mean_lat": mean_lat,
-                                            "mean_lon": mean_lon,
-                                        },
-                                    )
-                                )
-                                anomalies_created += 1
                 anchor_run = []
 
         # --- Type 2: Circle Spoof ---
         # Time-based 6h sliding window anchored on each point's timestamp.
         # Collect all points within 6h forward of the anchor; require >= 6 points.
         # This handles irregular AIS intervals correctly (unlike fixed point-count windows).
+        # The window's running aggregates reject most anchors; the exact statistics are
+        # computed only for windows whose approximate spread is within tolerance.
         _CIRCLE_WINDOW_H = 6
         _CIRCLE_MIN_POINTS = 6
         if len(points) >= _CIRCLE_MIN_POINTS:
+            import math
+
+            circle_window = TrackWindow(points, timedelta(hours=_CIRCLE_WINDOW_H))
             for i in range(len(points)):
-                anchor_time = points[i].timestamp_utc
-                window_end_time = anchor_time + timedelta(hours=_CIRCLE_WINDOW_H)
-                window = [p for p in points[i:] if p.timestamp_utc <= window_end_time]
-                if len(window) < _CIRCLE_MIN_POINTS:
+                circle_window.slide(i)
+                if circle_window.count < _CIRCLE_MIN_POINTS:
                     continue
-                window_hours = (
-                    window[-1].timestamp_utc - window[0].timestamp_utc
-                ).total_seconds() / 3600
+                window_hours = circle_window.hours
                 if window_hours < 4 or window_hours > 8:
                     continue
-                sogs = [p.sog for p in window if p.sog is not None]
-                if not sogs or statistics.median(sogs) <= 3.0:
+                if not circle_window.sog_count or circle_window.median_sog() <= 3.0:
+                    continue
+                approx_cos = math.cos(math.radians(circle_window.mean_lat()))
+                approx_threshold = 0.02 / max(approx_cos, 0.3) + POSITION_TOLERANCE_DEG
+                if (
+                    circle_window.lat_stdev() >= approx_threshold
+                    or circle_window.lon_stdev() * approx_cos >= approx_threshold
+                ):
                     continue
+                window = circle_window.points()
+                sogs = [p.sog for p in window if p.sog is not None]
                 lats = [p.lat for p in window]
                 lons = [p.lon for p in window]
-                if len(lats) < 2:
-                    continue
                 std_lat = statistics.stdev(lats)
                 std_lon = statistics.stdev(lons)
                 # Correct for latitude
-                import math
-
                 mean_lat = statistics.mean(lats)
                 std_lon_corrected = std_lon * math.cos(math.radians(mean_lat))
                 # Scale threshold by latitude to prevent false positives at high latitudes
@@ -713,21 +1037,8 @@ def run_spoofing_detection(
                 threshold = 0.02 / lat_scale  # Caps at ~0.067° at very high latitudes
                 if std_lat < threshold and std_lon_corrected < threshold:  # noqa: SIM102
                     if not _is_near_port(db, mean_lat, statistics.mean(lons)):
-                        existing = (
-                            db.query(SpoofingAnomaly)
-                            .filter(
-                                SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                                SpoofingAnomaly.anomaly_type.in_([
-                                    SpoofingTypeEnum.CIRCLE_SPOOF,
-                                    SpoofingTypeEnum.CIRCLE_SPOOF_STATIONARY,
-                                    SpoofingTypeEnum.CIRCLE_SPOOF_DELIBERATE,
-                                    SpoofingTypeEnum.CIRCLE_SPOOF_EQUIPMENT,
-                                ]),
-                                SpoofingAnomaly.start_time_utc == window[0].timestamp_utc,
-                            )
-                            .first()
-                        )
-                        if not existing:
+                        start = window[0].timestamp_utc
+                        if not any((vid, t, start) in recorded for t in _circle_types):
                             # Classify the circle pattern sub-type
                             from app.modules.circle_classifier import (
                                 CLASSIFICATION_SCORES,
@@ -744,11 +1055,11 @@ def run_spoofing_detection(
                                 _circle_class, SpoofingTypeEnum.CIRCLE_SPOOF
                             )
                             _circle_score = CLASSIFICATION_SCORES.get(_circle_class, 35)
-                            db.add(
+                            _add(
                                 SpoofingAnomaly(
-                                    vessel_id=vessel.vessel_id,
+                                    vessel_id=vid,
                                     anomaly_type=_circle_enum,
-                                    start_time_utc=window[0].timestamp_utc,
+                                    start_time_utc=start,
                                     end_time_utc=window[-1].timestamp_utc,
                                     risk_score_component=_circle_score,
                                     evidence_json={
@@ -761,7 +1072,6 @@ def run_spoofing_detection(
                                     },
                                 )
                             )
-                            anomalies_created += 1
 
         # --- Type 6: Erratic Nav Status ---
         # Three sub-detectors (all use SpoofingTypeEnum.ERRATIC_NAV_STATUS):
@@ -771,61 +1081,38 @@ def run_spoofing_detection(
 
         # 6a: Non-overlapping 60-minute window scan
         _NAV_WINDOW_S = 3600
+        nav_window = TrackWindow(points, timedelta(seconds=_NAV_WINDOW_S))
         i = 0
         while i < len(points) - 1:
-            window_end = points[i].timestamp_utc + timedelta(seconds=_NAV_WINDOW_S)
-            window = [p for p in points[i:] if p.timestamp_utc <= window_end]
-            if len(window) >= 2:
-                status_values = [p.nav_status for p in window if p.nav_status is not None]
-                changes = sum(1 for a, b in zip(status_values, status_values[1:], strict=False) if a != b)
-                if changes >= 3:
-                    existing_erratic = (
-                        db.query(SpoofingAnomaly)
-                        .filter(
-                            SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                            SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.ERRATIC_NAV_STATUS,
-                            SpoofingAnomaly.start_time_utc == points[i].timestamp_utc,
-                        )
-                        .first()
-                    )
-                    if not existing_erratic:
-                        db.add(
-                            SpoofingAnomaly(
-                                vessel_id=vessel.vessel_id,
-                                anomaly_type=SpoofingTypeEnum.ERRATIC_NAV_STATUS,
-                                start_time_utc=points[i].timestamp_utc,
-                                end_time_utc=window[-1].timestamp_utc,
-                                risk_score_component=12,
-                                evidence_json={
-                                    "subtype": "erratic_changes",
-                                    "status_changes": changes,
-                                    "window_minutes": 60,
-                                },
-                            )
+            nav_window.slide(i)
+            if nav_window.count >= 2 and nav_window.status_changes >= 3:
+                key = (vid, SpoofingTypeEnum.ERRATIC_NAV_STATUS, points[i].timestamp_utc)
+                if key not in recorded:
+                    _add(
+                        SpoofingAnomaly(
+                            vessel_id=vid,
+                            anomaly_type=SpoofingTypeEnum.ERRATIC_NAV_STATUS,
+                            start_time_utc=points[i].timestamp_utc,
+                            end_time_utc=nav_window.last.timestamp_utc,
+                            risk_score_component=12,
+                            evidence_json={
+                                "subtype": "erratic_changes",
+                                "status_changes": nav_window.status_changes,
+                                "window_minutes": 60,
+                            },
                         )
-                        anomalies_created += 1
-                    # Advance past the ENTIRE continuous episode (all consecutive matching windows)
-                    # so that one continuous oscillation produces exactly one anomaly.
-                    episode_end_idx = max(
-                        idx for idx, p in enumerate(points) if p.timestamp_utc <= window_end
                     )
-                    while episode_end_idx + 1 < len(points) - 1:
-                        next_i = episode_end_idx + 1
-                        next_we = points[next_i].timestamp_utc + timedelta(seconds=_NAV_WINDOW_S)
-                        next_win = [p for p in points[next_i:] if p.timestamp_utc <= next_we]
-                        if len(next_win) >= 2:
-                            next_sv = [p.nav_status for p in next_win if p.nav_status is not None]
-                            next_ch = sum(1 for a, b in zip(next_sv, next_sv[1:], strict=False) if a != b)
-                            if next_ch >= 3:
-                                episode_end_idx = max(
-                                    idx
-                                    for idx, p in enumerate(points)
-                                    if p.timestamp_utc <= next_we
-                                )
-                                continue
-                        break
-                    i = episode_end_idx + 1
-                    continue
+                # Advance past the ENTIRE continuous episode (all consecutive matching windows)
+                # so that one continuous oscillation produces exactly one anomaly.
+                episode_end_idx = nav_window.stop - 1
+                while episode_end_idx + 1 < len(points) - 1:
+                    nav_window.slide(episode_end_idx + 1)
+                    if nav_window.count >= 2 and nav_window.status_changes >= 3:
+                        episode_end_idx = nav_window.stop - 1
+                        continue
+                    break
+                i = episode_end_idx + 1
+                continue
             i += 1
 
         # 6b + 6c: tanker-specific sub-types
@@ -844,51 +1131,35 @@ def run_spoofing_detection(
                         run_hours = (
                             restricted_run[-1].timestamp_utc - restricted_run[0].timestamp_utc
                         ).total_seconds() / 3600
-                        if run_hours >= 6:
-                            existing = (
-                                db.query(SpoofingAnomaly)
-                                .filter(
-                                    SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                                    SpoofingAnomaly.anomaly_type
-                                    == SpoofingTypeEnum.ERRATIC_NAV_STATUS,
-                                    SpoofingAnomaly.start_time_utc
-                                    == restricted_run[0].timestamp_utc,
+                        key = (
+                            vid,
+                            SpoofingTypeEnum.ERRATIC_NAV_STATUS,
+                            restricted_run[0].timestamp_utc,
+                        )
+                        if run_hours >= 6 and key not in recorded:
+                            _add(
+                                SpoofingAnomaly(
+                                    vessel_id=vid,
+                                    anomaly_type=SpoofingTypeEnum.ERRATIC_NAV_STATUS,
+                                    start_time_utc=restricted_run[0].timestamp_utc,
+                                    end_time_utc=restricted_run[-1].timestamp_utc,
+                                    risk_score_component=8,
+                                    evidence_json={
+                                        "subtype": "extended_restricted",
+                                        "hours": round(run_hours, 1),
+                                    },
                                 )
-                                .first()
                             )
-                            if not existing:
-                                db.add(
-                                    SpoofingAnomaly(
-                                        vessel_id=vessel.vessel_id,
-                                        anomaly_type=SpoofingTypeEnum.ERRATIC_NAV_STATUS,
-                                        start_time_utc=restricted_run[0].timestamp_utc,
-                                        end_time_utc=restricted_run[-1].timestamp_utc,
-                                        risk_score_component=8,
-                                        evidence_json={
-                                            "subtype": "extended_restricted",
-                                            "hours": round(run_hours, 1),
-                                        },
-                                    )
-                                )
-                                anomalies_created += 1
                     restricted_run = []
 
             # 6c: nav_status=15 on tanker
             for p in points:
                 if p.nav_status == 15:
-                    existing = (
-                        db.query(SpoofingAnomaly)
-                        .filter(
-                            SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                            SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.ERRATIC_NAV_STATUS,
-                            SpoofingAnomaly.start_time_utc == p.timestamp_utc,
-                        )
-                        .first()
-                    )
-                    if not existing:
-                        db.add(
+                    key = (vid, SpoofingTypeEnum.ERRATIC_NAV_STATUS, p.timestamp_utc)
+                    if key not in recorded:
+                        _add(
                             SpoofingAnomaly(
-                                vessel_id=vessel.vessel_id,
+                                vessel_id=vid,
                                 anomaly_type=SpoofingTypeEnum.ERRATIC_NAV_STATUS,
                                 start_time_utc=p.timestamp_utc,
                                 end_time_utc=p.timestamp_utc,
@@ -896,7 +1167,6 @@ def run_spoofing_detection(
                                 evidence_json={"subtype": "nav_status_15"},
                             )
                         )
-                        anomalies_created += 1
 
         # --- Type 3: Slow Roll ---
         is_tanker = is_tanker_type(vessel)
@@ -910,31 +1180,23 @@ def run_spoofing_detection(
                         run_hours = (
                             slow_run[-1].timestamp_utc - slow_run[0].timestamp_utc
                         ).total_seconds() / 3600
-                        if run_hours >= 12:  # noqa: SIM102
-                            if not any(_is_near_port(db, p.lat, p.lon) for p in slow_run):
-                                existing = (
-                                    db.query(SpoofingAnomaly)
-                                    .filter(
-                                        SpoofingAnomaly.vessel_id == vessel.vessel_id,
-                                        SpoofingAnomaly.anomaly_type == SpoofingTypeEnum.SLOW_ROLL,
-                                        SpoofingAnomaly.start_time_utc == slow_run[0].timestamp_utc,
+                        key = (vid, SpoofingTypeEnum.SLOW_ROLL, slow_run[0].timestamp_utc)
+                        if run_hours >= 12 and key not in recorded:  # noqa: SIM102
+                            if not _any_near_port(db, [(p.lat, p.lon) for p in slow_run]):
+                                _add(
+                                    SpoofingAnomaly(
+                                        vessel_id=vid,
+                                        anomaly_type=SpoofingTypeEnum.SLOW_ROLL,
+                                        start_time_utc=slow_run[0].timestamp_utc,
+                                        end_time_utc=slow_run[-1].timestamp_utc,
+                                        risk_score_component=12,
+                                        evidence_json={"run_hours": run_hours},
                                     )
-                                    .first()
                                 )
-                                if not existing:
-                                    db.add(
-                                        SpoofingAnomaly(
-                                            vessel_id=vessel.vessel_id,
-                                            anomaly_type=SpoofingTypeEnum.SLOW_ROLL,
-                                            start_time_utc=slow_run[0].timestamp_utc,
-                                            end_time_utc=slow_run[-1].timestamp_utc,
-                                            risk_score_component=12,
-                                            evidence_json={"run_hours": run_hours},
-                                        )
-                                    )
-                                    anomalies_created += 1
                     slow_run = []
 
+    if plan is not None:
+        plan.advance()
     db.commit()
 
     # Post-processing: link unlinked SpoofingAnomaly records to their closest overlapping gap
@@ -947,7 +1209,8 @@ def run_spoofing_detection(
     )
     linked_count = 0
     for anomaly in unlinked:
-        if anomaly.start_time_utc is None:
+        # A shard only links its own vessels' anomalies
+        if anomaly.start_time_utc is None or not in_shard(anomaly.vessel_id, shard):
             continue
         anomaly_end = anomaly.end_time_utc or anomaly.start_time_utc
         # Find gap events for this vessel that overlap temporally with the anomaly
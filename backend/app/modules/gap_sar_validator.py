@@ -19,6 +19,7 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.gap_event import AISGapEvent
 from app.models.stubs import DarkVesselDetection
+from app.modules.spatial_index import bbox_around, detection_filter
 from app.utils.geo import haversine_nm
 
 logger = logging.getLogger(__name__)
@@ -105,17 +106,16 @@ def validate_gaps_with_sar(
 
         pred_lat, pred_lon = predicted
 
-        # Query detections in time window around the gap
+        # Query detections in the time window and search box around the gap
         time_start = gap.gap_start_utc - timedelta(hours=time_window_h)
         time_end = gap.gap_end_utc + timedelta(hours=time_window_h)
 
         detections = (
             db.query(DarkVesselDetection)
             .filter(
-                DarkVesselDetection.detection_time_utc >= time_start,
-                DarkVesselDetection.detection_time_utc <= time_end,
-                DarkVesselDetection.detection_lat.isnot(None),
-                DarkVesselDetection.detection_lon.isnot(None),
+                detection_filter(
+                    db, bbox_around(pred_lat, pred_lon, search_radius), time_start, time_end
+                )
             )
             .all()
         )
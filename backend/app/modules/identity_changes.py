@@ -0,0 +1,245 @@
+"""Batched VesselHistory recording for identity-field changes.
+
+``ingest._track_field_change`` checks each change on its own: a latest-point
+query (rapid-change warning) and a ±24h VesselHistory dedup query, then an
+ORM add.  Ingest paths call it up to four times per row, so name / flag /
+callsign churn in a large file becomes thousands of round trips.
+
+``IdentityChangeBatch`` collects the changes of a whole batch instead and
+``flush`` writes them set-based:
+
+1. Drop changes repeating a kept (vessel, field, old, new) within 24h.
+2. One chunked query loads the existing history rows that can match (same
+   vessels and fields, within 24h of the batch's time span); changes with an
+   identical row within ±24h are dropped.
+3. The remaining rows are written with a single executemany, and the rapid-
+   change warning is logged for the rows actually inserted.
+
+The warning compares against the vessel's latest AIS point time captured when
+its first change is queued (once per vessel per batch), before the batch's own
+points are written.
+
+Dedup semantics are those of ``_track_field_change``: exact old/new value
+match (after ``strip``) within ±24h of ``observed_at``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.ais_point import AISPoint
+from app.models.vessel_history import VesselHistory
+
+logger = logging.getLogger(__name__)
+
+_DEDUP_WINDOW = timedelta(hours=24)
+_RAPID_CHANGE_HOURS = 24
+_IN_CHUNK = 900
+
+
+@dataclass(slots=True)
+class IdentityChange:
+    vessel_id: int
+    mmsi: str
+    field: str
+    old_value: str
+    new_value: str
+    observed_at: datetime
+    source: str
+    last_point_utc: datetime | None = None
+
+    @property
+    def key(self) -> tuple[int, str, str, str]:
+        return (self.vessel_id, self.field, self.old_value, self.new_value)
+
+
+def _chunks(seq: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+class IdentityChangeBatch:
+    """Collects identity changes and writes the new ones with set-based queries."""
+
+    def __init__(self) -> None:
+        self._changes: list[IdentityChange] = []
+        self._last_points: dict[int, datetime | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    def add(
+        self,
+        vessel,
+        field: str,
+        old_str: str,
+        new_str: str,
+        observed_at: datetime,
+        source: str,
+        db: Session | None = None,
+    ) -> None:
+        """Queue a change; values must already be stripped and known to differ.
+
+        With ``db`` the vessel's latest AIS point time is captured for the
+        rapid-change warning on its first queued change.
+        """
+        if observed_at.tzinfo is not None:
+            observed_at = observed_at.astimezone(UTC).replace(tzinfo=None)
+        vessel_id = vessel.vessel_id
+        if db is not None and vessel_id not in self._last_points:
+            self._last_points[vessel_id] = latest_point_time(db, vessel_id)
+        self._changes.append(
+            IdentityChange(
+                vessel_id,
+                vessel.mmsi,
+                field,
+                old_str,
+                new_str,
+                observed_at,
+                source,
+                self._last_points.get(vessel_id),
+            )
+        )
+
+    def flush(self, db: Session) -> int:
+        """Dedup the queued changes and insert the new ones. Returns rows written."""
+        changes, self._changes = self._changes, []
+        self._last_points = {}
+        if not changes:
+            return 0
+
+        fresh = self._dedup_in_batch(changes)
+        existing = _existing_history(db, fresh)
+        new: list[IdentityChange] = []
+        rows = []
+        for change in fresh:
+            seen = existing.get(change.key)
+            if seen and _within_window(seen, change.observed_at):
+                continue
+            new.append(change)
+            rows.append(
+                {
+                    "vessel_id": change.vessel_id,
+                    "field_changed": change.field,
+                    "old_value": change.old_value,
+                    "new_value": change.new_value,
+                    "observed_at": change.observed_at,
+                    "source": change.source,
+                }
+            )
+        if not rows:
+            return 0
+
+        try:
+            with db.begin_nested():
+                db.execute(insert(VesselHistory), rows)
+        except IntegrityError:
+            # A concurrent writer recorded some of these — insert one by one.
+            logger.info("Bulk VesselHistory insert conflicted; falling back to per-row inserts")
+            written = []
+            for change, row in zip(new, rows, strict=True):
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(VesselHistory), [row])
+                    written.append(change)
+                except IntegrityError:
+                    continue
+            _warn_rapid_changes(written)
+            return len(written)
+        _warn_rapid_changes(new)
+        return len(rows)
+
+    @staticmethod
+    def _dedup_in_batch(changes: list[IdentityChange]) -> list[IdentityChange]:
+        kept: list[IdentityChange] = []
+        kept_times: dict[tuple, list[datetime]] = {}
+        for change in changes:
+            times = kept_times.setdefault(change.key, [])
+            if _within_window(times, change.observed_at):
+                continue
+            bisect.insort(times, change.observed_at)
+            kept.append(change)
+        return kept
+
+
+def _within_window(sorted_times: list[datetime], ts: datetime) -> bool:
+    """True when some time in ``sorted_times`` lies within ±24h of ``ts``."""
+    i = bisect.bisect_left(sorted_times, ts - _DEDUP_WINDOW)
+    return i < len(sorted_times) and sorted_times[i] <= ts + _DEDUP_WINDOW
+
+
+def _existing_history(
+    db: Session, changes: list[IdentityChange]
+) -> dict[tuple[int, str, str, str], list[datetime]]:
+    """Sorted observed_at times of stored history rows that can dedup ``changes``."""
+    lo = min(c.observed_at for c in changes) - _DEDUP_WINDOW
+    hi = max(c.observed_at for c in changes) + _DEDUP_WINDOW
+    vessel_ids = sorted({c.vessel_id for c in changes})
+    fields = sorted({c.field for c in changes})
+    found: dict[tuple[int, str, str, str], list[datetime]] = {}
+    for chunk in _chunks(vessel_ids):
+        rows = db.execute(
+            select(
+                VesselHistory.vessel_id,
+                VesselHistory.field_changed,
+                VesselHistory.old_value,
+                VesselHistory.new_value,
+                VesselHistory.observed_at,
+            ).where(
+                VesselHistory.vessel_id.in_(chunk),
+                VesselHistory.field_changed.in_(fields),
+                VesselHistory.observed_at >= lo,
+                VesselHistory.observed_at <= hi,
+            )
+        )
+        for vid, field, old, new, observed_at in rows:
+            found.setdefault((vid, field, old, new), []).append(observed_at)
+    for times in found.values():
+        times.sort()
+    return found
+
+
+def latest_point_time(db: Session, vessel_id: int) -> datetime | None:
+    """Timestamp of the vessel's latest AIS point, from its track summary when present."""
+    from app.modules.track_summary import load_track_summaries
+
+    summary = load_track_summaries(db, [vessel_id]).get(vessel_id)
+    if summary is not None:
+        return summary.last_point_utc
+    last_point = (
+        db.query(AISPoint)
+        .filter(AISPoint.vessel_id == vessel_id)
+        .order_by(AISPoint.timestamp_utc.desc())
+        .first()
+    )
+    return last_point.timestamp_utc if last_point else None
+
+
+def _warn_rapid_changes(changes: list[IdentityChange]) -> None:
+    """Log changes observed within 24h of the vessel's latest AIS point."""
+    for change in changes:
+        last_ts = change.last_point_utc
+        if last_ts is None:
+            continue
+        try:
+            change_window_h = (change.observed_at - last_ts).total_seconds() / 3600
+            rapid = change_window_h < _RAPID_CHANGE_HOURS
+        except TypeError:
+            continue
+        if rapid:
+            logger.warning(
+                "MMSI %s: %s changed within %.1fh (%s → %s)",
+                change.mmsi,
+                change.field,
+                change_window_h,
+                change.old_value,
+                change.new_value,
+            )
@@ -20,6 +20,8 @@ from sqlalchemy.orm import Session
 from app.models.ais_point import AISPoint
 from app.models.vessel import Vessel
 from app.models.vessel_history import VesselHistory
+from app.modules.identity_changes import IdentityChangeBatch, latest_point_time
+from app.modules.point_state_cache import CachedPoint, VesselPointCache
 
 logger = logging.getLogger(__name__)
 
@@ -86,13 +88,37 @@ def _check_sog_class_limit(vessel: Vessel, sog: float | None) -> None:
             return
 
 
-def ingest_ais_csv(file: IOBase, db: Session) -> dict[str, Any]:
+def _row_source_timestamp(row: dict, point_ts: datetime | None) -> datetime | None:
+    """5C: Use source_timestamp if provided, otherwise fall back to the point timestamp."""
+    source_ts_raw = row.get("source_timestamp") or row.get("source_timestamp_utc")
+    return _try_parse_ts(source_ts_raw) if source_ts_raw else point_ts
+
+
+def _touch_last_received(vessel: Vessel, source_ts: datetime | None) -> None:
+    """H1: Advance vessel.last_ais_received_utc (never moves it backwards)."""
+    if source_ts is None:
+        return
+    try:
+        current = getattr(vessel, "last_ais_received_utc", None)
+        if current is None or not isinstance(current, datetime) or source_ts > current:
+            vessel.last_ais_received_utc = source_ts
+    except (TypeError, AttributeError):
+        vessel.last_ais_received_utc = source_ts
+
+
+def ingest_ais_csv(file: IOBase, db: Session, bulk: bool | None = None) -> dict[str, Any]:
     """
     Ingest AIS records from a CSV file object.
 
+    Args:
+        file: CSV file object (bytes or text).
+        db: Database session.
+        bulk: Use the set-based engine in ``app.modules.bulk_ingest`` instead of
+            the row-by-row path. ``None`` reads ``INGEST_BULK_ENABLED``.
+
     Returns a summary dict with counts of accepted, rejected, and duplicate records.
     """
-    from app.modules.normalize import normalize_ais_dataframe, validate_ais_row
+    from app.modules.normalize import normalize_ais_dataframe
 
     # 1.4: Handle UTF-8 BOM — read raw bytes first, strip BOM if present
     raw: Any = file.read() if hasattr(file, "read") else file
@@ -114,14 +140,65 @@ def ingest_ais_csv(file: IOBase, db: Session) -> dict[str, Any]:
     if missing:
         raise ValueError(f"CSV missing required columns: {missing}")
 
+    df_normalized = normalize_ais_dataframe(df)
+
+    if bulk is None:
+        from app.config import settings
+
+        bulk = getattr(settings, "INGEST_BULK_ENABLED", False)
+
+    if bulk:
+        from app.modules.bulk_ingest import ingest_normalized_frame
+
+        counts = ingest_normalized_frame(db, df_normalized)
+    else:
+        counts = _ingest_rows(db, df_normalized)
+
+    accepted = counts["accepted"]
+    rejected = counts["rejected"]
+    replaced_count = counts["replaced"]
+    ignored_count = counts["ignored"]
+    errors: list[str] = counts["errors"]
+
+    db.commit()
+    duplicates = replaced_count + ignored_count
+    logger.info(
+        "Ingestion complete: %d accepted, %d rejected, %d duplicates (replaced=%d, ignored=%d)",
+        accepted,
+        rejected,
+        duplicates,
+        replaced_count,
+        ignored_count,
+    )
+    return {
+        "accepted": accepted,
+        "rejected": rejected,
+        "duplicates": duplicates,
+        "replaced": replaced_count,
+        "ignored": ignored_count,
+        "errors": errors[:50],
+        "errors_truncated": len(errors) > 50,
+        "total_errors": len(errors),
+    }
+
+
+def _ingest_rows(db: Session, df_normalized: pl.DataFrame) -> dict[str, Any]:
+    """Row-by-row ingest path: one vessel lookup and point upsert per CSV row."""
+    from app.modules.normalize import validate_ais_row
+    from app.modules.point_state_cache import new_point_cache
+
+    identity_changes = IdentityChangeBatch()
+    point_cache = new_point_cache()
+    if point_cache is not None and "mmsi" in df_normalized.columns:
+        mmsis = df_normalized["mmsi"].cast(pl.Utf8).drop_nulls().str.strip_chars().str.zfill(9)
+        point_cache.warm_mmsis(db, mmsis.unique().to_list())
+
     accepted = 0
     rejected = 0
     replaced_count = 0
     ignored_count = 0
     errors: list[str] = []
 
-    df_normalized = normalize_ais_dataframe(df)
-
     for row in df_normalized.iter_rows(named=True):
         error = validate_ais_row(row)
         if error:
@@ -130,7 +207,7 @@ def ingest_ais_csv(file: IOBase, db: Session) -> dict[str, Any]:
             rejected += 1
             continue
 
-        vessel = _get_or_create_vessel(db, row)
+        vessel = _get_or_create_vessel(db, row, identity_changes)
         if vessel is None:
             # Timestamp was unparseable — skip the row
             logger.warning("Skipped row: unparseable timestamp | row: %s", row)
@@ -138,19 +215,12 @@ def ingest_ais_csv(file: IOBase, db: Session) -> dict[str, Any]:
             rejected += 1
             continue
         # H1: Update data freshness tracking
-        # 5C: Use source_timestamp if provided, otherwise fall back to point timestamp
-        point_ts = _parse_timestamp(row)
-        source_ts_raw = row.get("source_timestamp") or row.get("source_timestamp_utc")
-        source_ts = _try_parse_ts(source_ts_raw) if source_ts_raw else point_ts
-        if source_ts is not None:
-            try:
-                current = getattr(vessel, "last_ais_received_utc", None)
-                if current is None or not isinstance(current, datetime) or source_ts > current:
-                    vessel.last_ais_received_utc = source_ts
-            except (TypeError, AttributeError):
-                vessel.last_ais_received_utc = source_ts
+        source_ts = _row_source_timestamp(row, _parse_timestamp(row))
+        _touch_last_received(vessel, source_ts)
         _check_sog_class_limit(vessel, row.get("sog"))
-        result = _create_ais_point(db, vessel, row, source_timestamp=source_ts)
+        result = _create_ais_point(
+            db, vessel, row, source_timestamp=source_ts, point_cache=point_cache
+        )
         if result is None:
             ignored_count += 1
             continue
@@ -159,31 +229,22 @@ def ingest_ais_csv(file: IOBase, db: Session) -> dict[str, Any]:
             continue
         accepted += 1
 
-    db.commit()
-    duplicates = replaced_count + ignored_count
-    logger.info(
-        "Ingestion complete: %d accepted, %d rejected, %d duplicates (replaced=%d, ignored=%d)",
-        accepted,
-        rejected,
-        duplicates,
-        replaced_count,
-        ignored_count,
-    )
+    identity_changes.flush(db)
     return {
         "accepted": accepted,
         "rejected": rejected,
-        "duplicates": duplicates,
         "replaced": replaced_count,
         "ignored": ignored_count,
-        "errors": errors[:50],
-        "errors_truncated": len(errors) > 50,
-        "total_errors": len(errors),
+        "errors": errors,
     }
 
 
-def _get_or_create_vessel(db: Session, row: dict) -> Vessel | None:
+def _get_or_create_vessel(
+    db: Session, row: dict, changes: IdentityChangeBatch | None = None
+) -> Vessel | None:
     """Get or create a vessel record.
 
+    Identity changes are queued on ``changes`` when given (see ``_track_field_change``).
     Returns None if the timestamp cannot be parsed (row should be skipped).
     """
     mmsi = str(row["mmsi"]).strip().zfill(9)
@@ -192,35 +253,7 @@ def _get_or_create_vessel(db: Session, row: dict) -> Vessel | None:
         ts = _parse_timestamp(row)
         if ts is None:
             return None
-        from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
-
-        csv_flag = row.get("flag") or row.get("country")
-        flag = csv_flag or mmsi_to_flag(mmsi)
-        # Parse AIS cargo type from numeric ship_type code (5B)
-        _cargo_type_val = None
-        _ship_type_raw = (
-            row.get("ship_type") or row.get("vessel_type_code") or row.get("cargo_type")
-        )
-        if _ship_type_raw is not None:
-            try:
-                from app.modules.cargo_inference import parse_ais_cargo_type
-
-                _cargo_type_val = parse_ais_cargo_type(int(_ship_type_raw))
-            except (TypeError, ValueError):
-                pass
-        vessel = Vessel(
-            mmsi=mmsi,
-            imo=row.get("imo"),
-            name=row.get("vessel_name") or row.get("shipname"),
-            flag=flag,
-            flag_risk_category=flag_to_risk_category(flag),
-            vessel_type=row.get("vessel_type") or row.get("ship_type"),
-            deadweight=row.get("deadweight"),
-            ais_class=row.get("ais_class", "unknown"),
-            callsign=row.get("callsign"),
-            mmsi_first_seen_utc=ts,
-            ais_cargo_type=_cargo_type_val,
-        )
+        vessel = _new_vessel_from_row(mmsi, row, ts)
         try:
             db.add(vessel)
             db.flush()
@@ -235,6 +268,49 @@ def _get_or_create_vessel(db: Session, row: dict) -> Vessel | None:
     ts = _parse_timestamp(row)
     if ts is None:
         return None
+    _apply_vessel_row(db, vessel, row, ts, changes)
+    return vessel
+
+
+def _new_vessel_from_row(mmsi: str, row: dict, ts: datetime) -> Vessel:
+    """Build (but do not add) a Vessel from the first CSV row seen for an MMSI."""
+    from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
+
+    csv_flag = row.get("flag") or row.get("country")
+    flag = csv_flag or mmsi_to_flag(mmsi)
+    # Parse AIS cargo type from numeric ship_type code (5B)
+    _cargo_type_val = None
+    _ship_type_raw = row.get("ship_type") or row.get("vessel_type_code") or row.get("cargo_type")
+    if _ship_type_raw is not None:
+        try:
+            from app.modules.cargo_inference import parse_ais_cargo_type
+
+            _cargo_type_val = parse_ais_cargo_type(int(_ship_type_raw))
+        except (TypeError, ValueError):
+            pass
+    return Vessel(
+        mmsi=mmsi,
+        imo=row.get("imo"),
+        name=row.get("vessel_name") or row.get("shipname"),
+        flag=flag,
+        flag_risk_category=flag_to_risk_category(flag),
+        vessel_type=row.get("vessel_type") or row.get("ship_type"),
+        deadweight=row.get("deadweight"),
+        ais_class=row.get("ais_class", "unknown"),
+        callsign=row.get("callsign"),
+        mmsi_first_seen_utc=ts,
+        ais_cargo_type=_cargo_type_val,
+    )
+
+
+def _apply_vessel_row(
+    db: Session,
+    vessel: Vessel,
+    row: dict,
+    ts: datetime,
+    changes: IdentityChangeBatch | None = None,
+) -> None:
+    """Track identity changes for an existing vessel, then apply the row's mutable fields."""
     _track_field_change(
         db,
         vessel,
@@ -243,14 +319,24 @@ def _get_or_create_vessel(db: Session, row: dict) -> Vessel | None:
         row.get("vessel_name") or row.get("shipname"),
         ts,
         "ais_csv",
+        changes,
+    )
+    _track_field_change(
+        db,
+        vessel,
+        "flag",
+        vessel.flag,
+        row.get("flag") or row.get("country"),
+        ts,
+        "ais_csv",
+        changes,
     )
     _track_field_change(
-        db, vessel, "flag", vessel.flag, row.get("flag") or row.get("country"), ts, "ais_csv"
+        db, vessel, "ais_class", vessel.ais_class, row.get("ais_class"), ts, "ais_csv", changes
     )
     _track_field_change(
-        db, vessel, "ais_class", vessel.ais_class, row.get("ais_class"), ts, "ais_csv"
+        db, vessel, "callsign", vessel.callsign, row.get("callsign"), ts, "ais_csv", changes
     )
-    _track_field_change(db, vessel, "callsign", vessel.callsign, row.get("callsign"), ts, "ais_csv")
 
     # Update mutable fields
     new_name = row.get("vessel_name") or row.get("shipname")
@@ -296,8 +382,6 @@ def _get_or_create_vessel(db: Session, row: dict) -> Vessel | None:
 
         vessel.flag_risk_category = flag_to_risk_category(vessel.flag)
 
-    return vessel
-
 
 def _try_parse_ts(value) -> datetime | None:
     """Try to parse a timestamp value, returning None on failure.
@@ -344,31 +428,32 @@ def _track_field_change(
     new_val,
     observed_at: datetime,
     source: str,
+    changes: IdentityChangeBatch | None = None,
 ) -> None:
-    """Record a VesselHistory entry when an identity field changes."""
+    """Record a VesselHistory entry when an identity field changes.
+
+    With ``changes`` the entry is only queued; ``changes.flush(db)`` dedups and
+    writes the whole batch with set-based queries.
+    """
     if old_val is None or new_val is None:
         return
     old_str = str(old_val).strip()
     new_str = str(new_val).strip()
     if old_str and new_str and old_str.lower() != new_str.lower():
+        if changes is not None:
+            changes.add(vessel, field, old_str, new_str, observed_at, source, db=db)
+            return
         # Check how recent the last AIS point was to flag rapid changes
-        last_point = (
-            db.query(AISPoint)
-            .filter(AISPoint.vessel_id == vessel.vessel_id)
-            .order_by(AISPoint.timestamp_utc.desc())
-            .first()
-        )
-        if last_point:
+        last_point_utc = latest_point_time(db, vessel.vessel_id)
+        if last_point_utc:
             change_window_h = (
-                (observed_at - last_point.timestamp_utc).total_seconds() / 3600
+                (observed_at - last_point_utc).total_seconds() / 3600
                 if hasattr(observed_at, "total_seconds")
                 else 0
             )
-            if hasattr(observed_at, "__sub__") and hasattr(last_point.timestamp_utc, "__sub__"):
+            if hasattr(observed_at, "__sub__") and hasattr(last_point_utc, "__sub__"):
                 try:
-                    change_window_h = (
-                        observed_at - last_point.timestamp_utc
-                    ).total_seconds() / 3600
+                    change_window_h = (observed_at - last_point_utc).total_seconds() / 3600
                     if change_window_h < 24:
                         logger.warning(
                             "MMSI %s: %s changed within %.1fh (%s → %s)",
@@ -409,11 +494,74 @@ def _track_field_change(
         )
 
 
+def _point_values(
+    row: dict,
+) -> tuple[float | None, float | None, float | None, float | None, str | None]:
+    """Coerce a validated row's kinematic fields for storage.
+
+    Returns (sog, cog, heading, draught, destination).
+    """
+    # 1.2: SOG/COG default to None (not 0) when missing
+    sog_raw = row.get("sog")
+    cog_raw = row.get("cog")
+    sog_val = float(sog_raw) if sog_raw is not None else None
+    cog_val = float(cog_raw) if cog_raw is not None else None
+
+    # 1.1: Heading sentinel 511 → None
+    heading_raw = row.get("heading")
+    heading_val = None
+    if heading_raw is not None:
+        try:
+            h = float(heading_raw)
+            if h != 511:
+                heading_val = h
+        except (TypeError, ValueError):
+            heading_val = None
+
+    # Parse draught (manually entered, may be absent)
+    draught_raw = row.get("draught")
+    draught_val = float(draught_raw) if draught_raw is not None else None
+
+    # Parse destination (may be absent)
+    destination_raw = row.get("destination")
+    destination_val = str(destination_raw).strip()[:20] if destination_raw else None
+
+    return sog_val, cog_val, heading_val, draught_val, destination_val
+
+
+def _motion_deltas(
+    prev_sog: float | None,
+    prev_cog: float | None,
+    sog_val: float | None,
+    cog_val: float | None,
+) -> tuple[float | None, float | None]:
+    """Compute (sog_delta, cog_delta) against the previous point for the vessel."""
+    sog_delta = None
+    cog_delta = None
+    # 1.2: Handle None in delta computations
+    if prev_sog is not None and sog_val is not None:
+        sog_delta = round(sog_val - prev_sog, 2)
+    if prev_cog is not None and cog_val is not None:
+        # Normalize COG delta to [-180, 180] range
+        raw_cog_delta = cog_val - prev_cog
+        cog_delta = round(((raw_cog_delta + 180) % 360) - 180, 2)
+    return sog_delta, cog_delta
+
+
 def _create_ais_point(
-    db: Session, vessel: Vessel, row: dict, *, source_timestamp: datetime | None = None
+    db: Session,
+    vessel: Vessel,
+    row: dict,
+    *,
+    source_timestamp: datetime | None = None,
+    point_cache: VesselPointCache | None = None,
 ) -> AISPoint | str | None:
     """Create or replace an AIS point.
 
+    With ``point_cache`` the ±10s dedup and previous-point lookups are answered
+    from the cached recent points of the vessel; the database is queried only
+    when the cache cannot answer (e.g. out-of-order points).
+
     Returns:
         AISPoint if a new point was created,
         "replaced" if an existing point was updated with higher-quality data,
@@ -423,19 +571,14 @@ def _create_ais_point(
     if ts is None:
         return None
 
-    # Parse draught (manually entered, may be absent)
-    draught_raw = row.get("draught")
-    draught_val = float(draught_raw) if draught_raw is not None else None
-
-    # Parse destination (may be absent)
-    destination_raw = row.get("destination")
-    destination_val = str(destination_raw).strip()[:20] if destination_raw else None
+    sog_val, cog_val, heading_val, draught_val, destination_val = _point_values(row)
 
     # Dual-write: raw observation for cross-receiver comparison (no dedup)
     try:
-        from app.models.ais_observation import AISObservation
+        from app.modules.observation_store import add_observation
 
-        obs = AISObservation(
+        add_observation(
+            db,
             mmsi=str(vessel.mmsi),
             source=row.get("source", "csv_import") or "unknown",
             timestamp_utc=ts,
@@ -446,7 +589,6 @@ def _create_ais_point(
             heading=float(row["heading"]) if row.get("heading") is not None else None,
             draught=draught_val,
         )
-        db.add(obs)
     except Exception as e:
         logger.warning(
             "AIS observation dual-write failed for vessel %s (MMSI %s): %s",
@@ -455,38 +597,43 @@ def _create_ais_point(
             e,
         )
 
-    # 1.2: SOG/COG default to None (not 0) when missing
-    sog_raw = row.get("sog")
-    cog_raw = row.get("cog")
-    sog_val = float(sog_raw) if sog_raw is not None else None
-    cog_val = float(cog_raw) if cog_raw is not None else None
-
-    # 1.1: Heading sentinel 511 → None
-    heading_raw = row.get("heading")
-    heading_val = None
-    if heading_raw is not None:
-        try:
-            h = float(heading_raw)
-            if h != 511:
-                heading_val = h
-        except (TypeError, ValueError):
-            heading_val = None
+    cached = point_cache.neighbours(db, vessel.vessel_id, ts) if point_cache is not None else None
 
     # 4.4: Multi-receiver AIS dedup — skip if a point exists within ±10s
-    near_dup = (
-        db.query(AISPoint)
-        .filter(
-            AISPoint.vessel_id == vessel.vessel_id,
-            AISPoint.timestamp_utc >= ts - timedelta(seconds=10),
-            AISPoint.timestamp_utc <= ts + timedelta(seconds=10),
+    if cached is not None:
+        near_dup = cached[0]
+    else:
+        near_dup = (
+            db.query(AISPoint)
+            .filter(
+                AISPoint.vessel_id == vessel.vessel_id,
+                AISPoint.timestamp_utc >= ts - timedelta(seconds=10),
+                AISPoint.timestamp_utc <= ts + timedelta(seconds=10),
+            )
+            .first()
         )
-        .first()
-    )
     if near_dup:
         # Exact timestamp match → check source quality for potential replacement
         if near_dup.timestamp_utc == ts:
             new_source = row.get("source", "csv_import")
             if _is_higher_quality_source(new_source, near_dup.source):
+                cached_dup = near_dup if isinstance(near_dup, CachedPoint) else None
+                if cached_dup is not None:
+                    near_dup = cached_dup.orm_point or (
+                        db.query(AISPoint)
+                        .filter(
+                            AISPoint.vessel_id == vessel.vessel_id,
+                            AISPoint.timestamp_utc == ts,
+                            AISPoint.source == cached_dup.source,
+                        )
+                        .first()
+                    )
+                    if near_dup is None:
+                        return None
+                    cached_dup.source = new_source
+                    cached_dup.sog = sog_val
+                    cached_dup.cog = cog_val
+                    cached_dup.orm_point = near_dup
                 near_dup.lat = float(row["lat"])
                 near_dup.lon = float(row["lon"])
                 near_dup.sog = sog_val
@@ -501,6 +648,10 @@ def _create_ais_point(
                     near_dup.destination = destination_val
                 old_source = near_dup.source
                 near_dup.source = new_source
+                if point_cache is not None and cached_dup is None:
+                    point_cache.record(
+                        vessel.vessel_id, CachedPoint(ts, new_source, sog_val, cog_val, near_dup)
+                    )
                 logger.debug(
                     "Replaced AIS point (vessel=%s, ts=%s): %s > %s",
                     vessel.mmsi,
@@ -512,25 +663,22 @@ def _create_ais_point(
         return None  # multi-receiver dedup
 
     # Compute sog_delta and cog_delta from previous point for this vessel
-    prev_point = (
-        db.query(AISPoint)
-        .filter(
-            AISPoint.vessel_id == vessel.vessel_id,
-            AISPoint.timestamp_utc < ts,
+    if cached is not None:
+        prev_point = cached[1]
+    else:
+        prev_point = (
+            db.query(AISPoint)
+            .filter(
+                AISPoint.vessel_id == vessel.vessel_id,
+                AISPoint.timestamp_utc < ts,
+            )
+            .order_by(AISPoint.timestamp_utc.desc())
+            .first()
         )
-        .order_by(AISPoint.timestamp_utc.desc())
-        .first()
-    )
     sog_delta = None
     cog_delta = None
     if prev_point is not None:
-        # 1.2: Handle None in delta computations
-        if prev_point.sog is not None and sog_val is not None:
-            sog_delta = round(sog_val - prev_point.sog, 2)
-        if prev_point.cog is not None and cog_val is not None:
-            # Normalize COG delta to [-180, 180] range
-            raw_cog_delta = cog_val - prev_point.cog
-            cog_delta = round(((raw_cog_delta + 180) % 360) - 180, 2)
+        sog_delta, cog_delta = _motion_deltas(prev_point.sog, prev_point.cog, sog_val, cog_val)
 
     point = AISPoint(
         vessel_id=vessel.vessel_id,
@@ -551,6 +699,8 @@ def _create_ais_point(
         source_timestamp_utc=source_timestamp,
     )
     db.add(point)
+    if point_cache is not None:
+        point_cache.record(vessel.vessel_id, CachedPoint(ts, point.source, sog_val, cog_val, point))
 
     # Phase C dual-write: persist per-source AIS observation for cross-receiver detection.
     # Failures must not block main ingest — log and track error rate.
@@ -582,9 +732,10 @@ def _write_ais_observation(
         return
     mmsi = str(row["mmsi"]).strip().zfill(9)
     try:
-        from app.models.ais_observation import AISObservation
+        from app.modules.observation_store import add_observation
 
-        obs = AISObservation(
+        add_observation(
+            db,
             mmsi=mmsi,
             timestamp_utc=ts,
             lat=float(row["lat"]),
@@ -595,7 +746,6 @@ def _write_ais_observation(
             draught=draught_val,
             source=row.get("source", "csv_import"),
         )
-        db.add(obs)
     except Exception as e:
         _ais_observation_errors += 1
         logger.warning("Failed to write AIS observation for MMSI %s: %s", mmsi, e)
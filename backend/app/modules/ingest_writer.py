@@ -0,0 +1,551 @@
+"""Single-writer ingest service for the collection scheduler.
+
+``CollectionScheduler`` runs one thread per source.  When every collector
+opened its own session and committed its own small batches, the collectors
+spent most of their time waiting on SQLite's write lock (``busy_timeout``)
+instead of fetching.  With ``COLLECT_INGEST_WRITER_ENABLED`` the scheduler
+starts one ``IngestWriter`` instead:
+
+- Collectors normalize their positions to point dicts and ``submit`` them.
+  Submission only waits when the bounded queue is full (backpressure), never
+  on a database lock.
+- The writer thread takes everything queued (up to
+  ``COLLECT_INGEST_WRITER_MAX_POINTS``, lingering up to
+  ``COLLECT_INGEST_WRITER_LINGER_SECONDS`` for more) and writes it in ONE
+  transaction with ``write_point_batch``: vessels resolved with one IN query
+  against a cached MMSI -> vessel_id map, points deduplicated on
+  (vessel, timestamp) across all sources of the transaction and against the
+  database, and rows written with executemany.  If that transaction fails,
+  each submission is retried in its own transaction so one bad source
+  cannot fail the others.
+
+Collectors look up the running writer with ``get_ingest_writer()`` and fall
+back to writing through their own session when it returns None (CLI runs,
+tests, writer disabled).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identity fields a submission may fill on vessels that do not have them yet
+_FILL_FIELDS = {
+    "imo": "imo",
+    "callsign": "callsign",
+    "vessel_name": "name",
+    "vessel_type": "vessel_type",
+}
+
+
+# ── Set-based point writes ──────────────────────────────────────────────────
+
+
+def write_point_batch(
+    db: Session,
+    points: list[dict],
+    vessel_ids: dict[str, int],
+    *,
+    static_updates: dict[str, dict] | None = None,
+    default_source: str = "unknown",
+) -> dict[str, Any]:
+    """Write normalized AIS point dicts set-based.
+
+    Each point needs ``mmsi``, ``timestamp_utc`` (or ``timestamp``), ``lat`` and
+    ``lon``; ``source`` falls back to ``default_source``.  ``vessel_ids`` is the
+    caller's MMSI -> vessel_id map, kept across batches: MMSIs missing from it
+    are resolved with one IN query and new vessels are created in one flush.
+    ``static_updates`` (MMSI -> {destination, draught}) overrides per-point
+    voyage fields, as for aisstream ShipStaticData.
+
+    Points are deduplicated on (vessel, timestamp) — against the database with
+    one range query per vessel chunk, and within the batch (first submitted
+    wins, whatever its source) — then points, observations and forward-only
+    ``last_ais_received_utc`` updates are written with executemany.
+
+    Does NOT commit.  Returns {"points_stored": int, "stored_by_source": Counter}.
+    """
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+    from app.modules.bulk_ingest import _chunks
+    from app.modules.ingest import _parse_timestamp
+    from app.modules.observation_store import add_observations
+    from app.modules.pg_copy import insert_ais_points
+    from app.modules.track_summary import record_point_rows
+
+    static_updates = static_updates or {}
+    stored_by_source: Counter[str] = Counter()
+
+    parsed: list[tuple[str, datetime, dict]] = []
+    for pt in points:
+        ts = _parse_timestamp(pt)
+        if ts is not None:
+            parsed.append((str(pt["mmsi"]), ts, pt))
+    if not parsed:
+        return {"points_stored": 0, "stored_by_source": stored_by_source}
+
+    resolve_vessel_ids(db, parsed, vessel_ids, default_source=default_source)
+
+    lo = min(ts for _, ts, _ in parsed)
+    hi = max(ts for _, ts, _ in parsed)
+    seen: set[tuple[int, datetime]] = set()
+    for chunk in _chunks(sorted({vessel_ids[mmsi] for mmsi, _, _ in parsed})):
+        seen.update(
+            db.execute(
+                select(AISPoint.vessel_id, AISPoint.timestamp_utc).where(
+                    AISPoint.vessel_id.in_(chunk),
+                    AISPoint.timestamp_utc >= lo,
+                    AISPoint.timestamp_utc <= hi,
+                )
+            ).all()
+        )
+
+    point_rows: list[dict] = []
+    obs_rows: list[dict] = []
+    latest: dict[int, datetime] = {}
+    for mmsi, ts, pt in parsed:
+        vessel_id = vessel_ids[mmsi]
+        if latest.get(vessel_id) is None or ts > latest[vessel_id]:
+            latest[vessel_id] = ts
+        if (vessel_id, ts) in seen:
+            continue
+        seen.add((vessel_id, ts))
+
+        source = pt.get("source") or default_source
+        vessel_static = static_updates.get(mmsi, {})
+        draught_val = (
+            vessel_static.get("draught")
+            if vessel_static.get("draught") is not None
+            else (float(pt["draught"]) if pt.get("draught") is not None else None)
+        )
+        sog_val = float(pt["sog"]) if pt.get("sog") is not None else None
+        cog_val = float(pt["cog"]) if pt.get("cog") is not None else None
+        heading_val = (
+            float(pt["heading"]) if pt.get("heading") is not None and pt["heading"] != 511 else None
+        )
+        point_rows.append(
+            {
+                "vessel_id": vessel_id,
+                "timestamp_utc": ts,
+                "lat": float(pt["lat"]),
+                "lon": float(pt["lon"]),
+                "sog": sog_val,
+                "cog": cog_val,
+                "heading": heading_val,
+                "nav_status": pt.get("nav_status"),
+                "ais_class": pt.get("ais_class", "A"),
+                "source": source,
+                "destination": vessel_static.get("destination") or pt.get("destination") or None,
+                "draught": draught_val,
+            }
+        )
+        obs_rows.append(
+            {
+                "mmsi": mmsi,
+                "timestamp_utc": ts,
+                "lat": float(pt["lat"]),
+                "lon": float(pt["lon"]),
+                "sog": sog_val,
+                "cog": cog_val,
+                "heading": heading_val,
+                "draught": draught_val,
+                "source": source,
+            }
+        )
+        stored_by_source[source] += 1
+
+    if point_rows:
+        insert_ais_points(db, point_rows)
+        record_point_rows(db, point_rows)
+        add_observations(db, obs_rows)
+
+    _advance_last_received(db, Vessel.__table__.c.vessel_id, latest)
+    return {"points_stored": len(point_rows), "stored_by_source": stored_by_source}
+
+
+def advance_last_received(db: Session, latest: dict[str, datetime]) -> None:
+    """Freshness-only update: move ``last_ais_received_utc`` forward, keyed by MMSI.
+
+    For positions a collector received but did not store (e.g. downsampled).
+    Vessels not in the database are ignored.  Does NOT commit.
+    """
+    from app.models.vessel import Vessel
+
+    _advance_last_received(db, Vessel.__table__.c.mmsi, latest)
+
+
+def _advance_last_received(db: Session, key, latest: dict) -> None:
+    """Data freshness tracking: only ever move last_ais_received_utc forward."""
+    if not latest:
+        return
+    vessels = key.table
+    db.execute(
+        vessels.update()
+        .where(
+            key == bindparam("b_key"),
+            or_(
+                vessels.c.last_ais_received_utc.is_(None),
+                vessels.c.last_ais_received_utc < bindparam("b_ts"),
+            ),
+        )
+        .values(last_ais_received_utc=bindparam("b_ts")),
+        [{"b_key": k, "b_ts": ts} for k, ts in latest.items()],
+    )
+
+
+def resolve_vessel_ids(
+    db: Session,
+    parsed: list[tuple[str, datetime, dict]],
+    vessel_ids: dict[str, int],
+    *,
+    default_source: str = "unknown",
+) -> None:
+    """Add every MMSI of ``parsed`` to ``vessel_ids``, creating missing vessels.
+
+    New vessels take ``ais_source`` from the first point seen for them.
+    """
+    from app.models.vessel import Vessel
+    from app.modules.bulk_ingest import load_vessels_by_mmsi
+    from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
+
+    missing = [m for m in dict.fromkeys(mmsi for mmsi, _, _ in parsed) if m not in vessel_ids]
+    if not missing:
+        return
+    vessel_ids.update({m: v.vessel_id for m, v in load_vessels_by_mmsi(db, missing).items()})
+
+    pending: dict[str, Vessel] = {}
+    for mmsi, ts, pt in parsed:
+        if mmsi in vessel_ids or mmsi in pending:
+            continue
+        derived_flag = mmsi_to_flag(mmsi)
+        pending[mmsi] = Vessel(
+            mmsi=mmsi,
+            name=pt.get("vessel_name"),
+            flag=derived_flag,
+            flag_risk_category=flag_to_risk_category(derived_flag),
+            ais_class="A",
+            ais_source=pt.get("source") or default_source,
+            mmsi_first_seen_utc=ts,
+        )
+    if not pending:
+        return
+    try:
+        with db.begin_nested():
+            db.add_all(pending.values())
+            db.flush()
+    except IntegrityError:
+        # Another writer created some of these MMSIs — resolve one by one.
+        for mmsi, vessel in pending.items():
+            existing = db.query(Vessel).filter(Vessel.mmsi == mmsi).first()
+            if existing is None:
+                fresh = Vessel(
+                    mmsi=mmsi,
+                    name=vessel.name,
+                    flag=vessel.flag,
+                    flag_risk_category=vessel.flag_risk_category,
+                    ais_class="A",
+                    ais_source=vessel.ais_source,
+                    mmsi_first_seen_utc=vessel.mmsi_first_seen_utc,
+                )
+                with db.begin_nested():
+                    db.add(fresh)
+                    db.flush()
+                existing = fresh
+            vessel_ids[mmsi] = existing.vessel_id
+        return
+    vessel_ids.update({mmsi: v.vessel_id for mmsi, v in pending.items()})
+
+
+def fill_vessel_static(db: Session, static: dict[str, dict]) -> int:
+    """Fill empty identity fields (imo, callsign, name, type) from ``static``.
+
+    Never overwrites a value the vessel already has.  Returns vessels changed.
+    """
+    from app.modules.bulk_ingest import load_vessels_by_mmsi
+
+    changed = 0
+    for mmsi, vessel in load_vessels_by_mmsi(db, list(static)).items():
+        updated = False
+        for key, attr in _FILL_FIELDS.items():
+            value = static[mmsi].get(key)
+            if value and not getattr(vessel, attr):
+                setattr(vessel, attr, value)
+                updated = True
+        changed += updated
+    return changed
+
+
+def latest_point_times(db: Session, mmsis: list[str], source: str) -> dict[str, datetime]:
+    """MMSI -> timestamp of the vessel's latest point from ``source``.
+
+    One grouped read per chunk; used by collectors that downsample before
+    submitting (reads do not contend for the write lock).
+    """
+    from sqlalchemy import func
+
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+    from app.modules.bulk_ingest import _chunks
+
+    latest: dict[str, datetime] = {}
+    for chunk in _chunks(sorted(set(mmsis))):
+        latest.update(
+            db.execute(
+                select(Vessel.mmsi, func.max(AISPoint.timestamp_utc))
+                .join(AISPoint, AISPoint.vessel_id == Vessel.vessel_id)
+                .where(Vessel.mmsi.in_(chunk), AISPoint.source == source)
+                .group_by(Vessel.mmsi)
+            ).all()
+        )
+    return latest
+
+
+# ── Writer service ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class _Submission:
+    points: list[dict]
+    static: dict[str, dict]
+    # MMSI -> latest position time of points received but not submitted
+    freshness: dict[str, datetime] = field(default_factory=dict)
+    future: Future = field(default_factory=Future)
+
+
+class IngestWriter:
+    """Owns all point writes of the collectors; see the module docstring."""
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Session],
+        queue_batches: int | None = None,
+        max_points: int | None = None,
+        linger_seconds: float | None = None,
+    ):
+        self._db_factory = db_factory
+        self.max_points = max_points or settings.COLLECT_INGEST_WRITER_MAX_POINTS
+        self.linger_seconds = (
+            linger_seconds
+            if linger_seconds is not None
+            else settings.COLLECT_INGEST_WRITER_LINGER_SECONDS
+        )
+        self._queue: queue.Queue[_Submission | None] = queue.Queue(
+            maxsize=queue_batches or settings.COLLECT_INGEST_WRITER_QUEUE_BATCHES
+        )
+        self._thread: threading.Thread | None = None
+        self._vessel_ids: dict[str, int] | None = None
+        self._lock = threading.Lock()
+        self.stats: dict[str, Any] = {
+            "submissions": 0,
+            "points_submitted": 0,
+            "points_stored": Counter(),
+            "transactions": 0,
+            "errors": 0,
+            "last_commit_seconds": None,
+        }
+
+    # ── Lifecycle ───────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the writer thread and make it the active writer."""
+        global _active
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+        with _active_lock:
+            _active = self
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Write everything already submitted, then stop the thread."""
+        global _active
+        with _active_lock:
+            if _active is self:
+                _active = None
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=timeout)
+        if thread.is_alive():
+            logger.warning("Ingest writer did not drain within %.0fs", timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ── Producer side ───────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        points: list[dict],
+        static: dict[str, dict] | None = None,
+        freshness: dict[str, datetime] | None = None,
+    ) -> Future:
+        """Queue normalized points (and fill-if-empty static data) for writing.
+
+        ``freshness`` (MMSI -> position time) only advances the vessels'
+        ``last_ais_received_utc``, for positions the collector chose not to store.
+
+        Blocks only while the queue is full.  The returned future resolves to
+        True once the transaction holding the submission has committed, or to
+        the write's exception.
+        """
+        if not self.running:
+            raise RuntimeError("Ingest writer is not running")
+        sub = _Submission(
+            points=list(points), static=dict(static or {}), freshness=dict(freshness or {})
+        )
+        self._queue.put(sub)
+        with self._lock:
+            self.stats["submissions"] += 1
+            self.stats["points_submitted"] += len(sub.points)
+        return sub.future
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    # ── Writer side ─────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            n_points = len(first.points)
+            deadline = time.monotonic() + self.linger_seconds
+            while n_points < self.max_points:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+                n_points += len(nxt.points)
+            try:
+                self._write(batch)
+            except Exception as exc:
+                # e.g. the session factory failed — keep serving later submissions
+                logger.exception("Ingest writer: batch failed")
+                for sub in batch:
+                    if not sub.future.done():
+                        sub.future.set_exception(exc)
+
+    def _write(self, batch: list[_Submission]) -> None:
+        """Commit the batch in one transaction, or each submission alone if that fails.
+
+        The retry keeps one bad submission (unparseable values, a concurrent
+        insert conflict) from failing every collector's points in the batch.
+        Submissions are retried in order, so cross-source dedup still lets the
+        first submitted point win.
+        """
+        try:
+            self._commit(batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                self._fail(batch[0], exc)
+                return
+            logger.warning(
+                "Ingest writer: batch of %d submissions failed (%s); retrying one at a time",
+                len(batch),
+                exc,
+            )
+            for sub in batch:
+                try:
+                    self._commit([sub])
+                except Exception as sub_exc:
+                    self._fail(sub, sub_exc)
+                else:
+                    sub.future.set_result(True)
+            return
+        for sub in batch:
+            sub.future.set_result(True)
+
+    def _fail(self, sub: _Submission, exc: Exception) -> None:
+        logger.error("Ingest writer: submission of %d points failed: %s", len(sub.points), exc)
+        with self._lock:
+            self.stats["errors"] += 1
+        sub.future.set_exception(exc)
+
+    def _commit(self, batch: list[_Submission]) -> None:
+        """Write ``batch`` in one transaction; rolls back and re-raises on failure."""
+        points = [pt for sub in batch for pt in sub.points]
+        static: dict[str, dict] = {}
+        freshness: dict[str, datetime] = {}
+        for sub in batch:
+            for mmsi, values in sub.static.items():
+                static.setdefault(mmsi, {}).update({k: v for k, v in values.items() if v})
+            for mmsi, ts in sub.freshness.items():
+                if mmsi not in freshness or ts > freshness[mmsi]:
+                    freshness[mmsi] = ts
+
+        t0 = time.monotonic()
+        db = self._db_factory()
+        try:
+            if self._vessel_ids is None:
+                from app.models.vessel import Vessel
+
+                self._vessel_ids = dict(db.query(Vessel.mmsi, Vessel.vessel_id).all())
+            result = write_point_batch(db, points, self._vessel_ids)
+            if static:
+                fill_vessel_static(db, static)
+            advance_last_received(db, freshness)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Vessels created in the failed transaction are gone — rebuild the map
+            self._vessel_ids = None
+            raise
+        finally:
+            db.close()
+
+        elapsed = time.monotonic() - t0
+        with self._lock:
+            self.stats["transactions"] += 1
+            self.stats["points_stored"].update(result["stored_by_source"])
+            self.stats["last_commit_seconds"] = round(elapsed, 3)
+        logger.debug(
+            "Ingest writer: %d submissions, %d points -> %d stored in %.2fs",
+            len(batch),
+            len(points),
+            result["points_stored"],
+            elapsed,
+        )
+
+
+# ── Active writer ───────────────────────────────────────────────────────────
+
+_active: IngestWriter | None = None
+_active_lock = threading.Lock()
+
+
+def ingest_writer_enabled() -> bool:
+    return bool(getattr(settings, "COLLECT_INGEST_WRITER_ENABLED", False))
+
+
+def get_ingest_writer() -> IngestWriter | None:
+    """The running writer collectors should submit to, or None."""
+    writer = _active
+    if writer is not None and writer.running:
+        return writer
+    return None
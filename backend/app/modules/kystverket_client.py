@@ -151,13 +151,9 @@ def stream_kystverket(
                             )
 
                             if len(batch) >= batch_size:
-                                for pt in batch:
-                                    try:
-                                        _ingest_point(db, pt)
-                                        points_ingested += 1
-                                    except Exception:
-                                        errors += 1
-                                db.commit()
+                                stored, failed = _flush_batch(db, batch)
+                                points_ingested += stored
+                                errors += failed
                                 batch = []
                     except Exception:
                         errors += 1
@@ -170,14 +166,10 @@ def stream_kystverket(
                 break
 
         # Flush remaining batch
-        for pt in batch:
-            try:
-                _ingest_point(db, pt)
-                points_ingested += 1
-            except Exception:
-                errors += 1
         if batch:
-            db.commit()
+            stored, failed = _flush_batch(db, batch)
+            points_ingested += stored
+            errors += failed
 
         sock.close()
 
@@ -198,6 +190,36 @@ def stream_kystverket(
     }
 
 
+def _flush_batch(db: Session, batch: list[dict]) -> tuple[int, int]:
+    """Write a batch of points; returns (points handled, errors).
+
+    Under the collection scheduler the batch goes to the shared ingest writer
+    (Type 5 static data is applied fill-if-empty there too); otherwise each
+    point is ingested through ``db`` and the batch committed.
+    """
+    from app.modules.ingest_writer import get_ingest_writer
+
+    writer = get_ingest_writer()
+    if writer is not None:
+        static = {pt["mmsi"]: pt["static_data"] for pt in batch if pt.get("static_data")}
+        try:
+            writer.submit(batch, static=static)
+        except RuntimeError:
+            logger.warning("Kystverket: ingest writer stopped, dropping %d points", len(batch))
+            return 0, len(batch)
+        return len(batch), 0
+
+    stored = failed = 0
+    for pt in batch:
+        try:
+            _ingest_point(db, pt)
+            stored += 1
+        except Exception:
+            failed += 1
+    db.commit()
+    return stored, failed
+
+
 def _ingest_point(db: Session, pt: dict) -> None:
     """Ingest a single AIS point, creating the vessel if needed."""
     from sqlalchemy.exc import IntegrityError
@@ -273,9 +295,10 @@ def _ingest_point(db: Session, pt: dict) -> None:
 
     # Dual-write to AIS observations for cross-receiver detection
     try:
-        from app.models.ais_observation import AISObservation
+        from app.modules.observation_store import add_observation
 
-        obs = AISObservation(
+        add_observation(
+            db,
             mmsi=pt["mmsi"],
             timestamp_utc=pt["timestamp_utc"],
             lat=pt["lat"],
@@ -286,7 +309,6 @@ def _ingest_point(db: Session, pt: dict) -> None:
             draught=pt.get("draught"),
             source="kystverket",
         )
-        db.add(obs)
     except Exception:
         logger.debug("Kystverket observation write failed", exc_info=True)
 
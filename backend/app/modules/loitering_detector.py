@@ -19,6 +19,7 @@ from __future__ import annotations
 
 import logging
 from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
 
 import polars as pl
 from sqlalchemy.orm import Session
@@ -28,6 +29,10 @@ from app.models.corridor import Corridor
 from app.models.gap_event import AISGapEvent
 from app.models.loitering_event import LoiteringEvent
 from app.models.vessel import Vessel
+from app.modules.detector_checkpoints import DetectorSpec, plan_detector_run
+
+if TYPE_CHECKING:
+    from app.modules.track_store import TrackStore
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +64,15 @@ _GAP_LINK_WINDOW_HOURS: int = _settings.LOITER_GAP_LINKAGE_HOURS
 
 _MIN_POINTS: int = 4
 
+# Incremental-run checkpoint (see app.modules.detector_checkpoints): a vessel's
+# new points are rescanned with a sustained loiter's worth of earlier hours
+LOITERING_CHECKPOINT = DetectorSpec(
+    "loitering",
+    lookback=timedelta(hours=_SUSTAINED_LOITER_HOURS),
+    config_keys=("LOITER_GAP_LINKAGE_HOURS",),
+    params=dict(_LOITER_CFG),
+)
+
 
 def _get_min_hours_for_corridor(corridor) -> int:
     """Return corridor-type-specific minimum loitering hours."""
@@ -117,18 +131,16 @@ _LAID_UP_BBOX_DEG: float = _LOITER_CFG.get("laid_up_bbox_deg", 0.033)
 def _parse_corridor_bbox(corridor: Corridor) -> tuple[float, float, float, float] | None:
     """Extract (min_lat, max_lat, min_lon, max_lon) from a corridor's WKT geometry.
 
-    Returns None if the geometry is unavailable or cannot be parsed.
+    Returns None if the geometry is unavailable or holds no coordinates.  The
+    parse is shared with (and cached by) :mod:`app.modules.corridor_index`.
     """
-    from app.utils.geo import load_geometry
+    from app.modules.corridor_index import zone_geometry
 
-    try:
-        shape = load_geometry(corridor.geometry)
-        if shape is None:
-            return None
-        min_lon, min_lat, max_lon, max_lat = shape.bounds
-        return (min_lat, max_lat, min_lon, max_lon)
-    except (ValueError, TypeError, AttributeError):
+    geom = zone_geometry(corridor.geometry)
+    if geom is None:
         return None
+    min_lon, min_lat, max_lon, max_lat = geom.bounds
+    return (min_lat, max_lat, min_lon, max_lon)
 
 
 def _point_in_corridor(lat: float, lon: float, corridor: Corridor) -> bool:
@@ -201,6 +213,8 @@ def detect_loitering_for_vessel(
     vessel: Vessel,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    since: datetime | None = None,
 ) -> int:
     """Detect loitering events for a single vessel.
 
@@ -216,26 +230,40 @@ def detect_loitering_for_vessel(
         vessel: Vessel ORM instance to analyse.
         date_from: Inclusive start date filter (UTC).
         date_to: Inclusive end date filter (UTC).
+        track_store: Shared pipeline TrackStore to read points from, if any.
+        since: Only read points from this time on, floored to the hour so the
+            1-hour buckets line up with a full scan.
 
     Returns:
         Number of new LoiteringEvent rows created.
     """
     # ── 1. Query AIS points ────────────────────────────────────────────────────
-    query = (
-        db.query(AISPoint)
-        .filter(AISPoint.vessel_id == vessel.vessel_id)
-        .order_by(AISPoint.timestamp_utc)
-    )
-    if date_from:
-        query = query.filter(
-            AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
-        )
-    if date_to:
-        query = query.filter(
-            AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
+    if since is not None:
+        since = since.replace(minute=0, second=0, microsecond=0)
+    if track_store is not None:
+        from app.modules.track_store import day_bounds
+
+        start, end = day_bounds(date_from, date_to)
+        if since is not None:
+            start = since if start is None else max(start, since)
+        points = track_store.points(vessel.vessel_id, start, end)
+    else:
+        query = (
+            db.query(AISPoint)
+            .filter(AISPoint.vessel_id == vessel.vessel_id)
+            .order_by(AISPoint.timestamp_utc)
         )
-
-    points = query.all()
+        if date_from:
+            query = query.filter(
+                AISPoint.timestamp_utc >= datetime.combine(date_from, datetime.min.time())
+            )
+        if date_to:
+            query = query.filter(
+                AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
+            )
+        if since is not None:
+            query = query.filter(AISPoint.timestamp_utc >= since)
+        points = query.all()
     if len(points) < _MIN_POINTS:
         logger.debug(
             "Vessel %d (%s): only %d AIS points — skipping loitering detection",
@@ -423,6 +451,9 @@ def run_loitering_detection(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    incremental: bool = False,
+    shard: tuple[int, int] | None = None,
 ) -> dict:
     """Run loitering detection across all vessels.
 
@@ -430,18 +461,41 @@ def run_loitering_detection(
         db: SQLAlchemy sync session.
         date_from: Inclusive start date filter.
         date_to: Inclusive end date filter.
+        track_store: Shared pipeline TrackStore to read points from, if any.
+        incremental: Only rescan vessels with new AIS points, from
+            ``_SUSTAINED_LOITER_HOURS`` before them
+            (see :mod:`app.modules.detector_checkpoints`).
+        shard: Only process one vessel shard
+            (see :mod:`app.modules.sharded_detection`).
 
     Returns:
         {"loitering_events_created": N, "vessels_processed": M}
     """
     vessels = db.query(Vessel).all()
+    if shard is not None:
+        from app.modules.sharded_detection import in_shard
+
+        vessels = [v for v in vessels if in_shard(v.vessel_id, shard)]
     total_events = 0
+    plan = None
+    if incremental:
+        plan = plan_detector_run(db, LOITERING_CHECKPOINT, (v.vessel_id for v in vessels))
+        vessels = plan.select(vessels)
 
     for vessel in vessels:
         try:
-            n = detect_loitering_for_vessel(db, vessel, date_from=date_from, date_to=date_to)
+            n = detect_loitering_for_vessel(
+                db,
+                vessel,
+                date_from=date_from,
+                date_to=date_to,
+                track_store=track_store,
+                since=None if plan is None else plan.since(vessel.vessel_id),
+            )
             total_events += n
         except Exception as exc:
+            if plan is not None:
+                plan.skip(vessel.vessel_id)
             logger.exception(
                 "Loitering detection failed for vessel %d (%s): %s",
                 vessel.vessel_id,
@@ -449,6 +503,10 @@ def run_loitering_detection(
                 exc,
             )
 
+    if plan is not None:
+        plan.advance()
+        db.commit()
+
     logger.info(
         "Loitering detection complete: %d events created across %d vessels",
         total_events,
@@ -490,10 +548,22 @@ def detect_laid_up_vessels(db: Session) -> dict:
         all_corridors = []
         sts_corridors = []
 
+    from app.modules.track_summary import load_track_summaries, may_have_points
+
     vessels = db.query(Vessel).all()
+    summaries = load_track_summaries(db)
     updated_count = 0
 
     for vessel in vessels:
+        # Needs points on _LAID_UP_30D_DAYS distinct UTC days, so a track
+        # spanning under _LAID_UP_30D_DAYS - 2 full days cannot qualify
+        if not may_have_points(
+            summaries.get(vessel.vessel_id),
+            min_points=_LAID_UP_30D_DAYS,
+            min_span=timedelta(days=_LAID_UP_30D_DAYS - 2),
+        ):
+            continue
+
         # ── 1. Load all AIS points for this vessel ─────────────────────────────
         points = (
             db.query(AISPoint)
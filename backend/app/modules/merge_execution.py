@@ -423,6 +423,13 @@ def execute_merge(
     # 6. Reassign AIS points (largest table — bulk SQL)
     ais_result = _reassign_ais_points(db, canonical_id, absorbed_id)
     affected["ais_points"] = ais_result
+    if ais_result["count"]:
+        from app.modules.detector_checkpoints import reset_checkpoints
+        from app.modules.track_summary import rebuild_track_summaries
+
+        rebuild_track_summaries(db, {canonical_id, absorbed_id})
+        # The canonical vessel now owns points its checkpoints never covered
+        reset_checkpoints(db, vessel_ids={canonical_id, absorbed_id})
 
     # 7. Update canonical vessel metadata
     _update_canonical_metadata(db, canonical, absorbed)
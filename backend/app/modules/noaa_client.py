@@ -13,12 +13,17 @@ from __future__ import annotations
 import csv
 import io
 import logging
+import shutil
+import tempfile
 import zipfile
-from datetime import UTC, date, timedelta
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, date, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
 import httpx
+import polars as pl
 
 from app.config import settings
 from app.modules.circuit_breakers import breakers
@@ -42,27 +47,15 @@ def _url_for_date(d: date) -> str:
 
 def _build_corridor_bbox(db) -> tuple[float, float, float, float] | None:
     """Build a merged bounding box from all corridors (±1° buffer)."""
-    from app.models.corridor import Corridor
-    from app.modules.gfw_client import _extract_bbox_from_wkt
+    from app.modules.corridor_index import corridor_index
 
-    corridors = db.query(Corridor).filter(Corridor.geometry.isnot(None)).all()
-    if not corridors:
-        return None
-
-    all_lats = []
-    all_lons = []
-    for c in corridors:
-        bbox = _extract_bbox_from_wkt(c.geometry)
-        if bbox:
-            lat_min, lon_min, lat_max, lon_max = bbox
-            all_lats.extend([lat_min, lat_max])
-            all_lons.extend([lon_min, lon_max])
-
-    if not all_lats:
+    bounds = corridor_index(db).bounds()
+    if bounds is None:
         return None
 
+    min_lon, min_lat, max_lon, max_lat = bounds
     # ±1° buffer
-    return (min(all_lats) - 1.0, min(all_lons) - 1.0, max(all_lats) + 1.0, max(all_lons) + 1.0)
+    return (min_lat - 1.0, min_lon - 1.0, max_lat + 1.0, max_lon + 1.0)
 
 
 def _point_in_bbox(lat: float, lon: float, bbox: tuple[float, float, float, float]) -> bool:
@@ -160,6 +153,7 @@ def import_noaa_file(
     filepath: Path,
     db,
     corridor_filter: bool = True,
+    bulk: bool | None = None,
 ) -> dict[str, int]:
     """Import AIS positions from a NOAA file into the database.
 
@@ -167,6 +161,8 @@ def import_noaa_file(
         filepath: Path to ZIP or .csv.zst file.
         db: SQLAlchemy session.
         corridor_filter: If True, only import points within corridor bboxes.
+        bulk: Use the lazy polars reader with bulk inserts instead of the
+            row-by-row path. ``None`` reads ``INGEST_BULK_ENABLED``.
 
     Returns import statistics dict.
     """
@@ -186,6 +182,16 @@ def import_noaa_file(
     if corridor_filter and bbox is None:
         logger.warning("No corridors loaded — importing all positions (no geo-filter)")
 
+    if bulk is None:
+        bulk = getattr(settings, "INGEST_BULK_ENABLED", False)
+    if bulk:
+        return _import_noaa_file_lazy(filepath, db, bbox, stats)
+
+    from app.modules.identity_changes import IdentityChangeBatch
+    from app.modules.point_state_cache import new_point_cache
+
+    identity_changes = IdentityChangeBatch()
+    point_cache = new_point_cache()
     lines = _decompress_csv_lines(filepath)
     reader = csv.DictReader(lines)
 
@@ -220,11 +226,11 @@ def import_noaa_file(
 
         # Import via existing ingest pipeline
         try:
-            vessel = _get_or_create_vessel(db, normalized)
+            vessel = _get_or_create_vessel(db, normalized, identity_changes)
             if vessel is None:
                 stats["rejected"] += 1
                 continue
-            result = _create_ais_point(db, vessel, normalized)
+            result = _create_ais_point(db, vessel, normalized, point_cache=point_cache)
             if result is None:
                 stats["duplicates"] += 1
             else:
@@ -236,6 +242,7 @@ def import_noaa_file(
 
         batch_count += 1
         if batch_count % _BATCH_SIZE == 0:
+            identity_changes.flush(db)
             db.commit()
             if stats["total_rows"] % 50000 == 0:
                 logger.info(
@@ -244,11 +251,185 @@ def import_noaa_file(
                     stats["accepted"],
                 )
 
+    identity_changes.flush(db)
     db.commit()
     logger.info("NOAA import complete: %s", stats)
     return stats
 
 
+# ---------------------------------------------------------------------------
+# Lazy (polars) import path
+# ---------------------------------------------------------------------------
+
+# Columns the ingest pipeline reads as numbers; everything else stays a string
+# exactly as csv.DictReader would hand it over.
+_NOAA_NUMERIC_COLUMNS = ("lat", "lon", "sog", "cog", "heading")
+
+
+@contextmanager
+def _csv_sources(filepath: Path) -> Iterator[list[Path]]:
+    """Yield plain CSV paths for a NOAA file, decompressing to a temp dir if needed."""
+    name = filepath.name
+    if not (name.endswith(".zip") or name.endswith(".csv.zst")):
+        yield [filepath]
+        return
+
+    with tempfile.TemporaryDirectory(dir=filepath.parent) as tmp:
+        tmp_dir = Path(tmp)
+        paths: list[Path] = []
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(filepath) as zf:
+                csv_names = [n for n in zf.namelist() if n.endswith(".csv")]
+                if not csv_names:
+                    raise ValueError(f"No CSV files in ZIP: {filepath}")
+                for i, csv_name in enumerate(csv_names):
+                    out = tmp_dir / f"{i}.csv"
+                    with zf.open(csv_name) as src, open(out, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                    paths.append(out)
+        else:
+            import zstandard as zstd
+
+            out = tmp_dir / "0.csv"
+            with open(filepath, "rb") as f, open(out, "wb") as dst:
+                zstd.ZstdDecompressor().copy_stream(f, dst)
+            paths.append(out)
+        yield paths
+
+
+def _noaa_row_status(columns: set[str], bbox: tuple[float, float, float, float] | None) -> pl.Expr:
+    """Classify each row as "rejected", "filtered_geo" or "ok" with column expressions.
+
+    Mirrors the row path's order of checks: rows that normalize_noaa_row or
+    the lat/lon float parse would drop are rejected first, then the corridor
+    bbox filter, then the cheap parts of validate_ais_row.  Survivors are
+    still passed through validate_ais_row, so this is a pre-filter and never
+    accepts a row the row path would reject.
+    """
+    from app.modules.normalize import _TEST_MMSIS
+
+    lat, lon, ts = pl.col("lat"), pl.col("lon"), pl.col("timestamp_utc")
+    unparsed = ts.is_null() | lat.is_null() | lon.is_null()
+
+    in_bbox = pl.lit(True)
+    if bbox:
+        in_bbox = lat.is_between(bbox[0], bbox[2]) & lon.is_between(bbox[1], bbox[3])
+
+    mmsi = pl.col("mmsi").str.strip_chars().str.zfill(9)
+    valid = (
+        mmsi.str.contains(r"^\d{9}$")
+        & ~mmsi.str.contains(r"^(97\d|99|00)")
+        & ~mmsi.is_in(sorted(_TEST_MMSIS))
+        & lat.is_between(-90, 90)
+        & lon.is_between(-180, 180)
+        & (ts >= datetime(2010, 1, 1))
+        & (ts <= datetime.now(UTC).replace(tzinfo=None) + timedelta(days=7))
+    )
+    for col in ("sog", "cog"):
+        if col in columns:
+            # A non-empty value that is not a number is rejected by validate_ais_row
+            valid &= pl.col(col).is_not_null() | pl.col(f"_{col}_raw").is_null()
+    if "sog" in columns:
+        sog = pl.col("sog")
+        valid &= sog.is_null() | ((sog >= 0) & ((sog <= 35) | (sog >= 102.2)))
+    if "heading" in columns:
+        heading = pl.col("heading")
+        valid &= heading.is_null() | (heading == 511) | heading.is_between(0, 360)
+
+    return (
+        pl.when(unparsed)
+        .then(pl.lit("rejected"))
+        .when(~in_bbox)
+        .then(pl.lit("filtered_geo"))
+        .when(~valid.fill_null(False))
+        .then(pl.lit("rejected"))
+        .otherwise(pl.lit("ok"))
+    )
+
+
+def _scan_noaa_csv(
+    path: Path, bbox: tuple[float, float, float, float] | None
+) -> pl.LazyFrame | None:
+    """Lazy scan of one NOAA CSV with canonical columns and a ``_status`` column.
+
+    Returns None when the file lacks a required column (every row rejected).
+    """
+    from app.modules.normalize import noaa_column_name, parse_timestamp_column
+
+    lf = pl.scan_csv(path, infer_schema=False)
+    lf = lf.rename({c: noaa_column_name(c) for c in lf.collect_schema().names()})
+    columns = set(lf.collect_schema().names())
+    if not {"mmsi", "lat", "lon", "timestamp_utc"} <= columns:
+        return None
+
+    numeric = [c for c in _NOAA_NUMERIC_COLUMNS if c in columns]
+    exprs = [
+        pl.col("timestamp_utc").map_batches(parse_timestamp_column, return_dtype=pl.Datetime("us")),
+        *(pl.col(c).str.strip_chars().cast(pl.Float64, strict=False) for c in numeric),
+        *(pl.col(c).alias(f"_{c}_raw") for c in ("sog", "cog") if c in columns),
+    ]
+    if "imo" in columns:
+        # NOAA uses "IMO9869693"; keep only well-formed 7-digit numbers
+        imo = pl.col("imo").str.strip_chars().str.strip_prefix("IMO ").str.strip_prefix("IMO")
+        exprs.append(pl.when(imo.str.contains(r"^\d{7}$")).then(imo).alias("imo"))
+    lf = lf.with_columns(exprs)
+    return lf.with_columns(_noaa_row_status(columns, bbox).alias("_status"))
+
+
+def _import_noaa_file_lazy(
+    filepath: Path,
+    db,
+    bbox: tuple[float, float, float, float] | None,
+    stats: dict[str, int],
+) -> dict[str, int]:
+    """Lazy polars import: filter as column expressions, bulk-insert the survivors.
+
+    The bbox and validation filters run inside a streaming polars scan, so only
+    the rows that survive them are materialized; those go through
+    ``bulk_ingest.ingest_normalized_frame`` in ``_BATCH_SIZE`` slices, each
+    committed on its own.
+    """
+    from app.modules.bulk_ingest import ingest_normalized_frame
+
+    with _csv_sources(filepath) as paths:
+        for path in paths:
+            lf = _scan_noaa_csv(path, bbox)
+            if lf is None:
+                n_rows = pl.scan_csv(path, infer_schema=False).select(pl.len()).collect().item()
+                stats["total_rows"] += n_rows
+                stats["rejected"] += n_rows
+                continue
+
+            counts, survivors = pl.collect_all(
+                [
+                    lf.group_by("_status").len(),
+                    lf.filter(pl.col("_status") == "ok").drop(pl.col("^_.*$")),
+                ],
+                engine="streaming",
+            )
+            by_status = dict(counts.iter_rows())
+            stats["total_rows"] += sum(by_status.values())
+            stats["rejected"] += by_status.get("rejected", 0)
+            stats["filtered_geo"] += by_status.get("filtered_geo", 0)
+
+            for offset in range(0, survivors.height, _BATCH_SIZE):
+                result = ingest_normalized_frame(db, survivors.slice(offset, _BATCH_SIZE))
+                db.commit()
+                # Source-quality replacements count as accepted, as in the row path
+                stats["accepted"] += result["accepted"] + result["replaced"]
+                stats["rejected"] += result["rejected"]
+                stats["duplicates"] += result["ignored"]
+                logger.info(
+                    "NOAA import progress: %d/%d surviving rows processed, %d accepted",
+                    min(offset + _BATCH_SIZE, survivors.height),
+                    survivors.height,
+                    stats["accepted"],
+                )
+
+    logger.info("NOAA import complete: %s", stats)
+    return stats
+
+
 def fetch_and_import_noaa(
     db,
     start_date: date,
@@ -13,6 +13,8 @@ from typing import Any
 import polars as pl
 from unidecode import unidecode
 
+from app.utils.timestamps import naive_utc
+
 # ── Owner name normalization ─────────────────────────────────────────────────
 # Corporate suffixes to strip before comparison
 _SUFFIX_RE = re.compile(
@@ -61,6 +63,26 @@ _COMMON_TIMESTAMP_FORMATS = [
     "%d-%m-%Y %H:%M:%S",
 ]
 
+# Numeric timestamps above this are epoch milliseconds (1e11 s is the year 5138)
+_EPOCH_MS_THRESHOLD = 100_000_000_000
+
+# Columnar format candidates, in detection priority order.  Each entry is
+# (chrono format, suffix stripped before parsing).  "%#z" accepts both "Z"
+# and "+hh:mm" offsets; "%.f" is optional, so whole seconds match too.  The
+# month-first strftime variants precede the day-first ones, matching the
+# order parse_timestamp_flexible tries them in.
+_COLUMN_TIMESTAMP_FORMATS: list[tuple[str, str]] = [
+    ("%Y-%m-%dT%H:%M:%S%.f%#z", ""),
+    ("%Y-%m-%dT%H:%M:%S%.f", ""),
+    ("%Y-%m-%d %H:%M:%S%.f%#z", ""),
+    ("%Y-%m-%d %H:%M:%S%.f", ""),
+    *((fmt, "") for fmt in _COMMON_TIMESTAMP_FORMATS),
+    # Go-style: "2024-12-29 18:22:32.318353147 +0000 UTC"
+    ("%Y-%m-%d %H:%M:%S%.f %z", " UTC"),
+]
+
+_TIMESTAMP_SAMPLE_SIZE = 200
+
 # Test/invalid MMSIs that should always be rejected
 _TEST_MMSIS = frozenset({"111111111", "123456789", "000000000"})
 
@@ -96,8 +118,10 @@ def parse_timestamp_flexible(ts: Any) -> datetime | None:
     if isinstance(ts, datetime):
         return ts
 
-    # Unix epoch (int or float)
+    # Unix epoch (int or float); values above 1e11 are epoch milliseconds
     if isinstance(ts, (int, float)) and ts > 1_000_000_000:
+        if ts > _EPOCH_MS_THRESHOLD:
+            ts = ts / 1000
         try:
             return datetime.fromtimestamp(ts, tz=UTC)
         except (OSError, ValueError, OverflowError):
@@ -146,6 +170,86 @@ def parse_timestamp_flexible(ts: Any) -> datetime | None:
     return None
 
 
+def _strptime_column(values: pl.Series, fmt: str, suffix: str) -> pl.Series:
+    """Parse a stripped string column with one format; failures become null."""
+    if suffix:
+        values = values.str.strip_suffix(suffix)
+    parsed = values.str.strptime(pl.Datetime("us"), fmt, strict=False, exact=True)
+    if parsed.dtype.time_zone is not None:  # type: ignore[union-attr]
+        parsed = parsed.dt.convert_time_zone("UTC").dt.replace_time_zone(None)
+    return parsed
+
+
+def _detect_timestamp_format(sample: pl.Series, dayfirst: bool | None) -> tuple[str, str] | None:
+    """Pick the candidate format that parses the most sample values."""
+    candidates = list(_COLUMN_TIMESTAMP_FORMATS)
+    if dayfirst:
+        # Ambiguous d/m vs m/d samples tie; prefer the day-first variant.
+        candidates.sort(key=lambda c: not c[0].startswith("%d"))
+    best: tuple[str, str] | None = None
+    best_hits = 0
+    for fmt, suffix in candidates:
+        hits = sample.len() - _strptime_column(sample, fmt, suffix).null_count()
+        if hits > best_hits:
+            best, best_hits = (fmt, suffix), hits
+            if hits == sample.len():
+                break
+    return best
+
+
+def parse_timestamp_column(values: pl.Series, *, dayfirst: bool | None = None) -> pl.Series:
+    """Parse a whole column of timestamps into naive-UTC ``Datetime("us")``.
+
+    Columnar counterpart of parse_timestamp_flexible.  String columns have
+    their format detected from a sample of non-empty values and are parsed
+    in one vectorized pass; only the values that format misses go through
+    parse_timestamp_flexible one at a time.  ``dayfirst=True`` breaks d/m vs
+    m/d ties in favour of day-first (DMA exports).  Numeric columns are
+    treated as Unix epoch seconds, or milliseconds above 1e11.  Unparseable
+    values are null.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pl.Datetime):
+        if dtype.time_zone is not None:
+            values = values.dt.convert_time_zone("UTC").dt.replace_time_zone(None)
+        return values.cast(pl.Datetime("us"))
+
+    if dtype.is_numeric():
+        secs = values.cast(pl.Float64)
+        secs = (
+            pl.when(secs > _EPOCH_MS_THRESHOLD)
+            .then(secs / 1000)
+            .when(secs > 1_000_000_000)
+            .then(secs)
+            .otherwise(None)
+        )
+        return (
+            values.to_frame()
+            .select((secs * 1_000_000).round().cast(pl.Int64).cast(pl.Datetime("us")))
+            .to_series()
+            .alias(values.name)
+        )
+
+    if dtype != pl.Utf8:
+        parsed_list = [naive_utc(parse_timestamp_flexible(v)) for v in values.to_list()]
+        return pl.Series(values.name, parsed_list, dtype=pl.Datetime("us"))
+
+    stripped = values.str.strip_chars()
+    present = stripped.filter(stripped.str.len_chars() > 0)
+    fmt = _detect_timestamp_format(present.head(_TIMESTAMP_SAMPLE_SIZE), dayfirst)
+    if fmt is None:
+        parsed = pl.Series(values.name, [None] * values.len(), dtype=pl.Datetime("us"))
+    else:
+        parsed = _strptime_column(stripped, *fmt).alias(values.name)
+
+    # Per-value fallback for non-empty strings the detected format missed
+    missed = (parsed.is_null() & stripped.is_not_null() & (stripped.str.len_chars() > 0)).arg_true()
+    if missed.len():
+        fallback = [naive_utc(parse_timestamp_flexible(v)) for v in values.gather(missed).to_list()]
+        parsed = parsed.scatter(missed, pl.Series(fallback, dtype=pl.Datetime("us")))
+    return parsed
+
+
 def normalize_ais_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     """Rename and coerce columns to canonical field names."""
     rename_map = {
@@ -185,11 +289,10 @@ def normalize_ais_dataframe(df: pl.DataFrame) -> pl.DataFrame:
     if actual_renames:
         df = df.rename(actual_renames)
 
-    # Cast timestamp column if it exists and is string
-    if "timestamp" in df.columns and df["timestamp"].dtype == pl.Utf8:
-        df = df.with_columns(pl.col("timestamp").alias("timestamp_utc"))
-    elif "timestamp" in df.columns:
-        df = df.rename({"timestamp": "timestamp_utc"})
+    # Parse the timestamp column in one vectorized pass.  The raw value stays
+    # in "timestamp" so rows that fail to parse still report what they held.
+    if "timestamp" in df.columns:
+        df = df.with_columns(parse_timestamp_column(df["timestamp"]).alias("timestamp_utc"))
 
     return df
 
@@ -340,19 +443,21 @@ _NOAA_ALIASES: dict[str, str] = {
 }
 
 
+def noaa_column_name(key: str) -> str:
+    """Map a NOAA CSV header (any case, possibly BOM-prefixed) to its canonical name."""
+    lower_key = key.strip().lower()
+    canonical = _NOAA_ALIASES.get(lower_key, lower_key)
+    # Strip BOM from first column name
+    return canonical.lstrip("\ufeff")
+
+
 def normalize_noaa_row(row: dict[str, Any]) -> dict[str, Any] | None:
     """Normalize a single NOAA CSV row to canonical field names.
 
     Returns normalized dict or None if the row is invalid.
     """
     # Case-insensitive key mapping
-    normalized: dict[str, Any] = {}
-    for key, value in row.items():
-        lower_key = key.strip().lower()
-        canonical = _NOAA_ALIASES.get(lower_key, lower_key)
-        # Strip BOM from first column name
-        canonical = canonical.lstrip("\ufeff")
-        normalized[canonical] = value
+    normalized: dict[str, Any] = {noaa_column_name(key): value for key, value in row.items()}
 
     # Ensure required fields exist
     if "mmsi" not in normalized or "lat" not in normalized or "lon" not in normalized:
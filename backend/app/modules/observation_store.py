@@ -0,0 +1,382 @@
+"""Append-only Parquet store for raw AIS observations.
+
+The ``ais_observations`` table receives one row per position report from
+every source (several per accepted point) and is only ever read in bulk by
+``cross_receiver_detector``.  With ``AIS_OBSERVATION_STORE_ENABLED`` the
+writers hand observations to this store instead of the primary database:
+
+- Rows are buffered in memory and flushed as immutable Parquet segments
+  (``AIS_OBSERVATION_STORE_FLUSH_ROWS`` rows or ``_FLUSH_SECONDS`` old),
+  one segment per UTC day of ``timestamp_utc`` under ``day=YYYY-MM-DD/``.
+- Segments are sorted by (mmsi, timestamp_utc) so Parquet row-group
+  statistics prune MMSI and time predicates.
+- Each segment has a JSON sidecar with its row count and timestamp /
+  received / MMSI ranges; reads skip segments the sidecars rule out before
+  touching any Parquet file.  The segment list is the directory listing, so
+  processes sharing the directory (scheduler, CLI, ws-worker) never rewrite
+  a common file and cannot drop each other's segments.
+- Retention drops whole segments whose newest ``received_utc`` is older
+  than the cutoff — segments are never rewritten.
+
+``add_observation`` / ``add_observations`` are the write entry points for
+all collectors and importers; ``load_observations`` is the read entry point.
+Both fall back to the ``ais_observations`` table when the store is off, and
+reads also include any rows still in the table while the store is on.
+With the store on, observations are held on the session and only reach the
+store once its transaction commits, so a rolled-back ingest leaves no rows.
+
+``AIS_OBSERVATION_STORE_DIR`` must be shared by every process that ingests
+or runs detection; docker-compose mounts the ``appdata`` volume for this.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import polars as pl
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.config import settings
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA: dict[str, pl.DataType] = {
+    "mmsi": pl.Utf8(),
+    "source": pl.Utf8(),
+    "received_utc": pl.Datetime("us"),
+    "timestamp_utc": pl.Datetime("us"),
+    "lat": pl.Float64(),
+    "lon": pl.Float64(),
+    "sog": pl.Float64(),
+    "cog": pl.Float64(),
+    "heading": pl.Float64(),
+    "draught": pl.Float64(),
+    "raw_data": pl.Utf8(),
+}
+# Session.info key holding observations waiting for the session to commit
+_PENDING_KEY = "observation_store_pending"
+
+
+class StoredObservation(NamedTuple):
+    """Read-side observation record; attribute-compatible with AISObservation."""
+
+    mmsi: str
+    source: str
+    received_utc: datetime
+    timestamp_utc: datetime
+    lat: float
+    lon: float
+    sog: float | None
+    cog: float | None
+    heading: float | None
+    draught: float | None
+    raw_data: str | None
+
+
+def _prepare(row: dict[str, Any], now: datetime) -> dict[str, Any]:
+    if row.get("timestamp_utc") is None or row.get("mmsi") is None:
+        raise ValueError(f"Observation requires mmsi and timestamp_utc: {row!r}")
+    rec = {col: row.get(col) for col in _SCHEMA}
+    rec["mmsi"] = str(rec["mmsi"])
+    rec["source"] = rec["source"] or "unknown"
+    rec["timestamp_utc"] = naive_utc(rec["timestamp_utc"])
+    rec["received_utc"] = naive_utc(rec["received_utc"]) or now
+    return rec
+
+
+class ObservationStore:
+    """Buffered writer and stats-pruned reader over a directory of segments."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        flush_rows: int = 20_000,
+        flush_seconds: float = 60.0,
+    ) -> None:
+        self.root = Path(root)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._buffer: list[dict[str, Any]] = []
+        self._buffer_since = time.monotonic()
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+
+    def append(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Buffer observations; flushes once the buffer is large or old enough."""
+        now = datetime.now(UTC).replace(tzinfo=None)
+        prepared = [_prepare(row, now) for row in rows]
+        with self._lock:
+            if not self._buffer:
+                self._buffer_since = time.monotonic()
+            self._buffer.extend(prepared)
+            due = (
+                len(self._buffer) >= self.flush_rows
+                or time.monotonic() - self._buffer_since >= self.flush_seconds
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered rows as new segments. Returns rows written."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            frame = pl.DataFrame(rows, schema=_SCHEMA, orient="row")
+            for (day,), part in frame.group_by(
+                pl.col("timestamp_utc").dt.date().alias("day"), maintain_order=True
+            ):
+                self._write_segment(day.isoformat(), part)
+        logger.debug("Observation store: flushed %d rows", len(rows))
+        return len(rows)
+
+    def _write_segment(self, day: str, part: pl.DataFrame) -> dict[str, Any]:
+        """Write one segment, then its sidecar; a segment is visible once both exist."""
+        part = part.drop("day") if "day" in part.columns else part
+        part = part.sort("mmsi", "timestamp_utc")
+        rel = Path(f"day={day}") / f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        part.write_parquet(tmp, compression="zstd", statistics=True)
+        os.replace(tmp, path)
+        stats = {
+            "path": rel.as_posix(),
+            "day": day,
+            "rows": part.height,
+            "ts_min": part["timestamp_utc"].min().isoformat(),
+            "ts_max": part["timestamp_utc"].max().isoformat(),
+            "received_max": part["received_utc"].max().isoformat(),
+            "mmsi_min": part["mmsi"].min(),
+            "mmsi_max": part["mmsi"].max(),
+        }
+        sidecar = path.with_suffix(".json")
+        tmp = sidecar.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(stats))
+        os.replace(tmp, sidecar)
+        return stats
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+
+    def scan(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        mmsis: Iterable[str] | None = None,
+    ) -> pl.DataFrame:
+        """Observations with ``start <= timestamp_utc <= end`` (and MMSI in ``mmsis``).
+
+        Includes rows still buffered in memory.  Sorted by (mmsi, timestamp_utc).
+        """
+        start, end = naive_utc(start), naive_utc(end)
+        mmsi_list = sorted(set(mmsis)) if mmsis is not None else None
+
+        predicate = pl.lit(True)
+        if start is not None:
+            predicate &= pl.col("timestamp_utc") >= start
+        if end is not None:
+            predicate &= pl.col("timestamp_utc") <= end
+        if mmsi_list is not None:
+            predicate &= pl.col("mmsi").is_in(mmsi_list)
+
+        with self._lock:
+            buffered = list(self._buffer)
+
+        frames = []
+        for attempt in range(2):
+            paths = [
+                str(self.root / seg["path"])
+                for seg in self.segments()
+                if _segment_overlaps(seg, start, end, mmsi_list)
+            ]
+            if not paths:
+                break
+            try:
+                frames.append(pl.scan_parquet(paths).filter(predicate).collect())
+                break
+            except FileNotFoundError:
+                # Another process purged a listed segment; list again once
+                if attempt:
+                    raise
+        if buffered:
+            frames.append(pl.DataFrame(buffered, schema=_SCHEMA, orient="row").filter(predicate))
+        if not frames:
+            return pl.DataFrame(schema=_SCHEMA)
+        return pl.concat(frames).sort("mmsi", "timestamp_utc")
+
+    # ── Retention ───────────────────────────────────────────────────────────
+
+    def purge_older_than(self, cutoff: datetime) -> int:
+        """Delete segments whose newest ``received_utc`` is before ``cutoff``.
+
+        Returns the number of observations removed.
+        """
+        cutoff = naive_utc(cutoff)
+        dropped = 0
+        for seg in self.segments():
+            if datetime.fromisoformat(seg["received_max"]) < cutoff:
+                # Sidecar first: readers stop listing the segment before it goes
+                path = self.root / seg["path"]
+                path.with_suffix(".json").unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
+                dropped += seg["rows"]
+        return dropped
+
+    # ── Segment listing ─────────────────────────────────────────────────────
+
+    def segments(self) -> list[dict[str, Any]]:
+        """Stats of every written segment, read from the sidecars on disk."""
+        segments = []
+        for sidecar in sorted(self.root.glob("day=*/*.json")):
+            try:
+                segments.append(json.loads(sidecar.read_text()))
+            except FileNotFoundError:
+                continue  # purged since the listing
+        return segments
+
+
+def _segment_overlaps(
+    seg: dict[str, Any],
+    start: datetime | None,
+    end: datetime | None,
+    mmsis: list[str] | None,
+) -> bool:
+    if start is not None and datetime.fromisoformat(seg["ts_max"]) < start:
+        return False
+    if end is not None and datetime.fromisoformat(seg["ts_min"]) > end:
+        return False
+    if mmsis is not None:
+        return any(seg["mmsi_min"] <= m <= seg["mmsi_max"] for m in mmsis)
+    return True
+
+
+# ── Module-level store and entry points ─────────────────────────────────────
+
+_store: ObservationStore | None = None
+_store_lock = threading.Lock()
+
+
+def store_enabled() -> bool:
+    return bool(getattr(settings, "AIS_OBSERVATION_STORE_ENABLED", False))
+
+
+def get_observation_store() -> ObservationStore:
+    """Process-wide store built from settings; flushed at interpreter exit."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ObservationStore(
+                settings.AIS_OBSERVATION_STORE_DIR,
+                flush_rows=settings.AIS_OBSERVATION_STORE_FLUSH_ROWS,
+                flush_seconds=settings.AIS_OBSERVATION_STORE_FLUSH_SECONDS,
+            )
+            atexit.register(_store.flush)
+        return _store
+
+
+def _defer_until_commit(db: Session, rows: Iterable[dict[str, Any]]) -> None:
+    """Hold store rows on ``db`` until its transaction commits; drop them on rollback."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    prepared = [_prepare(row, now) for row in rows]
+    if not db.in_transaction():
+        db.begin()  # the rows belong to a transaction even before any SQL runs
+    pending = db.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = db.info[_PENDING_KEY] = []
+        event.listen(db, "after_commit", _append_pending)
+        event.listen(db, "after_transaction_end", _discard_pending)
+    pending.extend(prepared)
+
+
+def _append_pending(session: Session) -> None:
+    rows = session.info.get(_PENDING_KEY)
+    if rows:
+        session.info[_PENDING_KEY] = []
+        get_observation_store().append(rows)
+
+
+def _discard_pending(session: Session, transaction: SessionTransaction) -> None:
+    # Fires after after_commit, so anything left belongs to a rolled-back transaction
+    if transaction.parent is None and session.info.get(_PENDING_KEY):
+        session.info[_PENDING_KEY] = []
+
+
+def add_observation(db: Session, **values: Any) -> None:
+    """Record one observation: to the Parquet store on commit if enabled, else ``db.add``."""
+    if store_enabled():
+        _defer_until_commit(db, [values])
+        return
+    from app.models.ais_observation import AISObservation
+
+    db.add(AISObservation(**values))
+
+
+def add_observations(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Record many observations: to the Parquet store on commit if enabled, else executemany."""
+    if not rows:
+        return
+    if store_enabled():
+        _defer_until_commit(db, rows)
+        return
+    from app.modules.pg_copy import insert_ais_observations
+
+    insert_ais_observations(db, rows)
+
+
+def load_observations(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    mmsis: Iterable[str] | None = None,
+) -> list:
+    """Observations in ``[start, end]`` sorted by (mmsi, timestamp_utc).
+
+    Reads the ``ais_observations`` table and, when the store is enabled, the
+    Parquet segments too, so rows written before the switch stay visible
+    until the table's retention purges them.
+    """
+    from app.models.ais_observation import AISObservation
+
+    query = db.query(AISObservation).filter(
+        AISObservation.timestamp_utc.isnot(None),
+        AISObservation.lat.isnot(None),
+        AISObservation.lon.isnot(None),
+    )
+    if start is not None:
+        query = query.filter(AISObservation.timestamp_utc >= start)
+    if end is not None:
+        query = query.filter(AISObservation.timestamp_utc <= end)
+    mmsi_list = list(mmsis) if mmsis is not None else None
+    if mmsi_list is not None:
+        query = query.filter(AISObservation.mmsi.in_(mmsi_list))
+    observations: list = query.order_by(AISObservation.mmsi, AISObservation.timestamp_utc).all()
+
+    if store_enabled():
+        frame = get_observation_store().scan(start, end, mmsi_list)
+        stored = [StoredObservation(*row) for row in frame.select(list(_SCHEMA)).iter_rows()]
+        if stored:
+            observations = sorted(observations + stored, key=lambda o: (o.mmsi, o.timestamp_utc))
+    return observations
+
+
+def purge_old_observations(hours: int | None = None) -> int:
+    """Apply the observation retention window to the Parquet store."""
+    if not store_enabled():
+        return 0
+    if hours is None:
+        hours = settings.AIS_OBSERVATION_RETENTION_HOURS
+    cutoff = datetime.now(UTC) - timedelta(hours=hours)
+    return get_observation_store().purge_older_than(cutoff)
@@ -0,0 +1,257 @@
+"""PostgreSQL COPY fast path for ``ais_points`` and ``ais_observations``.
+
+The bulk ingest paths already decide set-based which rows to insert and
+which existing points a higher-quality source replaces; what remains is
+the write itself.  An executemany INSERT still costs one statement
+execution per row on Postgres, which dominates historical backfills.
+With ``INGEST_PG_COPY_ENABLED`` on a psycopg2 Postgres connection, batches
+of at least ``INGEST_PG_COPY_MIN_ROWS`` rows are instead:
+
+1. streamed with ``COPY ... FROM STDIN`` into a session-private staging
+   table (``CREATE TEMP TABLE ... ON COMMIT DROP`` — temp tables are not
+   WAL-logged),
+2. moved with one ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` (for
+   ``ais_points`` on the ``uq_ais_point_vessel_ts_source`` key: a row for
+   the same vessel, timestamp and source already stored by a concurrent
+   writer can never be a quality upgrade, so it is skipped), and
+3. for source-quality replacements (decided by the caller with
+   ``_is_higher_quality_source``), applied with one ``UPDATE ... FROM``
+   the staging table.
+
+Everything else — SQLite, other drivers, small batches — uses the same
+executemany statements as before, so callers get identical semantics on
+every backend.  Nothing here commits.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Iterable, Sequence
+from datetime import UTC, date, datetime
+from io import StringIO
+from typing import Any
+
+from sqlalchemy import Table, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_AIS_POINT_CONFLICT = ("vessel_id", "timestamp_utc", "source")
+
+
+def copy_available(db: Session, n_rows: int) -> bool:
+    """True when a batch of ``n_rows`` should go through COPY on this session."""
+    if not getattr(settings, "INGEST_PG_COPY_ENABLED", False):
+        return False
+    if n_rows < getattr(settings, "INGEST_PG_COPY_MIN_ROWS", 1_000):
+        return False
+    bind = db.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+# ── Public write helpers ────────────────────────────────────────────────────
+
+
+def insert_ais_points(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Insert point rows; COPY + ``ON CONFLICT DO NOTHING`` on Postgres."""
+    from app.models.ais_point import AISPoint
+
+    if not rows:
+        return
+    if copy_available(db, len(rows)):
+        copy_insert(db, AISPoint.__table__, rows, conflict_columns=_AIS_POINT_CONFLICT)
+    else:
+        db.execute(insert(AISPoint), rows)
+
+
+def update_ais_points(db: Session, rows: Iterable[dict[str, Any]]) -> None:
+    """Apply source-quality replacements keyed by ``ais_point_id``.
+
+    Rows may set different column subsets (draught/destination are
+    fill-if-present); a column absent from a row keeps its stored value.
+    """
+    from app.models.ais_point import AISPoint
+
+    rows = list(rows)
+    if not rows:
+        return
+    if copy_available(db, len(rows)):
+        copy_update(db, AISPoint.__table__, rows)
+        return
+    # Group by key set so each executemany batch has a uniform parameter shape
+    by_shape: dict[tuple, list[dict]] = {}
+    for params in rows:
+        by_shape.setdefault(tuple(sorted(params)), []).append(params)
+    for batch in by_shape.values():
+        db.execute(update(AISPoint), batch)
+
+
+def insert_ais_observations(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Insert raw observation rows (no dedup); COPY on Postgres."""
+    from app.models.ais_observation import AISObservation
+
+    if not rows:
+        return
+    if copy_available(db, len(rows)):
+        copy_insert(db, AISObservation.__table__, rows)
+    else:
+        db.execute(insert(AISObservation), rows)
+
+
+# ── COPY primitives ─────────────────────────────────────────────────────────
+
+
+def copy_insert(
+    db: Session,
+    table: Table,
+    rows: list[dict[str, Any]],
+    *,
+    conflict_columns: Sequence[str] | None = None,
+) -> int:
+    """COPY ``rows`` into a staging table and INSERT ... SELECT them into ``table``.
+
+    Column defaults the ORM would apply (``default=``) are filled in, since
+    the INSERT ... SELECT bypasses them.  Returns the number of rows inserted.
+    """
+    db.flush()
+    columns = _insert_columns(table, rows)
+    rows = _with_defaults(table, rows, columns)
+    stage = _create_stage(db, table, columns)
+    _copy(db, stage, table, columns, rows)
+
+    col_sql = ", ".join(columns)
+    sql = f"INSERT INTO {table.name} ({col_sql}) SELECT {col_sql} FROM {stage}"
+    if conflict_columns:
+        sql += f" ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+    inserted = _execute(db, sql)
+    logger.debug("COPY insert into %s: %d/%d rows", table.name, inserted, len(rows))
+    return inserted
+
+
+def copy_update(db: Session, table: Table, rows: list[dict[str, Any]]) -> int:
+    """COPY primary-keyed partial rows into a staging table and UPDATE ... FROM it."""
+    db.flush()
+    (pk,) = table.primary_key.columns
+    keys = {k for row in rows for k in row} - {pk.name}
+    columns = [c.name for c in table.columns if c.name in keys]
+    # Columns not set by every row carry a flag so absent values keep the stored one
+    partial = [c for c in columns if not all(c in row for row in rows)]
+    stage = _create_stage(db, table, [pk.name, *columns], flags=partial)
+
+    staged = []
+    for row in rows:
+        rec = {pk.name: row[pk.name], **{c: row.get(c) for c in columns}}
+        rec.update({f"has_{c}": c in row for c in partial})
+        staged.append(rec)
+    _copy(db, stage, table, [pk.name, *columns, *(f"has_{c}" for c in partial)], staged)
+
+    assignments = ", ".join(
+        f"{c} = CASE WHEN s.has_{c} THEN s.{c} ELSE t.{c} END" if c in partial else f"{c} = s.{c}"
+        for c in columns
+    )
+    sql = (
+        f"UPDATE {table.name} AS t SET {assignments} FROM {stage} AS s "
+        f"WHERE t.{pk.name} = s.{pk.name}"
+    )
+    return _execute(db, sql)
+
+
+def _insert_columns(table: Table, rows: list[dict[str, Any]]) -> list[str]:
+    keys = {k for row in rows for k in row}
+    return [
+        c.name
+        for c in table.columns
+        if c.name in keys or (c.default is not None and not c.primary_key)
+    ]
+
+
+def _with_defaults(
+    table: Table, rows: list[dict[str, Any]], columns: list[str]
+) -> list[dict[str, Any]]:
+    defaults: dict[str, Any] = {}
+    for name in columns:
+        default = table.c[name].default
+        if default is None:
+            continue
+        if default.is_scalar:
+            defaults[name] = default.arg
+        elif default.is_callable:
+            defaults[name] = default.arg(None)
+    if not defaults:
+        return rows
+    out = []
+    for row in rows:
+        missing = {k: v for k, v in defaults.items() if k not in row}
+        out.append({**row, **missing} if missing else row)
+    return out
+
+
+def _create_stage(db: Session, table: Table, columns: list[str], flags: Sequence[str] = ()) -> str:
+    """Create an empty temp table with ``columns`` typed like ``table``."""
+    name = f"_stage_{table.name}_{uuid.uuid4().hex[:8]}"
+    select_list = ", ".join([*columns, *(f"TRUE AS has_{c}" for c in flags)])
+    _execute(
+        db,
+        f"CREATE TEMP TABLE {name} ON COMMIT DROP AS "
+        f"SELECT {select_list} FROM {table.name} WITH NO DATA",
+    )
+    return name
+
+
+def _copy(
+    db: Session, stage: str, table: Table, columns: list[str], rows: list[dict[str, Any]]
+) -> None:
+    dialect = db.get_bind().dialect
+    processors = {}
+    for name in columns:
+        if name in table.c:
+            processors[name] = table.c[name].type.bind_processor(dialect)
+
+    buf = StringIO()
+    for row in rows:
+        values = []
+        for name in columns:
+            value = row.get(name)
+            proc = processors.get(name)
+            if proc is not None and value is not None:
+                value = proc(value)
+            values.append(_csv_field(value))
+        buf.write(",".join(values))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+
+
+def _csv_field(value: Any) -> str:
+    """One COPY CSV field: unquoted empty is NULL, strings are always quoted."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _execute(db: Session, sql: str) -> int:
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        cursor.execute(sql)
+        return cursor.rowcount
+    finally:
+        cursor.close()
@@ -0,0 +1,407 @@
+"""Time-range partitioning of ``ais_points`` and ``ais_observations`` on PostgreSQL.
+
+With ``PG_PARTITIONING_ENABLED`` the two append-heavy tables are declared
+``PARTITION BY RANGE``:
+
+- ``ais_points`` by month of ``timestamp_utc`` (``ais_points_2024_03``),
+- ``ais_observations`` by day of ``received_utc``
+  (``ais_observations_2024_03_15``) — its 72 h retention window would
+  never free a whole month.
+
+Each table also has a ``<table>_default`` partition so rows outside the
+pre-created range (historical backfills) are never rejected;
+:func:`ensure_partitions` later moves them into a proper partition.
+
+Why: every partition carries its own, much smaller indexes (including
+the ``(vessel_id, timestamp_utc, source)`` unique index, which includes
+the partition key), vacuum works per partition, time-bounded queries
+touch only the partitions their range overlaps, and retention becomes
+``DETACH PARTITION`` + ``DROP TABLE`` instead of row deletes.
+
+Partitioned tables need the partition key in every unique constraint, so
+the primary keys become ``(ais_point_id, timestamp_utc)`` and
+``(observation_id, received_utc)``; ids still come from the original
+sequences and remain unique.  Foreign keys *to* ``ais_points`` (gap event
+start/end points) cannot reference a partitioned table on ``ais_point_id``
+alone and are dropped; retention and the archiver protect those points
+explicitly instead.  Foreign keys *from* the tables (``vessel_id`` →
+``vessels``) are recreated on the partitioned table.
+
+Everything here is a no-op on SQLite and while the setting is off.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    column: str
+    interval: str  # "month" or "day"
+    primary_key: str
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    lo: datetime
+    hi: datetime
+
+
+PARTITIONED_TABLES = {
+    "ais_points": PartitionSpec("timestamp_utc", "month", "ais_point_id"),
+    "ais_observations": PartitionSpec("received_utc", "day", "observation_id"),
+}
+
+# Daily observation partitions created ahead of time
+_OBSERVATION_DAYS_AHEAD = 7
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def partitioning_enabled(bind) -> bool:
+    """True when partitioning is switched on and ``bind`` is PostgreSQL."""
+    if not getattr(settings, "PG_PARTITIONING_ENABLED", False):
+        return False
+    return bind.dialect.name == "postgresql"
+
+
+def partitioning_active(db, table: str) -> bool:
+    """True when ``table`` is a partitioned table on this session's database."""
+    if not partitioning_enabled(db.get_bind()):
+        return False
+    return is_partitioned(db, table)
+
+
+def is_partitioned(conn, table: str) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:t))"
+            ),
+            {"t": table},
+        ).scalar()
+    )
+
+
+# ── Period arithmetic ───────────────────────────────────────────────────────
+
+
+def period_start(ts: datetime, interval: str) -> datetime:
+    ts = naive_utc(ts)
+    if interval == "month":
+        return datetime(ts.year, ts.month, 1)
+    return datetime(ts.year, ts.month, ts.day)
+
+
+def period_end(lo: datetime, interval: str) -> datetime:
+    if interval == "month":
+        return datetime(lo.year + lo.month // 12, lo.month % 12 + 1, 1)
+    return lo + timedelta(days=1)
+
+
+def partition_name(table: str, lo: datetime, interval: str) -> str:
+    fmt = "%Y_%m" if interval == "month" else "%Y_%m_%d"
+    return f"{table}_{lo.strftime(fmt)}"
+
+
+def _periods_ahead(table: str, now: datetime) -> list[datetime]:
+    spec = PARTITIONED_TABLES[table]
+    if spec.interval == "month":
+        count = getattr(settings, "PG_PARTITION_MONTHS_AHEAD", 3)
+    else:
+        count = _OBSERVATION_DAYS_AHEAD
+    lo = period_start(now, spec.interval)
+    periods = [lo]
+    for _ in range(count):
+        lo = period_end(lo, spec.interval)
+        periods.append(lo)
+    return periods
+
+
+# ── Catalog ─────────────────────────────────────────────────────────────────
+
+
+def list_partitions(conn, table: str) -> list[Partition]:
+    """Range partitions of ``table`` ordered by lower bound (default excluded)."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:t)"
+        ),
+        {"t": table},
+    ).all()
+    parts = []
+    for name, bound in rows:
+        m = _BOUND_RE.search(bound or "")
+        if m:
+            lo, hi = (datetime.fromisoformat(v) for v in m.groups())
+            parts.append(Partition(name, lo, hi))
+    return sorted(parts, key=lambda p: p.lo)
+
+
+# ── Creating partitions ─────────────────────────────────────────────────────
+
+
+def _bounds_sql(lo: datetime, hi: datetime) -> str:
+    return f"FOR VALUES FROM ('{lo.isoformat(sep=' ')}') TO ('{hi.isoformat(sep=' ')}')"
+
+
+def create_partition(conn, table: str, lo: datetime) -> str:
+    """Create the partition starting at ``lo``, moving matching default rows into it.
+
+    Postgres refuses to create a partition whose range has rows in the
+    default partition, so those rows are moved into a standalone table
+    which is then attached.
+    """
+    spec = PARTITIONED_TABLES[table]
+    hi = period_end(lo, spec.interval)
+    name = partition_name(table, lo, spec.interval)
+    default = f"{table}_default"
+    in_range = f"{spec.column} >= :lo AND {spec.column} < :hi"
+
+    stranded = conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), {"lo": lo, "hi": hi}
+    ).scalar()
+    if not stranded:
+        conn.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {_bounds_sql(lo, hi)}")
+        )
+        return name
+
+    conn.execute(
+        text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    )
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lo": lo, "hi": hi},
+    )
+    # ATTACH clones the parent's foreign keys (vessel_id -> vessels) onto the partition
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {_bounds_sql(lo, hi)}"))
+    logger.info("Moved %s rows for %s out of %s", table, name, default)
+    return name
+
+
+def ensure_partitions(conn, table: str, now: datetime | None = None) -> list[str]:
+    """Create upcoming partitions and ones for periods stranded in the default.
+
+    Returns the names of partitions created.
+    """
+    spec = PARTITIONED_TABLES[table]
+    existing = {p.name for p in list_partitions(conn, table)}
+    periods = set(_periods_ahead(table, now or datetime.now(UTC)))
+    stranded = conn.execute(
+        text(f"SELECT DISTINCT date_trunc('{spec.interval}', {spec.column}) FROM {table}_default")
+    ).scalars()
+    periods.update(period_start(ts, spec.interval) for ts in stranded if ts is not None)
+
+    created = []
+    for lo in sorted(periods):
+        name = partition_name(table, lo, spec.interval)
+        if name not in existing:
+            created.append(create_partition(conn, table, lo))
+    if created:
+        logger.info("Created %s partitions: %s", table, ", ".join(created))
+    return created
+
+
+def convert_to_partitioned(conn, table: str, now: datetime | None = None) -> None:
+    """Rebuild a plain ``table`` as a range-partitioned table, copying its rows.
+
+    Runs in the caller's transaction.  The copy rewrites the whole table, so
+    on a large installation run it in a maintenance window.
+    """
+    spec = PARTITIONED_TABLES[table]
+    legacy = f"{table}_unpartitioned"
+    key = f"{spec.primary_key}, {spec.column}"
+
+    indexes = conn.execute(
+        text("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :t"), {"t": table}
+    ).all()
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence(:t, :c)"), {"t": table, "c": spec.primary_key}
+    ).scalar()
+    unique_constraints = conn.execute(
+        text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'u' AND conrelid = to_regclass(:t)"
+        ),
+        {"t": table},
+    ).all()
+    referencing = conn.execute(
+        text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = to_regclass(:t)"
+        ),
+        {"t": table},
+    ).all()
+    # LIKE ... INCLUDING CONSTRAINTS copies only CHECK constraints
+    foreign_keys = conn.execute(
+        text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND conrelid = to_regclass(:t)"
+        ),
+        {"t": table},
+    ).all()
+
+    for ref_table, constraint in referencing:
+        conn.execute(text(f"ALTER TABLE {ref_table} DROP CONSTRAINT {constraint}"))
+        logger.info("Dropped foreign key %s.%s (target is now partitioned)", ref_table, constraint)
+
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    for index_name, _ in indexes:
+        conn.execute(text(f"ALTER INDEX {index_name} RENAME TO {index_name}_unpartitioned"))
+
+    conn.execute(
+        text(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({spec.column})"
+        )
+    )
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({key})"))
+    # The dedup key (vessel_id, timestamp_utc, source) already contains the
+    # partition column; constraints are recreated as constraints so
+    # _run_migrations still finds them
+    for constraint, definition in unique_constraints:
+        if spec.column not in definition:
+            definition = definition.rstrip(")") + f", {spec.column})"
+            logger.warning("Unique constraint %s extended with partition key", constraint)
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition}"))
+    skip = {f"{table}_pkey", *(name for name, _ in unique_constraints)}
+    for index_name, index_def in indexes:
+        if index_name in skip:
+            continue
+        # "CREATE [UNIQUE] INDEX name ON public.table USING btree (cols)"
+        index_def = re.sub(r" ON (\w+\.)?\w+ ", f" ON {table} ", index_def, count=1)
+        if "UNIQUE" in index_def and spec.column not in index_def:
+            index_def = index_def.rstrip(")") + f", {spec.column})"
+            logger.warning("Unique index %s extended with partition key", index_name)
+        conn.execute(text(index_def))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{spec.primary_key}"))
+
+    conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    span = conn.execute(text(f"SELECT min({spec.column}), max({spec.column}) FROM {legacy}")).one()
+    periods = set(_periods_ahead(table, now or datetime.now(UTC)))
+    if span[0] is not None:
+        lo = period_start(span[0], spec.interval)
+        while lo <= span[1]:
+            periods.add(lo)
+            lo = period_end(lo, spec.interval)
+    for lo in sorted(periods):
+        create_partition(conn, table, lo)
+
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}"))
+    # Added after the copy so the rows are validated in one pass
+    for constraint, definition in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition}"))
+    conn.execute(text(f"DROP TABLE {legacy}"))
+    logger.info("Converted %s to %s range partitions", table, spec.interval)
+
+
+def ensure_partitioned(engine) -> None:
+    """init_db hook: convert the tables if needed and pre-create partitions."""
+    if not partitioning_enabled(engine):
+        return
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                convert_to_partitioned(conn, table)
+            ensure_partitions(conn, table)
+
+
+# ── Retention ───────────────────────────────────────────────────────────────
+
+
+def points_keep_condition(
+    keep_sources=None, only_source: str | None = None, max_id: int | None = None
+) -> tuple[str, dict[str, Any]]:
+    """SQL over ``t`` (an ais_points partition) true for rows that must survive.
+
+    Points referenced by gap events are always kept; optionally also rows
+    from ``keep_sources``, rows not from ``only_source`` and rows newer than
+    the ``max_id`` snapshot.
+    """
+    terms = [
+        "EXISTS (SELECT 1 FROM ais_gap_events g "
+        "WHERE g.start_point_id = t.ais_point_id OR g.end_point_id = t.ais_point_id)"
+    ]
+    params: dict[str, Any] = {}
+    if keep_sources:
+        terms.append("t.source = ANY(:keep_sources)")
+        params["keep_sources"] = sorted(keep_sources)
+    if only_source is not None:
+        terms.append("t.source IS DISTINCT FROM :only_source")
+        params["only_source"] = only_source
+    if max_id is not None:
+        terms.append("t.ais_point_id > :max_id")
+        params["max_id"] = max_id
+    return " OR ".join(terms), params
+
+
+def _has_rows(conn, name: str, keep_sql: str | None, params) -> bool:
+    if not keep_sql:
+        return False
+    return bool(
+        conn.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {name} AS t WHERE {keep_sql})"), params or {}
+        ).scalar()
+    )
+
+
+def droppable_partitions(
+    conn, table: str, cutoff: datetime, keep_sql: str | None = None, params=None
+) -> list[Partition]:
+    """Partitions entirely before ``cutoff`` holding no row matching ``keep_sql``."""
+    cutoff = naive_utc(cutoff)
+    return [
+        part
+        for part in list_partitions(conn, table)
+        if part.hi <= cutoff and not _has_rows(conn, part.name, keep_sql, params)
+    ]
+
+
+def drop_partition(
+    conn, table: str, name: str, keep_sql: str | None = None, params=None
+) -> int | None:
+    """Detach and drop one partition; returns the number of rows it held.
+
+    The partition is locked first and ``keep_sql`` re-checked under the
+    lock, so rows written since an earlier check are never dropped; returns
+    None (and drops nothing) if such a row exists.
+    """
+    conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+    if _has_rows(conn, name, keep_sql, params):
+        return None
+    rows = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar() or 0
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    logger.info("Dropped partition %s (%d rows)", name, rows)
+    return rows
+
+
+def drop_partitions_before(
+    conn, table: str, cutoff: datetime, keep_sql: str | None = None, params=None
+) -> int:
+    """Drop every partition before ``cutoff`` with no row to keep; returns rows dropped."""
+    return sum(
+        drop_partition(conn, table, part.name, keep_sql, params) or 0
+        for part in droppable_partitions(conn, table, cutoff, keep_sql, params)
+    )
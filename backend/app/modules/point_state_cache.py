@@ -0,0 +1,207 @@
+"""Bounded per-vessel "last points" cache for the row-by-row ingest path.
+
+``ingest._create_ais_point`` needs two facts per incoming point: whether a
+stored point lies within ±10s (multi-receiver dedup) and which point
+precedes it (``sog_delta``/``cog_delta``).  Without a cache that is two
+indexed queries per row.
+
+``VesselPointCache`` keeps the most recent ``recent`` points of each vessel
+(timestamp, source, SOG, COG), warmed in bulk with one windowed query per
+chunk of vessels and updated as points are written.  For a vessel's cached
+points the invariant is: every stored point at or after the oldest cached
+timestamp is cached.  A lookup whose ±10s window starts before that horizon
+(an out-of-order or backfilled point) is not answerable and returns None,
+so the caller falls back to the database.
+
+The cache belongs to a single import run and session: points written by
+other processes after warm-up are not seen, so do not share it across runs.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.ais_point import AISPoint
+from app.models.vessel import Vessel
+
+logger = logging.getLogger(__name__)
+
+# 4.4: multi-receiver dedup window (must match ingest._create_ais_point)
+_DEDUP_WINDOW = timedelta(seconds=10)
+# Points kept per vessel; enough to cover a burst of near-simultaneous receivers
+_RECENT_POINTS = 16
+_IN_CHUNK = 900
+
+
+@dataclass(slots=True)
+class CachedPoint:
+    """The fields of a stored AISPoint that dedup and delta computation read."""
+
+    timestamp_utc: datetime
+    source: str | None
+    sog: float | None
+    cog: float | None
+    # The AISPoint written during this run, if any — may still be pending in the session
+    orm_point: AISPoint | None = None
+
+
+@dataclass(slots=True)
+class _VesselState:
+    points: list[CachedPoint] = field(default_factory=list)  # ascending timestamp_utc
+    complete: bool = True  # True when ``points`` holds every stored point of the vessel
+
+
+class VesselPointCache:
+    """LRU map of vessel_id -> most recent stored points."""
+
+    def __init__(self, max_vessels: int = 10_000, recent: int = _RECENT_POINTS) -> None:
+        self.max_vessels = max_vessels
+        self.recent = recent
+        self.hits = 0
+        self.misses = 0
+        self._states: OrderedDict[int, _VesselState] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    # ── Warm-up ─────────────────────────────────────────────────────────────
+
+    def warm(self, db: Session, vessel_ids: Iterable[int]) -> None:
+        """Load the recent points of every uncached vessel (one query per chunk)."""
+        missing = [vid for vid in dict.fromkeys(vessel_ids) if vid not in self._states]
+        for i in range(0, len(missing), _IN_CHUNK):
+            chunk = missing[i : i + _IN_CHUNK]
+            rn = (
+                func.row_number()
+                .over(partition_by=AISPoint.vessel_id, order_by=AISPoint.timestamp_utc.desc())
+                .label("rn")
+            )
+            ranked = (
+                select(
+                    AISPoint.vessel_id,
+                    AISPoint.timestamp_utc,
+                    AISPoint.source,
+                    AISPoint.sog,
+                    AISPoint.cog,
+                    rn,
+                )
+                .where(AISPoint.vessel_id.in_(chunk))
+                .subquery()
+            )
+            rows = db.execute(
+                select(
+                    ranked.c.vessel_id,
+                    ranked.c.timestamp_utc,
+                    ranked.c.source,
+                    ranked.c.sog,
+                    ranked.c.cog,
+                ).where(ranked.c.rn <= self.recent)
+            )
+            loaded: dict[int, list[CachedPoint]] = {vid: [] for vid in chunk}
+            for vid, ts, source, sog, cog in rows:
+                loaded[vid].append(CachedPoint(ts, source, sog, cog))
+            for vid, points in loaded.items():
+                self._put(vid, _state_from_latest(points, self.recent))
+
+    def warm_mmsis(self, db: Session, mmsis: Iterable[str]) -> None:
+        """Warm the cache for the existing vessels among ``mmsis``."""
+        mmsis = list(dict.fromkeys(mmsis))
+        vessel_ids: list[int] = []
+        for i in range(0, len(mmsis), _IN_CHUNK):
+            chunk = mmsis[i : i + _IN_CHUNK]
+            vessel_ids.extend(
+                vid for (vid,) in db.query(Vessel.vessel_id).filter(Vessel.mmsi.in_(chunk))
+            )
+        self.warm(db, vessel_ids)
+
+    # ── Lookup / update ─────────────────────────────────────────────────────
+
+    def neighbours(
+        self, db: Session, vessel_id: int | None, ts: datetime
+    ) -> tuple[CachedPoint | None, CachedPoint | None] | None:
+        """Return ``(near_dup, prev_point)`` for a point at ``ts``, or None on a miss.
+
+        ``near_dup`` is a stored point within ±10s — the exact-timestamp one
+        when there is one, so source-quality replacement can apply.
+        ``prev_point`` is the latest stored point strictly before ``ts``.
+        """
+        if vessel_id is None:
+            return None
+        state = self._states.get(vessel_id)
+        if state is None:
+            self.warm(db, [vessel_id])
+            state = self._states[vessel_id]
+        else:
+            self._states.move_to_end(vessel_id)
+
+        lo, hi = ts - _DEDUP_WINDOW, ts + _DEDUP_WINDOW
+        points = state.points
+        if not state.complete and (not points or lo < points[0].timestamp_utc):
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        keys = [p.timestamp_utc for p in points]
+        start = bisect.bisect_left(keys, lo)
+        end = bisect.bisect_right(keys, hi)
+        near = None
+        for p in points[start:end]:
+            if p.timestamp_utc == ts:
+                near = p
+                break
+            if near is None:
+                near = p
+        before = bisect.bisect_left(keys, ts)
+        prev = points[before - 1] if before else None
+        return near, prev
+
+    def record(self, vessel_id: int | None, point: CachedPoint) -> None:
+        """Add a newly written point, or update one replaced at the same timestamp."""
+        if vessel_id is None:
+            return
+        state = self._states.get(vessel_id)
+        if state is None:
+            return  # never loaded — the next lookup reads it from the database
+        points = state.points
+        keys = [p.timestamp_utc for p in points]
+        i = bisect.bisect_left(keys, point.timestamp_utc)
+        if i < len(points) and points[i].timestamp_utc == point.timestamp_utc:
+            points[i] = point
+            return
+        if not state.complete and point.timestamp_utc < points[0].timestamp_utc:
+            return  # below the horizon — keep the invariant, the DB has it
+        points.insert(i, point)
+        if len(points) > self.recent:
+            del points[0]
+            state.complete = False
+
+    def clear(self) -> None:
+        self._states.clear()
+
+    def _put(self, vessel_id: int, state: _VesselState) -> None:
+        self._states[vessel_id] = state
+        self._states.move_to_end(vessel_id)
+        while len(self._states) > self.max_vessels:
+            self._states.popitem(last=False)
+
+
+def _state_from_latest(latest: list[CachedPoint], recent: int) -> _VesselState:
+    """Build a state from a vessel's latest (at most ``recent``) points, in any order."""
+    latest.sort(key=lambda p: p.timestamp_utc)
+    return _VesselState(points=latest, complete=len(latest) < recent)
+
+
+def new_point_cache() -> VesselPointCache | None:
+    """Cache sized by ``INGEST_POINT_CACHE_SIZE``; None when the cache is disabled."""
+    from app.config import settings
+
+    size = getattr(settings, "INGEST_POINT_CACHE_SIZE", 0)
+    return VesselPointCache(max_vessels=size) if size > 0 else None
@@ -16,9 +16,9 @@ from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 
 from app.models.ais_point import AISPoint
-from app.models.port import Port
 from app.models.port_call import PortCall
 from app.models.vessel import Vessel
+from app.modules.port_index import PortEntry, port_index
 
 logger = logging.getLogger(__name__)
 
@@ -53,9 +53,10 @@ def detect_port_calls_for_vessel(
     date_from: date | None = None,
     date_to: date | None = None,
 ) -> int:
-    """Detect port calls for a single vessel. Returns count of new PortCall records."""
-    from app.utils.geo import haversine_nm
+    """Detect port calls for a single vessel. Returns count of new PortCall records.
 
+    A slow point belongs to the nearest major port within ``PORT_PROXIMITY_NM``.
+    """
     query = (
         db.query(AISPoint)
         .filter(AISPoint.vessel_id == vessel.vessel_id)
@@ -74,23 +75,16 @@ def detect_port_calls_for_vessel(
     if len(points) < 2:
         return 0
 
-    # Pre-fetch all ports for proximity checks
-    ports = db.query(Port).filter(Port.major_port).all()
-    if not ports:
+    index = port_index(db)
+    if not any(entry.major_port for entry in index.entries):
         return 0
 
-    # Build simple port lookup with lat/lon from WKT geometry
-    from app.utils.geo import load_geometry
-
-    port_coords = []
-    for port in ports:
-        pt = load_geometry(port.geometry)
-        if pt is not None:
-            port_coords.append((port, pt.y, pt.x))
-
-    if not port_coords:
-        logger.warning("Could not extract port coordinates — skipping port call detection")
-        return 0
+    # Nearest major port within range for every slow point, in one batch
+    slow = [pt for pt in points if pt.sog is not None and pt.sog < SOG_THRESHOLD_KN]
+    nearest = index.nearest_port_many(
+        [(pt.lat, pt.lon) for pt in slow], max_nm=PORT_PROXIMITY_NM, major_only=True
+    )
+    port_at = {id(pt): hit[0] for pt, hit in zip(slow, nearest, strict=True) if hit is not None}
 
     call_count = 0
     # Track runs of low-SOG points near a port
@@ -99,26 +93,18 @@ def detect_port_calls_for_vessel(
     run_end = None
 
     for pt in points:
-        if pt.sog is not None and pt.sog < SOG_THRESHOLD_KN:
-            # Check proximity to any port
-            nearest_port = None
-            for port, p_lat, p_lon in port_coords:
-                dist = haversine_nm(pt.lat, pt.lon, p_lat, p_lon)
-                if dist <= PORT_PROXIMITY_NM:
-                    nearest_port = port
-                    break
-
-            if nearest_port:
-                if current_port is None or current_port.port_id != nearest_port.port_id:
-                    # New port run — flush previous if valid
-                    if current_port and run_start and run_end:
-                        call_count += _maybe_create_port_call(
-                            db, vessel, current_port, run_start, run_end
-                        )
-                    current_port = nearest_port
-                    run_start = pt.timestamp_utc
-                run_end = pt.timestamp_utc
-                continue
+        nearest_port = port_at.get(id(pt))
+        if nearest_port:
+            if current_port is None or current_port.port_id != nearest_port.port_id:
+                # New port run — flush previous if valid
+                if current_port and run_start and run_end:
+                    call_count += _maybe_create_port_call(
+                        db, vessel, current_port, run_start, run_end
+                    )
+                current_port = nearest_port
+                run_start = pt.timestamp_utc
+            run_end = pt.timestamp_utc
+            continue
 
         # Point is not near a port or moving too fast — flush run
         if current_port and run_start and run_end:
@@ -139,7 +125,7 @@ def detect_port_calls_for_vessel(
 def _maybe_create_port_call(
     db: Session,
     vessel: Vessel,
-    port: Port,
+    port: PortEntry,
     arrival: datetime,
     departure: datetime,
 ) -> int:
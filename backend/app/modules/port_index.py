@@ -0,0 +1,221 @@
+"""Process-wide proximity index over the ``ports`` table.
+
+Port proximity is checked per AIS point by the spoofing, STS, port-call and
+draught detectors, and per event by the port resolver.  Ports change only
+when they are seeded or edited, so this module parses every port's WKT once
+and keeps, per database engine, a :class:`PortIndex` — a shapely
+``STRtree`` over the port positions.  Radius queries take the candidates in
+the geodesic bounding box of the search circle
+(:func:`app.utils.geo.bbox_around_nm`) and keep those within the radius by
+:func:`app.utils.geo.haversine_nm`, so results match the per-port scans they
+replace.
+
+Invalidation follows :mod:`app.modules.corridor_index`: ORM writes to
+``Port`` (``seed_ports`` included) drop the cached index at flush and at
+commit/rollback, and an index older than ``PORT_INDEX_MAX_AGE_S`` is rebuilt
+to pick up edits from other processes.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import shapely
+from shapely import STRtree
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models.port import Port
+from app.utils.geo import bbox_around_nm, haversine_nm, load_geometry
+
+logger = logging.getLogger(__name__)
+
+# Half the Earth's circumference: a circle this large covers the globe
+_MAX_RADIUS_NM = 10_810.0
+# First search radius for unbounded nearest-port lookups (grows ×4 per miss)
+_NEAREST_START_NM = 50.0
+
+
+@dataclass(frozen=True)
+class PortEntry:
+    """Snapshot of the port attributes proximity callers need."""
+
+    port_id: int
+    lat: float
+    lon: float
+    major_port: bool
+    is_offshore_terminal: bool
+
+
+def _port_position(geometry_value: object) -> tuple[float, float] | None:
+    """(lat, lon) of a port geometry, or None when it cannot be parsed."""
+    if geometry_value is None:
+        return None
+    try:
+        shape = load_geometry(str(geometry_value))
+    except Exception:  # unparseable WKT means "no position"
+        return None
+    if shape is None or shape.is_empty:
+        return None
+    if shape.geom_type != "Point":
+        shape = shape.centroid
+    return shape.y, shape.x
+
+
+class PortIndex:
+    """Immutable spatial index over port positions, in row order."""
+
+    def __init__(self, entries: Sequence[PortEntry]):
+        self.entries = list(entries)
+        self._tree = STRtree([shapely.Point(e.lon, e.lat) for e in self.entries])
+
+    @classmethod
+    def from_rows(cls, rows) -> PortIndex:
+        entries = []
+        for row in rows:
+            position = _port_position(row.geometry)
+            if position is None:
+                continue
+            entries.append(
+                PortEntry(
+                    port_id=row.port_id,
+                    lat=position[0],
+                    lon=position[1],
+                    major_port=bool(row.major_port),
+                    is_offshore_terminal=bool(getattr(row, "is_offshore_terminal", False)),
+                )
+            )
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def ports_within_many(
+        self,
+        positions: Sequence[tuple[float, float]],
+        radius_nm: float,
+        major_only: bool = False,
+    ) -> list[list[tuple[PortEntry, float]]]:
+        """Batch :meth:`ports_within` for a sequence of (lat, lon) positions."""
+        results: list[list[tuple[int, PortEntry, float]]] = [[] for _ in positions]
+        if not self.entries or not positions:
+            return [[] for _ in positions]
+        min_lon, min_lat, max_lon, max_lat = zip(
+            *(bbox_around_nm(lat, lon, radius_nm) for lat, lon in positions), strict=True
+        )
+        pos_idx, port_idx = self._tree.query(shapely.box(min_lon, min_lat, max_lon, max_lat))
+        for p, i in zip(pos_idx.tolist(), port_idx.tolist(), strict=True):
+            entry = self.entries[i]
+            if major_only and not entry.major_port:
+                continue
+            lat, lon = positions[p]
+            dist = haversine_nm(lat, lon, entry.lat, entry.lon)
+            if dist <= radius_nm:
+                results[p].append((i, entry, dist))
+        # Nearest first; row order breaks ties
+        return [[(e, d) for i, e, d in sorted(r, key=lambda t: (t[2], t[0]))] for r in results]
+
+    def ports_within(
+        self, lat: float, lon: float, radius_nm: float, major_only: bool = False
+    ) -> list[tuple[PortEntry, float]]:
+        """(port, distance_nm) for every port within ``radius_nm``, nearest first."""
+        return self.ports_within_many([(lat, lon)], radius_nm, major_only)[0]
+
+    def nearest_port_many(
+        self,
+        positions: Sequence[tuple[float, float]],
+        max_nm: float | None = None,
+        major_only: bool = False,
+    ) -> list[tuple[PortEntry, float] | None]:
+        """Batch :meth:`nearest_port`.
+
+        Positions are searched together with a radius that grows ×4 until
+        each has a hit or ``max_nm`` (default: the whole globe) is reached.
+        """
+        limit = _MAX_RADIUS_NM if max_nm is None else max_nm
+        found: list[tuple[PortEntry, float] | None] = [None] * len(positions)
+        pending = list(range(len(positions)))
+        radius = min(_NEAREST_START_NM, limit) if max_nm is None else limit
+        while pending and self.entries:
+            hits = self.ports_within_many([positions[i] for i in pending], radius, major_only)
+            still: list[int] = []
+            for i, within in zip(pending, hits, strict=True):
+                if within:
+                    found[i] = within[0]
+                else:
+                    still.append(i)
+            if radius >= limit:
+                break
+            pending = still
+            radius = min(radius * 4, limit)
+        return found
+
+    def nearest_port(
+        self,
+        lat: float,
+        lon: float,
+        max_nm: float | None = None,
+        major_only: bool = False,
+    ) -> tuple[PortEntry, float] | None:
+        """(port, distance_nm) of the closest port, or None if none within ``max_nm``."""
+        return self.nearest_port_many([(lat, lon)], max_nm, major_only)[0]
+
+
+# ── Process-wide cache ──────────────────────────────────────────────────────
+
+# engine -> (generation, built_at, index)
+_indexes: WeakKeyDictionary[Any, tuple[int, float, PortIndex]] = WeakKeyDictionary()
+_generation = 0
+
+
+def invalidate_port_index() -> None:
+    """Drop every cached index; the next lookup rebuilds from the database."""
+    global _generation
+    _generation += 1
+
+
+def port_index(db: Session) -> PortIndex:
+    """Cached :class:`PortIndex` over every port with a parseable position."""
+    bind = db.get_bind()
+    engine = getattr(bind, "engine", bind)
+    max_age = getattr(settings, "PORT_INDEX_MAX_AGE_S", 300)
+    cached = _indexes.get(engine)
+    now = time.monotonic()
+    if cached is not None and cached[0] == _generation and now - cached[1] < max_age:
+        return cached[2]
+
+    generation = _generation
+    index = PortIndex.from_rows(db.query(Port).all())
+    _indexes[engine] = (generation, now, index)
+    logger.debug("Built port index (%d ports)", len(index))
+    return index
+
+
+def _port_written(mapper, connection, target) -> None:
+    invalidate_port_index()
+    session = object_session(target)
+    if session is not None:
+        session.info["port_index_dirty"] = True
+
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(Port, _event, _port_written)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session) -> None:
+    # Another session may have rebuilt from pre-commit data since the flush
+    if session.info.pop("port_index_dirty", False):
+        invalidate_port_index()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction) -> None:
+    if session.info.pop("port_index_dirty", False):
+        invalidate_port_index()
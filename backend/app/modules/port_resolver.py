@@ -14,7 +14,8 @@ import logging
 from sqlalchemy.orm import Session
 
 from app.models.port import Port
-from app.utils.geo import haversine_nm, load_geometry
+from app.modules.port_index import port_index
+from app.utils.geo import load_geometry  # noqa: F401 — backward-compatible name for tests
 
 logger = logging.getLogger(__name__)
 
@@ -43,20 +44,12 @@ def resolve_port(
         return None
 
     # 1. Geo-nearest within radius
-    best_port = None
-    best_dist = _PORT_MATCH_RADIUS_NM
-    for port in ports:
-        port_shape = load_geometry(port.geometry)
-        if port_shape is None:
-            continue
-        port_lat, port_lon = port_shape.y, port_shape.x
-        dist = haversine_nm(lat, lon, port_lat, port_lon)
-        if dist < best_dist:
-            best_dist = dist
-            best_port = port
-
-    if best_port is not None:
-        return best_port
+    nearest = port_index(db).nearest_port(lat, lon, max_nm=_PORT_MATCH_RADIUS_NM)
+    if nearest is not None:
+        by_id = {port.port_id: port for port in ports}
+        best_port = by_id.get(nearest[0].port_id)
+        if best_port is not None:
+            return best_port
 
     # 2. Name match (if provided)
     if port_name:
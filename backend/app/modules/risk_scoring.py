@@ -301,6 +301,9 @@ def score_all_alerts(db: Session, scoring_date: datetime = None) -> dict:
     config = load_scoring_config()
     corridor_overrides = _load_corridor_overrides(db)
     alerts = db.query(AISGapEvent).filter(AISGapEvent.risk_score == 0).all()
+    eez_distances = _eez_boundary_distances(
+        [a for a in alerts if not getattr(a, "is_feed_outage", False)]
+    )
     scored = 0
     feed_outage_skipped = 0
     for alert in alerts:
@@ -323,6 +326,7 @@ def score_all_alerts(db: Session, scoring_date: datetime = None) -> dict:
             scoring_date=scoring_date,
             db=db,
             pre_gap_sog=getattr(alert, "pre_gap_sog", None),
+            eez_boundary=eez_distances.get(alert.gap_event_id),
         )
         # Store override source in breakdown for traceability
         if merged_config is not config and isinstance(breakdown, dict):
@@ -383,6 +387,35 @@ def rescore_all_alerts(db: Session, clear_detections: bool = False) -> dict:
 # ── Helper functions ──────────────────────────────────────────────────────────
 
 
+def _eez_position(gap: Any) -> tuple[float, float] | None:
+    """(lat, lon) the EEZ-boundary signal measures from: the gap-off position, else gap-on."""
+    lat = getattr(gap, "gap_off_lat", None) or getattr(gap, "gap_on_lat", None)
+    lon = getattr(gap, "gap_off_lon", None) or getattr(gap, "gap_on_lon", None)
+    if lat is None or lon is None:
+        return None
+    return lat, lon
+
+
+def _eez_boundary_distances(gaps: list) -> dict[int, tuple[float, str]]:
+    """(distance_nm, boundary_name) per gap_event_id, for every gap with a position.
+
+    One batch lookup against the EEZ segment index instead of one per gap.
+    """
+    positioned = [(gap.gap_event_id, pos) for gap in gaps if (pos := _eez_position(gap))]
+    if not positioned:
+        return {}
+    try:
+        from app.utils.eez_boundaries import distances_to_nearest_eez_boundary_nm
+
+        distances = distances_to_nearest_eez_boundary_nm(
+            [pos[0] for _, pos in positioned], [pos[1] for _, pos in positioned]
+        )
+    except Exception as e:
+        logger.debug("EEZ boundary distance lookup failed: %s", e)
+        return {}
+    return {gap_id: dist for (gap_id, _), dist in zip(positioned, distances, strict=True)}
+
+
 def _corridor_multiplier(corridor: Any, config: dict) -> tuple[float, str]:
     """Return (multiplier, corridor_type_label) from config.
 
@@ -995,6 +1028,7 @@ def compute_gap_score(
     scoring_date: datetime = None,
     db: Session = None,
     pre_gap_sog: float = None,
+    eez_boundary: tuple[float, str] | None = None,
 ) -> tuple[int, dict]:
     """Compute risk score for a single gap event using three-phase composition.
 
@@ -1010,6 +1044,8 @@ def compute_gap_score(
             Defaults to datetime.now(timezone.utc) if not provided (Phase 6.1 reproducibility).
         db: Optional SQLAlchemy session for DB-backed signal integration.
             If None, all DB-dependent phases are skipped gracefully.
+        eez_boundary: Precomputed (distance_nm, boundary_name) to the nearest EEZ
+            boundary from the gap position; looked up here when not given.
 
     Returns:
         (final_score, breakdown_dict)
@@ -2459,13 +2495,14 @@ def compute_gap_score(
         # Use already-computed duration_h (from duration_minutes) — never access gap.gap_duration_hours
         # directly since existing tests mock gap without setting that attribute.
         if duration_h >= _min_gap_h and _flag_risk_ok:
-            _eez_lat = getattr(gap, "gap_off_lat", None) or getattr(gap, "gap_on_lat", None)
-            _eez_lon = getattr(gap, "gap_off_lon", None) or getattr(gap, "gap_on_lon", None)
-            if _eez_lat is not None and _eez_lon is not None:
+            _eez_pos = _eez_position(gap)
+            if _eez_pos is not None:
                 try:
-                    from app.utils.eez_boundaries import distance_to_nearest_eez_boundary_nm
+                    if eez_boundary is None:
+                        from app.utils.eez_boundaries import distance_to_nearest_eez_boundary_nm
 
-                    _dist_nm, _eez_name = distance_to_nearest_eez_boundary_nm(_eez_lat, _eez_lon)
+                        eez_boundary = distance_to_nearest_eez_boundary_nm(*_eez_pos)
+                    _dist_nm, _eez_name = eez_boundary
                     if _dist_nm <= eez_cfg.get("within_5nm_threshold", 5.0):
                         breakdown["eez_boundary_proximity_5nm"] = eez_cfg.get("within_5nm", 25)
                         breakdown["_eez_boundary_name"] = _eez_name
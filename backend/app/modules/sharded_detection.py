@@ -0,0 +1,295 @@
+"""Process-pool sharded execution of per-vessel detectors.
+
+Detectors such as gap, spoofing or loitering detection treat every vessel on
+its own, so a run can be split by vessel.  :func:`run_sharded` calls a
+detector's ``run_*`` function once per shard, each in a worker process, with
+``shard=(index, count)``; the detector then only processes vessels whose
+``vessel_id % count == index`` (:func:`in_shard`).
+
+Workers never commit.  Each opens its own engine and runs the detector in a
+session joined to an outer transaction that is rolled back at the end: the
+detector's commits only release savepoints, so its duplicate checks still see
+the rows it wrote itself.  The rows the session inserted, updated or deleted
+are returned as plain column values, together with any checkpoint advances
+(see :func:`app.modules.detector_checkpoints.deferred_advances`).  The parent
+writes all shards' rows in one transaction in shard order, then merges the
+shards' summary dicts, so a sharded run stores the same events and returns
+the same summary as a serial one.
+
+The ids workers draw depend on timing, so the parent discards them and
+assigns new rows' primary keys itself, in vessel order, remapping foreign
+keys between the new rows.  Ids are therefore the same from one sharded run
+to the next, but need not equal a serial run's.
+
+Only ORM writes are captured: detectors must not issue bulk SQL DML when
+``shard`` is set.  Workers rely on PostgreSQL sequences to hand out primary
+keys that no other worker will reuse; on SQLite the detector runs serially.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import create_engine, delete, event, inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import UnmappedColumnError
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.models.base import Base
+from app.modules.detector_checkpoints import PendingAdvance, apply_advance, deferred_advances
+
+logger = logging.getLogger(__name__)
+
+# Shards per worker process; smaller shards even out vessels with long tracks
+_SHARDS_PER_WORKER = 4
+
+Shard = tuple[int, int]
+
+
+def in_shard(vessel_id: int, shard: Shard | None) -> bool:
+    """Whether ``vessel_id`` belongs to ``shard`` (every vessel does when None)."""
+    return shard is None or vessel_id % shard[1] == shard[0]
+
+
+def resolve_workers(workers: int | None = None) -> int:
+    """Worker processes for a run: ``workers`` if given, else the configured count.
+
+    Zero means one per CPU core; without ``DETECTOR_SHARDING_ENABLED`` the
+    configured count is 1 (serial).
+    """
+    if workers is None:
+        if not settings.DETECTOR_SHARDING_ENABLED:
+            return 1
+        workers = settings.DETECTOR_WORKERS
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+@dataclass
+class ShardChanges:
+    """Rows a shard wrote, keyed by table name, as ``{column key: value}`` dicts."""
+
+    inserts: dict[str, list[dict]] = field(default_factory=dict)
+    updates: dict[str, list[dict]] = field(default_factory=dict)
+    deletes: dict[str, list[dict]] = field(default_factory=dict)
+
+
+class _ChangeRecorder:
+    """Collects the ORM objects a session inserts, updates and deletes."""
+
+    def __init__(self, session: Session) -> None:
+        # Keyed by id() to keep first-seen order without hashing ORM objects
+        self._new: dict[int, Any] = {}
+        self._dirty: dict[int, Any] = {}
+        self._deleted: dict[int, Any] = {}
+        event.listen(session, "after_flush", self._after_flush)
+
+    def _after_flush(self, session: Session, flush_context) -> None:
+        # Still the pre-flush state here
+        for obj in session.new:
+            self._new.setdefault(id(obj), obj)
+        for obj in session.dirty:
+            if id(obj) not in self._new and session.is_modified(obj):
+                self._dirty.setdefault(id(obj), obj)
+        for obj in session.deleted:
+            if id(obj) not in self._new:
+                self._deleted.setdefault(id(obj), obj)
+
+    def changes(self) -> ShardChanges:
+        """Final state of every row written; call before the transaction ends."""
+        changes = ShardChanges()
+        for obj in self._new.values():
+            # Rolled back (transient) or deleted again: nothing to write
+            if inspect(obj).persistent:
+                for table, row in _rows(obj):
+                    changes.inserts.setdefault(table, []).append(row)
+        for obj in self._dirty.values():
+            state = inspect(obj)
+            if state.persistent and id(obj) not in self._deleted:
+                for table, row in _rows(obj):
+                    changes.updates.setdefault(table, []).append(row)
+        for obj in self._deleted.values():
+            state = inspect(obj)
+            if state.was_deleted:
+                mapper = state.mapper
+                keys = dict(zip((c.key for c in mapper.primary_key), state.identity, strict=True))
+                changes.deletes.setdefault(mapper.local_table.name, []).append(keys)
+        return changes
+
+
+def _rows(obj: Any) -> list[tuple[str, dict]]:
+    """Column values of ``obj`` per mapped table."""
+    mapper = inspect(obj).mapper
+    rows = []
+    for table in mapper.tables:
+        row = {}
+        for column in table.columns:
+            try:
+                prop = mapper.get_property_by_column(column)
+            except UnmappedColumnError:
+                continue
+            row[column.key] = getattr(obj, prop.key)
+        rows.append((table.name, row))
+    return rows
+
+
+# Engine of a worker process, created by _init_worker
+_worker_engine = None
+
+
+def _init_worker(url: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(url, poolclass=NullPool)
+
+
+def _run_shard(
+    task: tuple[Callable[..., Any], Shard, dict],
+) -> tuple[Any, ShardChanges, list[PendingAdvance]]:
+    detector, shard, kwargs = task
+    with _worker_engine.connect() as conn:
+        outer = conn.begin()
+        session = Session(
+            bind=conn,
+            join_transaction_mode="create_savepoint",
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        recorder = _ChangeRecorder(session)
+        try:
+            with deferred_advances() as advances:
+                result = detector(session, shard=shard, **kwargs)
+            session.flush()
+            return result, recorder.changes(), advances
+        finally:
+            session.close()
+            outer.rollback()
+
+
+def _apply_changes(db: Session, shard_changes: list[ShardChanges]) -> None:
+    """Write the shards' rows: parents before children, in shard order.
+
+    Worker-drawn primary keys depend on how the shards' inserts interleaved,
+    so new rows get their ids here instead, in vessel order (shard order for
+    tables without ``vessel_id``), and foreign keys to them are remapped.
+    """
+    tables = Base.metadata.sorted_tables
+    # (shard index, table name) -> {worker id: stored id}
+    new_ids: dict[tuple[int, str], dict[Any, Any]] = {}
+    for table in tables:
+        tagged = [
+            (i, _remap(table, row, new_ids, i))
+            for i, c in enumerate(shard_changes)
+            for row in c.inserts.get(table.name, ())
+        ]
+        if not tagged:
+            continue
+        pk = table.autoincrement_column
+        if pk is None:
+            db.execute(table.insert(), [row for _, row in tagged])
+            continue
+        if "vessel_id" in table.c:
+            tagged.sort(key=lambda item: (item[1]["vessel_id"] is None, item[1]["vessel_id"] or 0))
+        worker_ids = [row.pop(pk.key) for _, row in tagged]
+        stored = db.scalars(
+            table.insert().returning(pk, sort_by_parameter_order=True),
+            [row for _, row in tagged],
+        ).all()
+        for (i, _), worker_id, stored_id in zip(tagged, worker_ids, stored, strict=True):
+            new_ids.setdefault((i, table.name), {})[worker_id] = stored_id
+    for table in tables:
+        keys = [col.key for col in table.primary_key.columns]
+        for i, changes in enumerate(shard_changes):
+            for row in changes.updates.get(table.name, ()):
+                row = _remap(table, row, new_ids, i)
+                db.execute(
+                    update(table)
+                    .where(*(table.c[k] == row[k] for k in keys))
+                    .values({k: v for k, v in row.items() if k not in keys})
+                )
+    for table in reversed(tables):
+        for changes in shard_changes:
+            for row in changes.deletes.get(table.name, ()):
+                db.execute(delete(table).where(*(table.c[k] == v for k, v in row.items())))
+
+
+def _remap(table, row: dict, new_ids: dict[tuple[int, str], dict], shard_index: int) -> dict:
+    """Copy of ``row`` with foreign keys to the shard's new rows pointing at their stored ids."""
+    row = dict(row)
+    for fk in table.foreign_keys:
+        ids = new_ids.get((shard_index, fk.column.table.name))
+        key = fk.parent.key
+        if ids and row.get(key) in ids:
+            row[key] = ids[row[key]]
+    return row
+
+
+def merge_results(results: list[Any]) -> Any:
+    """Combine shard summaries: numbers add up, lists concatenate, dicts merge by key."""
+    merged = results[0] if results else {}
+    for result in results[1:]:
+        merged = _merge(merged, result)
+    return merged
+
+
+def _merge(a: Any, b: Any) -> Any:
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = dict(a)
+        for key, value in b.items():
+            out[key] = _merge(out[key], value) if key in out else value
+        return out
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a or b
+    if isinstance(a, int | float) and isinstance(b, int | float):
+        return a + b
+    if isinstance(a, list) and isinstance(b, list):
+        return a + b
+    return a
+
+
+def run_sharded(
+    db: Session, detector: Callable[..., Any], *, workers: int | None = None, **kwargs: Any
+) -> Any:
+    """Run ``detector(db, **kwargs)`` over vessel shards in a process pool.
+
+    ``detector`` must be a module-level ``run_*`` function accepting ``shard``;
+    ``kwargs`` must be picklable.  Falls back to a plain call with one worker
+    or on SQLite.  Commits the combined writes and returns the merged summary.
+    """
+    n_workers = resolve_workers(workers)
+    bind = db.get_bind() if n_workers > 1 else None
+    if bind is None or bind.dialect.name == "sqlite":
+        if bind is not None:
+            logger.info(
+                "Sharded detection needs PostgreSQL; running %s serially", detector.__name__
+            )
+        return detector(db, **kwargs)
+
+    # Workers read through their own connections
+    db.commit()
+    n_shards = n_workers * _SHARDS_PER_WORKER
+    tasks = [(detector, (i, n_shards), kwargs) for i in range(n_shards)]
+    logger.info("Running %s in %d shards on %d workers", detector.__name__, n_shards, n_workers)
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(bind.url.render_as_string(hide_password=False),),
+    ) as pool:
+        outcomes = list(pool.map(_run_shard, tasks))
+
+    try:
+        _apply_changes(db, [changes for _, changes, _ in outcomes])
+        for _, _, advances in outcomes:
+            for pending in advances:
+                apply_advance(db, pending)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return merge_results([result for result, _, _ in outcomes])
@@ -0,0 +1,303 @@
+"""Optional spatial index over ``ais_points`` and ``dark_vessel_detections``.
+
+With ``SPATIAL_INDEX_ENABLED`` init_db builds, per dialect:
+
+- SQLite: an R*Tree virtual table ``<table>_rtree`` holding each row's
+  (lat, lon, epoch-seconds) box, kept in sync by AFTER INSERT / UPDATE /
+  DELETE triggers — so core inserts, upserts and bulk deletes are covered
+  without any Python hook.
+- PostgreSQL: a GiST index on the expression ``point(lon, lat)``, plus a
+  BRIN index on ``dark_vessel_detections.detection_time_utc`` (points
+  already have a btree on ``timestamp_utc``).  An expression index rather
+  than a generated column keeps the ``SELECT *`` copies in
+  :mod:`app.modules.pg_partitions` working, and the partition conversion
+  recreates it like any other index.
+
+Callers never talk to either directly: :func:`point_filter` and
+:func:`detection_filter` return a WHERE clause for "rows in this box and
+time window" that uses the index when it exists and plain range predicates
+otherwise.  The exact lat/lon/time predicates are always included — the
+R*Tree stores 32-bit floats rounded outwards, so it is a prefilter only.
+
+Boxes do not wrap: :func:`app.utils.geo.bbox_around_nm` widens a circle
+that crosses the antimeridian to the full longitude range.
+"""
+
+from __future__ import annotations
+
+import calendar
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, NamedTuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import and_, column, func, select, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BBox(NamedTuple):
+    """Axis-aligned box in degrees, lon-first like shapely ``bounds``."""
+
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+
+@dataclass(frozen=True)
+class SpatialSpec:
+    primary_key: str
+    lat: str
+    lon: str
+    time: str
+
+
+SPATIAL_TABLES = {
+    "ais_points": SpatialSpec("ais_point_id", "lat", "lon", "timestamp_utc"),
+    "dark_vessel_detections": SpatialSpec(
+        "detection_id", "detection_lat", "detection_lon", "detection_time_utc"
+    ),
+}
+
+# engine -> {table: "rtree" | "gist" | None}
+_index_kinds: WeakKeyDictionary[Any, dict[str, str | None]] = WeakKeyDictionary()
+
+
+def bbox_around(lat: float, lon: float, radius_nm: float) -> BBox:
+    """Box enclosing every position within ``radius_nm`` of (lat, lon)."""
+    from app.utils.geo import bbox_around_nm
+
+    return BBox(*bbox_around_nm(lat, lon, radius_nm))
+
+
+def spatial_index_enabled(bind) -> bool:
+    """True when the index is switched on and ``bind`` is SQLite or PostgreSQL."""
+    if not getattr(settings, "SPATIAL_INDEX_ENABLED", False):
+        return False
+    return getattr(bind.dialect, "name", None) in ("sqlite", "postgresql")
+
+
+# ── DDL ─────────────────────────────────────────────────────────────────────
+
+
+def _epoch_sql(expr: str) -> str:
+    # NULL times map to 0; the exact time predicate excludes those rows anyway
+    return f"COALESCE(CAST(strftime('%s', {expr}) AS INTEGER), 0)"
+
+
+def _ensure_sqlite(conn, name: str, spec: SpatialSpec, rebuild: bool) -> None:
+    rtree = f"{name}_rtree"
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": rtree}
+    ).first()
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} "
+            "USING rtree(id, min_lat, max_lat, min_lon, max_lon, min_t, max_t)"
+        )
+    )
+
+    def row(ref: str) -> str:
+        t = _epoch_sql(f"{ref}.{spec.time}")
+        return (
+            f"{ref}.{spec.primary_key}, {ref}.{spec.lat}, {ref}.{spec.lat}, "
+            f"{ref}.{spec.lon}, {ref}.{spec.lon}, {t}, {t}"
+        )
+
+    has_position = f"NEW.{spec.lat} IS NOT NULL AND NEW.{spec.lon} IS NOT NULL"
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {rtree}_insert AFTER INSERT ON {name} "
+            f"WHEN {has_position} BEGIN "
+            f"INSERT OR REPLACE INTO {rtree} VALUES ({row('NEW')}); END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {rtree}_update "
+            f"AFTER UPDATE OF {spec.lat}, {spec.lon}, {spec.time} ON {name} BEGIN "
+            f"DELETE FROM {rtree} WHERE id = OLD.{spec.primary_key}; "
+            f"INSERT INTO {rtree} SELECT {row('NEW')} WHERE {has_position}; END"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {rtree}_delete AFTER DELETE ON {name} BEGIN "
+            f"DELETE FROM {rtree} WHERE id = OLD.{spec.primary_key}; END"
+        )
+    )
+    if exists and not rebuild:
+        return
+    conn.execute(text(f"DELETE FROM {rtree}"))
+    conn.execute(
+        text(
+            f"INSERT INTO {rtree} SELECT {row(name)} FROM {name} "
+            f"WHERE {name}.{spec.lat} IS NOT NULL AND {name}.{spec.lon} IS NOT NULL"
+        )
+    )
+    logger.info("Built %s", rtree)
+
+
+def _ensure_postgres(conn, name: str, spec: SpatialSpec, rebuild: bool) -> None:
+    index = f"ix_{name}_geo"
+    if rebuild:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    conn.execute(
+        text(
+            f"CREATE INDEX IF NOT EXISTS {index} ON {name} "
+            f"USING gist (point({spec.lon}, {spec.lat}))"
+        )
+    )
+    if name == "dark_vessel_detections":
+        conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{name}_time_brin ON {name} USING brin ({spec.time})"
+            )
+        )
+
+
+def ensure_spatial_index(engine, rebuild: bool = False) -> None:
+    """init_db hook: create the index structures, backfilling new R*Trees.
+
+    ``rebuild`` repopulates the R*Trees / recreates the GiST indexes.
+    """
+    if not spatial_index_enabled(engine):
+        return
+    _index_kinds.pop(engine, None)
+    for name, spec in SPATIAL_TABLES.items():
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                try:
+                    _ensure_sqlite(conn, name, spec, rebuild)
+                except OperationalError:
+                    # SQLite builds without the R*Tree module
+                    logger.warning("SQLite R*Tree unavailable; %s stays unindexed", name)
+                    return
+            else:
+                _ensure_postgres(conn, name, spec, rebuild)
+
+
+def _index_kind(db, name: str) -> str | None:
+    bind = db.get_bind()
+    if not spatial_index_enabled(bind):
+        return None
+    engine = getattr(bind, "engine", bind)
+    kinds = _index_kinds.setdefault(engine, {})
+    if name not in kinds:
+        if bind.dialect.name == "sqlite":
+            found = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+                {"n": f"{name}_rtree"},
+            ).first()
+            kinds[name] = "rtree" if found else None
+        else:
+            found = db.execute(
+                text("SELECT to_regclass(:n) IS NOT NULL"), {"n": f"ix_{name}_geo"}
+            ).scalar()
+            kinds[name] = "gist" if found else None
+    return kinds[name]
+
+
+# ── Query helpers ───────────────────────────────────────────────────────────
+
+
+def _epoch(ts: datetime) -> int:
+    # Whole seconds, truncated like strftime('%s') in the triggers
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(UTC)
+    return calendar.timegm(ts.timetuple())
+
+
+def bbox_clause(lat_col, lon_col, bbox: BBox):
+    """Plain range predicate for columns with no spatial index."""
+    return and_(
+        lat_col.between(bbox.min_lat, bbox.max_lat),
+        lon_col.between(bbox.min_lon, bbox.max_lon),
+    )
+
+
+def _filter(db, model, name: str, bbox: BBox, start: datetime | None, end: datetime | None):
+    spec = SPATIAL_TABLES[name]
+    lat, lon, ts = getattr(model, spec.lat), getattr(model, spec.lon), getattr(model, spec.time)
+    clauses = [bbox_clause(lat, lon, bbox)]
+    if start is not None:
+        clauses.append(ts >= start)
+    if end is not None:
+        clauses.append(ts <= end)
+
+    kind = _index_kind(db, name)
+    if kind == "rtree":
+        rt = table(
+            f"{name}_rtree",
+            *(
+                column(c)
+                for c in ("id", "min_lat", "max_lat", "min_lon", "max_lon", "min_t", "max_t")
+            ),
+        )
+        ids = select(rt.c.id).where(
+            rt.c.max_lat >= bbox.min_lat,
+            rt.c.min_lat <= bbox.max_lat,
+            rt.c.max_lon >= bbox.min_lon,
+            rt.c.min_lon <= bbox.max_lon,
+        )
+        if start is not None:
+            ids = ids.where(rt.c.max_t >= _epoch(start))
+        if end is not None:
+            ids = ids.where(rt.c.min_t <= _epoch(end))
+        clauses.append(getattr(model, spec.primary_key).in_(ids))
+    elif kind == "gist":
+        box = func.box(
+            func.point(bbox.min_lon, bbox.min_lat), func.point(bbox.max_lon, bbox.max_lat)
+        )
+        clauses.append(func.point(lon, lat).op("<@")(box))
+    return and_(*clauses)
+
+
+def point_filter(db, bbox: BBox, start: datetime | None = None, end: datetime | None = None):
+    """WHERE clause selecting ``AISPoint`` rows inside ``bbox`` and [start, end]."""
+    from app.models.ais_point import AISPoint
+
+    return _filter(db, AISPoint, "ais_points", bbox, start, end)
+
+
+def detection_filter(db, bbox: BBox, start: datetime | None = None, end: datetime | None = None):
+    """WHERE clause selecting ``DarkVesselDetection`` rows inside ``bbox`` and [start, end]."""
+    from app.models.stubs import DarkVesselDetection
+
+    return _filter(db, DarkVesselDetection, "dark_vessel_detections", bbox, start, end)
+
+
+def points_in_window(
+    db,
+    bbox: BBox,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    vessel_ids=None,
+) -> list:
+    """AIS points inside ``bbox`` and [start, end], ordered by vessel and time."""
+    from app.models.ais_point import AISPoint
+
+    stmt = select(AISPoint).where(point_filter(db, bbox, start, end))
+    if vessel_ids is not None:
+        stmt = stmt.where(AISPoint.vessel_id.in_(list(vessel_ids)))
+    stmt = stmt.order_by(AISPoint.vessel_id, AISPoint.timestamp_utc)
+    return list(db.execute(stmt).scalars())
+
+
+def detections_in_window(
+    db, bbox: BBox, start: datetime | None = None, end: datetime | None = None
+) -> list:
+    """Dark vessel detections inside ``bbox`` and [start, end], ordered by time."""
+    from app.models.stubs import DarkVesselDetection
+
+    stmt = (
+        select(DarkVesselDetection)
+        .where(detection_filter(db, bbox, start, end))
+        .order_by(DarkVesselDetection.detection_time_utc)
+    )
+    return list(db.execute(stmt).scalars())
@@ -63,11 +63,11 @@ def collect_spire_gulf_ais(
     Returns:
         Stats dict: {points_imported, vessels_seen, errors, quota_used}
     """
-    from app.models.ais_observation import AISObservation
     from app.models.ais_point import AISPoint
     from app.models.collection_run import CollectionRun
     from app.models.vessel import Vessel
     from app.modules.normalize import is_non_vessel_mmsi
+    from app.modules.observation_store import add_observation
     from app.modules.spire_ais_client import SpireAisClient
     from app.utils.vessel_identity import flag_to_risk_category, mmsi_to_flag
 
@@ -192,7 +192,8 @@ def collect_spire_gulf_ais(
 
                 # Dual-write to AIS observations
                 try:
-                    obs = AISObservation(
+                    add_observation(
+                        db,
                         mmsi=mmsi,
                         timestamp_utc=timestamp,
                         lat=pos["lat"],
@@ -202,7 +203,6 @@ def collect_spire_gulf_ais(
                         heading=pos.get("heading"),
                         source="spire",
                     )
-                    db.add(obs)
                 except Exception as exc:
                     logger.debug("AIS observation dual-write failed: %s", exc)
 
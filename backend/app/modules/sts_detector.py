@@ -31,6 +31,7 @@ import math
 from collections import defaultdict
 from datetime import UTC, date, datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import yaml
 from sqlalchemy.orm import Session
@@ -40,7 +41,10 @@ from app.models.base import CorridorTypeEnum, STSDetectionTypeEnum
 from app.models.corridor import Corridor
 from app.models.sts_transfer import StsTransferEvent
 from app.models.vessel import Vessel
-from app.utils.geo import parse_wkt_bbox as _parse_wkt_bbox
+from app.modules.detector_checkpoints import DetectorSpec, plan_detector_run
+
+if TYPE_CHECKING:
+    from app.modules.track_store import TrackStore
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +109,15 @@ _RISK_STS_ZONE: int = 35
 _RISK_NO_ZONE: int = 25
 _RISK_APPROACHING: int = 20
 
+# Incremental-run checkpoint (see app.modules.detector_checkpoints).  Pairs are
+# formed across vessels, so when any tanker has new points every tanker is
+# reloaded from the earliest rescan start.
+STS_CHECKPOINT = DetectorSpec(
+    "sts",
+    lookback=timedelta(minutes=_BUCKET_MINUTES * _MIN_CONSECUTIVE_WINDOWS),
+    config_keys=("STS_PROXIMITY_METERS", "STS_MIN_WINDOWS"),
+)
+
 
 # ── Public entry point ────────────────────────────────────────────────────────
 
@@ -113,6 +126,8 @@ def detect_sts_events(
     db: Session,
     date_from: date | None = None,
     date_to: date | None = None,
+    track_store: TrackStore | None = None,
+    incremental: bool = False,
 ) -> dict:
     """Run both detection phases and persist new StsTransferEvents.
 
@@ -120,6 +135,11 @@ def detect_sts_events(
         db: Active SQLAlchemy session.
         date_from: Inclusive start date filter on AIS timestamps (UTC).
         date_to: Inclusive end date filter on AIS timestamps (UTC).
+        track_store: Shared pipeline TrackStore to read points from, if any.
+        incremental: Skip phases A and B unless a tanker has new AIS points
+            since the last incremental run, and then only read points from
+            just before the earliest of them
+            (see :mod:`app.modules.detector_checkpoints`).
 
     Returns:
         ``{"sts_events_created": N}`` where N is the total number of new rows
@@ -137,7 +157,15 @@ def detect_sts_events(
         logger.info("STS detector: no tanker vessels found — skipping.")
         return {"sts_events_created": 0}
 
-    points = _load_ais_points(db, tanker_ids, date_from, date_to)
+    plan = None
+    since = None
+    if incremental:
+        plan = plan_detector_run(db, STS_CHECKPOINT, tanker_ids)
+        since = plan.fleet_start(None)
+    if plan is None or plan.vessel_ids:
+        points = _load_ais_points(db, tanker_ids, date_from, date_to, track_store, since)
+    else:
+        points = []
     logger.info(
         "STS detector: loaded %d AIS points for %d tanker vessels.",
         len(points),
@@ -147,6 +175,9 @@ def detect_sts_events(
     created_a = _phase_a(db, points, sts_zone_bboxes, corridors, config)
     created_b = _phase_b(db, points, sts_zone_bboxes, corridors, config)
     created_c = _phase_c_dark_dark(db, corridors, config)
+    if plan is not None:
+        plan.advance()
+        db.commit()
 
     total = created_a + created_b + created_c
     logger.info(
@@ -162,6 +193,14 @@ def detect_sts_events(
 # ── Geometry helpers ──────────────────────────────────────────────────────────
 
 
+def _parse_wkt_bbox(geometry_value: object) -> tuple[float, float, float, float] | None:
+    """(min_lon, min_lat, max_lon, max_lat) of a corridor geometry, parsed once per WKT."""
+    from app.modules.corridor_index import zone_geometry
+
+    geom = zone_geometry(geometry_value)
+    return geom.bounds if geom is not None else None
+
+
 def _haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Great-circle distance in metres between two WGS-84 coordinates.
 
@@ -205,8 +244,23 @@ def _load_ais_points(
     vessel_ids: list[int],
     date_from: date | None,
     date_to: date | None,
+    track_store: TrackStore | None = None,
+    since: datetime | None = None,
 ) -> list[AISPoint]:
-    """Load AIS points for given vessel IDs within the optional date window."""
+    """Load AIS points for given vessel IDs within the optional date window.
+
+    ``since`` further narrows the window; it is floored to the hour so the
+    15-minute buckets line up with a full scan.
+    """
+    if since is not None:
+        since = since.replace(minute=0, second=0, microsecond=0)
+    if track_store is not None:
+        from app.modules.track_store import day_bounds
+
+        start, end = day_bounds(date_from, date_to)
+        if since is not None:
+            start = since if start is None else max(start, since)
+        return track_store.points_many(vessel_ids, start, end)
     query = (
         db.query(AISPoint)
         .filter(AISPoint.vessel_id.in_(vessel_ids))
@@ -220,6 +274,8 @@ def _load_ais_points(
         query = query.filter(
             AISPoint.timestamp_utc <= datetime.combine(date_to, datetime.max.time())
         )
+    if since is not None:
+        query = query.filter(AISPoint.timestamp_utc >= since)
     return query.all()
 
 
@@ -530,22 +586,10 @@ def _phase_a(
                     duration = int((end_dt - start_dt).total_seconds() / 60)
 
                     # Port proximity filter: skip if both vessels are within 3nm of a major port
-                    from app.models.port import Port
-                    from app.utils.geo import haversine_nm, load_geometry
+                    from app.modules.port_index import port_index
 
                     try:
-                        ports = db.query(Port).filter(Port.major_port).all()
-                        in_port = False
-                        for port in ports:
-                            port_shape = load_geometry(port.geometry)
-                            if port_shape is None:
-                                continue
-                            port_lat, port_lon = port_shape.y, port_shape.x
-                            d1 = haversine_nm(mean_lat, mean_lon, port_lat, port_lon)
-                            if d1 < 3.0:
-                                in_port = True
-                                break
-                        if in_port:
+                        if port_index(db).ports_within(mean_lat, mean_lon, 3.0, major_only=True):
                             run_start = idx
                             continue
                     except Exception:
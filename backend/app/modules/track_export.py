@@ -11,19 +11,12 @@ from sqlalchemy.orm import Session
 def _query_points(
     db: Session, vessel_id: int, date_from: date | None = None, date_to: date | None = None
 ):
-    """Query AISPoint records for a vessel, ordered by timestamp."""
-    from app.models.ais_point import AISPoint
-
-    q = db.query(AISPoint).filter(AISPoint.vessel_id == vessel_id)
-    if date_from:
-        q = q.filter(
-            AISPoint.timestamp_utc >= datetime(date_from.year, date_from.month, date_from.day)
-        )
-    if date_to:
-        q = q.filter(
-            AISPoint.timestamp_utc <= datetime(date_to.year, date_to.month, date_to.day, 23, 59, 59)
-        )
-    return q.order_by(AISPoint.timestamp_utc).all()
+    """Query a vessel's AIS points (live and archived), ordered by timestamp."""
+    from app.modules.track_reader import read_track
+
+    start = datetime(date_from.year, date_from.month, date_from.day) if date_from else None
+    end = datetime(date_to.year, date_to.month, date_to.day, 23, 59, 59) if date_to else None
+    return read_track(db, vessel_id, start, end)
 
 
 def export_track_geojson(
@@ -242,9 +242,12 @@ def _count_outside_bounds(features: dict[str, float | None]) -> int:
 # ---------------------------------------------------------------------------
 
 
-def run_track_naturalness_detection(db: Session) -> dict:
+def run_track_naturalness_detection(db: Session, shard: tuple[int, int] | None = None) -> dict:
     """Run track naturalness detection across all vessels.
 
+    ``shard`` limits the run to the vessels of one shard among those selected
+    (see :mod:`app.modules.sharded_detection`).
+
     Returns dict with keys: checked, skipped, flagged, status.
     """
     if not settings.TRACK_NATURALNESS_ENABLED:
@@ -253,15 +256,19 @@ def run_track_naturalness_detection(db: Session) -> dict:
     cutoff = datetime.now(UTC) - timedelta(hours=WINDOW_HOURS)
 
     # Get vessels with enough AIS data in the window
-    vessel_ids = (
+    selected = (
         db.query(AISPoint.vessel_id)
         .filter(AISPoint.timestamp_utc >= cutoff)
         .group_by(AISPoint.vessel_id)
         .having(func.count(AISPoint.ais_point_id) >= MIN_POINTS)
-        .limit(BATCH_SIZE)
-        .all()
+        # A stable batch across runs, and the same one for every shard
+        .order_by(AISPoint.vessel_id)
     )
-    vessel_ids = [v[0] for v in vessel_ids]
+    vessel_ids = [v[0] for v in selected.limit(BATCH_SIZE).all()]
+    if shard is not None:
+        from app.modules.sharded_detection import in_shard
+
+        vessel_ids = [vid for vid in vessel_ids if in_shard(vid, shard)]
 
     checked = 0
     skipped = 0
@@ -0,0 +1,175 @@
+"""Tiered AIS track reads spanning the live database and Parquet archives.
+
+``archive_old_points`` moves history out of ``ais_points`` into
+``{ARCHIVE_STORAGE_DIR}/ais_points/YYYY/MM/*.parquet.*`` files.  Readers that
+only query ``AISPoint`` silently lose that history; this module puts the
+two tiers behind one call:
+
+- :func:`read_track` returns a vessel's points for a time range, merged
+  from hot DB rows and archived rows, ordered by timestamp.  Hot rows are
+  the usual ``AISPoint`` instances; archived rows are :class:`ArchivedPoint`
+  objects with the same attributes, so existing per-point code works on both.
+- :func:`scan_archives` returns a polars ``LazyFrame`` over the archive
+  files that can match a time range, vessel set or area (pruned with the
+  archive manifest), for long-range analysis that should not materialise
+  objects at all.
+
+Archive files are never loaded whole: each is scanned lazily and the
+vessel / time / speed predicates are pushed down into the Parquet reader,
+so only matching row groups are decoded.  Batches already restored into
+the database (status ``restored``) are skipped, and archived rows whose
+``ais_point_id`` is also present in the hot result are dropped.
+
+Disable with ``ARCHIVE_TIERED_READS=False`` to read the database only.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+import polars as pl
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.modules.ais_archiver import _AIS_POINT_COLUMNS
+from app.modules.archive_manifest import BBox, candidate_files
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedPoint:
+    """Read-only AIS point served from an archive file.
+
+    Carries the same column attributes as ``AISPoint`` (``ais_class`` as its
+    string value) but no session state or relationships.
+    """
+
+    __slots__ = tuple(_AIS_POINT_COLUMNS)
+
+    def __init__(self, **values: Any) -> None:
+        for name in _AIS_POINT_COLUMNS:
+            setattr(self, name, values.get(name))
+
+    def __repr__(self) -> str:
+        return (
+            f"ArchivedPoint(ais_point_id={self.ais_point_id}, vessel_id={self.vessel_id}, "
+            f"timestamp_utc={self.timestamp_utc})"
+        )
+
+
+def tiered_reads_enabled() -> bool:
+    return getattr(settings, "ARCHIVE_TIERED_READS", True)
+
+
+def archive_files(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    vessel_ids: list[int] | None = None,
+    bbox: BBox | None = None,
+) -> list[str]:
+    """Paths of completed archive files that may hold points matching the query.
+
+    Pruned with the archive manifest (time range, bbox, vessel Bloom filter).
+    """
+    return candidate_files(db, start, end, vessel_ids=vessel_ids, bbox=bbox)
+
+
+def scan_archives(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    vessel_ids: list[int] | None = None,
+    bbox: BBox | None = None,
+) -> pl.LazyFrame | None:
+    """Lazy frame of archived points in [start, end], or None if no file can match.
+
+    ``bbox`` is ``(lat_min, lon_min, lat_max, lon_max)``.  The filters are
+    part of the returned plan, so collecting it decodes only the row groups
+    that can match; callers may add their own predicates.
+    """
+    files = archive_files(db, start, end, vessel_ids=vessel_ids, bbox=bbox)
+    if not files:
+        return None
+
+    predicate = pl.lit(True)
+    if vessel_ids is not None:
+        predicate &= pl.col("vessel_id").is_in(vessel_ids)
+    if start is not None:
+        predicate &= pl.col("timestamp_utc") >= naive_utc(start)
+    if end is not None:
+        predicate &= pl.col("timestamp_utc") <= naive_utc(end)
+    if bbox is not None:
+        lat_min, lon_min, lat_max, lon_max = bbox
+        predicate &= pl.col("lat").is_between(lat_min, lat_max)
+        predicate &= pl.col("lon").is_between(lon_min, lon_max)
+
+    # One scan per file so archives written with slightly different schemas
+    # (e.g. all-null columns) still concatenate
+    frames = [pl.scan_parquet(path).filter(predicate) for path in files]
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def read_archived_points(
+    db: Session,
+    vessel_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    min_sog: float | None = None,
+) -> list[ArchivedPoint]:
+    """Archived points for one vessel in [start, end], ordered by timestamp."""
+    lf = scan_archives(db, start, end, vessel_ids=[vessel_id])
+    if lf is None:
+        return []
+    if min_sog is not None:
+        lf = lf.filter(pl.col("sog").is_not_null() & (pl.col("sog") >= min_sog))
+    df = lf.sort("timestamp_utc", "ais_point_id").collect()
+    return [ArchivedPoint(**row) for row in df.iter_rows(named=True)]
+
+
+def read_track(
+    db: Session,
+    vessel_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    *,
+    min_sog: float | None = None,
+) -> list:
+    """A vessel's AIS points in [start, end] from the database and archives.
+
+    Args:
+        db: Database session.
+        vessel_id: Vessel to read.
+        start: Inclusive lower timestamp bound, or None for no bound.
+        end: Inclusive upper timestamp bound, or None for no bound.
+        min_sog: Keep only points with a non-null ``sog >= min_sog``.
+
+    Returns:
+        ``AISPoint`` and ``ArchivedPoint`` objects ordered by timestamp.
+    """
+    from app.models.ais_point import AISPoint
+
+    terms = [AISPoint.vessel_id == vessel_id]
+    if start is not None:
+        terms.append(AISPoint.timestamp_utc >= start)
+    if end is not None:
+        terms.append(AISPoint.timestamp_utc <= end)
+    if min_sog is not None:
+        terms += [AISPoint.sog.isnot(None), AISPoint.sog >= min_sog]
+    hot = db.query(AISPoint).filter(*terms).order_by(AISPoint.timestamp_utc).all()
+
+    if not tiered_reads_enabled():
+        return hot
+    archived = read_archived_points(db, vessel_id, start, end, min_sog=min_sog)
+    if not archived:
+        return hot
+
+    hot_ids = {p.ais_point_id for p in hot}
+    archived = [p for p in archived if p.ais_point_id not in hot_ids]
+    if hot and archived and archived[-1].timestamp_utc > hot[0].timestamp_utc:
+        return sorted([*archived, *hot], key=lambda p: p.timestamp_utc)
+    return [*archived, *hot]
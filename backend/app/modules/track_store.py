@@ -0,0 +1,464 @@
+"""Shared columnar AIS track store for one pipeline run.
+
+``discover_dark_vessels`` runs gap, spoofing, stale-AIS, loitering, STS and
+other detectors back to back, and each used to reload every vessel's
+``AISPoint`` rows as ORM instances.  A :class:`TrackStore` reads the columns
+detectors use — id, vessel, time, position, sog/cog/heading, nav status,
+source and draught — for the whole run window in one streamed SELECT and
+keeps them per vessel in parallel typed ``array`` buffers, ordered by
+timestamp.  Detectors that accept a ``track_store`` read their points from
+it instead of querying:
+
+===============  ===========  ======
+field            typecode     bytes
+===============  ===========  ======
+ais_point_id     ``q``        8
+epoch µs         ``q``        8
+lat / lon        ``d``        8 + 8
+sog/cog/heading  ``d``        8 × 3
+draught          ``d``        8
+nav_status       ``i``        4
+source           ``H``        2 (interned)
+===============  ===========  ======
+
+Values are kept at full precision so detectors comparing consecutive
+points for equality (stale AIS) see exactly what the ORM path returns.
+:meth:`TrackStore.points` yields :class:`StoredPoint` tuples with
+``AISPoint`` attribute names.  Requests outside the loaded window fall
+through to a plain column query for that vessel.
+
+New data arriving mid-run invalidates the affected vessels, which are
+re-read lazily on their next access:
+
+- ORM flushes that add, change or delete ``AISPoint`` rows (after_flush);
+- ORM bulk ``insert``/``update``/``delete`` on ``ais_points``, e.g. the
+  vessel merge reassigning points (do_orm_execute) — everything is dropped;
+- rows written outside the session (COPY ingest, other processes), picked
+  up by :meth:`TrackStore.refresh` from ``ais_point_id`` above the
+  committed high-water mark taken at load time (the same mark detector
+  checkpoints record, so late-committing transactions are not skipped).
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import NamedTuple
+from weakref import WeakSet
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.ais_point import AISPoint
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+_NAN = float("nan")
+_NO_INT = -(2**31)
+_COLUMNS = (
+    "ais_point_id",
+    "vessel_id",
+    "timestamp_utc",
+    "lat",
+    "lon",
+    "sog",
+    "cog",
+    "heading",
+    "nav_status",
+    "source",
+    "draught",
+)
+# Vessel ids per IN (...) list; stays under SQLite's bound-parameter limit
+_IN_CHUNK = 900
+
+
+class StoredPoint(NamedTuple):
+    """One point read from a :class:`TrackStore`; attribute-compatible with ``AISPoint``."""
+
+    ais_point_id: int
+    vessel_id: int
+    timestamp_utc: datetime
+    lat: float
+    lon: float
+    sog: float | None
+    cog: float | None
+    heading: float | None
+    nav_status: int | None
+    source: str | None
+    draught: float | None
+
+
+def day_bounds(
+    date_from: date | None, date_to: date | None
+) -> tuple[datetime | None, datetime | None]:
+    """Inclusive datetime bounds of a detector's ``date_from``/``date_to`` filter."""
+    start = datetime.combine(date_from, datetime.min.time()) if date_from else None
+    end = datetime.combine(date_to, datetime.max.time()) if date_to else None
+    return start, end
+
+
+def _in_window(stmt, start: datetime | None, end: datetime | None):
+    if start is not None:
+        stmt = stmt.where(AISPoint.timestamp_utc >= start)
+    if end is not None:
+        stmt = stmt.where(AISPoint.timestamp_utc <= end)
+    return stmt
+
+
+def _point_select(start: datetime | None, end: datetime | None):
+    cols = [AISPoint.__table__.c[name] for name in _COLUMNS]
+    stmt = _in_window(select(*cols), start, end)
+    return stmt.order_by(AISPoint.vessel_id, AISPoint.timestamp_utc, AISPoint.ais_point_id)
+
+
+def _micros(ts: datetime) -> int:
+    return (naive_utc(ts) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _opt(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class _VesselColumns:
+    """One vessel's points as parallel arrays, ordered by (timestamp, ais_point_id)."""
+
+    __slots__ = (
+        "ids",
+        "ts",
+        "lat",
+        "lon",
+        "sog",
+        "cog",
+        "heading",
+        "nav_status",
+        "source",
+        "draught",
+    )
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.ts = array("q")
+        self.lat = array("d")
+        self.lon = array("d")
+        self.sog = array("d")
+        self.cog = array("d")
+        self.heading = array("d")
+        self.nav_status = array("i")
+        self.source = array("H")
+        self.draught = array("d")
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def append(self, row: tuple, source_code: int) -> None:
+        point_id, _, ts, lat, lon, sog, cog, heading, nav, _, draught = row
+        self.ids.append(point_id)
+        self.ts.append(_micros(ts))
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.sog.append(_NAN if sog is None else sog)
+        self.cog.append(_NAN if cog is None else cog)
+        self.heading.append(_NAN if heading is None else heading)
+        self.nav_status.append(_NO_INT if nav is None else nav)
+        self.source.append(source_code)
+        self.draught.append(_NAN if draught is None else draught)
+
+    def points(self, vessel_id: int, lo: int, hi: int, sources: list) -> list[StoredPoint]:
+        return [
+            StoredPoint(
+                self.ids[i],
+                vessel_id,
+                _EPOCH + timedelta(microseconds=self.ts[i]),
+                self.lat[i],
+                self.lon[i],
+                _opt(self.sog[i]),
+                _opt(self.cog[i]),
+                _opt(self.heading[i]),
+                None if self.nav_status[i] == _NO_INT else self.nav_status[i],
+                sources[self.source[i]],
+                _opt(self.draught[i]),
+            )
+            for i in range(lo, hi)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        buffers = (getattr(self, name) for name in self.__slots__)
+        return sum(len(buf) * buf.itemsize for buf in buffers)
+
+
+class TrackStore:
+    """AIS columns of every vessel in ``[start, end]``, loaded once and shared.
+
+    Nothing is read until the first lookup.  ``scans`` counts the SELECTs
+    over ``ais_points`` rows the store has issued (initial load, vessel
+    reloads and out-of-window fall-through reads).
+    """
+
+    def __init__(
+        self, db: Session, start: datetime | None = None, end: datetime | None = None
+    ) -> None:
+        self.db = db
+        self.start = start
+        self.end = end
+        self.scans = 0
+        self._tracks: dict[int, _VesselColumns] | None = None
+        self._stale: set[int] = set()
+        self._stale_all = False
+        self._max_point_id = 0
+        self._sources: list[str | None] = []
+        self._source_codes: dict[str | None, int] = {}
+        _live_stores.add(self)
+
+    @classmethod
+    def for_dates(cls, db: Session, date_from: date | None, date_to: date | None) -> TrackStore:
+        """Store over the same window as a detector's ``date_from``/``date_to`` filter."""
+        return cls(db, *day_bounds(date_from, date_to))
+
+    # ── Reading ──────────────────────────────────────────────────────────────
+
+    def covers(self, start: datetime | None, end: datetime | None) -> bool:
+        """True if ``[start, end]`` lies inside the loaded window."""
+        if self.start is not None and (start is None or start < self.start):
+            return False
+        return self.end is None or (end is not None and end <= self.end)
+
+    def points(
+        self, vessel_id: int, start: datetime | None = None, end: datetime | None = None
+    ) -> list[StoredPoint]:
+        """One vessel's points with ``start <= timestamp_utc <= end``, oldest first."""
+        if not self.covers(start, end):
+            return self._read([vessel_id], start, end)
+        cols = self._vessel(vessel_id)
+        if cols is None:
+            return []
+        lo = 0 if start is None else bisect_left(cols.ts, _micros(start))
+        hi = len(cols) if end is None else bisect_right(cols.ts, _micros(end))
+        return cols.points(vessel_id, lo, hi, self._sources)
+
+    def points_many(
+        self,
+        vessel_ids: Iterable[int] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[StoredPoint]:
+        """Points of several vessels (all when None) merged into one timestamp-ordered list."""
+        vessel_ids = None if vessel_ids is None else list(vessel_ids)
+        if not self.covers(start, end):
+            return sorted(self._read(vessel_ids, start, end), key=lambda p: p.timestamp_utc)
+        if vessel_ids is None:
+            vessel_ids = list(self._loaded())
+        return list(
+            heapq.merge(
+                *(self.points(vid, start, end) for vid in vessel_ids),
+                key=lambda p: p.timestamp_utc,
+            )
+        )
+
+    def columns(self, start: datetime | None = None, end: datetime | None = None) -> dict:
+        """Every vessel's points in ``[start, end]`` as flat columns, for vectorized scans.
+
+        Keys are ``vessel_id``, ``ais_point_id``, ``ts_us`` (epoch µs) and
+        ``lat``, ``lon``, ``sog`` (NaN when missing).  Rows are contiguous per
+        vessel and time-ordered within it.
+        """
+        out = {
+            "vessel_id": array("q"),
+            "ais_point_id": array("q"),
+            "ts_us": array("q"),
+            "lat": array("d"),
+            "lon": array("d"),
+            "sog": array("d"),
+        }
+        if not self.covers(start, end):
+            for p in self._read(None, start, end):
+                out["vessel_id"].append(p.vessel_id)
+                out["ais_point_id"].append(p.ais_point_id)
+                out["ts_us"].append(_micros(p.timestamp_utc))
+                out["lat"].append(p.lat)
+                out["lon"].append(p.lon)
+                out["sog"].append(_NAN if p.sog is None else p.sog)
+            return out
+        for vid, cols in self._loaded().items():
+            lo = 0 if start is None else bisect_left(cols.ts, _micros(start))
+            hi = len(cols) if end is None else bisect_right(cols.ts, _micros(end))
+            out["vessel_id"].extend(array("q", [vid]) * (hi - lo))
+            out["ais_point_id"].extend(cols.ids[lo:hi])
+            out["ts_us"].extend(cols.ts[lo:hi])
+            out["lat"].extend(cols.lat[lo:hi])
+            out["lon"].extend(cols.lon[lo:hi])
+            out["sog"].extend(cols.sog[lo:hi])
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return sum(cols.nbytes for cols in (self._tracks or {}).values())
+
+    def __len__(self) -> int:
+        return sum(len(cols) for cols in (self._tracks or {}).values())
+
+    # ── Invalidation ─────────────────────────────────────────────────────────
+
+    def invalidate(self, vessel_ids: Iterable[int] | None = None) -> None:
+        """Re-read these vessels (all when None) on their next access."""
+        if vessel_ids is None:
+            self._stale_all = True
+        else:
+            self._stale.update(vessel_ids)
+
+    def refresh(self) -> int:
+        """Invalidate vessels with points written since the load; returns their count.
+
+        Catches rows that bypass the session hooks — COPY/core ingest and
+        other processes — via ``ais_point_id`` above the load-time high-water
+        mark.
+        """
+        if self._tracks is None or self._stale_all:
+            return 0
+        latest = self._committed_high_water()
+        if latest <= self._max_point_id:
+            return 0
+        stmt = _in_window(
+            select(AISPoint.vessel_id)
+            .where(AISPoint.ais_point_id > self._max_point_id)
+            .where(AISPoint.ais_point_id <= latest)
+            .distinct(),
+            self.start,
+            self.end,
+        )
+        vessel_ids = set(self.db.scalars(stmt))
+        self._max_point_id = latest
+        self.invalidate(vessel_ids)
+        return len(vessel_ids)
+
+    def _committed_high_water(self) -> int:
+        """Highest ``ais_point_id`` below which no in-flight transaction can still commit.
+
+        Ids are drawn at insert time, not in commit order, so on PostgreSQL the
+        plain max can skip rows of a transaction that commits later; see
+        :mod:`app.modules.detector_checkpoints`.
+        """
+        from app.modules.detector_checkpoints import _committed_high_water
+
+        latest = self.db.scalar(select(func.max(AISPoint.ais_point_id)))
+        return _committed_high_water(self.db, latest) if isinstance(latest, int) else 0
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _source_code(self, source: str | None) -> int:
+        code = self._source_codes.get(source)
+        if code is None:
+            code = self._source_codes[source] = len(self._sources)
+            self._sources.append(source)
+        return code
+
+    def _fill(self, stmt) -> None:
+        self.scans += 1
+        cols = None
+        vid = None
+        for row in self.db.execute(stmt.execution_options(yield_per=10_000)):
+            if row[1] != vid:
+                vid = row[1]
+                cols = self._tracks[vid] = _VesselColumns()
+            cols.append(row, self._source_code(row[9]))
+
+    def _load(self) -> None:
+        # Take the high-water mark first so rows committed during the scan are
+        # picked up by the next refresh() rather than missed
+        self._max_point_id = self._committed_high_water()
+        self._tracks = {}
+        self._stale.clear()
+        self._stale_all = False
+        self._fill(_point_select(self.start, self.end))
+        logger.info(
+            "Track store loaded %d points for %d vessels (%d bytes)",
+            len(self),
+            len(self._tracks),
+            self.nbytes,
+        )
+
+    def _reload(self, vessel_ids: set[int]) -> None:
+        for vid in vessel_ids:
+            self._tracks.pop(vid, None)
+        ordered = sorted(vessel_ids)
+        self._stale.clear()
+        for i in range(0, len(ordered), _IN_CHUNK):
+            chunk = ordered[i : i + _IN_CHUNK]
+            self._fill(_point_select(self.start, self.end).where(AISPoint.vessel_id.in_(chunk)))
+        logger.debug("Track store reloaded %d vessels", len(ordered))
+
+    def _loaded(self) -> dict[int, _VesselColumns]:
+        if self._tracks is None or self._stale_all:
+            self._load()
+        elif self._stale:
+            self._reload(set(self._stale))
+        return self._tracks
+
+    def _vessel(self, vessel_id: int) -> _VesselColumns | None:
+        return self._loaded().get(vessel_id)
+
+    def _read(
+        self, vessel_ids: list[int] | None, start: datetime | None, end: datetime | None
+    ) -> list[StoredPoint]:
+        """Uncached column read for a window the store does not cover."""
+        self.scans += 1
+        if vessel_ids is None:
+            return [StoredPoint(*row) for row in self.db.execute(_point_select(start, end))]
+        points: list[StoredPoint] = []
+        for i in range(0, len(vessel_ids), _IN_CHUNK):
+            stmt = _point_select(start, end).where(
+                AISPoint.vessel_id.in_(vessel_ids[i : i + _IN_CHUNK])
+            )
+            points.extend(StoredPoint(*row) for row in self.db.execute(stmt))
+        return points
+
+
+# ── Invalidation hooks ──────────────────────────────────────────────────────
+
+# Stores of every engine: over-invalidating another engine's store only costs a reload
+_live_stores: WeakSet[TrackStore] = WeakSet()
+
+
+def _invalidate_live(vessel_ids: set[int] | None) -> None:
+    for store in list(_live_stores):
+        store.invalidate(vessel_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context) -> None:
+    if not _live_stores:
+        return
+    vessel_ids: set[int] = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, AISPoint):
+            continue
+        if obj.vessel_id is not None:
+            vessel_ids.add(obj.vessel_id)
+        # A point moved to another vessel leaves its old track too
+        history = inspect(obj).attrs.vessel_id.history
+        vessel_ids.update(v for v in history.deleted if v is not None)
+    if vessel_ids:
+        _invalidate_live(vessel_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _after_bulk_write(orm_execute_state) -> None:
+    if not _live_stores:
+        return
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if getattr(table, "name", None) == AISPoint.__tablename__ or any(
+        m.class_ is AISPoint for m in state.all_mappers
+    ):
+        _invalidate_live(None)
@@ -0,0 +1,563 @@
+"""Incrementally maintained per-vessel track summaries.
+
+Stale-data and laid-up detection, the vessel listing, identity-change
+warnings and the aisstream static-data path each need a few per-vessel
+facts about ``ais_points`` — first/last point, point count, bounding box,
+last known position, dominant source — and used to derive them by scanning
+or sorting the vessel's points.  ``vessel_track_summaries`` keeps those
+facts in one row per vessel; ``vessel_track_source_counts`` holds the
+per-source counts behind ``dominant_source``.
+
+Maintenance:
+
+- Ingest.  ``TrackSummaryBatch`` folds new points (and source-quality
+  replacements) into per-vessel deltas and writes them with one upsert per
+  table: counts are added, first/last point and bounding box only move
+  outwards.  Upserts never conflict, so concurrent writers need no retry
+  path.  Points added, re-sourced, moved to another vessel or deleted
+  through the ORM are picked up by a flush hook (``collect_flush_points`` /
+  ``write_flush_points``); the set-based writers call ``record_point_rows``
+  after their insert.
+- Deletes and reassignments.  ``rebuild_track_summaries`` recomputes
+  summaries from ``ais_points``.  Merges rebuild both vessels; archiving and
+  retention pruning rebuild the vessels whose first point precedes the
+  cutoff (``rebuild_summaries_before``).
+
+Summaries describe the rows currently in ``ais_points``; archived points are
+not counted.  After a source-quality replacement moves a point, the bounding
+box may stay wider than the track until the next rebuild.  A vessel without a
+summary row is *unknown*, not empty — readers fall back to the points table
+for it.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import case, delete, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.ais_point import AISPoint
+from app.models.vessel_track_source_count import VesselTrackSourceCount
+from app.models.vessel_track_summary import VesselTrackSummary
+from app.utils.timestamps import naive_utc
+
+logger = logging.getLogger(__name__)
+
+# Keep IN-lists under SQLite's bound-parameter limit
+_IN_CHUNK = 900
+
+# Source key for points stored without a source
+_UNKNOWN_SOURCE = "unknown"
+
+# session.info key holding ORM points seen by the current flush
+_FLUSH_KEY = "track_summary_points"
+
+
+def _chunks(seq: Sequence, size: int = _IN_CHUNK) -> Iterator[Sequence]:
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]
+
+
+def summaries_enabled() -> bool:
+    return bool(getattr(settings, "TRACK_SUMMARY_ENABLED", True))
+
+
+# ── Ingest-time deltas ──────────────────────────────────────────────────────
+
+
+@dataclass(slots=True)
+class _Delta:
+    """What a batch adds to one vessel's summary."""
+
+    point_count: int = 0
+    first: tuple | None = None  # (ts, lat, lon)
+    last: tuple | None = None  # (ts, lat, lon, sog, cog, nav_status, source)
+    lat_min: float = 90.0
+    lat_max: float = -90.0
+    lon_min: float = 180.0
+    lon_max: float = -180.0
+    sources: Counter = field(default_factory=Counter)
+
+    def observe(self, ts, lat, lon, sog, cog, nav_status, source) -> None:
+        if self.first is None or ts < self.first[0]:
+            self.first = (ts, lat, lon)
+        if self.last is None or ts >= self.last[0]:
+            self.last = (ts, lat, lon, sog, cog, nav_status, source)
+        self.lat_min = min(self.lat_min, lat)
+        self.lat_max = max(self.lat_max, lat)
+        self.lon_min = min(self.lon_min, lon)
+        self.lon_max = max(self.lon_max, lon)
+
+    def row(self, vessel_id: int, now: datetime) -> dict:
+        first_ts, first_lat, first_lon = self.first
+        last_ts, last_lat, last_lon, last_sog, last_cog, last_nav, last_source = self.last
+        return {
+            "vessel_id": vessel_id,
+            "point_count": self.point_count,
+            "first_point_utc": first_ts,
+            "first_lat": first_lat,
+            "first_lon": first_lon,
+            "last_point_utc": last_ts,
+            "last_lat": last_lat,
+            "last_lon": last_lon,
+            "last_sog": last_sog,
+            "last_cog": last_cog,
+            "last_nav_status": last_nav,
+            "last_source": last_source,
+            "lat_min": self.lat_min,
+            "lat_max": self.lat_max,
+            "lon_min": self.lon_min,
+            "lon_max": self.lon_max,
+            "updated_at": now,
+        }
+
+
+class TrackSummaryBatch:
+    """Collects point inserts and replacements; ``flush`` upserts the summaries."""
+
+    def __init__(self) -> None:
+        self._deltas: dict[int, _Delta] = {}
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def add(
+        self,
+        vessel_id: int,
+        ts: datetime,
+        lat: float,
+        lon: float,
+        *,
+        sog: float | None = None,
+        cog: float | None = None,
+        nav_status: int | None = None,
+        source: str | None = None,
+    ) -> None:
+        """Queue a newly inserted point."""
+        delta = self._deltas.setdefault(vessel_id, _Delta())
+        delta.point_count += 1
+        delta.sources[source or _UNKNOWN_SOURCE] += 1
+        delta.observe(naive_utc(ts), float(lat), float(lon), sog, cog, nav_status, source)
+
+    def replace(
+        self,
+        vessel_id: int,
+        ts: datetime,
+        old_source: str | None,
+        lat: float,
+        lon: float,
+        *,
+        sog: float | None = None,
+        cog: float | None = None,
+        nav_status: int | None = None,
+        source: str | None = None,
+    ) -> None:
+        """Queue a source-quality replacement of the stored point at ``ts``."""
+        delta = self._deltas.setdefault(vessel_id, _Delta())
+        delta.sources[old_source or _UNKNOWN_SOURCE] -= 1
+        delta.sources[source or _UNKNOWN_SOURCE] += 1
+        delta.observe(naive_utc(ts), float(lat), float(lon), sog, cog, nav_status, source)
+
+    def add_rows(self, rows: Iterable[dict]) -> None:
+        """Queue inserted point rows keyed by ``AISPoint`` column names."""
+        for row in rows:
+            self.add(
+                row["vessel_id"],
+                row["timestamp_utc"],
+                row["lat"],
+                row["lon"],
+                sog=row.get("sog"),
+                cog=row.get("cog"),
+                nav_status=row.get("nav_status"),
+                source=row.get("source"),
+            )
+
+    def flush(self, db: Session) -> int:
+        """Upsert the queued deltas. Returns the number of vessels touched."""
+        deltas, self._deltas = self._deltas, {}
+        if not deltas or not summaries_enabled():
+            return 0
+
+        now = datetime.now(UTC).replace(tzinfo=None)
+        db.execute(_summary_upsert(db), [d.row(vid, now) for vid, d in deltas.items()])
+        counts = [
+            {"vessel_id": vid, "source": source, "point_count": n}
+            for vid, d in deltas.items()
+            for source, n in d.sources.items()
+            if n
+        ]
+        if counts:
+            db.execute(_source_count_upsert(db), counts)
+        _refresh_dominant_sources(db, sorted(deltas))
+        return len(deltas)
+
+
+def record_point_rows(db: Session, rows: Iterable[dict]) -> int:
+    """Fold rows just inserted with a core INSERT into the summaries."""
+    batch = TrackSummaryBatch()
+    batch.add_rows(rows)
+    return batch.flush(db)
+
+
+def _dialect_insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _summary_upsert(db: Session):
+    table = VesselTrackSummary.__table__
+    stmt = _dialect_insert(db)(table)
+    new, cur = stmt.excluded, table.c
+    earlier = new.first_point_utc < cur.first_point_utc
+    later = new.last_point_utc >= cur.last_point_utc
+
+    def pick(cond, column: str):
+        return case((cond, new[column]), else_=cur[column])
+
+    set_ = {
+        "point_count": cur.point_count + new.point_count,
+        "updated_at": new.updated_at,
+    }
+    for column in ("first_point_utc", "first_lat", "first_lon"):
+        set_[column] = pick(earlier, column)
+    for column in (
+        "last_point_utc",
+        "last_lat",
+        "last_lon",
+        "last_sog",
+        "last_cog",
+        "last_nav_status",
+        "last_source",
+    ):
+        set_[column] = pick(later, column)
+    for column in ("lat_min", "lon_min"):
+        set_[column] = pick(new[column] < cur[column], column)
+    for column in ("lat_max", "lon_max"):
+        set_[column] = pick(new[column] > cur[column], column)
+    return stmt.on_conflict_do_update(index_elements=["vessel_id"], set_=set_)
+
+
+def _source_count_upsert(db: Session):
+    table = VesselTrackSourceCount.__table__
+    stmt = _dialect_insert(db)(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["vessel_id", "source"],
+        set_={"point_count": table.c.point_count + stmt.excluded.point_count},
+    )
+
+
+def _refresh_dominant_sources(db: Session, vessel_ids: list[int]) -> None:
+    summaries = VesselTrackSummary.__table__
+    counts = VesselTrackSourceCount.__table__
+    dominant = (
+        select(counts.c.source)
+        .where(counts.c.vessel_id == summaries.c.vessel_id, counts.c.point_count > 0)
+        .order_by(counts.c.point_count.desc(), counts.c.source)
+        .limit(1)
+        .correlate(summaries)
+        .scalar_subquery()
+    )
+    for chunk in _chunks(vessel_ids):
+        db.execute(
+            update(summaries)
+            .where(summaries.c.vessel_id.in_(chunk))
+            .values(dominant_source=dominant)
+        )
+
+
+# ── ORM flush hook ──────────────────────────────────────────────────────────
+
+
+def collect_flush_points(session: Session) -> None:
+    """``before_flush``: remember the AISPoints this flush inserts, changes or deletes.
+
+    A re-sourced point moves one count between sources; a point moved to
+    another vessel, like a deleted one, rebuilds the vessels involved.
+    """
+    session.info.pop(_FLUSH_KEY, None)
+    if not summaries_enabled():
+        return
+    added = [obj for obj in session.new if isinstance(obj, AISPoint)]
+    rebuild = {
+        obj.vessel_id
+        for obj in session.deleted
+        if isinstance(obj, AISPoint) and obj.vessel_id is not None
+    }
+    changed = {}
+    for obj in session.dirty:
+        if isinstance(obj, AISPoint) and obj.ais_point_id is not None:
+            attrs = inspect(obj).attrs
+            if attrs.source.history.added or attrs.vessel_id.history.added:
+                changed[obj.ais_point_id] = obj
+    replaced = []
+    if changed:
+        # Attribute history has no old value for a point expired by a commit;
+        # the database still holds it until this flush.
+        with session.no_autoflush:
+            stored = _stored_owners(session, list(changed))
+        for point_id, obj in changed.items():
+            old_vessel_id, old_source = stored.get(point_id, (None, None))
+            if old_vessel_id != obj.vessel_id:
+                rebuild.update(v for v in (old_vessel_id, obj.vessel_id) if v is not None)
+            elif old_source != obj.source:
+                replaced.append((obj, old_source))
+    if added or replaced or rebuild:
+        session.info[_FLUSH_KEY] = (added, replaced, rebuild)
+
+
+def _stored_owners(session: Session, point_ids: list[int]) -> dict[int, tuple[int, str | None]]:
+    """ais_point_id -> (vessel_id, source) as currently stored."""
+    owners: dict[int, tuple[int, str | None]] = {}
+    for chunk in _chunks(point_ids):
+        rows = session.execute(
+            select(AISPoint.ais_point_id, AISPoint.vessel_id, AISPoint.source).where(
+                AISPoint.ais_point_id.in_(chunk)
+            )
+        )
+        owners.update((point_id, (vessel_id, source)) for point_id, vessel_id, source in rows)
+    return owners
+
+
+def write_flush_points(session: Session) -> None:
+    """``after_flush_postexec``: fold the flushed points into the summaries."""
+    pending = session.info.pop(_FLUSH_KEY, None)
+    if not pending:
+        return
+    added, replaced, rebuild = pending
+    batch = TrackSummaryBatch()
+    for point in added:
+        if point.vessel_id is None or point.vessel_id in rebuild:
+            continue
+        batch.add(
+            point.vessel_id,
+            point.timestamp_utc,
+            point.lat,
+            point.lon,
+            sog=point.sog,
+            cog=point.cog,
+            nav_status=point.nav_status,
+            source=point.source,
+        )
+    for point, old_source in replaced:
+        if point.vessel_id in rebuild:
+            continue
+        batch.replace(
+            point.vessel_id,
+            point.timestamp_utc,
+            old_source,
+            point.lat,
+            point.lon,
+            sog=point.sog,
+            cog=point.cog,
+            nav_status=point.nav_status,
+            source=point.source,
+        )
+    batch.flush(session)
+    if rebuild:
+        rebuild_track_summaries(session, rebuild)
+
+
+# ── Rebuilds ────────────────────────────────────────────────────────────────
+
+
+def rebuild_track_summaries(db: Session, vessel_ids: Iterable[int] | None = None) -> int:
+    """Recompute summaries from ``ais_points``; all vessels when ``vessel_ids`` is None.
+
+    Vessels left without points lose their summary.  Does NOT commit.
+    Returns the number of summaries written.
+    """
+    if not summaries_enabled():
+        return 0
+    summaries = VesselTrackSummary.__table__
+    counts = VesselTrackSourceCount.__table__
+    if vessel_ids is None:
+        db.execute(delete(counts))
+        db.execute(delete(summaries))
+        return _rebuild(db, None)
+
+    written = 0
+    for chunk in _chunks(sorted(set(vessel_ids))):
+        db.execute(delete(counts).where(counts.c.vessel_id.in_(chunk)))
+        db.execute(delete(summaries).where(summaries.c.vessel_id.in_(chunk)))
+        written += _rebuild(db, chunk)
+    return written
+
+
+def rebuild_summaries_before(db: Session, cutoff: datetime) -> int:
+    """Rebuild the summaries of vessels with points before ``cutoff``.
+
+    Used after archiving and retention pruning, which only delete points
+    older than their cutoff.  Does NOT commit.
+    """
+    if not summaries_enabled():
+        return 0
+    summaries = VesselTrackSummary.__table__
+    vessel_ids = (
+        db.execute(
+            select(summaries.c.vessel_id).where(summaries.c.first_point_utc < naive_utc(cutoff))
+        )
+        .scalars()
+        .all()
+    )
+    return rebuild_track_summaries(db, vessel_ids) if vessel_ids else 0
+
+
+def _rebuild(db: Session, chunk: Sequence[int] | None) -> int:
+    points = AISPoint.__table__
+    where = [points.c.vessel_id.in_(chunk)] if chunk is not None else []
+
+    summaries: dict[int, dict] = {}
+    for vid, n, lat_min, lat_max, lon_min, lon_max in db.execute(
+        select(
+            points.c.vessel_id,
+            func.count(),
+            func.min(points.c.lat),
+            func.max(points.c.lat),
+            func.min(points.c.lon),
+            func.max(points.c.lon),
+        )
+        .where(*where)
+        .group_by(points.c.vessel_id)
+    ):
+        summaries[vid] = {
+            "vessel_id": vid,
+            "point_count": n,
+            "lat_min": lat_min,
+            "lat_max": lat_max,
+            "lon_min": lon_min,
+            "lon_max": lon_max,
+        }
+    if not summaries:
+        return 0
+
+    # First and last point per vessel
+    ranked = (
+        select(
+            points.c.vessel_id,
+            points.c.timestamp_utc,
+            points.c.lat,
+            points.c.lon,
+            points.c.sog,
+            points.c.cog,
+            points.c.nav_status,
+            points.c.source,
+            func.row_number()
+            .over(
+                partition_by=points.c.vessel_id,
+                order_by=(points.c.timestamp_utc, points.c.ais_point_id),
+            )
+            .label("rn_first"),
+            func.row_number()
+            .over(
+                partition_by=points.c.vessel_id,
+                order_by=(points.c.timestamp_utc.desc(), points.c.ais_point_id.desc()),
+            )
+            .label("rn_last"),
+        )
+        .where(*where)
+        .subquery()
+    )
+    for row in db.execute(
+        select(ranked).where(or_(ranked.c.rn_first == 1, ranked.c.rn_last == 1))
+    ).mappings():
+        summary = summaries[row["vessel_id"]]
+        if row["rn_first"] == 1:
+            summary.update(
+                first_point_utc=row["timestamp_utc"], first_lat=row["lat"], first_lon=row["lon"]
+            )
+        if row["rn_last"] == 1:
+            summary.update(
+                last_point_utc=row["timestamp_utc"],
+                last_lat=row["lat"],
+                last_lon=row["lon"],
+                last_sog=row["sog"],
+                last_cog=row["cog"],
+                last_nav_status=row["nav_status"],
+                last_source=row["source"],
+            )
+
+    per_source: dict[int, Counter] = {}
+    for vid, source, n in db.execute(
+        select(points.c.vessel_id, points.c.source, func.count())
+        .where(*where)
+        .group_by(points.c.vessel_id, points.c.source)
+    ):
+        per_source.setdefault(vid, Counter())[source or _UNKNOWN_SOURCE] += n
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    for vid, summary in summaries.items():
+        sources = per_source.get(vid, Counter())
+        summary["dominant_source"] = (
+            min(sources.items(), key=lambda kv: (-kv[1], kv[0]))[0] if sources else None
+        )
+        summary["updated_at"] = now
+    db.execute(VesselTrackSummary.__table__.insert(), list(summaries.values()))
+    db.execute(
+        VesselTrackSourceCount.__table__.insert(),
+        [
+            {"vessel_id": vid, "source": source, "point_count": n}
+            for vid, sources in per_source.items()
+            for source, n in sources.items()
+        ],
+    )
+    return len(summaries)
+
+
+# ── Reads ───────────────────────────────────────────────────────────────────
+
+
+def load_track_summaries(
+    db: Session, vessel_ids: Iterable[int] | None = None
+) -> dict[int, VesselTrackSummary]:
+    """{vessel_id: VesselTrackSummary} for the given vessels (all when None).
+
+    Vessels missing from the result have no summary yet — callers treat them
+    as unknown and fall back to ``ais_points``.  Empty when summaries are off.
+    """
+    if not summaries_enabled():
+        return {}
+    # Summaries are upserted with core statements; refresh instances already
+    # in the identity map
+    query = select(VesselTrackSummary).execution_options(populate_existing=True)
+    if vessel_ids is None:
+        rows = db.execute(query).scalars().all()
+        return {s.vessel_id: s for s in rows}
+    found: dict[int, VesselTrackSummary] = {}
+    for chunk in _chunks(sorted(set(vessel_ids))):
+        for summary in db.execute(query.where(VesselTrackSummary.vessel_id.in_(chunk))).scalars():
+            found[summary.vessel_id] = summary
+    return found
+
+
+def may_have_points(
+    summary: VesselTrackSummary | None,
+    *,
+    min_points: int = 1,
+    min_span: timedelta = timedelta(0),
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> bool:
+    """False only when ``summary`` proves the vessel lacks such a track.
+
+    Checks that the vessel has at least ``min_points`` points spanning at
+    least ``min_span`` and that its points overlap [start, end].  A missing
+    summary proves nothing.
+    """
+    if summary is None:
+        return True
+    if summary.point_count < min_points:
+        return False
+    if summary.last_point_utc - summary.first_point_utc < min_span:
+        return False
+    if start is not None and summary.last_point_utc < naive_utc(start):
+        return False
+    return not (end is not None and summary.first_point_utc > naive_utc(end))
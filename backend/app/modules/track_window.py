@@ -0,0 +1,217 @@
+"""Two-pointer sliding window over a time-ordered AIS track.
+
+The spoofing sub-detectors treat every point as the anchor of a forward time
+window (``anchor <= t <= anchor + span``).  Rebuilding that window for each
+anchor costs O(n·w) per vessel, which dominates on dense tracks.
+:class:`TrackWindow` instead moves two indices forward over the track and
+updates running aggregates as points enter and leave:
+
+- point count, and position sums for means and sample standard deviations.
+  Positions are summed as integers in 1e-7 degree units, so the sums do not
+  drift however long the track is; the derived statistics are within
+  ``POSITION_TOLERANCE_DEG`` of the exact ones.
+- min/max latitude and longitude (monotonic deques)
+- reported SOGs, kept sorted for an exact median
+- changes between consecutive reported nav statuses
+- the maximum of an optional caller-supplied per-point value (monotonic deque)
+
+Detectors use the aggregates to reject windows cheaply and read the window's
+points back (:meth:`TrackWindow.points`) when exact statistics are needed.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from collections import deque
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any
+
+from app.utils.geo import haversine_nm
+
+# Fixed-point scale for the position sums (1e-7 degree is about 1 cm)
+_SCALE = 10_000_000
+# Bound on |derived statistic - exact statistic| caused by the fixed-point rounding
+POSITION_TOLERANCE_DEG = 1e-6
+# Great-circle nm per degree of arc, with headroom for float rounding
+_NM_PER_DEG = haversine_nm(0.0, 0.0, 1.0, 0.0) * 1.0001
+
+
+class TrackWindow:
+    """Forward time window ``[anchor, anchor + span]`` over ``points``.
+
+    ``points`` must be sorted by ``timestamp_utc`` and expose ``lat``, ``lon``,
+    ``sog`` and ``nav_status`` (ORM rows or
+    :class:`~app.modules.track_store.StoredPoint`).  ``values``, if given, holds
+    one number per point whose window maximum :meth:`max_value` reports.  The
+    window covers ``points[start:stop]``; anchors passed to :meth:`slide` must
+    not decrease.
+    """
+
+    def __init__(
+        self, points: Sequence[Any], span: timedelta, values: Sequence[float] | None = None
+    ) -> None:
+        self._points = points
+        self._values = values
+        self.span = span
+        self.start = 0
+        self.stop = 0
+        self._lat_sum = self._lat_sq = self._lon_sum = self._lon_sq = 0
+        # (index, fixed-point value), values increasing / decreasing
+        self._lat_min: deque[tuple[int, int]] = deque()
+        self._lat_max: deque[tuple[int, int]] = deque()
+        self._lon_min: deque[tuple[int, int]] = deque()
+        self._lon_max: deque[tuple[int, int]] = deque()
+        self._value_max: deque[tuple[int, float]] = deque()
+        self._extremes = (
+            self._lat_min,
+            self._lat_max,
+            self._lon_min,
+            self._lon_max,
+            self._value_max,
+        )
+        self._sogs: list[float] = []
+        self._statuses: deque[int] = deque()
+        self.status_changes = 0
+
+    def slide(self, anchor: int) -> TrackWindow:
+        """Move the window to start at ``points[anchor]`` and return it."""
+        if anchor < self.start:
+            raise ValueError("TrackWindow anchors must not decrease")
+        while self.start < anchor and self.start < self.stop:
+            self._pop()
+        if self.start < anchor:  # jumped past the old window
+            self.start = self.stop = anchor
+        points = self._points
+        window_end = points[anchor].timestamp_utc + self.span
+        while self.stop < len(points) and points[self.stop].timestamp_utc <= window_end:
+            self._push()
+        return self
+
+    # -- window contents ---------------------------------------------------
+
+    @property
+    def count(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def first(self) -> Any:
+        return self._points[self.start]
+
+    @property
+    def last(self) -> Any:
+        return self._points[self.stop - 1]
+
+    @property
+    def hours(self) -> float:
+        """Hours between the first and last point in the window."""
+        return (self.last.timestamp_utc - self.first.timestamp_utc).total_seconds() / 3600
+
+    def points(self) -> list[Any]:
+        return list(self._points[self.start : self.stop])
+
+    # -- aggregates ----------------------------------------------------------
+
+    def mean_lat(self) -> float:
+        return self._lat_sum / self.count / _SCALE
+
+    def mean_lon(self) -> float:
+        return self._lon_sum / self.count / _SCALE
+
+    def lat_stdev(self) -> float:
+        """Sample standard deviation of latitude (0.0 below two points)."""
+        return _stdev(self.count, self._lat_sum, self._lat_sq)
+
+    def lon_stdev(self) -> float:
+        """Sample standard deviation of longitude (0.0 below two points)."""
+        return _stdev(self.count, self._lon_sum, self._lon_sq)
+
+    def lat_span(self) -> float:
+        return (self._lat_max[0][1] - self._lat_min[0][1]) / _SCALE
+
+    def lon_span(self) -> float:
+        return (self._lon_max[0][1] - self._lon_min[0][1]) / _SCALE
+
+    def max_distance_nm(self) -> float:
+        """Upper bound on the haversine distance between any two window points.
+
+        A meridian leg plus a parallel leg across the bounding box is never
+        shorter than the great circle between two points inside it.
+        """
+        return (self.lat_span() + self.lon_span() + 2 / _SCALE) * _NM_PER_DEG
+
+    @property
+    def sog_count(self) -> int:
+        return len(self._sogs)
+
+    def median_sog(self) -> float:
+        """Median reported SOG, as ``statistics.median`` computes it."""
+        sogs = self._sogs
+        mid = len(sogs) // 2
+        if len(sogs) % 2:
+            return sogs[mid]
+        return (sogs[mid - 1] + sogs[mid]) / 2
+
+    def max_sog(self) -> float:
+        return self._sogs[-1]
+
+    def max_value(self) -> float:
+        """Largest of the window's ``values``."""
+        return self._value_max[0][1]
+
+    # -- maintenance ----------------------------------------------------------
+
+    def _push(self) -> None:
+        idx = self.stop
+        p = self._points[idx]
+        lat, lon = round(p.lat * _SCALE), round(p.lon * _SCALE)
+        self._lat_sum += lat
+        self._lat_sq += lat * lat
+        self._lon_sum += lon
+        self._lon_sq += lon * lon
+        _push_extreme(self._lat_min, idx, lat, min)
+        _push_extreme(self._lat_max, idx, lat, max)
+        _push_extreme(self._lon_min, idx, lon, min)
+        _push_extreme(self._lon_max, idx, lon, max)
+        if self._values is not None:
+            _push_extreme(self._value_max, idx, self._values[idx], max)
+        if p.sog is not None:
+            bisect.insort(self._sogs, p.sog)
+        if p.nav_status is not None:
+            if self._statuses and self._statuses[-1] != p.nav_status:
+                self.status_changes += 1
+            self._statuses.append(p.nav_status)
+        self.stop += 1
+
+    def _pop(self) -> None:
+        idx = self.start
+        p = self._points[idx]
+        lat, lon = round(p.lat * _SCALE), round(p.lon * _SCALE)
+        self._lat_sum -= lat
+        self._lat_sq -= lat * lat
+        self._lon_sum -= lon
+        self._lon_sq -= lon * lon
+        for extremes in self._extremes:
+            if extremes and extremes[0][0] == idx:
+                extremes.popleft()
+        if p.sog is not None:
+            del self._sogs[bisect.bisect_left(self._sogs, p.sog)]
+        if p.nav_status is not None:
+            status = self._statuses.popleft()
+            if self._statuses and self._statuses[0] != status:
+                self.status_changes -= 1
+        self.start += 1
+
+
+def _push_extreme(extremes: deque, idx: int, value: float, pick) -> None:
+    """Append to a monotonic deque whose head is the window's min (or max)."""
+    while extremes and pick(extremes[-1][1], value) == value:
+        extremes.pop()
+    extremes.append((idx, value))
+
+
+def _stdev(count: int, total: int, squares: int) -> float:
+    if count < 2:
+        return 0.0
+    return math.sqrt((count * squares - total * total) / (count * (count - 1))) / _SCALE
@@ -378,20 +378,11 @@ def compute_fingerprint(db: Session, vessel_id: int) -> Any | None:
 
     Returns the VesselFingerprint record, or None if insufficient data.
     """
-    from app.models.ais_point import AISPoint
     from app.models.vessel_fingerprint import VesselFingerprint
+    from app.modules.track_reader import read_track
 
-    # Query AIS points, ordered by time
-    points = (
-        db.query(AISPoint)
-        .filter(
-            AISPoint.vessel_id == vessel_id,
-            AISPoint.sog.isnot(None),
-            AISPoint.sog >= _ANCHORED_SOG_THRESHOLD,
-        )
-        .order_by(AISPoint.timestamp_utc)
-        .all()
-    )
+    # Query AIS points (live and archived), ordered by time
+    points = read_track(db, vessel_id, min_sog=_ANCHORED_SOG_THRESHOLD)
 
     if len(points) < _MIN_POINTS:
         logger.debug(
@@ -631,10 +622,13 @@ def fingerprint_merge_bonus(db: Session, vessel_a_id: int, vessel_b_id: int) ->
     return 0
 
 
-def run_fingerprint_computation(db: Session) -> dict[str, Any]:
+def run_fingerprint_computation(
+    db: Session, shard: tuple[int, int] | None = None
+) -> dict[str, Any]:
     """Batch fingerprint computation for all vessels with sufficient AIS data.
 
-    Gated by FINGERPRINT_ENABLED feature flag.
+    Gated by FINGERPRINT_ENABLED feature flag.  ``shard`` limits the run to one
+    vessel shard (see :mod:`app.modules.sharded_detection`).
     Returns statistics dict.
     """
     from app.models.vessel import Vessel
@@ -652,6 +646,10 @@ def run_fingerprint_computation(db: Session) -> dict[str, Any]:
         return stats
 
     vessels = db.query(Vessel).filter(Vessel.merged_into_vessel_id.is_(None)).all()
+    if shard is not None:
+        from app.modules.sharded_detection import in_shard
+
+        vessels = [v for v in vessels if in_shard(v.vessel_id, shard)]
 
     for vessel in vessels:
         stats["vessels_processed"] += 1
@@ -13,6 +13,7 @@ import logging
 import math
 from datetime import datetime, timedelta
 
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
 from app.models.stubs import (
@@ -23,6 +24,7 @@ from app.models.stubs import (
 )
 from app.models.vessel import Vessel
 from app.modules.gap_detector import compute_max_distance_nm
+from app.modules.spatial_index import bbox_around, detection_filter
 from app.utils.geo import haversine_nm as _haversine_nm
 
 logger = logging.getLogger(__name__)
@@ -257,18 +259,29 @@ def find_hunt_candidates(mission_id: int, db: Session) -> list[HuntCandidate]:
         window_end_seconds = (mission.elapsed_hours or 24) * 3600
         window_end = window_start + timedelta(seconds=window_end_seconds)
 
-    detections = (
-        db.query(DarkVesselDetection)
-        .filter(
-            DarkVesselDetection.ais_match_result == "unmatched",
+    max_radius = mission.max_radius_nm or float("inf")
+    has_center = mission.center_lat is not None and mission.center_lon is not None
+    if has_center and max_radius < float("inf"):
+        # Box around the drift radius + search window (spatial index when built)
+        window = detection_filter(
+            db,
+            bbox_around(mission.center_lat, mission.center_lon, max_radius),
+            window_start,
+            window_end,
+        )
+    else:
+        window = and_(
             DarkVesselDetection.detection_time_utc >= window_start,
             DarkVesselDetection.detection_time_utc <= window_end,
         )
+
+    detections = (
+        db.query(DarkVesselDetection)
+        .filter(DarkVesselDetection.ais_match_result == "unmatched", window)
         .all()
     )
 
     candidates = []
-    max_radius = mission.max_radius_nm or float("inf")
 
     for det in detections:
         if det.detection_lat is None or det.detection_lon is None:
@@ -46,16 +46,20 @@ def find_nearby_gaps(
         List of AISGapEvent records that fall within the spatial+temporal window.
     """
     from app.models.gap_event import AISGapEvent
+    from app.modules.spatial_index import bbox_around, bbox_clause
 
     time_start = timestamp - timedelta(hours=time_window_h)
     time_end = timestamp + timedelta(hours=time_window_h)
 
-    # Query gaps overlapping the time window
+    # Query gaps overlapping the time window whose off-position is in the search box
     candidates = (
         db.query(AISGapEvent)
         .filter(
             AISGapEvent.gap_start_utc <= time_end,
             AISGapEvent.gap_end_utc >= time_start,
+            bbox_clause(
+                AISGapEvent.gap_off_lat, AISGapEvent.gap_off_lon, bbox_around(lat, lon, radius_nm)
+            ),
         )
         .all()
     )
@@ -5,7 +5,10 @@ of intentional AIS disabling (50–80M events analysed). Vessels disable AIS wit
 a few km of EEZ boundaries to hide cross-boundary activity.
 
 This module provides simplified key maritime EEZ boundary line segments
-(hard-coded, ~20 key segments — no spatial DB required).
+(hard-coded, ~20 key segments — no spatial DB required).  The segments are
+indexed once at import in an STRtree; lookups search a box that grows until
+it provably contains the nearest segment, so each position only measures
+against the handful of segments around it.
 
 IMPORTANT — False-positive guard:
 Baltic/North Sea routes constantly cross EEZ boundaries. This signal MUST only
@@ -16,6 +19,10 @@ Without this guard, ferry routes and supply vessels generate 85-90% false positi
 from __future__ import annotations
 
 import math
+from collections.abc import Sequence
+
+import shapely
+from shapely import STRtree
 
 # Each entry: (name, [(lat, lon), ...])
 # Line segments are approximate EEZ boundary mid-points.
@@ -100,11 +107,96 @@ def _point_to_segment_distance_nm(
     return d
 
 
+# ── Segment index ────────────────────────────────────────────────────────────
+
+# (name, start_lat, start_lon, end_lat, end_lon) in EEZ_BOUNDARY_LINES order
+_SEGMENTS: list[tuple[str, float, float, float, float]] = [
+    (name, points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+    for name, points in EEZ_BOUNDARY_LINES
+    for i in range(len(points) - 1)
+]
+_SEGMENT_TREE = STRtree(
+    [shapely.LineString([(ax, ay), (bx, by)]) for _, ay, ax, by, bx in _SEGMENTS]
+)
+# Zero-length segments are measured by haversine, which the search box
+# bound below does not cover — always check them
+_DEGENERATE = [
+    i for i, (_, ay, ax, by, bx) in enumerate(_SEGMENTS) if ay == by and ax == bx
+]
+# Smallest longitude scale factor of any segment: 1° lon ≥ 60·cos NM
+_MIN_COS = max(
+    1e-6, min((math.cos(math.radians((s[1] + s[3]) / 2.0)) for s in _SEGMENTS), default=1.0)
+)
+# First search radius; grows ×4 until the nearest segment is inside it
+_SEARCH_START_NM = 60.0
+
+
+def _nearest_of(lat: float, lon: float, indices: Sequence[int]) -> tuple[float, str]:
+    min_dist = float("inf")
+    nearest_name = "unknown"
+    for i in indices:
+        name, ay, ax, by, bx = _SEGMENTS[i]
+        d = _point_to_segment_distance_nm(lon, lat, ax, ay, bx, by)
+        if d < min_dist:
+            min_dist = d
+            nearest_name = name
+    return min_dist, nearest_name
+
+
+def distances_to_nearest_eez_boundary_nm(
+    lats: Sequence[float], lons: Sequence[float]
+) -> list[tuple[float, str]]:
+    """Batch :func:`distance_to_nearest_eez_boundary_nm` for parallel lat/lon arrays.
+
+    A segment within R NM of a point has its closest point inside the box
+    lat ± R/60, lon ± R/(60·cos) (the equirectangular metric of
+    :func:`_point_to_segment_distance_nm`), so once the best candidate in
+    that box is ≤ R it is the true nearest.  Pending positions are queried
+    together each round.
+    """
+    if len(lats) != len(lons):
+        raise ValueError("lats and lons must have the same length")
+    results: list[tuple[float, str]] = [(float("inf"), "unknown")] * len(lats)
+    if not _SEGMENTS:
+        return results
+
+    pending = list(range(len(lats)))
+    radius = _SEARCH_START_NM
+    while pending:
+        lat_pad = radius / 60.0
+        lon_pad = radius / (60.0 * _MIN_COS)
+        covers_all = lat_pad >= 180.0 and lon_pad >= 360.0
+        query_idx, segment_idx = _SEGMENT_TREE.query(
+            shapely.box(
+                [lons[i] - lon_pad for i in pending],
+                [lats[i] - lat_pad for i in pending],
+                [lons[i] + lon_pad for i in pending],
+                [lats[i] + lat_pad for i in pending],
+            )
+        )
+        candidates: list[set[int]] = [set(_DEGENERATE) for _ in pending]
+        for q, seg in zip(query_idx.tolist(), segment_idx.tolist(), strict=True):
+            candidates[q].add(seg)
+
+        still: list[int] = []
+        for k, i in enumerate(pending):
+            # Segment order keeps the original first-minimum tie-break
+            dist, name = _nearest_of(lats[i], lons[i], sorted(candidates[k]))
+            if dist <= radius or covers_all:
+                results[i] = (dist, name)
+            else:
+                still.append(i)
+        pending = still
+        radius *= 4.0
+    return results
+
+
 def distance_to_nearest_eez_boundary_nm(lat: float, lon: float) -> tuple[float, str]:
     """Return (distance_nm, boundary_name) to nearest key EEZ boundary.
 
-    Iterates over all boundary line segments and returns the minimum distance.
-    Uses segment-projection for accurate sub-segment proximity.
+    Returns the minimum distance over all boundary line segments, using
+    segment-projection for accurate sub-segment proximity; the segment index
+    limits the measurement to segments near the point.
 
     Args:
         lat: Point latitude in decimal degrees.
@@ -114,16 +206,4 @@ def distance_to_nearest_eez_boundary_nm(lat: float, lon: float) -> tuple[float,
         Tuple of (distance_nm: float, boundary_name: str).
         distance_nm is the distance to the nearest boundary segment endpoint or mid-point.
     """
-    min_dist = float("inf")
-    nearest_name = "unknown"
-
-    for name, points in EEZ_BOUNDARY_LINES:
-        for i in range(len(points) - 1):
-            ay, ax = points[i]  # segment start (lat, lon)
-            by, bx = points[i + 1]  # segment end (lat, lon)
-            d = _point_to_segment_distance_nm(lon, lat, ax, ay, bx, by)
-            if d < min_dist:
-                min_dist = d
-                nearest_name = name
-
-    return min_dist, nearest_name
+    return distances_to_nearest_eez_boundary_nm([lat], [lon])[0]
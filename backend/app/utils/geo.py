@@ -26,6 +26,20 @@ def haversine_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return _EARTH_RADIUS_NM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def haversine_nm_expr(lat1, lon1, lat2, lon2):
+    """:func:`haversine_nm` as a polars expression over four Float64 columns."""
+    import polars as pl
+
+    lat1, lon1, lat2, lon2 = (
+        pl.col(c) if isinstance(c, str) else c for c in (lat1, lon1, lat2, lon2)
+    )
+    phi1, phi2 = lat1.radians(), lat2.radians()
+    dphi = (lat2 - lat1).radians()
+    dlam = (lon2 - lon1).radians()
+    a = (dphi / 2).sin() ** 2 + phi1.cos() * phi2.cos() * (dlam / 2).sin() ** 2
+    return _EARTH_RADIUS_NM * 2 * pl.arctan2(a.sqrt(), (1 - a).sqrt())
+
+
 def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Great-circle distance in metres between two WGS-84 coordinates."""
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
@@ -69,6 +83,26 @@ def parse_wkt_bbox(wkt: str) -> tuple[float, float, float, float] | None:
     return min(lons), min(lats), max(lons), max(lats)
 
 
+def bbox_around_nm(lat: float, lon: float, radius_nm: float) -> tuple[float, float, float, float]:
+    """Return (min_lon, min_lat, max_lon, max_lat) enclosing a great-circle radius.
+
+    Every point within ``radius_nm`` by :func:`haversine_nm` lies inside the
+    box.  Circles reaching a pole or crossing the antimeridian get the full
+    longitude range rather than a split box.
+    """
+    d = radius_nm / _EARTH_RADIUS_NM
+    lat_rad = math.radians(lat)
+    min_lat = max(-90.0, lat - math.degrees(d))
+    max_lat = min(90.0, lat + math.degrees(d))
+    cos_lat = math.cos(lat_rad)
+    if d >= math.pi / 2 or min_lat <= -90.0 or max_lat >= 90.0 or math.sin(d) >= cos_lat:
+        return -180.0, min_lat, 180.0, max_lat
+    dlon = math.degrees(math.asin(math.sin(d) / cos_lat))
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        return -180.0, min_lat, 180.0, max_lat
+    return lon - dlon, min_lat, lon + dlon, max_lat
+
+
 def parse_wkt_point(wkt: str | None) -> tuple[float, float] | None:
     """Extract (lat, lon) from a WKT POINT string like ``POINT(lon lat)``.
 
@@ -0,0 +1,20 @@
+"""Timestamp helpers shared by ingest, storage and detection modules.
+
+Stored timestamps are naive UTC (see ``app.models.base.UTCDateTime``); these
+helpers bring caller-supplied values into the same form before comparing or
+encoding them.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import TypeVar
+
+_T = TypeVar("_T", datetime, datetime | None)
+
+
+def naive_utc(value: _T) -> _T:
+    """``value`` converted to naive UTC; naive values and None pass through unchanged."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
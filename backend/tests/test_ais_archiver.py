@@ -299,6 +299,99 @@ class TestArchiveOldPoints:
         assert batch.file_path.endswith(".parquet.gz")
 
 
+class TestStreamingArchive:
+    def test_keyset_pages_without_offset(self, db_session, mock_settings):
+        """Pages are read by key, never by OFFSET, and written in key order."""
+        mock_settings.ARCHIVE_BATCH_SIZE = 3
+        base = datetime(2024, 3, 1)
+        for vid in (1, 2):
+            _create_vessel(db_session, vid)
+        # Equal timestamps across vessels exercise the ais_point_id tie-break
+        for i in range(7):
+            _create_ais_point(db_session, 10 - i, 1 + i % 2, base + timedelta(hours=i // 2))
+
+        offsets: list = []
+
+        def _record(conn, cursor, statement, parameters, *args):
+            # SQLite renders every LIMIT as "LIMIT ? OFFSET ?"; the offset must stay 0
+            if " OFFSET ?" in statement and "ais_points" in statement:
+                offsets.append(parameters[-1])
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", _record)
+        from app.modules.ais_archiver import archive_old_points
+
+        batch = archive_old_points(db_session, datetime(2024, 4, 1, tzinfo=UTC))
+        event.remove(db_session.get_bind(), "before_cursor_execute", _record)
+
+        assert batch.row_count == 7
+        assert offsets == [0, 0, 0, 0]
+        df = pl.read_parquet(batch.file_path)
+        keys = list(zip(df["timestamp_utc"], df["ais_point_id"], strict=True))
+        assert keys == sorted(keys)
+        assert df["ais_class"].to_list() == ["A"] * 7
+
+    def test_range_delete_keeps_protected_points(self, db_session, mock_settings):
+        """Protected points inside an archived key range stay in the database."""
+        from app.models.ais_point import AISPoint
+
+        mock_settings.ARCHIVE_BATCH_SIZE = 2
+        _create_vessel(db_session)
+        base = datetime(2024, 3, 1)
+        for i in range(6):
+            _create_ais_point(db_session, i + 1, 1, base + timedelta(hours=i))
+        _create_gap_event(db_session, 1, 2, 5)
+
+        from app.modules.ais_archiver import archive_old_points
+
+        batch = archive_old_points(db_session, datetime(2024, 4, 1))
+
+        assert batch.row_count == 4
+        assert sorted(pl.read_parquet(batch.file_path)["ais_point_id"]) == [1, 3, 4, 6]
+        assert [p.ais_point_id for p in db_session.query(AISPoint)] == [2, 5]
+
+    def test_resumes_from_checkpoint(self, db_session, mock_settings, archive_dir):
+        """An interrupted run is completed by the next call from its checkpoint."""
+        from app.models.ais_archive_batch import AisArchiveBatch
+        from app.models.ais_point import AISPoint
+        from app.modules import ais_archiver
+
+        mock_settings.ARCHIVE_BATCH_SIZE = 3
+        _create_vessel(db_session)
+        base = datetime(2024, 3, 1)
+        for i in range(7):
+            _create_ais_point(db_session, i + 1, 1, base + timedelta(hours=i))
+
+        real_fetch = ais_archiver._fetch_page
+        calls = []
+
+        def _interrupted(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("killed")
+            return real_fetch(*args, **kwargs)
+
+        with patch.object(ais_archiver, "_fetch_page", _interrupted):
+            with pytest.raises(RuntimeError):
+                ais_archiver.archive_old_points(db_session, datetime(2024, 4, 1))
+        db_session.rollback()
+
+        pending = archive_dir / "ais_points" / "_pending" / "_all"
+        assert (pending / "checkpoint.json").exists()
+        assert db_session.query(AISPoint).count() == 4
+        assert db_session.query(AisArchiveBatch).count() == 0
+
+        # Inserted after the run started: beyond its id snapshot, left alone
+        _create_ais_point(db_session, 8, 1, base - timedelta(days=1))
+
+        batch = ais_archiver.archive_old_points(db_session, datetime(2030, 1, 1))
+
+        assert batch.row_count == 7
+        assert batch.date_range_start == base
+        assert sorted(pl.read_parquet(batch.file_path)["ais_point_id"]) == list(range(1, 8))
+        assert [p.ais_point_id for p in db_session.query(AISPoint)] == [8]
+        assert not pending.exists()
+
+
 # ---------------------------------------------------------------------------
 # restore_archive_batch
 # ---------------------------------------------------------------------------
@@ -689,38 +782,6 @@ class TestComputeSha256:
         assert _compute_sha256(f) == expected
 
 
-# ---------------------------------------------------------------------------
-# _points_to_dataframe
-# ---------------------------------------------------------------------------
-
-
-class TestPointsToDataframe:
-    def test_converts_orm_objects(self, db_session, mock_settings):
-        """Should convert AIS point objects to a Polars DataFrame."""
-        from app.models.ais_point import AISPoint
-        from app.modules.ais_archiver import _points_to_dataframe
-
-        _create_vessel(db_session)
-        now = datetime.now(UTC)
-        _create_ais_point(db_session, 1, 1, now)
-
-        points = db_session.query(AISPoint).all()
-        df = _points_to_dataframe(points)
-
-        assert isinstance(df, pl.DataFrame)
-        assert len(df) == 1
-        assert df["ais_point_id"][0] == 1
-        assert df["vessel_id"][0] == 1
-
-    def test_empty_list(self):
-        """Empty list should produce empty DataFrame."""
-        from app.modules.ais_archiver import _points_to_dataframe
-
-        df = _points_to_dataframe([])
-        assert isinstance(df, pl.DataFrame)
-        assert len(df) == 0
-
-
 # ---------------------------------------------------------------------------
 # Model
 # ---------------------------------------------------------------------------
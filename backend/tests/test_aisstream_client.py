@@ -264,3 +264,132 @@ class TestGetCorridorBoundingBoxes:
 
         boxes = get_corridor_bounding_boxes(db)
         assert len(boxes) == 0
+
+
+# ── Tests: _ingest_batch_bulk ────────────────────────────────────────
+
+
+def _sqlite_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import app.models  # noqa: F401 — register all tables
+    from app.models.base import Base
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _pt(mmsi: str, ts: str, lat: float = 55.0) -> dict:
+    return {
+        "mmsi": mmsi,
+        "timestamp": ts,
+        "lat": lat,
+        "lon": 20.0,
+        "sog": 10.0,
+        "cog": 90.0,
+        "heading": 511,
+        "vessel_name": "NEW SHIP",
+        "source": "aisstream",
+    }
+
+
+def _ts(value: str):
+    from datetime import datetime
+
+    return datetime.fromisoformat(value)
+
+
+class TestIngestBatchBulk:
+    def test_creates_vessels_and_dedups(self):
+        from app.models.ais_observation import AISObservation
+        from app.models.ais_point import AISPoint
+        from app.models.vessel import Vessel
+        from app.modules.aisstream_client import _ingest_batch_bulk
+
+        db = _sqlite_session()
+        existing = Vessel(mmsi="211000001", name="OLD")
+        db.add(existing)
+        db.flush()
+        db.add(
+            AISPoint(
+                vessel_id=existing.vessel_id,
+                timestamp_utc=_ts("2026-01-15T12:00:00"),
+                lat=55.0,
+                lon=20.0,
+                source="aisstream",
+            )
+        )
+        db.commit()
+
+        vessel_ids: dict[str, int] = {}
+        points = [
+            _pt("211000001", "2026-01-15T12:00:00Z"),  # already stored
+            _pt("211000001", "2026-01-15T12:01:00Z"),
+            _pt("273000002", "2026-01-15T12:00:00Z"),
+            _pt("273000002", "2026-01-15T12:00:00Z"),  # in-batch duplicate
+            _pt("273000002", "2026-01-15T11:59:00Z"),
+        ]
+        result = _ingest_batch_bulk(db, points, {}, vessel_ids)
+        db.commit()
+
+        assert result["points_stored"] == 3
+        assert set(vessel_ids) == {"211000001", "273000002"}
+        assert db.query(AISPoint).count() == 4
+        assert db.query(AISObservation).count() == 3
+        new_vessel = db.query(Vessel).filter(Vessel.mmsi == "273000002").one()
+        assert new_vessel.name == "NEW SHIP"
+        assert new_vessel.last_ais_received_utc == _ts("2026-01-15T12:00:00")
+        assert db.query(AISPoint).filter(AISPoint.heading.isnot(None)).count() == 0
+
+    def test_known_mmsis_skip_vessel_lookup(self):
+        from sqlalchemy import event
+
+        from app.modules.aisstream_client import _ingest_batch_bulk
+
+        db = _sqlite_session()
+        vessel_ids: dict[str, int] = {}
+        _ingest_batch_bulk(db, [_pt("211000001", "2026-01-15T12:00:00Z")], {}, vessel_ids)
+        db.commit()
+
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            if "FROM vessels" in statement:
+                statements.append(statement)
+
+        event.listen(db.get_bind(), "before_cursor_execute", _count)
+        _ingest_batch_bulk(db, [_pt("211000001", "2026-01-15T12:05:00Z")], {}, vessel_ids)
+        event.remove(db.get_bind(), "before_cursor_execute", _count)
+        assert statements == []
+
+    def test_freshness_only_moves_forward(self):
+        from app.models.vessel import Vessel
+        from app.modules.aisstream_client import _ingest_batch_bulk
+
+        db = _sqlite_session()
+        vessel_ids: dict[str, int] = {}
+        _ingest_batch_bulk(db, [_pt("211000001", "2026-01-15T12:00:00Z")], {}, vessel_ids)
+        _ingest_batch_bulk(db, [_pt("211000001", "2026-01-15T11:00:00Z")], {}, vessel_ids)
+        db.commit()
+        vessel = db.query(Vessel).one()
+        assert vessel.last_ais_received_utc == _ts("2026-01-15T12:00:00")
+
+    def test_static_updates_tracked(self):
+        from app.models.vessel import Vessel
+        from app.models.vessel_history import VesselHistory
+        from app.modules.aisstream_client import _ingest_batch_bulk
+
+        db = _sqlite_session()
+        db.add(Vessel(mmsi="211000001", name="OLD", callsign="AAA"))
+        db.commit()
+        static = {"211000001": {"mmsi": "211000001", "vessel_name": "RENAMED"}}
+        vessel_ids: dict[str, int] = {}
+        result = _ingest_batch_bulk(db, [], static, vessel_ids)
+        db.commit()
+
+        assert result["vessels_updated"] == 1
+        assert vessel_ids == {"211000001": db.query(Vessel).one().vessel_id}
+        history = db.query(VesselHistory).one()
+        assert (history.old_value, history.new_value) == ("OLD", "RENAMED")
@@ -347,3 +347,106 @@ def test_ws_loop_reconnects_on_error(worker):
         assert call_count >= 2
 
     asyncio.run(_run())
+
+
+# ---------------------------------------------------------------------------
+# Pipeline: bounded queue, writer thread, backpressure
+# ---------------------------------------------------------------------------
+
+_POSITION_MSG = (
+    '{"MessageType": "PositionReport", "MetaData": {"MMSI": 273456789, '
+    '"latitude": 55.5, "longitude": 15.5, "time_utc": "2025-01-15T12:00:00Z"}, '
+    '"Message": {"PositionReport": {"Sog": 12.5, "Cog": 180.0}}}'
+)
+
+
+def test_full_queue_drops_oldest_message():
+    """The reader never blocks: a full raw queue sheds its oldest message."""
+    w = AisstreamWorker(api_key="k", bounding_boxes=[], queue_size=2)
+    for raw in ("a", "b", "c"):
+        w._enqueue_raw(raw)
+
+    assert w.stats["messages_received"] == 3
+    assert w.stats["messages_dropped"] == 1
+    assert [w._raw_queue.get_nowait()[1] for _ in range(2)] == ["b", "c"]
+
+
+def test_decode_fills_buffers_and_counts_errors(worker):
+    worker._enqueue_raw(_POSITION_MSG)
+    worker._enqueue_raw("not json")
+    worker._drain_raw_queue()
+
+    assert len(worker._point_buffer) == 1
+    assert worker._point_buffer[0]["mmsi"] == "273456789"
+    assert worker._buffer_since is not None
+    assert worker.stats["errors"] == 1
+
+
+def test_decode_loop_cuts_batch_at_max_points():
+    w = AisstreamWorker(api_key="k", bounding_boxes=[], batch_interval=3600, batch_max_points=2)
+
+    async def _run():
+        with patch.object(w, "_flush_buffers", new_callable=AsyncMock) as mock_flush:
+            task = asyncio.create_task(w._decode_loop())
+            w._enqueue_raw(_POSITION_MSG)
+            w._enqueue_raw(_POSITION_MSG)
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        mock_flush.assert_called_once()
+
+    asyncio.run(_run())
+
+
+def test_writer_thread_backpressure():
+    """A slow writer fills the write queue and makes the decode stage wait."""
+    import threading
+
+    release = threading.Event()
+    written: list[int] = []
+
+    def slow_ingest(points, static):
+        release.wait(timeout=5)
+        written.append(len(points))
+        return {"points_stored": len(points), "vessels_updated": 0}
+
+    w = AisstreamWorker(api_key="k", bounding_boxes=[], write_queue_batches=1)
+
+    async def _run():
+        with patch.object(AisstreamWorker, "_ingest_sync", side_effect=slow_ingest):
+            w._start_writer()
+            for _ in range(2):  # one batch in the writer, one queued
+                w._point_buffer.append({"mmsi": "1"})
+                await w._flush_buffers()
+                await asyncio.sleep(0.05)
+
+            w._point_buffer.append({"mmsi": "2"})
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(w._flush_buffers(), timeout=0.2)
+            # The batch that could not be queued is handed back, not lost
+            assert w._point_buffer == [{"mmsi": "2"}]
+            assert w.health_snapshot()["write_queue_depth"] == 1
+
+            release.set()
+            await w._flush_buffers()
+            await w._stop_writer()
+
+    asyncio.run(_run())
+    assert written == [1, 1, 1]
+    assert w.stats["batches"] == 3
+    assert w.stats["ingest_lag_seconds"] is not None
+    assert w.stats["last_write_seconds"] is not None
+
+
+def test_health_snapshot_reports_pipeline_metrics(worker):
+    worker.stats["start_time"] = time.time()
+    worker._enqueue_raw(_POSITION_MSG)
+
+    body = worker.health_snapshot()
+    assert body["status"] == "ok"
+    assert body["queue_depth"] == 1
+    assert body["queue_capacity"] == worker._raw_queue.maxsize
+    assert body["write_queue_depth"] == 0
+    assert body["messages_dropped"] == 0
+    assert body["ingest_lag_seconds"] is None
@@ -0,0 +1,154 @@
+"""Tests for the archive manifest index (app.modules.archive_manifest)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import polars as pl
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def db(tmp_path):
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def _fk(dbapi_conn, _record):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with (
+        patch("app.config.settings.ARCHIVE_STORAGE_DIR", str(tmp_path / "archives")),
+        patch("app.config.settings.ARCHIVE_BATCH_SIZE", 4),
+    ):
+        yield session
+    session.close()
+    engine.dispose()
+
+
+def _points(db, vessel_id: int, hours: range, lat: float = 55.0, source: str = "test") -> None:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    if db.get(Vessel, vessel_id) is None:
+        db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100{vessel_id:04d}"))
+    for h in hours:
+        db.add(
+            AISPoint(
+                vessel_id=vessel_id,
+                timestamp_utc=T0 + timedelta(hours=h),
+                lat=lat,
+                lon=12.0,
+                source=source,
+            )
+        )
+    db.commit()
+
+
+def _archive(db, before_hours: int, source: str | None = None):
+    from app.modules.ais_archiver import archive_old_points
+
+    return archive_old_points(db, T0 + timedelta(hours=before_hours), source=source)
+
+
+def test_bloom_has_no_false_negatives():
+    from app.modules.archive_manifest import bloom_contains, build_bloom
+
+    members = set(range(1, 2001))
+    bits, k = build_bloom(members)
+    assert all(bloom_contains(bits, k, v) for v in members)
+    false_hits = sum(bloom_contains(bits, k, v) for v in range(100_000, 110_000))
+    assert false_hits < 300  # ~1% target
+    assert len(bits) < 3000  # ~1.2 bytes per member
+
+
+class TestManifestBuild:
+    def test_one_entry_per_row_group(self, db):
+        from app.models.ais_archive_manifest import AisArchiveManifest
+        from app.modules.archive_manifest import bloom_contains
+
+        _points(db, 1, range(6), lat=50.0)
+        _points(db, 2, range(6, 10), lat=60.0, source="other")
+        batch = _archive(db, 10)
+
+        entries = db.query(AisArchiveManifest).order_by(AisArchiveManifest.row_group).all()
+        assert [(e.row_group, e.row_offset, e.row_count) for e in entries] == [
+            (0, 0, 4),
+            (1, 4, 4),
+            (2, 8, 2),
+        ]
+        middle = entries[1]
+        assert (middle.ts_min, middle.ts_max) == (T0 + timedelta(hours=4), T0 + timedelta(hours=7))
+        assert (middle.lat_min, middle.lat_max) == (50.0, 60.0)
+        assert middle.sources == ["other", "test"]
+        assert middle.vessel_count == 2
+        assert not bloom_contains(entries[0].vessel_bloom, entries[0].bloom_hashes, 2)
+
+        # Entries describe the rows at their offsets in the archive file
+        df = pl.read_parquet(batch.file_path).slice(middle.row_offset, middle.row_count)
+        assert df["timestamp_utc"].min() == middle.ts_min
+
+    def test_cleanup_removes_manifest_rows(self, db):
+        from app.models.ais_archive_manifest import AisArchiveManifest
+        from app.modules.ais_archiver import cleanup_expired_archives
+
+        _points(db, 1, range(3))
+        _archive(db, 3)
+        assert db.query(AisArchiveManifest).count() == 1
+        assert cleanup_expired_archives(db, max_age_days=-1) == 1
+        assert db.query(AisArchiveManifest).count() == 0
+
+
+class TestCandidateFiles:
+    def test_prunes_by_vessel_time_area_and_source(self, db):
+        from app.modules.archive_manifest import candidate_files
+
+        _points(db, 1, range(0, 4), lat=50.0)
+        first = _archive(db, 4).file_path
+        _points(db, 2, range(4, 8), lat=60.0, source="other")
+        second = _archive(db, 8).file_path
+
+        assert candidate_files(db) == [first, second]
+        assert candidate_files(db, vessel_ids=[2]) == [second]
+        assert candidate_files(db, vessel_ids=[3]) == []
+        assert candidate_files(db, end=T0 + timedelta(hours=2)) == [first]
+        assert candidate_files(db, bbox=(59.0, 11.0, 61.0, 13.0)) == [second]
+        assert candidate_files(db, source="other") == [second]
+
+    def test_unindexed_files_kept_until_backfilled(self, db):
+        from app.models.ais_archive_manifest import AisArchiveManifest
+        from app.modules.archive_manifest import candidate_files, index_archive_file
+
+        _points(db, 1, range(6))
+        batch = _archive(db, 6)
+        db.query(AisArchiveManifest).delete()
+        db.commit()
+
+        assert candidate_files(db, vessel_ids=[99]) == [batch.file_path]
+        assert index_archive_file(db, batch, row_group_size=4) == 2
+        db.commit()
+        assert candidate_files(db, vessel_ids=[99]) == []
+        assert candidate_files(db, vessel_ids=[1]) == [batch.file_path]
+
+    def test_track_reads_open_only_matching_files(self, db):
+        from app.modules.track_reader import read_track
+
+        _points(db, 1, range(0, 4))
+        _archive(db, 4)
+        _points(db, 2, range(4, 8))
+        _archive(db, 8)
+
+        with patch("app.modules.track_reader.pl.scan_parquet", wraps=pl.scan_parquet) as scan:
+            points = read_track(db, 2)
+        assert len(points) == 4
+        assert scan.call_count == 1
@@ -287,3 +287,33 @@ class TestBarentsWatchClient:
             result = fetch_barentswatch_tracks(db)
             expected_keys = {"points_imported", "vessels_seen", "api_calls", "errors"}
             assert expected_keys == set(result.keys())
+
+    def test_barentswatch_writer_counts_only_accepted_points(self):
+        """Points are not counted as imported when the ingest writer rejects them."""
+        db = SafeSessionMock(spec=Session)
+        writer = MagicMock()
+        writer.submit.side_effect = RuntimeError("Ingest writer is not running")
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"features": [self._make_geojson_feature()]}
+        mock_response.raise_for_status = MagicMock()
+
+        with (
+            patch("app.modules.barentswatch_client.settings") as mock_settings,
+            patch("app.modules.ingest_writer.get_ingest_writer", return_value=writer),
+            patch("app.modules.barentswatch_client.httpx.Client") as mock_client_cls,
+        ):
+            mock_settings.BARENTSWATCH_ENABLED = True
+            mock_settings.BARENTSWATCH_API_URL = "https://test.api/api"
+            mock_client = MagicMock()
+            mock_client.__enter__ = MagicMock(return_value=mock_client)
+            mock_client.__exit__ = MagicMock(return_value=False)
+            mock_client.get.return_value = mock_response
+            mock_client_cls.return_value = mock_client
+
+            from app.modules.barentswatch_client import fetch_barentswatch_tracks
+
+            result = fetch_barentswatch_tracks(db, token="test-token")
+            assert writer.submit.call_count == 1
+            assert result["points_imported"] == 0
+            assert result["errors"] == 1
@@ -0,0 +1,232 @@
+"""Tests for the set-based bulk CSV ingest engine (app.modules.bulk_ingest)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+
+def _make_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    import app.models  # noqa: F401 — register all tables
+
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)(), engine
+
+
+@pytest.fixture()
+def two_dbs():
+    """Two independent in-memory databases: one per ingest path."""
+    row_db, row_engine = _make_session()
+    bulk_db, bulk_engine = _make_session()
+    yield row_db, bulk_db
+    row_db.close()
+    bulk_db.close()
+    row_engine.dispose()
+    bulk_engine.dispose()
+
+
+def _seed(db):
+    """Pre-existing vessel with two points that the CSV collides with."""
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    v = Vessel(mmsi="211234567", name="OLD NAME", flag="DE")
+    db.add(v)
+    db.flush()
+    db.add_all(
+        [
+            AISPoint(
+                vessel_id=v.vessel_id,
+                timestamp_utc=datetime(2025, 6, 1, 0, 0, 0),
+                lat=55.0,
+                lon=12.0,
+                sog=10.0,
+                cog=90.0,
+                source="csv_import",
+            ),
+            AISPoint(
+                vessel_id=v.vessel_id,
+                timestamp_utc=datetime(2025, 6, 1, 0, 10, 0),
+                lat=55.1,
+                lon=12.1,
+                sog=11.0,
+                cog=350.0,
+                source="satellite",
+            ),
+        ]
+    )
+    db.commit()
+
+
+_CSV = """mmsi,timestamp,lat,lon,sog,cog,vessel_name,source
+211234567,2025-06-01T00:00:00Z,55.0,12.0,12.0,95.0,NEW NAME,satellite
+211234567,2025-06-01T00:05:00Z,55.05,12.05,12.5,10.0,NEW NAME,csv_import
+211234567,2025-06-01T00:05:04Z,55.05,12.05,12.6,11.0,NEW NAME,csv_import
+211234567,2025-06-01T00:05:04Z,55.05,12.05,13.6,12.0,NEW NAME,satellite
+211234567,2025-06-01T00:10:03Z,55.1,12.1,11.0,350.0,NEW NAME,csv_import
+211234567,2025-06-01T00:20:00Z,55.2,12.2,10.0,5.0,NEW NAME,csv_import
+273111222,2025-06-01T01:00:00Z,60.0,25.0,8.0,270.0,FRESH ONE,terrestrial
+273111222,2025-06-01T01:00:09Z,60.0,25.0,8.1,271.0,FRESH ONE,terrestrial
+273111222,2025-06-01T01:00:20Z,60.01,25.01,8.2,272.0,FRESH TWO,terrestrial
+273111222,2025-06-01T01:00:20Z,60.02,25.02,8.4,275.0,FRESH TWO,satellite
+999111222,2025-06-01T01:00:00Z,60.0,25.0,8.0,270.0,ATON,terrestrial
+273111222,2025-06-01T01:00:30Z,95.0,25.0,8.0,270.0,FRESH TWO,terrestrial
+"""
+
+
+def _snapshot(db):
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    points = (
+        db.query(Vessel.mmsi, AISPoint)
+        .join(AISPoint, AISPoint.vessel_id == Vessel.vessel_id)
+        .order_by(Vessel.mmsi, AISPoint.timestamp_utc, AISPoint.source)
+        .all()
+    )
+    return [
+        (
+            mmsi,
+            p.timestamp_utc,
+            p.source,
+            p.lat,
+            p.sog,
+            p.cog,
+            p.sog_delta,
+            p.cog_delta,
+        )
+        for mmsi, p in points
+    ]
+
+
+class TestBulkMatchesRowPath:
+    def test_counts_match(self, two_dbs):
+        from app.modules.ingest import ingest_ais_csv
+
+        row_db, bulk_db = two_dbs
+        _seed(row_db)
+        _seed(bulk_db)
+
+        row_result = ingest_ais_csv(_CSV.encode(), row_db, bulk=False)
+        bulk_result = ingest_ais_csv(_CSV.encode(), bulk_db, bulk=True)
+
+        for key in ("accepted", "rejected", "replaced", "ignored", "duplicates"):
+            assert bulk_result[key] == row_result[key], key
+        assert row_result["accepted"] == 4
+        assert row_result["replaced"] == 2
+        assert row_result["ignored"] == 4
+        assert row_result["rejected"] == 2
+        assert bulk_result["errors"] == row_result["errors"]
+
+    def test_points_and_deltas_match(self, two_dbs):
+        from app.modules.ingest import ingest_ais_csv
+
+        row_db, bulk_db = two_dbs
+        _seed(row_db)
+        _seed(bulk_db)
+
+        ingest_ais_csv(_CSV.encode(), row_db, bulk=False)
+        ingest_ais_csv(_CSV.encode(), bulk_db, bulk=True)
+
+        assert _snapshot(bulk_db) == _snapshot(row_db)
+
+    def test_vessels_and_history_match(self, two_dbs):
+        from app.models.vessel import Vessel
+        from app.models.vessel_history import VesselHistory
+        from app.modules.ingest import ingest_ais_csv
+
+        row_db, bulk_db = two_dbs
+        _seed(row_db)
+        _seed(bulk_db)
+
+        ingest_ais_csv(_CSV.encode(), row_db, bulk=False)
+        ingest_ais_csv(_CSV.encode(), bulk_db, bulk=True)
+
+        def vessels(db):
+            return [
+                (v.mmsi, v.name, v.flag, v.mmsi_first_seen_utc, v.last_ais_received_utc)
+                for v in db.query(Vessel).order_by(Vessel.mmsi).all()
+            ]
+
+        def history(db):
+            return sorted(
+                (h.field_changed, h.old_value, h.new_value) for h in db.query(VesselHistory).all()
+            )
+
+        assert vessels(bulk_db) == vessels(row_db)
+        assert history(bulk_db) == history(row_db)
+
+
+class TestBulkIngest:
+    def test_new_vessels_created_once(self, two_dbs):
+        from app.models.vessel import Vessel
+        from app.modules.ingest import ingest_ais_csv
+
+        _, db = two_dbs
+        ingest_ais_csv(_CSV.encode(), db, bulk=True)
+        mmsis = [v.mmsi for v in db.query(Vessel).order_by(Vessel.mmsi).all()]
+        assert mmsis == ["211234567", "273111222"]
+
+    def test_one_observation_per_valid_row(self, two_dbs):
+        from app.models.ais_observation import AISObservation
+        from app.modules.ingest import ingest_ais_csv
+
+        _, db = two_dbs
+        result = ingest_ais_csv(_CSV.encode(), db, bulk=True)
+        valid_rows = result["accepted"] + result["duplicates"]
+        assert db.query(AISObservation).count() == valid_rows
+
+    def test_reimport_is_fully_ignored(self, two_dbs):
+        from app.modules.ingest import ingest_ais_csv
+
+        _, db = two_dbs
+        first = ingest_ais_csv(_CSV.encode(), db, bulk=True)
+        second = ingest_ais_csv(_CSV.encode(), db, bulk=True)
+        assert second["accepted"] == 0
+        assert second["replaced"] == 0
+        assert second["ignored"] == first["accepted"] + first["ignored"] + first["replaced"]
+
+    def test_all_rows_rejected(self, two_dbs):
+        from app.modules.ingest import ingest_ais_csv
+
+        _, db = two_dbs
+        csv = "mmsi,timestamp,lat,lon\n12,2025-06-01T00:00:00Z,55.0,12.0\n"
+        result = ingest_ais_csv(csv.encode(), db, bulk=True)
+        assert result["accepted"] == 0
+        assert result["rejected"] == 1
+
+    def test_setting_selects_bulk_path(self, two_dbs):
+        from unittest.mock import patch
+
+        from app.modules.ingest import ingest_ais_csv
+
+        _, db = two_dbs
+        with (
+            patch("app.config.settings.INGEST_BULK_ENABLED", True),
+            patch(
+                "app.modules.bulk_ingest.ingest_normalized_frame",
+                return_value={
+                    "accepted": 7,
+                    "rejected": 0,
+                    "replaced": 0,
+                    "ignored": 0,
+                    "errors": [],
+                },
+            ) as bulk,
+        ):
+            result = ingest_ais_csv(_CSV.encode(), db)
+        assert bulk.called
+        assert result["accepted"] == 7
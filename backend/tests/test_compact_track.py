@@ -0,0 +1,168 @@
+"""Tests for array-backed compact tracks (app.modules.compact_track)."""
+
+from __future__ import annotations
+
+import gc
+import math
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def db(tmp_path):
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with (
+        patch("app.config.settings.ARCHIVE_STORAGE_DIR", str(tmp_path / "archives")),
+        patch("app.config.settings.ARCHIVE_BATCH_SIZE", 4),
+    ):
+        yield session
+    session.close()
+    engine.dispose()
+
+
+def _track(db, vessel_id: int, n: int, step: timedelta = timedelta(hours=1)) -> None:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    db.add_all(
+        AISPoint(
+            vessel_id=vessel_id,
+            timestamp_utc=T0 + i * step,
+            lat=55.0 + i / 1000,
+            lon=12.0,
+            sog=None if i % 5 == 4 else 10.5,
+            cog=90.0,
+            nav_status=0 if i % 2 else None,
+            source="test",
+        )
+        for i in range(n)
+    )
+    db.commit()
+
+
+class TestCompactTrack:
+    def test_round_trip_with_missing_values(self):
+        from app.modules.compact_track import CompactTrack
+
+        track = CompactTrack(7)
+        track.append(T0, 55.5, 12.25, 10.5, None, 5)
+        track.append(T0.replace(tzinfo=UTC) + timedelta(minutes=1), 55.6, 12.5, None, 270.0, None)
+
+        first, second = list(track)
+        assert len(track) == 2
+        assert first == (7, T0, 55.5, 12.25, 10.5, None, 5)
+        assert second.timestamp_utc == T0 + timedelta(minutes=1)
+        assert second.sog is None and second.nav_status is None
+        assert second.lat == pytest.approx(55.6, abs=1e-5)
+        assert math.isnan(track.sog[1])
+        assert track[1] == second
+        assert track.nbytes == 2 * (8 + 4 * 4 + 1)
+
+    def test_delta_encoding_and_between(self):
+        from app.modules.compact_track import CompactTrack, to_epoch
+
+        times = [T0 + timedelta(seconds=s) for s in (0, 10, 70, 3600, 7200)]
+        plain = CompactTrack(1)
+        delta = CompactTrack(1, delta=True)
+        for i, ts in enumerate(times):
+            plain.append(ts, 55.0, 12.0, float(i))
+            delta.append(ts, 55.0, 12.0, float(i))
+
+        assert list(delta) == list(plain)
+        assert list(delta.epoch_seconds()) == [to_epoch(t) for t in times]
+        assert delta.nbytes < plain.nbytes
+        assert delta[3].timestamp_utc == times[3]
+
+        window = delta.between(times[1], times[3])
+        assert [p.timestamp_utc for p in window] == times[1:4]
+        assert [p.sog for p in window] == [1.0, 2.0, 3.0]
+        assert len(plain.between(start=times[4])) == 1
+
+
+class TestLoaders:
+    def test_load_compact_tracks_without_orm_hydration(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.compact_track import load_compact_tracks
+
+        _track(db, 1, 6)
+        _track(db, 2, 3)
+        db.expire_all()
+
+        loaded = []
+
+        def on_load(target, context):
+            loaded.append(target)
+
+        event.listen(AISPoint, "load", on_load)
+        try:
+            tracks = load_compact_tracks(db, start=T0 + timedelta(hours=1), delta=True)
+            only_two = load_compact_tracks(db, vessel_ids=[2])
+        finally:
+            event.remove(AISPoint, "load", on_load)
+
+        assert loaded == []
+        assert sorted(tracks) == [1, 2]
+        assert len(tracks[1]) == 5 and len(tracks[2]) == 2
+        assert [p.timestamp_utc for p in tracks[2]] == [T0 + timedelta(hours=h) for h in (1, 2)]
+        assert list(only_two) == [2]
+        assert [p.nav_status for p in only_two[2]] == [None, 0, None]
+
+    def test_read_compact_track_includes_archived_points(self, db):
+        from app.modules.ais_archiver import archive_old_points
+        from app.modules.compact_track import read_compact_track
+
+        _track(db, 1, 10)
+        archive_old_points(db, T0 + timedelta(hours=6))
+
+        track = read_compact_track(db, 1)
+        assert [p.timestamp_utc for p in track] == [T0 + timedelta(hours=h) for h in range(10)]
+        assert track[4].sog is None and track[5].sog == 10.5
+
+        window = read_compact_track(db, 1, T0 + timedelta(hours=4), T0 + timedelta(hours=7))
+        assert len(window) == 4
+
+        with patch("app.config.settings.ARCHIVE_TIERED_READS", False):
+            assert len(read_compact_track(db, 1)) == 4
+
+    def test_at_least_ten_times_smaller_than_orm_rows(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.compact_track import load_compact_tracks
+
+        _track(db, 1, 2_000, step=timedelta(minutes=1))
+        db.expunge_all()
+        gc.collect()
+
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            rows = db.query(AISPoint).order_by(AISPoint.timestamp_utc).all()
+            gc.collect()
+            orm_bytes = tracemalloc.get_traced_memory()[0] - base
+            assert len(rows) == 2_000
+            del rows
+            db.expunge_all()
+            gc.collect()
+
+            base = tracemalloc.get_traced_memory()[0]
+            tracks = load_compact_tracks(db, [1])
+            gc.collect()
+            compact_bytes = tracemalloc.get_traced_memory()[0] - base
+            assert len(tracks[1]) == 2_000
+        finally:
+            tracemalloc.stop()
+
+        assert orm_bytes >= 10 * compact_bytes
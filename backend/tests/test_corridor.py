@@ -279,31 +279,29 @@ def test_transit_trajectory_through_corridor():
     that passes through the corridor at lon=25, lat in [54.5, 55.5].
     Neither endpoint is inside the corridor.
 
-    With Shapely intersection, _intersecting_rows SHOULD match this trajectory.
+    With Shapely intersection, the corridor index SHOULD match this trajectory.
     """
     from unittest.mock import MagicMock
 
-    from app.modules.corridor_correlator import _intersecting_rows
+    from app.models.corridor import Corridor
+    from app.modules.corridor_index import ZoneIndex
 
     rect_wkt = "POLYGON ((24 54.5, 26 54.5, 26 55.5, 24 55.5, 24 54.5))"
 
     row = MagicMock()
     row.geometry = rect_wkt
+    row.corridor_id = 7
 
-    model = MagicMock()
-    db = MagicMock()
-    db.query.return_value.filter.return_value.all.return_value = [row]
+    index = ZoneIndex.from_rows([row], Corridor)
 
     # Trajectory from (lat=53, lon=25) to (lat=57, lon=25) — passes through corridor
-    matches = _intersecting_rows(
-        db,
+    matches = index.intersecting(
         start_lat=53.0,
         start_lon=25.0,
         end_lat=57.0,
         end_lon=25.0,
-        model=model,
     )
     assert len(matches) == 1, (
         "Transit trajectory through corridor should be detected via Shapely intersection"
     )
-    assert matches[0] is row
+    assert matches[0].zone_id == 7
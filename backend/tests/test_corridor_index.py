@@ -0,0 +1,198 @@
+"""Tests for the shared corridor / dark-zone geometry index (app.modules.corridor_index)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+RECT = "POLYGON ((24 54.5, 26 54.5, 26 55.5, 24 55.5, 24 54.5))"
+DIAMOND = "POLYGON ((25 56, 26 55, 25 54, 24 55, 25 56))"
+
+
+@pytest.fixture()
+def engine():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _corridor(name: str, wkt: str | None, **kw):
+    from app.models.base import CorridorTypeEnum
+    from app.models.corridor import Corridor
+
+    kw.setdefault("corridor_type", CorridorTypeEnum.EXPORT_ROUTE)
+    return Corridor(name=name, geometry=wkt, **kw)
+
+
+def _gap(db, vessel_id: int, start: tuple[float, float], end: tuple[float, float]):
+    from app.models.ais_point import AISPoint
+    from app.models.gap_event import AISGapEvent
+    from app.models.vessel import Vessel
+
+    if db.get(Vessel, vessel_id) is None:
+        db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    a = AISPoint(vessel_id=vessel_id, timestamp_utc=T0, lat=start[0], lon=start[1])
+    b = AISPoint(vessel_id=vessel_id, timestamp_utc=T0 + timedelta(hours=8), lat=end[0], lon=end[1])
+    db.add_all([a, b])
+    db.flush()
+    gap = AISGapEvent(
+        vessel_id=vessel_id,
+        gap_start_utc=a.timestamp_utc,
+        gap_end_utc=b.timestamp_utc,
+        duration_minutes=480,
+        start_point_id=a.ais_point_id,
+        end_point_id=b.ais_point_id,
+    )
+    db.add(gap)
+    db.flush()
+    return gap
+
+
+class TestZoneGeometry:
+    def test_polygon_bounds(self):
+        from app.modules.corridor_index import zone_geometry
+
+        geom = zone_geometry(RECT)
+        assert geom.is_area
+        assert geom.bounds == (24.0, 54.5, 26.0, 55.5)
+
+    def test_unparseable_falls_back_to_coordinate_bbox(self):
+        from app.modules.corridor_index import zone_geometry
+
+        geom = zone_geometry("POLYGON ((24 54, 26 54, 26")
+        assert not geom.is_area
+        assert geom.bounds == (24.0, 54.0, 26.0, 54.0)
+        assert zone_geometry(None) is None
+        assert zone_geometry("") is None
+
+
+class TestZoneIndex:
+    def test_containing_uses_polygon_not_bbox(self, db):
+        from app.models.corridor import Corridor
+        from app.modules.corridor_index import ZoneIndex
+
+        index = ZoneIndex.from_rows([_corridor("diamond", DIAMOND)], Corridor)
+        assert index.containing(55.0, 25.0, 0.1)
+        # Inside the bbox, outside the diamond
+        assert not index.containing(54.1, 24.1, 0.1)
+        assert index.in_bbox(54.1, 24.1)
+
+    def test_intersecting_many_matches_single_queries(self, db):
+        from app.models.corridor import Corridor
+        from app.modules.corridor_index import ZoneIndex
+
+        rows = [_corridor("rect", RECT), _corridor("diamond", DIAMOND), _corridor("pt", None)]
+        for i, row in enumerate(rows, start=1):
+            row.corridor_id = i
+        index = ZoneIndex.from_rows(rows, Corridor)
+        assert len(index) == 2
+
+        segments = [
+            (53.0, 25.0, 57.0, 25.0),  # transits both
+            (54.0, 24.05, 54.0, 24.05),  # degenerate, near the diamond's bbox corner
+            (10.0, 10.0, 11.0, 11.0),  # far away
+        ]
+        many = index.intersecting_many(segments, 0.1)
+        assert [[e.zone_id for e in hits] for hits in many] == [[1, 2], [], []]
+        for seg, hits in zip(segments, many, strict=True):
+            assert index.intersecting(*seg, buffer_deg=0.1) == hits
+
+    def test_zone_type_filter(self, db):
+        from app.models.base import CorridorTypeEnum
+        from app.models.corridor import Corridor
+        from app.modules.corridor_index import ZoneIndex
+
+        index = ZoneIndex.from_rows(
+            [
+                _corridor("route", RECT),
+                _corridor("anchorage", RECT, corridor_type=CorridorTypeEnum.ANCHORAGE_HOLDING),
+            ],
+            Corridor,
+        )
+        anchorages = {CorridorTypeEnum.ANCHORAGE_HOLDING}
+        found = index.containing(55.0, 25.0, 0.05, zone_types=anchorages)
+        assert [e.zone_type for e in found] == ["anchorage_holding"]
+
+
+class TestCache:
+    def test_cached_until_zone_written(self, db):
+        from app.models.corridor import Corridor
+        from app.modules.corridor_index import corridor_index
+
+        db.add(_corridor("rect", RECT))
+        db.commit()
+        first = corridor_index(db)
+        assert corridor_index(db) is first
+
+        db.add(_corridor("diamond", DIAMOND))
+        db.commit()
+        second = corridor_index(db)
+        assert second is not first
+        assert len(second) == 2
+
+        row = db.query(Corridor).filter_by(name="rect").one()
+        row.geometry = "POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))"
+        db.commit()
+        assert corridor_index(db).containing(0.5, 0.5, 0.0)
+
+    def test_max_age_forces_rebuild(self, db, monkeypatch):
+        from app.modules.corridor_index import corridor_index
+
+        first = corridor_index(db)
+        monkeypatch.setattr("app.config.settings.ZONE_INDEX_MAX_AGE_S", 0)
+        assert corridor_index(db) is not first
+
+
+class TestCorrelator:
+    def test_bulk_correlation_matches_per_gap_lookup(self, db):
+        from app.models.dark_zone import DarkZone
+        from app.modules.corridor_correlator import (
+            correlate_all_uncorrelated_gaps,
+            find_corridor_for_gap,
+            find_dark_zone_for_gap,
+        )
+
+        low = _corridor("low", RECT, risk_weight=1.0)
+        high = _corridor("high", DIAMOND, risk_weight=2.0, is_jamming_zone=True)
+        db.add_all([low, high, DarkZone(name="dz", geometry=RECT)])
+        through_both = _gap(db, 1, (53.0, 25.0), (57.0, 25.0))
+        rect_only = _gap(db, 2, (54.6, 24.1), (54.6, 24.15))
+        nowhere = _gap(db, 3, (10.0, 10.0), (11.0, 11.0))
+        db.commit()
+
+        expected = {
+            g.gap_event_id: (
+                getattr(find_corridor_for_gap(db, g), "corridor_id", None),
+                getattr(find_dark_zone_for_gap(db, g), "zone_id", None),
+            )
+            for g in (through_both, rect_only, nowhere)
+        }
+        assert expected[through_both.gap_event_id][0] == high.corridor_id
+        assert expected[rect_only.gap_event_id][0] == low.corridor_id
+        assert expected[nowhere.gap_event_id] == (None, None)
+
+        result = correlate_all_uncorrelated_gaps(db)
+        assert result == {"correlated": 2, "dark_zone": 2}
+        for g in (through_both, rect_only, nowhere):
+            assert (g.corridor_id, g.dark_zone_id) == expected[g.gap_event_id]
+        assert through_both.in_dark_zone and rect_only.in_dark_zone
@@ -0,0 +1,211 @@
+"""Tests for incremental detection watermarks (app.modules.detector_checkpoints)."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.modules.detector_checkpoints import DetectorSpec, plan_detector_run, reset_checkpoints
+
+T0 = datetime(2024, 3, 1, 0, 0, 0)
+SPEC = DetectorSpec("test", lookback=timedelta(hours=2), config_keys=("GAP_MIN_HOURS",))
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _overlap(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "DETECTOR_CHECKPOINT_OVERLAP_HOURS", 1.0)
+
+
+def _vessels(db, *vessel_ids: int) -> None:
+    from app.models.vessel import Vessel
+
+    db.add_all(Vessel(vessel_id=vid, mmsi=f"2110000{vid:02d}") for vid in vessel_ids)
+    db.commit()
+
+
+def _points(db, vessel_id: int, *hours: float) -> None:
+    from app.models.ais_point import AISPoint
+
+    db.add_all(
+        AISPoint(
+            vessel_id=vessel_id,
+            timestamp_utc=T0 + timedelta(hours=h),
+            lat=40.0,
+            lon=5.0 + h * 0.1,
+            sog=6.0,
+        )
+        for h in hours
+    )
+    db.commit()
+
+
+def _run(db, spec: DetectorSpec = SPEC, vessel_ids=(1, 2)):
+    plan = plan_detector_run(db, spec, vessel_ids)
+    plan.advance()
+    db.commit()
+    return plan
+
+
+class TestCheckpointPlan:
+    def test_first_run_recomputes_then_skips_unchanged_vessels(self, db):
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1, 2)
+        _points(db, 2, 0, 1)
+
+        first = _run(db)
+        assert first.vessel_ids == [1, 2]
+        assert first.since(1) is None and first.start(1, T0) == T0
+
+        again = _run(db)
+        assert again.vessel_ids == []
+
+    def test_new_points_rescan_from_lookback_and_overlap(self, db):
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1, 2)
+        _points(db, 2, 0, 1)
+        _run(db)
+
+        _points(db, 1, 10, 11)
+        plan = plan_detector_run(db, SPEC, [1, 2])
+        assert plan.vessel_ids == [1]
+        assert 2 not in plan
+        assert plan.since(1) == T0 + timedelta(hours=10 - 2 - 1)
+        assert plan.start(1, T0 + timedelta(hours=8)) == T0 + timedelta(hours=8)
+        assert plan.fleet_start(None) == T0 + timedelta(hours=7)
+
+    def test_previous_point_reaches_back_to_last_old_point(self, db):
+        spec = DetectorSpec("gap_like", previous_point=True)
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        _run(db, spec)
+
+        _points(db, 1, 30)
+        plan = plan_detector_run(db, spec, [1, 2])
+        assert plan.since(1) == T0 + timedelta(hours=1)
+
+    def test_config_change_recomputes(self, db, monkeypatch):
+        from app.config import settings
+
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        _run(db)
+
+        monkeypatch.setattr(settings, "GAP_MIN_HOURS", settings.GAP_MIN_HOURS + 1)
+        plan = _run(db)
+        assert plan.vessel_ids == [1, 2]
+        assert plan.since(1) is None
+        assert _run(db).vessel_ids == []
+
+    def test_advance_stops_at_plan_high_water(self, db):
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        plan = plan_detector_run(db, SPEC, [1, 2])
+        # Written while the detector runs: must be picked up by the next run
+        _points(db, 2, 5)
+        plan.advance()
+        db.commit()
+
+        assert plan_detector_run(db, SPEC, [1, 2]).vessel_ids == [2]
+
+    def test_advance_lowered_while_writers_in_flight(self, db, monkeypatch):
+        from app.config import settings
+        from app.models.ais_point import AISPoint
+        from app.modules import detector_checkpoints
+
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        _points(db, 2, 0)
+        now = datetime.now(UTC).replace(tzinfo=None)
+        points = db.query(AISPoint).order_by(AISPoint.ais_point_id).all()
+        for point, age_minutes in zip(points, (60, 60, 1)):
+            point.ingested_at = now - timedelta(minutes=age_minutes)
+        db.commit()
+
+        monkeypatch.setattr(settings, "DETECTOR_CHECKPOINT_COMMIT_MARGIN_MINUTES", 10.0)
+        monkeypatch.setattr(detector_checkpoints, "_writers_in_flight", lambda db: True)
+        plan = _run(db)
+        assert plan.high_water == points[2].ais_point_id
+        assert plan.committed_high_water == points[1].ais_point_id
+
+        # The point above the recorded watermark is rescanned next run
+        monkeypatch.setattr(detector_checkpoints, "_writers_in_flight", lambda db: False)
+        assert plan_detector_run(db, SPEC, [1, 2]).vessel_ids == [2]
+
+    def test_points_without_ingested_at_count_as_committed(self, db, monkeypatch):
+        from app.models.ais_point import AISPoint
+        from app.modules import detector_checkpoints
+
+        _vessels(db, 1)
+        _points(db, 1, 0, 1)
+        points = db.query(AISPoint).order_by(AISPoint.ais_point_id).all()
+        points[0].ingested_at = None
+        points[1].ingested_at = datetime.now(UTC).replace(tzinfo=None)
+        db.commit()
+
+        monkeypatch.setattr(detector_checkpoints, "_writers_in_flight", lambda db: True)
+        plan = plan_detector_run(db, SPEC, [1])
+        assert plan.committed_high_water == points[0].ais_point_id
+
+    def test_skipped_vessel_keeps_its_checkpoint(self, db):
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        _run(db)
+        _points(db, 1, 4)
+        _points(db, 2, 4)
+
+        plan = plan_detector_run(db, SPEC, [1, 2])
+        plan.skip(2)
+        plan.advance()
+        db.commit()
+        assert plan_detector_run(db, SPEC, [1, 2]).vessel_ids == [2]
+
+    def test_reset_checkpoints(self, db):
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 1)
+        _run(db)
+        _run(db, DetectorSpec("other"))
+
+        assert reset_checkpoints(db, detector="test", vessel_ids=[1]) == 1
+        assert plan_detector_run(db, SPEC, [1, 2]).vessel_ids == [1]
+        assert reset_checkpoints(db) == 3
+
+
+class TestIncrementalGapDetection:
+    def test_gap_across_watermark_is_found_once(self, db):
+        from app.models.gap_event import AISGapEvent
+        from app.modules.gap_detector import run_gap_detection
+
+        _vessels(db, 1, 2)
+        _points(db, 1, 0, 0.5, 1)
+        _points(db, 2, 0, 0.5)
+        assert run_gap_detection(db, incremental=True)["gaps_detected"] == 0
+
+        # Vessel 1 goes dark for 20h; its first point back is the gap end
+        _points(db, 1, 21, 21.5)
+        summary = run_gap_detection(db, incremental=True)
+        assert summary == {"gaps_detected": 1, "vessels_processed": 1}
+        gap = db.query(AISGapEvent).one()
+        assert (gap.vessel_id, gap.gap_start_utc) == (1, T0 + timedelta(hours=1))
+
+        assert run_gap_detection(db, incremental=True)["vessels_processed"] == 0
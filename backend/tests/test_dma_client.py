@@ -5,7 +5,7 @@ from __future__ import annotations
 import csv
 import gzip
 import io
-from datetime import date
+from datetime import UTC, date, datetime
 from unittest.mock import MagicMock, patch
 
 from sqlalchemy.orm import Session
@@ -140,6 +140,16 @@ class TestDMAClient:
         assert ts.month == 3
         assert ts.day == 15
 
+    def test_dma_timestamp_column_dayfirst(self):
+        """Chunk timestamps are parsed column-wise, day-first even when ambiguous."""
+        from app.modules.dma_client import _DMA_COLUMN_MAP, _parse_dma_timestamps
+
+        header = list(_DMA_COLUMN_MAP.keys())
+        filler = [""] * (len(header) - 1)
+        rows = [["01/03/2026 08:30:00", *filler], ["garbage", *filler], ["short"]]
+        parsed = _parse_dma_timestamps(header, rows)
+        assert parsed == [datetime(2026, 3, 1, 8, 30, tzinfo=UTC), None, None]
+
     def test_dma_unknown_imo_skipped(self):
         """Rows with IMO='Unknown' should not store an IMO on the vessel."""
         db = SafeSessionMock(spec=Session)
@@ -314,3 +324,160 @@ class TestDMAClient:
         assert _safe_float("") is None
         assert _safe_float(None) is None
         assert _safe_float("abc") is None
+
+
+class TestDMAParallelImport:
+    """Chunked multi-process import must match the row-by-row path."""
+
+    def _session(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        import app.models  # noqa: F401 — register all tables
+        from app.models.base import Base
+
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        return sessionmaker(bind=engine)()
+
+    def _csv(self) -> str:
+        helper = TestDMAClient()
+        rows = [
+            helper._make_dma_row(mmsi="219000001", ts="01/03/2026 12:00:00", imo="Unknown"),
+            helper._make_dma_row(mmsi="219000001", ts="01/03/2026 12:00:10", imo="1234567"),
+            helper._make_dma_row(mmsi="219000001", ts="01/03/2026 12:00:10"),  # duplicate
+            helper._make_dma_row(mmsi="219000001", ts="01/03/2026 12:01:00", name="RENAMED"),
+            helper._make_dma_row(mmsi="219000002", ts="01/03/2026 12:00:00", ship_type="Cargo"),
+            helper._make_dma_row(mmsi="219000003", ts="not a date"),
+            helper._make_dma_row(mmsi="219000003", lat="95.0"),
+            helper._make_dma_row(mmsi="992190001"),  # AtoN
+            helper._make_dma_row(mmsi="219000004", ts="01/03/2026 13:00:00", imo="7654321"),
+            helper._make_dma_row(mmsi="219000005", ts="01/03/2026 13:00:00", name=""),
+        ]
+        return helper._make_csv_content(rows) + "short,row\n"
+
+    def _seed(self, db):
+        from datetime import datetime
+
+        from app.models.ais_point import AISPoint
+        from app.models.vessel import Vessel
+
+        vessel = Vessel(
+            mmsi="219000004",
+            name="EXISTING",
+            imo="7654320",
+            last_ais_received_utc=datetime(2026, 2, 1),
+        )
+        db.add(vessel)
+        db.flush()
+        db.add(
+            AISPoint(
+                vessel_id=vessel.vessel_id,
+                timestamp_utc=datetime(2026, 3, 1, 13, 0, 0),
+                lat=55.0,
+                lon=12.0,
+                source="dma",
+            )
+        )
+        db.commit()
+
+    def _run(self, db, workers, vessel_types=None):
+        mock_resp = TestDMAClient()._make_gz_response(self._csv())
+        mock_client = _make_mock_httpx_client(mock_resp)
+        with patch("app.modules.dma_client.settings") as mock_settings:
+            mock_settings.DMA_ENABLED = True
+            with (
+                patch("app.modules.dma_client.httpx.Client", return_value=mock_client),
+                patch("app.modules.dma_client._CHUNK_BYTES", 300),
+            ):
+                from app.modules.dma_client import fetch_and_import_dma
+
+                return fetch_and_import_dma(
+                    db, date(2026, 3, 1), date(2026, 3, 1), vessel_types, workers=workers
+                )
+
+    def _snapshot(self, db):
+        from app.models.ais_observation import AISObservation
+        from app.models.ais_point import AISPoint
+        from app.models.vessel import Vessel
+        from app.models.vessel_history import VesselHistory
+
+        vessels = [
+            (v.mmsi, v.imo, v.name, v.callsign, v.vessel_type, v.mmsi_first_seen_utc)
+            for v in db.query(Vessel).order_by(Vessel.mmsi)
+        ]
+        points = sorted(
+            (p.vessel_id, p.timestamp_utc, p.lat, p.sog, p.heading, p.source)
+            for p in db.query(AISPoint)
+        )
+        history = sorted(
+            (h.field_changed, h.old_value, h.new_value) for h in db.query(VesselHistory)
+        )
+        return vessels, points, history, db.query(AISObservation).count()
+
+    def test_parallel_matches_row_path(self):
+        row_db, par_db = self._session(), self._session()
+        self._seed(row_db)
+        self._seed(par_db)
+
+        row_stats = self._run(row_db, workers=1)
+        par_stats = self._run(par_db, workers=2)
+
+        assert par_stats == row_stats
+        assert row_stats["points_imported"] == 5
+        assert row_stats["days_processed"] == 1
+        assert self._snapshot(par_db) == self._snapshot(row_db)
+
+    def test_parallel_type_filter(self):
+        db = self._session()
+        stats = self._run(db, workers=2, vessel_types=["Cargo"])
+        assert stats["points_imported"] == 1
+
+    def test_parallel_bounds_chunks_in_flight(self):
+        from concurrent.futures import Executor, Future
+
+        from app.modules.dma_client import _import_dma_day_parallel
+
+        class InlineExecutor(Executor):
+            def __init__(self):
+                self.outstanding = self.peak = self.submitted = 0
+
+            def submit(self, fn, /, *args, **kwargs):
+                future = Future()
+                future.set_result(fn(*args, **kwargs))
+                self.submitted += 1
+                self.outstanding += 1
+                self.peak = max(self.peak, self.outstanding)
+                result = future.result
+
+                def consume(timeout=None):
+                    self.outstanding -= 1
+                    return result(timeout)
+
+                future.result = consume
+                return future
+
+        db = self._session()
+        executor = InlineExecutor()
+        stats = {"errors": 0, "vessels_created": 0, "vessels_updated": 0}
+        with patch("app.modules.dma_client._CHUNK_BYTES", 300):
+            points = _import_dma_day_parallel(
+                db, self._csv().encode(), False, executor, None, stats, max_in_flight=2
+            )
+        assert points == 6
+        assert executor.submitted > 2
+        assert executor.peak == 2
+
+    def test_line_aligned_ranges_cover_body(self, tmp_path):
+        from app.modules.dma_client import _line_aligned_ranges
+
+        path = tmp_path / "day.csv"
+        body = "".join(f"{i},row-{i}\n" for i in range(50))
+        path.write_text("a,b\n" + body)
+
+        header, ranges = _line_aligned_ranges(path, 37)
+        assert header == ["a", "b"]
+        assert len(ranges) > 1
+        data = path.read_bytes()
+        assert b"".join(data[s:e] for s, e in ranges).decode() == body
+        assert all(data[e - 1 : e] == b"\n" for _, e in ranges)
@@ -0,0 +1,157 @@
+"""Vectorized whole-fleet gap detection must match the per-vessel detector."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 0, 0, 0)
+DAY = date(2024, 3, 1)
+
+_GAP_FIELDS = (
+    "vessel_id",
+    "start_point_id",
+    "end_point_id",
+    "gap_start_utc",
+    "gap_end_utc",
+    "duration_minutes",
+    "impossible_speed_flag",
+    "velocity_plausibility_ratio",
+    "max_plausible_distance_nm",
+    "actual_gap_distance_nm",
+    "pre_gap_sog",
+)
+
+
+def _session():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _seed(db, tracks: dict[int, list[tuple[int, float, float, float | None]]]):
+    """tracks: vessel_id -> [(minutes after T0, lat, lon, sog)]."""
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    for vid, points in tracks.items():
+        db.add(Vessel(vessel_id=vid, mmsi=f"21100000{vid}"))
+        db.flush()
+        db.add_all(
+            AISPoint(
+                vessel_id=vid,
+                timestamp_utc=T0 + timedelta(minutes=m),
+                lat=lat,
+                lon=lon,
+                sog=sog,
+            )
+            for m, lat, lon, sog in points
+        )
+    db.commit()
+
+
+def _gaps(db):
+    from app.models.gap_event import AISGapEvent
+
+    rows = db.query(AISGapEvent).order_by(AISGapEvent.vessel_id, AISGapEvent.gap_start_utc)
+    return [tuple(getattr(g, f) for f in _GAP_FIELDS) for g in rows]
+
+
+def _run_both(tracks, setup=None):
+    from app.modules.gap_detector import run_gap_detection
+    from app.modules.track_store import TrackStore
+
+    results = []
+    for vectorized in (False, True):
+        db = _session()
+        _seed(db, tracks)
+        if setup is not None:
+            setup(db)
+        store = TrackStore.for_dates(db, DAY, DAY) if vectorized else None
+        summary = run_gap_detection(db, date_from=DAY, date_to=DAY, track_store=store)
+        results.append((summary, _gaps(db)))
+        db.close()
+    return results
+
+
+TRACKS = {
+    1: [(0, 55.0, 20.0, 12.0), (30, 55.1, 20.1, None), (300, 56.0, 21.0, 11.0), (310, 56, 21, 1)],
+    2: [(0, 55.0, 20.0, 12.0), (2, 55.0, 20.0, 12.0), (200, 60.0, 30.0, 12.0)],
+    3: [(10, 40.0, 5.0, 0.0), (70, 40.0, 5.0, 0.0)],
+    4: [(0, 10.0, 10.0, 5.0), (500, 10.2, 10.2, 5.0), (1000, 10.4, 10.4, 5.0)],
+}
+
+
+class TestFleetGapDetection:
+    def test_matches_per_vessel_detector(self):
+        (legacy, legacy_gaps), (fleet, fleet_gaps) = _run_both(TRACKS)
+        assert legacy == fleet
+        assert fleet_gaps == legacy_gaps
+        assert [g[0] for g in fleet_gaps] == [1, 2, 4, 4]
+        assert fleet_gaps[0][-1] is None  # pre-gap sog missing
+        assert any(g[6] for g in fleet_gaps)  # vessel 2 jumps too far
+
+    def test_recorded_gaps_are_not_duplicated(self):
+        from app.models.gap_event import AISGapEvent
+
+        def gfw_gap(db):
+            db.add(
+                AISGapEvent(
+                    vessel_id=4,
+                    gap_start_utc=T0 + timedelta(minutes=505),
+                    gap_end_utc=T0 + timedelta(minutes=990),
+                    duration_minutes=485,
+                    risk_score=0,
+                    status="new",
+                )
+            )
+            db.commit()
+
+        (legacy, legacy_gaps), (fleet, fleet_gaps) = _run_both(TRACKS, setup=gfw_gap)
+        assert legacy == fleet
+        assert fleet_gaps == legacy_gaps
+        assert fleet["gaps_detected"] == 3
+
+    def test_merged_vessels_are_skipped(self):
+        def merge(db):
+            from app.models.vessel import Vessel
+
+            db.get(Vessel, 2).merged_into_vessel_id = 1
+            db.commit()
+
+        (legacy, legacy_gaps), (fleet, fleet_gaps) = _run_both(TRACKS, setup=merge)
+        assert fleet_gaps == legacy_gaps
+        assert 2 not in {g[0] for g in fleet_gaps}
+
+    def test_sub_window_gap_threshold_dedups_in_sequence(self, monkeypatch):
+        monkeypatch.setattr("app.config.settings.GAP_MIN_HOURS", 0.1)
+        tracks = {1: [(m, 55.0, 20.0, 10.0) for m in (0, 7, 14, 21, 40, 47)]}
+        (legacy, legacy_gaps), (fleet, fleet_gaps) = _run_both(tracks)
+        assert fleet_gaps == legacy_gaps
+        assert [g[3] for g in fleet_gaps] == [
+            T0,
+            T0 + timedelta(minutes=14),
+            T0 + timedelta(minutes=40),
+        ]
+
+    def test_rerun_is_idempotent(self):
+        from app.modules.gap_detector import run_gap_detection
+        from app.modules.track_store import TrackStore
+
+        db = _session()
+        _seed(db, TRACKS)
+        store = TrackStore.for_dates(db, DAY, DAY)
+        first = run_gap_detection(db, date_from=DAY, date_to=DAY, track_store=store)
+        again = run_gap_detection(db, date_from=DAY, date_to=DAY, track_store=store)
+        assert first["gaps_detected"] == 4
+        assert again["gaps_detected"] == 0
+        db.close()
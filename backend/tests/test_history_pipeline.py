@@ -574,6 +574,36 @@ class TestCorridorActivity:
         assert resp.status_code == 200
         assert resp.json() == []
 
+    def test_activity_include_traffic(self, real_api_client, real_api_db):
+        corr = _corridor(real_api_db, name="Traffic Corridor")
+        corr.geometry = "POLYGON((24 59, 26 59, 26 61, 24 61, 24 59))"
+        v1 = _vessel(real_api_db, mmsi="200000003")
+        v2 = _vessel(real_api_db, mmsi="200000004")
+        _gap_event(
+            real_api_db, v1, datetime(2024, 6, 15, 0, 0), datetime(2024, 6, 15, 6, 0), corridor=corr
+        )
+        _ais_point(real_api_db, v1, datetime(2024, 6, 14, 12, 0))
+        _ais_point(real_api_db, v2, datetime(2024, 6, 20, 12, 0))
+        _ais_point(real_api_db, v2, datetime(2024, 7, 2, 12, 0))
+        _ais_point(real_api_db, v1, datetime(2024, 7, 3, 12, 0), lat=40.0)  # outside bbox
+        real_api_db.commit()
+
+        resp = real_api_client.get(
+            f"{API}/corridors/{corr.corridor_id}/activity",
+            params={
+                "granularity": "month",
+                "date_from": "2024-06-01",
+                "date_to": "2024-07-31",
+                "include_traffic": True,
+            },
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [(b["period_start"], b["gap_count"], b["ais_vessels"]) for b in data] == [
+            ("2024-06", 1, 2),
+            ("2024-07", 0, 1),
+        ]
+
 
 # ===========================================================================
 # TestExistingEndpointDateFilters
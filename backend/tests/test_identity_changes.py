@@ -0,0 +1,197 @@
+"""Tests for batched VesselHistory recording (app.modules.identity_changes)."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2026, 1, 15, 12, 0, 0)
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _vessel(db, mmsi: str = "211234567"):
+    from app.models.vessel import Vessel
+
+    v = Vessel(mmsi=mmsi, name="ALPHA", flag="PA")
+    db.add(v)
+    db.commit()
+    return v
+
+
+def _history(db):
+    from app.models.vessel_history import VesselHistory
+
+    return sorted(
+        (h.vessel_id, h.field_changed, h.old_value, h.new_value, h.observed_at)
+        for h in db.query(VesselHistory).all()
+    )
+
+
+class TestIdentityChangeBatch:
+    def test_dedups_within_batch(self, db):
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        v = _vessel(db)
+        batch = IdentityChangeBatch()
+        batch.add(v, "flag", "PA", "LR", T0, "csv")
+        batch.add(v, "flag", "PA", "LR", T0 + timedelta(hours=6), "csv")
+        batch.add(v, "flag", "PA", "LR", T0 + timedelta(hours=30), "csv")
+        batch.add(v, "flag", "LR", "PA", T0 + timedelta(hours=1), "csv")
+
+        assert batch.flush(db) == 3
+        assert len(batch) == 0
+        assert [h[4] for h in _history(db) if h[2] == "PA"] == [T0, T0 + timedelta(hours=30)]
+
+    def test_dedups_against_stored_history(self, db):
+        from app.models.vessel_history import VesselHistory
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        v = _vessel(db)
+        db.add(
+            VesselHistory(
+                vessel_id=v.vessel_id,
+                field_changed="name",
+                old_value="ALPHA",
+                new_value="BETA",
+                observed_at=T0 - timedelta(hours=20),
+                source="csv",
+            )
+        )
+        db.commit()
+
+        batch = IdentityChangeBatch()
+        batch.add(v, "name", "ALPHA", "BETA", T0, "csv")
+        batch.add(v, "name", "ALPHA", "BETA", T0 + timedelta(hours=48), "csv")
+        assert batch.flush(db) == 1
+        assert len(_history(db)) == 2
+
+    def test_one_history_query_per_batch(self, db):
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        vessels = [_vessel(db, f"21100000{i}") for i in range(5)]
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "vessel_history" in statement:
+                statements.append(statement)
+
+        event.listen(db.get_bind(), "before_cursor_execute", _count)
+        batch = IdentityChangeBatch()
+        for v in vessels:
+            for field in ("name", "flag", "callsign"):
+                batch.add(v, field, "A", "B", T0, "csv")
+        batch.flush(db)
+        event.remove(db.get_bind(), "before_cursor_execute", _count)
+
+        assert len(statements) == 1
+        assert len(_history(db)) == 15
+
+    def test_aware_timestamps_stored_naive_utc(self, db):
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        v = _vessel(db)
+        batch = IdentityChangeBatch()
+        batch.add(v, "imo", "9000001", "9000002", T0.replace(tzinfo=UTC), "dma")
+        batch.flush(db)
+        # A second naive change at the same instant is a duplicate
+        batch.add(v, "imo", "9000001", "9000002", T0, "dma")
+        assert batch.flush(db) == 0
+        assert _history(db)[0][4] == T0
+
+    def test_rapid_change_warning_uses_point_time_at_queue(self, db, caplog):
+        from app.models.ais_point import AISPoint
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        v = _vessel(db)
+        db.add(
+            AISPoint(
+                vessel_id=v.vessel_id, timestamp_utc=T0 - timedelta(hours=48), lat=55.0, lon=12.0
+            )
+        )
+        db.commit()
+
+        batch = IdentityChangeBatch()
+        batch.add(v, "name", "ALPHA", "BETA", T0, "csv", db=db)
+        # The batch's own point is written before the flush
+        db.add(AISPoint(vessel_id=v.vessel_id, timestamp_utc=T0, lat=55.0, lon=12.1))
+        db.flush()
+        with caplog.at_level("WARNING", logger="app.modules.identity_changes"):
+            assert batch.flush(db) == 1
+        assert "changed within" not in caplog.text
+
+    def test_rapid_change_warning_only_for_inserted_rows(self, db, caplog):
+        from app.models.ais_point import AISPoint
+        from app.models.vessel_history import VesselHistory
+        from app.modules.identity_changes import IdentityChangeBatch
+
+        v = _vessel(db)
+        db.add(
+            AISPoint(
+                vessel_id=v.vessel_id, timestamp_utc=T0 - timedelta(hours=1), lat=55.0, lon=12.0
+            )
+        )
+        db.add(
+            VesselHistory(
+                vessel_id=v.vessel_id,
+                field_changed="flag",
+                old_value="PA",
+                new_value="LR",
+                observed_at=T0,
+                source="csv",
+            )
+        )
+        db.commit()
+
+        batch = IdentityChangeBatch()
+        batch.add(v, "flag", "PA", "LR", T0, "csv", db=db)
+        batch.add(v, "name", "ALPHA", "BETA", T0, "csv", db=db)
+        with caplog.at_level("WARNING", logger="app.modules.identity_changes"):
+            assert batch.flush(db) == 1
+        assert "name changed within 1.0h" in caplog.text
+        assert "flag changed" not in caplog.text
+
+
+_CSV = """mmsi,timestamp,lat,lon,vessel_name,flag,callsign
+211234567,2026-01-15T12:00:00Z,55.0,12.0,ALPHA,PA,ABC1
+211234567,2026-01-15T12:10:00Z,55.0,12.1,BETA,PA,ABC1
+211234567,2026-01-15T12:20:00Z,55.0,12.2,ALPHA,PA,ABC1
+211234567,2026-01-15T12:30:00Z,55.0,12.3,BETA,LR,XYZ9
+211234567,2026-01-15T12:40:00Z,55.0,12.4,ALPHA,LR,XYZ9
+"""
+
+
+class TestRowPathHistory:
+    def test_row_ingest_records_each_change_once(self, db):
+        from app.modules.ingest import ingest_ais_csv
+
+        _vessel(db)
+        ingest_ais_csv(_CSV.encode(), db, bulk=False)
+        changes = [(field, old, new) for _, field, old, new, _ in _history(db)]
+        assert sorted(changes) == [
+            ("callsign", "ABC1", "XYZ9"),
+            ("flag", "PA", "LR"),
+            ("name", "ALPHA", "BETA"),
+            ("name", "BETA", "ALPHA"),
+        ]
+
+        # Re-import: only the first row's revert of flag/callsign is new
+        ingest_ais_csv(_CSV.encode(), db, bulk=False)
+        added = {(field, old, new) for _, field, old, new, _ in _history(db)} - set(changes)
+        assert added == {("callsign", "XYZ9", "ABC1"), ("flag", "LR", "PA")}
+        assert len(_history(db)) == 6
@@ -0,0 +1,262 @@
+"""Tests for the single-writer ingest service (app.modules.ingest_writer)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+T0 = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def engine():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture()
+def writer(session_factory):
+    from app.modules.ingest_writer import IngestWriter
+
+    w = IngestWriter(session_factory, queue_batches=8, max_points=1_000, linger_seconds=0.5)
+    w.start()
+    yield w
+    w.stop()
+
+
+def _pt(mmsi: str, minutes: float, source: str, **extra) -> dict:
+    return {
+        "mmsi": mmsi,
+        "timestamp_utc": T0 + timedelta(minutes=minutes),
+        "lat": 60.0,
+        "lon": 25.0,
+        "sog": 10.0,
+        "source": source,
+        **extra,
+    }
+
+
+def _points(session_factory):
+    from app.models.ais_point import AISPoint
+
+    db = session_factory()
+    try:
+        return sorted((p.timestamp_utc, p.source) for p in db.query(AISPoint))
+    finally:
+        db.close()
+
+
+class TestWritePointBatch:
+    def test_cross_source_dedup_first_submitted_wins(self, session_factory):
+        from app.models.vessel import Vessel
+        from app.modules.ingest_writer import write_point_batch
+
+        db = session_factory()
+        vessel_ids: dict[str, int] = {}
+        result = write_point_batch(
+            db,
+            [
+                _pt("230000001", 0, "digitraffic"),
+                _pt("230000001", 0, "kystverket"),
+                _pt("230000001", 1, "kystverket"),
+            ],
+            vessel_ids,
+        )
+        db.commit()
+
+        assert result["points_stored"] == 2
+        assert result["stored_by_source"] == {"digitraffic": 1, "kystverket": 1}
+        assert db.query(Vessel).one().ais_source == "digitraffic"
+        assert db.query(Vessel).one().last_ais_received_utc == T0 + timedelta(minutes=1)
+
+        # Re-sending the same positions stores nothing
+        again = write_point_batch(db, [_pt("230000001", 0, "barentswatch")], vessel_ids)
+        assert again["points_stored"] == 0
+        db.close()
+
+    def test_fill_static_never_overwrites(self, session_factory):
+        from app.models.vessel import Vessel
+        from app.modules.ingest_writer import fill_vessel_static
+
+        db = session_factory()
+        db.add(Vessel(mmsi="257000001", name="KNOWN"))
+        db.commit()
+        changed = fill_vessel_static(
+            db, {"257000001": {"vessel_name": "OTHER", "imo": "9000001", "callsign": None}}
+        )
+        vessel = db.query(Vessel).one()
+        assert changed == 1
+        assert (vessel.name, vessel.imo, vessel.callsign) == ("KNOWN", "9000001", None)
+        db.close()
+
+
+class TestIngestWriter:
+    def test_coalesces_submissions_into_one_transaction(self, engine, session_factory, writer):
+        commits: list[int] = []
+
+        def _count(conn):
+            commits.append(1)
+
+        event.listen(engine, "commit", _count)
+
+        futures = [
+            writer.submit([_pt("230000001", 0, "digitraffic")]),
+            writer.submit([_pt("257000002", 0, "kystverket")]),
+            writer.submit([_pt("230000001", 0, "barentswatch"), _pt("230000001", 5, "x")]),
+        ]
+        assert all(f.result(timeout=5) for f in futures)
+        event.remove(engine, "commit", _count)
+
+        assert writer.stats["transactions"] == 1
+        assert len(commits) == 1
+        assert writer.stats["points_submitted"] == 4
+        assert sum(writer.stats["points_stored"].values()) == 3
+        assert _points(session_factory) == [
+            (T0, "digitraffic"),
+            (T0, "kystverket"),
+            (T0 + timedelta(minutes=5), "x"),
+        ]
+
+    def test_stop_drains_queue(self, session_factory):
+        from app.modules.ingest_writer import IngestWriter, get_ingest_writer
+
+        w = IngestWriter(session_factory, linger_seconds=0)
+        w.start()
+        assert get_ingest_writer() is w
+        for m in range(5):
+            w.submit([_pt("230000001", m, "digitraffic")])
+        w.stop()
+
+        assert get_ingest_writer() is None
+        assert len(_points(session_factory)) == 5
+        with pytest.raises(RuntimeError):
+            w.submit([_pt("230000001", 9, "digitraffic")])
+
+    def test_failed_transaction_reports_and_recovers(self, session_factory, writer):
+        bad = writer.submit([_pt("230000001", 0, "digitraffic", lat="not-a-number")])
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+        assert writer.stats["errors"] == 1
+
+        ok = writer.submit([_pt("230000001", 1, "digitraffic")])
+        assert ok.result(timeout=5) is True
+        assert _points(session_factory) == [(T0 + timedelta(minutes=1), "digitraffic")]
+
+    def test_bad_submission_does_not_fail_the_batch(self, session_factory, writer):
+        futures = [
+            writer.submit([_pt("230000001", 0, "digitraffic")]),
+            writer.submit([_pt("257000002", 0, "kystverket", lat=None)]),
+            writer.submit([_pt("257000002", 5, "kystverket")]),
+        ]
+        assert futures[0].result(timeout=5) is True
+        with pytest.raises(TypeError):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) is True
+
+        assert writer.stats["errors"] == 1
+        assert _points(session_factory) == [
+            (T0, "digitraffic"),
+            (T0 + timedelta(minutes=5), "kystverket"),
+        ]
+
+
+class TestCollectorsSubmit:
+    def test_kystverket_batch_goes_to_writer(self, session_factory, writer):
+        from app.models.vessel import Vessel
+        from app.modules.kystverket_client import _flush_batch
+
+        batch = [
+            _pt("257000003", 0, "kystverket", static_data={"imo": "9000003", "callsign": "LA1"})
+        ]
+        assert _flush_batch(session_factory(), batch) == (1, 0)
+        writer.stop()
+
+        db = session_factory()
+        vessel = db.query(Vessel).one()
+        assert (vessel.imo, vessel.callsign) == ("9000003", "LA1")
+        db.close()
+
+    def test_digitraffic_downsamples_before_submit(self, session_factory, writer):
+        from app.modules.digitraffic_client import _submit_digitraffic
+
+        def feature(minutes: int) -> dict:
+            ts = int((T0 + timedelta(minutes=minutes) - datetime(1970, 1, 1)).total_seconds())
+            return {
+                "properties": {"mmsi": 230000004, "sog": 100, "cog": 900, "timestamp": ts * 1000},
+                "geometry": {"coordinates": [25.0, 60.0]},
+            }
+
+        db = session_factory()
+        first = _submit_digitraffic(db, writer, [feature(0)], None)
+        writer.submit([]).result(timeout=5)  # wait for the write
+        second = _submit_digitraffic(db, writer, [feature(10), feature(40)], None)
+        writer.stop()
+
+        assert first["points_ingested"] == 1
+        assert (second["points_ingested"], second["downsampled"]) == (1, 1)
+        assert [ts for ts, _ in _points(session_factory)] == [T0, T0 + timedelta(minutes=40)]
+
+    def test_digitraffic_downsampled_points_refresh_last_received(self, session_factory, writer):
+        from app.models.vessel import Vessel
+        from app.modules.digitraffic_client import _submit_digitraffic
+
+        def feature(minutes: int) -> dict:
+            ts = int((T0 + timedelta(minutes=minutes) - datetime(1970, 1, 1)).total_seconds())
+            return {
+                "properties": {"mmsi": 230000005, "sog": 100, "cog": 900, "timestamp": ts * 1000},
+                "geometry": {"coordinates": [25.0, 60.0]},
+            }
+
+        db = session_factory()
+        _submit_digitraffic(db, writer, [feature(0)], None)
+        writer.submit([]).result(timeout=5)
+        result = _submit_digitraffic(db, writer, [feature(10), feature(5)], None)
+        writer.stop()
+
+        assert (result["points_ingested"], result["downsampled"]) == (0, 2)
+        assert _points(session_factory) == [(T0, "digitraffic")]
+        vessel = session_factory().query(Vessel).one()
+        assert vessel.last_ais_received_utc == T0 + timedelta(minutes=10)
+
+    def test_scheduler_runs_writer_for_collectors(self, session_factory):
+        from app.modules.collection_scheduler import CollectionScheduler
+        from app.modules.ingest_writer import get_ingest_writer
+
+        seen_writers = []
+
+        def collector(db, interval):
+            writer = get_ingest_writer()
+            seen_writers.append(writer)
+            writer.submit([_pt("230000005", 0, "digitraffic")])
+            return {"points_ingested": 1, "vessels_seen": 1, "errors": 0}
+
+        source = MagicMock(interval_seconds=1, collector=collector)
+        with patch(
+            "app.modules.collection_sources.get_available_sources",
+            return_value={"digitraffic": source},
+        ):
+            CollectionScheduler(db_factory=session_factory).start(duration_seconds=1)
+
+        assert seen_writers and seen_writers[0] is not None
+        assert get_ingest_writer() is None
+        assert len(_points(session_factory)) == 1
@@ -146,3 +146,98 @@ class TestNormalization:
 
         assert normalize_noaa_row({"MMSI": "636017000"}) is None  # No lat/lon
         assert normalize_noaa_row({}) is None
+
+
+_NOAA_CSV = (
+    "MMSI,BaseDateTime,LAT,LON,SOG,COG,Heading,VesselName,IMO,CallSign,VesselType\n"
+    "636017000,2025-01-15T12:00:00,60.0,25.0,10.0,180.0,180,IN AREA,IMO9876543,A8AB1,80\n"
+    "636017000,2025-01-15T12:00:05,60.0,25.0,10.0,180.0,180,IN AREA,IMO9876543,A8AB1,80\n"
+    "636017000,2025-01-15T12:05:00,60.1,25.1,11.0,170.0,511,IN AREA,IMO9876543,A8AB1,80\n"
+    "636017001,2025-01-15T12:00:00,10.0,-80.0,10.0,180.0,180,OUT OF AREA,,,80\n"
+    "636017002,not-a-date,60.0,25.0,10.0,180.0,180,BAD TS,,,80\n"
+    "636017003,2025-01-15T12:00:00,60.0,25.0,abc,180.0,180,BAD SOG,,,80\n"
+    "636017004,2025-01-15T12:00:00,60.0,25.0,45.0,180.0,180,TOO FAST,,,80\n"
+    "992345678,2025-01-15T12:00:00,60.0,25.0,0.0,0.0,511,ATON,,,\n"
+    "636017005,2025-01-15T12:00:00,60.5,24.5,8.0,90.0,90,SECOND,IMO123,,70\n"
+)
+
+
+def _sqlite_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    import app.models  # noqa: F401 — register all tables
+    from app.models.base import Base
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)(), engine
+
+
+@pytest.fixture()
+def sqlite_db():
+    db, engine = _sqlite_session()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _write_zip(tmp_path, csv_content: str) -> Path:
+    path = tmp_path / "AIS_2025_01_15.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("AIS_2025_01_15.csv", csv_content)
+    return path
+
+
+class TestLazyImport:
+    BBOX = (55.0, 20.0, 65.0, 30.0)
+
+    def test_stats_match_row_path(self, tmp_path, sqlite_db):
+        """Column-expression filters and bulk insert reproduce the row path's stats."""
+        from app.modules.noaa_client import import_noaa_file
+
+        path = _write_zip(tmp_path, _NOAA_CSV)
+        with patch("app.modules.noaa_client._build_corridor_bbox", return_value=self.BBOX):
+            lazy = import_noaa_file(path, sqlite_db, bulk=True)
+
+        row_db, engine = _sqlite_session()
+        try:
+            with patch("app.modules.noaa_client._build_corridor_bbox", return_value=self.BBOX):
+                row = import_noaa_file(path, row_db, bulk=False)
+        finally:
+            row_db.close()
+            engine.dispose()
+
+        assert lazy == row
+        assert lazy == {
+            "total_rows": 9,
+            "accepted": 3,
+            "rejected": 4,
+            "filtered_geo": 1,
+            "duplicates": 1,
+        }
+
+    def test_points_and_vessels_written(self, tmp_path, sqlite_db):
+        from app.models.ais_point import AISPoint
+        from app.models.vessel import Vessel
+        from app.modules.noaa_client import import_noaa_file
+
+        path = _write_zip(tmp_path, _NOAA_CSV)
+        with patch("app.modules.noaa_client._build_corridor_bbox", return_value=self.BBOX):
+            import_noaa_file(path, sqlite_db, bulk=True)
+
+        vessels = {v.mmsi: v for v in sqlite_db.query(Vessel).all()}
+        assert set(vessels) == {"636017000", "636017005"}
+        assert vessels["636017000"].imo == "9876543"
+        assert vessels["636017005"].imo is None
+        assert sqlite_db.query(AISPoint).count() == 3
+
+    def test_missing_required_column_rejects_all(self, tmp_path, sqlite_db):
+        from app.modules.noaa_client import import_noaa_file
+
+        path = tmp_path / "plain.csv"
+        path.write_text("MMSI,LAT,LON\n636017000,60.0,25.0\n636017001,60.0,25.0\n")
+        result = import_noaa_file(path, sqlite_db, corridor_filter=False, bulk=True)
+        assert result["total_rows"] == 2
+        assert result["rejected"] == 2
+        assert result["accepted"] == 0
@@ -4,6 +4,7 @@ Covers:
 - SOG/COG/Heading AIS sentinel values
 - MMSI type filtering (SAR, AtoN, coast stations, test MMSIs)
 - Non-ISO timestamp formats (Unix epoch, US/EU date formats)
+- Columnar timestamp parsing (parse_timestamp_column)
 - Scientific notation MMSI detection
 - MarineTraffic/VesselFinder uppercase column aliases
 - Shared helper: is_non_vessel_mmsi
@@ -387,6 +388,125 @@ class TestTimestampFormats:
         result = parse_timestamp_flexible(dt)
         assert result is dt
 
+    def test_parse_timestamp_flexible_epoch_milliseconds(self):
+        """Epoch values above 1e11 are read as milliseconds."""
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_flexible
+
+        result = parse_timestamp_flexible(1717243800500)
+        assert result == datetime(2024, 6, 1, 12, 10, 0, 500000, tzinfo=UTC)
+
+
+class TestParseTimestampColumn:
+    def test_iso_variants_to_naive_utc(self):
+        """Z, offsets, fractional seconds and space separators all parse."""
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_column
+
+        s = pl.Series(
+            "ts",
+            [
+                "2025-06-01T12:30:00Z",
+                "2025-06-01T14:30:00.25+02:00",
+                " 2025-06-01 12:30:00 ",
+            ],
+        )
+        result = parse_timestamp_column(s)
+        assert result.dtype == pl.Datetime("us")
+        assert result.to_list() == [
+            datetime(2025, 6, 1, 12, 30),
+            datetime(2025, 6, 1, 12, 30, 0, 250000),
+            datetime(2025, 6, 1, 12, 30),
+        ]
+
+    def test_epoch_seconds_and_milliseconds(self):
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_column
+
+        s = pl.Series("ts", [1717243800, 1717243800500, 12])
+        assert parse_timestamp_column(s).to_list() == [
+            datetime(2024, 6, 1, 12, 10),
+            datetime(2024, 6, 1, 12, 10, 0, 500000),
+            None,
+        ]
+
+    def test_day_first_detected_from_sample(self):
+        """A sample containing day > 12 selects the DD/MM format for the column."""
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_column
+
+        s = pl.Series("ts", ["13/06/2025 08:00:00", "01/06/2025 08:00:00"])
+        assert parse_timestamp_column(s).to_list() == [
+            datetime(2025, 6, 13, 8, 0),
+            datetime(2025, 6, 1, 8, 0),
+        ]
+
+    def test_ambiguous_dates_follow_dayfirst(self):
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_column
+
+        s = pl.Series("ts", ["01/06/2025 08:00:00"])
+        assert parse_timestamp_column(s).to_list() == [datetime(2025, 1, 6, 8, 0)]
+        assert parse_timestamp_column(s, dayfirst=True).to_list() == [datetime(2025, 6, 1, 8, 0)]
+
+    def test_mixed_formats_fall_back_per_value(self):
+        """Values the detected format misses are parsed one at a time."""
+        from datetime import datetime
+
+        from app.modules.normalize import parse_timestamp_column
+
+        s = pl.Series(
+            "ts",
+            [
+                "2025-06-01T12:30:00Z",
+                "2025-06-01T12:31:00Z",
+                "2024-12-29 18:22:32.318353147 +0000 UTC",
+                "06/01/2025 12:30",
+                "not-a-date",
+                "",
+                None,
+            ],
+        )
+        assert parse_timestamp_column(s).to_list() == [
+            datetime(2025, 6, 1, 12, 30),
+            datetime(2025, 6, 1, 12, 31),
+            datetime(2024, 12, 29, 18, 22, 32, 318353),
+            datetime(2025, 6, 1, 12, 30),
+            None,
+            None,
+            None,
+        ]
+
+    def test_agrees_with_scalar_parser(self):
+        from app.modules.normalize import parse_timestamp_column, parse_timestamp_flexible
+
+        values = [
+            "2025-06-01T12:30:00Z",
+            "2025-06-01T12:30:00+03:00",
+            "2025/06/01 12:30:00",
+            "01-06-2025 12:30:00",
+            "2024-12-29 18:22:32 +0000 UTC",
+        ]
+        for value in values:
+            expected = parse_timestamp_flexible(value).astimezone(UTC).replace(tzinfo=None)
+            assert parse_timestamp_column(pl.Series([value])).to_list() == [expected], value
+
+    def test_normalize_dataframe_parses_and_keeps_raw(self):
+        """normalize_ais_dataframe parses timestamp_utc and keeps the raw column."""
+        from datetime import datetime
+
+        from app.modules.normalize import normalize_ais_dataframe
+
+        df = pl.DataFrame({"time": ["2025-06-01T00:00:00Z", "bad"], "lat": [55.0, 55.0]})
+        result = normalize_ais_dataframe(df)
+        assert result["timestamp_utc"].to_list() == [datetime(2025, 6, 1), None]
+        assert result["timestamp"].to_list() == ["2025-06-01T00:00:00Z", "bad"]
+
 
 # =====================================================================
 # 4.5: Scientific notation MMSI detection
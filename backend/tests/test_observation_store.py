@@ -0,0 +1,206 @@
+"""Tests for the append-only Parquet observation store (app.modules.observation_store)."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2026, 2, 1, 23, 50, 0)
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture()
+def store(tmp_path):
+    from app.modules.observation_store import ObservationStore
+
+    return ObservationStore(tmp_path / "obs", flush_rows=1_000, flush_seconds=3600)
+
+
+@pytest.fixture()
+def enabled_store(store):
+    """Route the module-level entry points to a temporary store."""
+    with (
+        patch("app.config.settings.AIS_OBSERVATION_STORE_ENABLED", True),
+        patch("app.modules.observation_store._store", store),
+    ):
+        yield store
+
+
+def _obs(mmsi: str, source: str, minutes: float, lat: float = 55.0, **extra) -> dict:
+    return {
+        "mmsi": mmsi,
+        "source": source,
+        "timestamp_utc": T0 + timedelta(minutes=minutes),
+        "lat": lat,
+        "lon": 25.0,
+        **extra,
+    }
+
+
+class TestObservationStore:
+    def test_flush_writes_one_segment_per_day(self, store):
+        store.append([_obs("211000001", "aisstream", m) for m in (0, 5, 15, 20)])
+        assert store.flush() == 4
+
+        segments = store.segments()
+        days = sorted(seg["day"] for seg in segments)
+        assert days == ["2026-02-01", "2026-02-02"]
+        assert sum(seg["rows"] for seg in segments) == 4
+        for seg in segments:
+            path = store.root / seg["path"]
+            assert path.exists()
+            assert json.loads(path.with_suffix(".json").read_text()) == seg
+        assert store.flush() == 0
+
+    def test_append_flushes_at_row_threshold(self, store):
+        store.flush_rows = 3
+        store.append([_obs("211000001", "aisstream", m) for m in (0, 1)])
+        assert store.segments() == []
+        store.append([_obs("211000001", "aisstream", 2)])
+        assert len(store.segments()) == 1
+
+    def test_scan_applies_time_and_mmsi_predicates(self, store):
+        store.append([_obs("211000001", "a", m) for m in range(0, 30, 5)])
+        store.append([_obs("273000002", "b", m) for m in range(0, 30, 5)])
+        store.flush()
+        # Unflushed rows are visible too
+        store.append([_obs("211000001", "c", 12)])
+
+        frame = store.scan(T0 + timedelta(minutes=10), T0 + timedelta(minutes=15), ["211000001"])
+        assert frame["source"].to_list() == ["a", "c", "a"]
+        assert frame["mmsi"].unique().to_list() == ["211000001"]
+
+    def test_segment_stats_prune_segments(self, store):
+        store.append([_obs("211000001", "a", 0)])
+        store.flush()
+        store.append([_obs("211000001", "a", 60 * 24 * 3)])
+        store.flush()
+
+        with patch("polars.scan_parquet") as scan:
+            store.scan(T0 - timedelta(days=2), T0 - timedelta(days=1))
+        scan.assert_not_called()
+
+        with patch("polars.scan_parquet", wraps=__import__("polars").scan_parquet) as scan:
+            assert store.scan(T0 + timedelta(days=2)).height == 1
+        assert len(scan.call_args.args[0]) == 1
+
+    def test_purge_drops_whole_segments(self, store):
+        old = datetime(2026, 1, 1)
+        store.append([_obs("211000001", "a", 0, received_utc=old)])
+        store.flush()
+        store.append([_obs("211000001", "a", 1, received_utc=datetime(2026, 2, 2))])
+        store.flush()
+
+        assert store.purge_older_than(datetime(2026, 1, 15)) == 1
+        assert store.scan().height == 1
+        assert len(list(store.root.rglob("*.parquet"))) == 1
+        assert len(list(store.root.rglob("*.json"))) == 1
+
+    def test_concurrent_writers_keep_each_others_segments(self, store):
+        from app.modules.observation_store import ObservationStore
+
+        # Two processes' stores over the same directory, flushing interleaved
+        other = ObservationStore(store.root, flush_rows=1_000, flush_seconds=3600)
+        store.append([_obs("211000001", "a", 0)])
+        other.append([_obs("273000002", "b", 0)])
+        other.flush()
+        store.flush()
+
+        assert sorted(store.scan()["source"].to_list()) == ["a", "b"]
+        assert other.scan().height == 2
+
+    def test_rejects_rows_without_timestamp(self, store):
+        with pytest.raises(ValueError):
+            store.append([{"mmsi": "211000001", "source": "a", "timestamp_utc": None}])
+
+
+class TestEntryPoints:
+    def test_disabled_writes_to_session(self):
+        from app.modules.observation_store import add_observation
+
+        db = MagicMock()
+        with patch("app.config.settings.AIS_OBSERVATION_STORE_ENABLED", False):
+            add_observation(db, **_obs("211000001", "aisstream", 0))
+        assert db.add.call_count == 1
+
+    def test_enabled_bypasses_database(self, db, enabled_store):
+        from app.models.ais_observation import AISObservation
+        from app.modules.observation_store import add_observation, add_observations
+
+        add_observation(db, **_obs("211000001", "aisstream", 0))
+        add_observations(db, [_obs("211000001", "aishub", 1)])
+        assert db.query(AISObservation).count() == 0
+        assert enabled_store.scan().height == 0  # held until commit
+        db.commit()
+        assert enabled_store.scan().height == 2
+
+    def test_rollback_discards_pending_observations(self, db, enabled_store):
+        from app.modules.observation_store import add_observations
+
+        add_observations(db, [_obs("211000001", "aishub", 1)])
+        db.rollback()
+        db.commit()
+        assert enabled_store.scan().height == 0
+
+        add_observations(db, [_obs("211000001", "aishub", 2)])
+        db.commit()
+        assert enabled_store.scan()["source"].to_list() == ["aishub"]
+
+    def test_load_merges_table_and_store(self, db, enabled_store):
+        from app.models.ais_observation import AISObservation
+        from app.modules.observation_store import load_observations
+
+        db.add(AISObservation(**_obs("211000001", "legacy", 2)))
+        db.commit()
+        enabled_store.append([_obs("211000001", "aisstream", m) for m in (1, 3)])
+
+        observations = load_observations(db)
+        assert [o.source for o in observations] == ["aisstream", "legacy", "aisstream"]
+
+    def test_cross_receiver_reads_store(self, db, enabled_store):
+        from app.models.vessel import Vessel
+        from app.modules.cross_receiver_detector import detect_cross_receiver_anomalies
+
+        db.add(Vessel(mmsi="123456789", name="TEST"))
+        db.commit()
+        enabled_store.append(
+            [
+                _obs("123456789", "aisstream", 0, lat=55.0),
+                _obs("123456789", "aishub", 5, lat=56.0),
+            ]
+        )
+        enabled_store.flush()
+
+        result = detect_cross_receiver_anomalies(db)
+        assert result["anomalies_created"] == 1
+
+    def test_bulk_ingest_writes_to_store(self, db, enabled_store):
+        from app.models.ais_observation import AISObservation
+        from app.modules.ingest import ingest_ais_csv
+
+        csv = (
+            "mmsi,timestamp,lat,lon,sog,cog,source\n"
+            "211234567,2025-06-01T00:00:00Z,55.0,12.0,12.0,95.0,csv_import\n"
+            "211234567,2025-06-01T00:05:00Z,55.1,12.1,12.0,95.0,csv_import\n"
+        )
+        ingest_ais_csv(csv.encode(), db, bulk=True)
+        assert db.query(AISObservation).count() == 0
+        assert enabled_store.scan(mmsis=["211234567"]).height == 2
@@ -121,6 +121,42 @@ class TestEEZBoundaryDistance:
         d = _point_to_segment_distance_nm(0, 1, 0, 0, 0, 2)  # lon, lat, ax, ay, bx, by
         assert d < 60  # 1 degree lat ≈ 60 NM
 
+    def test_batch_matches_full_segment_scan(self):
+        from app.utils.eez_boundaries import (
+            EEZ_BOUNDARY_LINES,
+            _point_to_segment_distance_nm,
+            distances_to_nearest_eez_boundary_nm,
+        )
+
+        lats = [float(lat) for lat in range(-60, 81, 7) for _ in range(-170, 181, 13)]
+        lons = [float(lon) for _ in range(-60, 81, 7) for lon in range(-170, 181, 13)]
+        batch = distances_to_nearest_eez_boundary_nm(lats, lons)
+        for lat, lon, (dist, name) in zip(lats, lons, batch, strict=True):
+            expected = min(
+                _point_to_segment_distance_nm(lon, lat, a[1], a[0], b[1], b[0])
+                for _, pts in EEZ_BOUNDARY_LINES
+                for a, b in zip(pts, pts[1:], strict=False)
+            )
+            assert abs(dist - expected) < 1e-9
+            assert name != "unknown"
+
+    def test_scorer_batch_lookup_matches_single_point(self):
+        from types import SimpleNamespace
+
+        from app.modules.risk_scoring import _eez_boundary_distances
+        from app.utils.eez_boundaries import distance_to_nearest_eez_boundary_nm
+
+        gaps = [
+            SimpleNamespace(gap_event_id=1, gap_off_lat=59.5, gap_off_lon=27.0),
+            SimpleNamespace(gap_event_id=2, gap_off_lat=None, gap_on_lat=26.0, gap_on_lon=57.5),
+            SimpleNamespace(gap_event_id=3, gap_off_lat=None, gap_on_lat=None),
+        ]
+        distances = _eez_boundary_distances(gaps)
+        assert distances == {
+            1: distance_to_nearest_eez_boundary_nm(59.5, 27.0),
+            2: distance_to_nearest_eez_boundary_nm(26.0, 57.5),
+        }
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Phase 3a: Class-Median DWT Fallback
@@ -0,0 +1,149 @@
+"""Tests for the PostgreSQL COPY fast path (app.modules.pg_copy).
+
+No Postgres server is needed: a session double with a psycopg2 dialect
+records the SQL and the COPY payload sent to the DBAPI cursor.
+"""
+
+from __future__ import annotations
+
+import csv
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql.psycopg2 import PGDialect_psycopg2
+from sqlalchemy.orm import sessionmaker
+
+T0 = datetime(2026, 3, 1, 12, 0, 0)
+
+
+class _RecordingCursor:
+    def __init__(self, log: list):
+        self._log = log
+        self.rowcount = 0
+
+    def execute(self, sql):
+        self._log.append(("sql", sql))
+        self.rowcount = 2
+
+    def copy_expert(self, sql, buf):
+        self._log.append(("copy", sql, buf.read()))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def pg_session():
+    """Session double on a psycopg2 dialect; ``.log`` collects cursor traffic."""
+    db = MagicMock()
+    db.get_bind.return_value.dialect = PGDialect_psycopg2()
+    db.log = []
+    db.connection.return_value.connection.driver_connection.cursor.side_effect = lambda: (
+        _RecordingCursor(db.log)
+    )
+    with patch("app.config.settings.INGEST_PG_COPY_MIN_ROWS", 1):
+        yield db
+
+
+def _point(minutes: int, **extra) -> dict:
+    return {
+        "vessel_id": 7,
+        "timestamp_utc": T0.replace(minute=minutes),
+        "lat": 55.0,
+        "lon": 12.0,
+        "sog": None,
+        "source": "csv_import",
+        **extra,
+    }
+
+
+def _copied_rows(entry) -> list[list[str]]:
+    return list(csv.reader(entry[2].splitlines()))
+
+
+class TestInsert:
+    def test_points_staged_and_inserted_on_conflict(self, pg_session):
+        from app.modules.pg_copy import insert_ais_points
+
+        insert_ais_points(pg_session, [_point(0), _point(1, ais_class="unknown")])
+
+        create, copy, insert = pg_session.log
+        assert "CREATE TEMP TABLE _stage_ais_points_" in create[1]
+        assert "ON COMMIT DROP" in create[1]
+        assert copy[1].startswith("COPY _stage_ais_points_")
+        assert insert[1].startswith("INSERT INTO ais_points (")
+        assert insert[1].endswith("ON CONFLICT (vessel_id, timestamp_utc, source) DO NOTHING")
+        pg_session.execute.assert_not_called()
+
+        columns = copy[1].split("(", 1)[1].split(")", 1)[0].split(", ")
+        rows = [dict(zip(columns, r, strict=True)) for r in _copied_rows(copy)]
+        # ORM default filled in, enum stored by name as SQLAlchemy would bind it
+        assert [r["ais_class"] for r in rows] == ["A", "UNKNOWN"]
+        assert rows[0]["timestamp_utc"] == "2026-03-01T12:00:00"
+        assert rows[0]["sog"] == ""
+
+    def test_small_batches_and_sqlite_use_executemany(self, pg_session):
+        from app.modules.pg_copy import copy_available, insert_ais_points
+
+        with patch("app.config.settings.INGEST_PG_COPY_MIN_ROWS", 10):
+            insert_ais_points(pg_session, [_point(0)])
+        assert pg_session.log == []
+        pg_session.execute.assert_called_once()
+
+        engine = create_engine("sqlite:///:memory:")
+        db = sessionmaker(bind=engine)()
+        assert not copy_available(db, 1_000_000)
+        db.close()
+
+    def test_observations_copied_without_conflict_clause(self, pg_session):
+        from app.modules.pg_copy import insert_ais_observations
+
+        insert_ais_observations(
+            pg_session,
+            [
+                {
+                    "mmsi": "211000001",
+                    "source": "a",
+                    "timestamp_utc": T0,
+                    "lat": 1.0,
+                    "lon": 2.0,
+                    "received_utc": datetime(2026, 3, 1, 13, 0, tzinfo=UTC),
+                }
+            ],
+        )
+        insert = pg_session.log[-1][1]
+        assert insert.startswith("INSERT INTO ais_observations")
+        assert "ON CONFLICT" not in insert
+        assert "2026-03-01T13:00:00" in pg_session.log[1][2]
+
+
+class TestUpdate:
+    def test_partial_columns_keep_stored_values(self, pg_session):
+        from app.modules.pg_copy import update_ais_points
+
+        update_ais_points(
+            pg_session,
+            [
+                {"ais_point_id": 1, "lat": 1.0, "source": "satellite", "draught": 9.5},
+                {"ais_point_id": 2, "lat": 2.0, "source": "satellite"},
+            ],
+        )
+        create, copy, update = pg_session.log
+        assert "TRUE AS has_draught" in create[1]
+        assert "has_lat" not in create[1]
+        assert "draught = CASE WHEN s.has_draught THEN s.draught ELSE t.draught END" in update[1]
+        assert "lat = s.lat" in update[1]
+        assert update[1].endswith("WHERE t.ais_point_id = s.ais_point_id")
+        assert [r[-1] for r in _copied_rows(copy)] == ["true", "false"]
+
+
+def test_csv_field_quoting():
+    from app.modules.pg_copy import _csv_field
+
+    assert _csv_field(None) == ""
+    assert _csv_field("") == '""'
+    assert _csv_field('say "hi"') == '"say ""hi"""'
+    assert _csv_field(1.5) == "1.5"
+    assert _csv_field(True) == "true"
@@ -0,0 +1,291 @@
+"""Tests for PostgreSQL time-range partitioning (app.modules.pg_partitions).
+
+No Postgres server is needed: a scripted connection double answers the
+catalog queries and records every statement issued.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+
+class _Result:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar(self):
+        return self._value
+
+    def scalars(self):
+        return iter(self._value)
+
+    def all(self):
+        return self._value
+
+    def one(self):
+        return self._value
+
+
+class _Conn:
+    """Connection double: ``answers`` maps a SQL substring to a value or callable."""
+
+    def __init__(self, answers: dict):
+        self.answers = answers
+        self.log: list[str] = []
+
+    def execute(self, clause, params=None):
+        sql = str(clause)
+        self.log.append(sql)
+        for needle, value in self.answers.items():
+            if needle in sql:
+                return _Result(value(sql, params or {}) if callable(value) else value)
+        return _Result(None)
+
+    def statements(self, prefix: str) -> list[str]:
+        return [s for s in self.log if s.startswith(prefix)]
+
+
+def _bound(lo: str, hi: str) -> str:
+    return f"FOR VALUES FROM ('{lo} 00:00:00') TO ('{hi} 00:00:00')"
+
+
+class TestPeriods:
+    def test_month_and_day_periods(self):
+        from app.modules.pg_partitions import partition_name, period_end, period_start
+
+        dec = period_start(
+            datetime(2024, 12, 31, 23, 0, tzinfo=timezone(timedelta(hours=-2))), "month"
+        )
+        assert dec == datetime(2025, 1, 1)  # aware input normalised to UTC first
+        assert period_end(datetime(2024, 12, 1), "month") == datetime(2025, 1, 1)
+        assert period_end(datetime(2024, 2, 28), "day") == datetime(2024, 2, 29)
+        assert partition_name("ais_points", datetime(2024, 3, 1), "month") == "ais_points_2024_03"
+        assert (
+            partition_name("ais_observations", datetime(2024, 3, 5), "day")
+            == "ais_observations_2024_03_05"
+        )
+
+    def test_list_partitions_parses_bounds(self):
+        from app.modules.pg_partitions import Partition, list_partitions
+
+        conn = _Conn(
+            {
+                "pg_inherits": [
+                    ("ais_points_2024_04", _bound("2024-04-01", "2024-05-01")),
+                    ("ais_points_default", "DEFAULT"),
+                    ("ais_points_2024_03", _bound("2024-03-01", "2024-04-01")),
+                ]
+            }
+        )
+        assert list_partitions(conn, "ais_points") == [
+            Partition("ais_points_2024_03", datetime(2024, 3, 1), datetime(2024, 4, 1)),
+            Partition("ais_points_2024_04", datetime(2024, 4, 1), datetime(2024, 5, 1)),
+        ]
+
+
+class TestEnsurePartitions:
+    def test_creates_upcoming_and_stranded_periods(self):
+        from app.modules.pg_partitions import ensure_partitions
+
+        conn = _Conn(
+            {
+                "pg_inherits": [("ais_points_2026_03", _bound("2026-03-01", "2026-04-01"))],
+                "SELECT DISTINCT date_trunc": [datetime(2015, 6, 1)],
+                # Only the 2015-06 range has rows waiting in the default partition
+                "SELECT EXISTS (SELECT 1 FROM ais_points_default": lambda sql, p: (
+                    p["lo"].year == 2015
+                ),
+            }
+        )
+        with patch("app.config.settings.PG_PARTITION_MONTHS_AHEAD", 2):
+            created = ensure_partitions(conn, "ais_points", now=datetime(2026, 3, 10, tzinfo=UTC))
+
+        assert created == ["ais_points_2015_06", "ais_points_2026_04", "ais_points_2026_05"]
+        plain = conn.statements("CREATE TABLE IF NOT EXISTS")
+        assert plain == [
+            "CREATE TABLE IF NOT EXISTS ais_points_2026_04 PARTITION OF ais_points "
+            "FOR VALUES FROM ('2026-04-01 00:00:00') TO ('2026-05-01 00:00:00')",
+            "CREATE TABLE IF NOT EXISTS ais_points_2026_05 PARTITION OF ais_points "
+            "FOR VALUES FROM ('2026-05-01 00:00:00') TO ('2026-06-01 00:00:00')",
+        ]
+        # Stranded rows are moved out of the default partition, then attached
+        assert conn.statements("CREATE TABLE ais_points_2015_06 (LIKE ais_points")
+        assert conn.statements("WITH moved AS (DELETE FROM ais_points_default")
+        assert conn.statements("ALTER TABLE ais_points ATTACH PARTITION ais_points_2015_06")
+
+
+class TestRetention:
+    def test_drops_only_old_partitions_without_rows_to_keep(self):
+        from app.modules.pg_partitions import drop_partitions_before, points_keep_condition
+
+        conn = _Conn(
+            {
+                "pg_inherits": [
+                    ("ais_points_2024_01", _bound("2024-01-01", "2024-02-01")),
+                    ("ais_points_2024_02", _bound("2024-02-01", "2024-03-01")),
+                    ("ais_points_2024_03", _bound("2024-03-01", "2024-04-01")),
+                ],
+                "AS t WHERE": lambda sql, p: "ais_points_2024_02" in sql,
+                "count(*)": 1200,
+            }
+        )
+        keep_sql, params = points_keep_condition(keep_sources={"noaa", "dma"})
+        assert params == {"keep_sources": ["dma", "noaa"]}
+
+        dropped = drop_partitions_before(
+            conn, "ais_points", datetime(2024, 3, 15, tzinfo=UTC), keep_sql, params
+        )
+
+        assert dropped == 1200
+        assert conn.statements("ALTER TABLE ais_points DETACH") == [
+            "ALTER TABLE ais_points DETACH PARTITION ais_points_2024_01"
+        ]
+        assert conn.statements("DROP TABLE") == ["DROP TABLE ais_points_2024_01"]
+        # Locked before the final re-check
+        lock = conn.log.index("LOCK TABLE ais_points_2024_01 IN ACCESS EXCLUSIVE MODE")
+        assert "AS t WHERE" in conn.log[lock + 1]
+
+    def test_sqlite_is_never_partitioned(self):
+        import app.models  # noqa: F401 — register all tables
+        from app.models.ais_observation import AISObservation
+        from app.modules.pg_partitions import partitioning_active
+
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        with patch("app.config.settings.PG_PARTITIONING_ENABLED", True):
+            assert not partitioning_active(db, "ais_points")
+            db.add(
+                AISObservation(
+                    mmsi="211000001",
+                    source="a",
+                    timestamp_utc=datetime(2024, 1, 1),
+                    received_utc=datetime(2024, 1, 1),
+                    lat=1.0,
+                    lon=2.0,
+                )
+            )
+            db.commit()
+            assert AISObservation.purge_old(db, hours=1) == 1
+        db.close()
+
+
+def test_convert_rebuilds_table_as_partitioned():
+    from app.modules.pg_partitions import convert_to_partitioned
+
+    conn = _Conn(
+        {
+            "FROM pg_indexes": [
+                ("ais_points_pkey", "CREATE UNIQUE INDEX ais_points_pkey ON public.ais_points ..."),
+                ("uq_ais_point_vessel_ts_source", "CREATE UNIQUE INDEX uq ..."),
+                (
+                    "ix_ais_vessel_ts",
+                    "CREATE INDEX ix_ais_vessel_ts ON public.ais_points USING btree "
+                    "(vessel_id, timestamp_utc)",
+                ),
+            ],
+            "pg_get_serial_sequence": "public.ais_points_ais_point_id_seq",
+            "contype = 'u'": [
+                ("uq_ais_point_vessel_ts_source", "UNIQUE (vessel_id, timestamp_utc, source)")
+            ],
+            "contype = 'f' AND confrelid": [
+                ("ais_gap_events", "ais_gap_events_start_point_id_fkey")
+            ],
+            "contype = 'f' AND conrelid": [
+                (
+                    "ais_points_vessel_id_fkey",
+                    "FOREIGN KEY (vessel_id) REFERENCES vessels(vessel_id)",
+                )
+            ],
+            "SELECT min(timestamp_utc)": (datetime(2026, 1, 5), datetime(2026, 2, 20)),
+        }
+    )
+    convert_to_partitioned(conn, "ais_points", now=datetime(2026, 3, 1))
+
+    ddl = [s for s in conn.log if not s.startswith("SELECT")]
+    assert ddl[0] == "ALTER TABLE ais_gap_events DROP CONSTRAINT ais_gap_events_start_point_id_fkey"
+    assert "ALTER TABLE ais_points RENAME TO ais_points_unpartitioned" in ddl
+    assert (
+        "CREATE TABLE ais_points (LIKE ais_points_unpartitioned INCLUDING DEFAULTS "
+        "INCLUDING CONSTRAINTS) PARTITION BY RANGE (timestamp_utc)" in ddl
+    )
+    assert (
+        "ALTER TABLE ais_points ADD CONSTRAINT ais_points_pkey "
+        "PRIMARY KEY (ais_point_id, timestamp_utc)" in ddl
+    )
+    assert (
+        "ALTER TABLE ais_points ADD CONSTRAINT uq_ais_point_vessel_ts_source "
+        "UNIQUE (vessel_id, timestamp_utc, source)" in ddl
+    )
+    assert (
+        "CREATE INDEX ix_ais_vessel_ts ON ais_points USING btree (vessel_id, timestamp_utc)" in ddl
+    )
+    assert (
+        "ALTER SEQUENCE public.ais_points_ais_point_id_seq OWNED BY ais_points.ais_point_id" in ddl
+    )
+    created = [s.split()[5] for s in conn.statements("CREATE TABLE IF NOT EXISTS")]
+    assert created[:3] == ["ais_points_2026_01", "ais_points_2026_02", "ais_points_2026_03"]
+    assert ddl[-3:] == [
+        "INSERT INTO ais_points SELECT * FROM ais_points_unpartitioned",
+        "ALTER TABLE ais_points ADD CONSTRAINT ais_points_vessel_id_fkey "
+        "FOREIGN KEY (vessel_id) REFERENCES vessels(vessel_id)",
+        "DROP TABLE ais_points_unpartitioned",
+    ]
+
+
+class TestUTCDateTime:
+    def test_aware_binds_are_naive_utc(self):
+        from app.models.ais_point import AISPoint
+
+        aware = datetime(2024, 3, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+        bind = AISPoint.__table__.c.timestamp_utc.type.bind_processor(postgresql.dialect())
+        assert bind(aware) == datetime(2024, 3, 1, 12, 0)
+
+    @pytest.mark.parametrize("offset", [0, 5])
+    def test_round_trip_on_sqlite(self, offset):
+        import app.models  # noqa: F401 — register all tables
+        from app.models.ais_point import AISPoint
+        from app.models.vessel import Vessel
+
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        tz = timezone(timedelta(hours=offset))
+        db.add(Vessel(vessel_id=1, mmsi="211000001"))
+        db.add(
+            AISPoint(
+                vessel_id=1,
+                timestamp_utc=datetime(2024, 3, 1, 12 + offset, tzinfo=tz),
+                lat=1,
+                lon=2,
+            )
+        )
+        db.commit()
+        point = db.query(AISPoint).one()
+        assert point.timestamp_utc == datetime(2024, 3, 1, 12, 0)
+        cutoff = datetime(2024, 3, 1, 12 + offset, 30, tzinfo=tz)
+        assert db.query(AISPoint).filter(AISPoint.timestamp_utc < cutoff).count() == 1
+        db.close()
+
+
+def test_scheduler_maintenance_is_throttled():
+    from app.modules.collection_scheduler import CollectionScheduler
+
+    db = MagicMock()
+    scheduler = CollectionScheduler(db_factory=lambda: db)
+    with (
+        patch("app.modules.pg_partitions.partitioning_active", return_value=True),
+        patch("app.modules.pg_partitions.ensure_partitions", return_value=[]) as ensure,
+    ):
+        scheduler._maintain_partitions()
+        scheduler._maintain_partitions()
+    assert [c.args[1] for c in ensure.call_args_list] == ["ais_points", "ais_observations"]
+    db.commit.assert_called_once()
@@ -0,0 +1,197 @@
+"""Tests for the per-vessel recent-point cache (app.modules.point_state_cache)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2025, 6, 1, 0, 0, 0)
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _vessel_with_points(db, mmsi: str, minutes: list[int], source: str = "csv_import") -> int:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    v = Vessel(mmsi=mmsi, name="TEST")
+    db.add(v)
+    db.flush()
+    db.add_all(
+        AISPoint(
+            vessel_id=v.vessel_id,
+            timestamp_utc=T0 + timedelta(minutes=m),
+            lat=55.0,
+            lon=12.0,
+            sog=float(m),
+            cog=90.0,
+            source=source,
+        )
+        for m in minutes
+    )
+    db.commit()
+    return v.vessel_id
+
+
+class TestVesselPointCache:
+    def test_complete_state_answers_everything(self, db):
+        from app.modules.point_state_cache import VesselPointCache
+
+        vid = _vessel_with_points(db, "211000001", [0, 10])
+        cache = VesselPointCache(recent=4)
+        cache.warm(db, [vid])
+
+        near, prev = cache.neighbours(db, vid, T0 + timedelta(minutes=10, seconds=5))
+        assert near.timestamp_utc == T0 + timedelta(minutes=10)
+        assert prev.timestamp_utc == T0 + timedelta(minutes=10)
+
+        # Older than anything stored — still answerable, the state is complete
+        assert cache.neighbours(db, vid, T0 - timedelta(days=1)) == (None, None)
+
+    def test_window_below_horizon_is_a_miss(self, db):
+        from app.modules.point_state_cache import VesselPointCache
+
+        vid = _vessel_with_points(db, "211000002", [0, 10, 20, 30, 40])
+        cache = VesselPointCache(recent=3)
+        cache.warm(db, [vid])
+
+        # Cached: 20, 30, 40 — a point at minute 15 may collide with minute 10
+        assert cache.neighbours(db, vid, T0 + timedelta(minutes=15)) is None
+        near, prev = cache.neighbours(db, vid, T0 + timedelta(minutes=45))
+        assert near is None
+        assert prev.sog == 40.0
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_exact_timestamp_preferred_as_near_dup(self, db):
+        from app.modules.point_state_cache import CachedPoint, VesselPointCache
+
+        vid = _vessel_with_points(db, "211000003", [])
+        cache = VesselPointCache()
+        cache.warm(db, [vid])
+        cache.record(vid, CachedPoint(T0, "csv_import", 1.0, 1.0))
+        cache.record(vid, CachedPoint(T0 + timedelta(seconds=5), "satellite", 2.0, 2.0))
+
+        near, _ = cache.neighbours(db, vid, T0 + timedelta(seconds=5))
+        assert near.source == "satellite"
+
+    def test_record_trims_and_keeps_horizon(self, db):
+        from app.modules.point_state_cache import CachedPoint, VesselPointCache
+
+        vid = _vessel_with_points(db, "211000004", [0])
+        cache = VesselPointCache(recent=2)
+        cache.warm(db, [vid])
+        cache.record(vid, CachedPoint(T0 + timedelta(minutes=1), "csv_import", None, None))
+        cache.record(vid, CachedPoint(T0 + timedelta(minutes=2), "csv_import", None, None))
+
+        # Minute 0 was trimmed: the window around minute 0 must go to the DB
+        assert cache.neighbours(db, vid, T0) is None
+        # Below the horizon is not recorded, so the invariant holds
+        cache.record(vid, CachedPoint(T0 - timedelta(minutes=5), "csv_import", None, None))
+        assert cache.neighbours(db, vid, T0 + timedelta(minutes=3))[1].timestamp_utc == (
+            T0 + timedelta(minutes=2)
+        )
+
+    def test_lru_eviction(self, db):
+        from app.modules.point_state_cache import VesselPointCache
+
+        ids = [_vessel_with_points(db, f"21100001{i}", [0]) for i in range(3)]
+        cache = VesselPointCache(max_vessels=2)
+        cache.warm(db, ids)
+        assert len(cache) == 2
+        # The evicted vessel is reloaded on demand
+        assert cache.neighbours(db, ids[0], T0)[0] is not None
+
+    def test_warm_mmsis_skips_unknown(self, db):
+        from app.modules.point_state_cache import VesselPointCache
+
+        _vessel_with_points(db, "211000020", [0])
+        cache = VesselPointCache()
+        cache.warm_mmsis(db, ["211000020", "999999999"])
+        assert len(cache) == 1
+
+
+_CSV = """mmsi,timestamp,lat,lon,sog,cog,source
+211234567,2025-06-01T00:00:00Z,55.0,12.0,12.0,95.0,csv_import
+211234567,2025-06-01T00:00:04Z,55.0,12.0,12.1,96.0,csv_import
+211234567,2025-06-01T00:01:00Z,55.0,12.0,12.5,10.0,csv_import
+211234567,2025-06-01T00:01:00Z,55.0,12.0,13.0,11.0,satellite
+211234567,2025-06-01T00:02:00Z,55.0,12.0,13.5,20.0,csv_import
+211234567,2025-05-31T23:00:00Z,55.0,12.0,9.0,350.0,csv_import
+273111222,2025-06-01T01:00:00Z,60.0,25.0,8.0,270.0,terrestrial
+273111222,2025-06-01T01:00:30Z,60.0,25.0,8.5,271.0,terrestrial
+"""
+
+
+class TestRowPathWithCache:
+    def _ingest(self, db, cache_size):
+        from app.modules.ingest import ingest_ais_csv
+
+        with patch("app.config.settings.INGEST_POINT_CACHE_SIZE", cache_size):
+            return ingest_ais_csv(_CSV.encode(), db, bulk=False)
+
+    def _points(self, db):
+        from app.models.ais_point import AISPoint
+
+        return sorted(
+            (p.vessel_id, p.timestamp_utc, p.source, p.sog, p.sog_delta, p.cog_delta)
+            for p in db.query(AISPoint)
+        )
+
+    def test_same_result_with_and_without_cache(self, db):
+        _vessel_with_points(db, "211234567", [-120])
+        cached = self._ingest(db, 10_000)
+        cached_points = self._points(db)
+
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        other = sessionmaker(bind=engine)()
+        try:
+            _vessel_with_points(other, "211234567", [-120])
+            uncached = self._ingest(other, 0)
+            assert self._points(other) == cached_points
+        finally:
+            other.close()
+            engine.dispose()
+
+        for key in ("accepted", "replaced", "ignored", "rejected"):
+            assert cached[key] == uncached[key], key
+        assert cached["replaced"] == 1
+        assert cached["ignored"] == 1
+
+    def test_cache_skips_point_queries(self, db):
+        from app.models.ais_point import AISPoint
+
+        _vessel_with_points(db, "211234567", [-120])
+        statements: list[str] = []
+
+        def _count(conn, cursor, statement, *args):
+            if "FROM ais_points" in statement:
+                statements.append(statement)
+
+        event.listen(db.get_bind(), "before_cursor_execute", _count)
+        self._ingest(db, 10_000)
+        cached_queries = len(statements)
+        statements.clear()
+        db.query(AISPoint).delete()
+        db.commit()
+        self._ingest(db, 0)
+        event.remove(db.get_bind(), "before_cursor_execute", _count)
+
+        # Two ais_points queries per row without the cache, one warm-up per vessel with it
+        assert cached_queries < len(statements) / 2
@@ -0,0 +1,111 @@
+"""Tests for the cached port proximity index (app.modules.port_index)."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+
+@pytest.fixture()
+def engine():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _port(port_id: int, lat: float, lon: float, major: bool = True):
+    from app.models.port import Port
+
+    return Port(
+        port_id=port_id,
+        name=f"Port {port_id}",
+        country="XX",
+        geometry=f"POINT ({lon} {lat})",
+        major_port=major,
+    )
+
+
+def _index(ports):
+    from app.modules.port_index import PortIndex
+
+    return PortIndex.from_rows(ports)
+
+
+class TestPortIndex:
+    def test_ports_within_matches_brute_force(self):
+        from app.utils.geo import haversine_nm
+
+        ports = [_port(i, 50.0 + (i % 9) * 0.07, 3.0 + (i // 9) * 0.09) for i in range(1, 82)]
+        index = _index(ports)
+        queries = [(50.3, 3.4), (50.0, 3.0), (49.5, 2.5), (60.0, 3.0)]
+        batch = index.ports_within_many(queries, 6.0)
+        for (lat, lon), hits in zip(queries, batch, strict=True):
+            expected = sorted(
+                e.port_id for e in index.entries if haversine_nm(lat, lon, e.lat, e.lon) <= 6.0
+            )
+            assert sorted(e.port_id for e, _ in hits) == expected
+            assert [d for _, d in hits] == sorted(d for _, d in hits)
+            assert index.ports_within(lat, lon, 6.0) == hits
+
+    def test_nearest_port_unbounded_and_capped(self):
+        index = _index([_port(1, 0.0, 0.0), _port(2, 10.0, 10.0)])
+        nearest, dist = index.nearest_port(9.0, 9.5)
+        assert nearest.port_id == 2
+        assert dist > 0
+        # Far from both (~4050 vs ~4900 nm): still found without a radius cap
+        assert index.nearest_port(-40.0, -60.0)[0].port_id == 1
+        assert index.nearest_port(5.0, 5.0, max_nm=10.0) is None
+
+    def test_antimeridian(self):
+        index = _index([_port(1, 0.0, 179.95)])
+        hits = index.ports_within(0.0, -179.95, 10.0)
+        assert [e.port_id for e, _ in hits] == [1]
+
+    def test_major_only(self):
+        index = _index([_port(1, 0.0, 0.0, major=False), _port(2, 0.0, 0.2)])
+        assert index.nearest_port(0.0, 0.0)[0].port_id == 1
+        assert index.nearest_port(0.0, 0.0, major_only=True)[0].port_id == 2
+        assert index.ports_within(0.0, 0.0, 5.0, major_only=True) == []
+
+
+class TestCache:
+    def test_refreshed_when_ports_seeded_or_edited(self, db):
+        from app.modules.gap_detector import _is_near_port
+        from app.modules.port_index import port_index
+
+        assert not _is_near_port(db, 51.95, 4.05)
+        first = port_index(db)
+        assert port_index(db) is first
+
+        port = _port(1, 51.95, 4.05)
+        db.add(port)
+        db.commit()
+        assert _is_near_port(db, 51.95, 4.05)
+
+        port.major_port = False
+        db.commit()
+        assert not _is_near_port(db, 51.95, 4.05)
+
+    def test_resolver_uses_index(self, db):
+        from app.modules.port_resolver import resolve_port
+
+        db.add_all([_port(1, 37.0, 23.0), _port(2, 37.95, 23.64)])
+        db.commit()
+        assert resolve_port(db, 37.95, 23.65).port_id == 2
+        assert resolve_port(db, 30.0, 10.0) is None
@@ -0,0 +1,203 @@
+"""Tests for process-pool sharded detection (app.modules.sharded_detection).
+
+Worker processes need PostgreSQL; here shards run in-process against SQLite,
+which checks the capture of a shard's writes and their replay by the parent.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.modules import sharded_detection
+from app.modules.sharded_detection import (
+    _apply_changes,
+    _run_shard,
+    in_shard,
+    merge_results,
+    resolve_workers,
+    run_sharded,
+)
+
+T0 = datetime(2024, 3, 1, 0, 0, 0)
+
+
+@pytest.fixture()
+def engine(monkeypatch):
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    # pysqlite needs SQLAlchemy to own BEGIN for SAVEPOINTs to work
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, connection_record):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(sharded_detection, "_worker_engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+def _seed(db) -> None:
+    """Vessels 1 and 2 each go dark once (5h and 3h); vessel 3 reports steadily."""
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    hours = {1: [0, 1, 6, 7], 2: [0, 3, 4], 3: [0, 1, 2]}
+    for vid, offsets in hours.items():
+        db.add(Vessel(vessel_id=vid, mmsi=f"21100000{vid}"))
+        db.flush()
+        db.add_all(
+            AISPoint(
+                vessel_id=vid,
+                timestamp_utc=T0 + timedelta(hours=h),
+                lat=40.0 + 0.01 * h,
+                lon=5.0,
+                sog=0.5,
+            )
+            for h in offsets
+        )
+    db.commit()
+
+
+def _gaps(db) -> list[tuple[int, datetime]]:
+    from app.models.gap_event import AISGapEvent
+
+    rows = db.query(AISGapEvent.vessel_id, AISGapEvent.gap_start_utc)
+    return sorted(rows.all())
+
+
+class TestHelpers:
+    def test_in_shard_partitions_vessels(self):
+        shards = [(i, 3) for i in range(3)]
+        for vid in range(1, 50):
+            assert sum(in_shard(vid, shard) for shard in shards) == 1
+            assert in_shard(vid, None)
+
+    def test_resolve_workers(self, monkeypatch):
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "DETECTOR_SHARDING_ENABLED", False)
+        assert resolve_workers() == 1
+        assert resolve_workers(6) == 6
+        monkeypatch.setattr(settings, "DETECTOR_SHARDING_ENABLED", True)
+        monkeypatch.setattr(settings, "DETECTOR_WORKERS", 0)
+        assert resolve_workers() >= 1
+        assert resolve_workers(1) == 1
+
+    def test_merge_results(self):
+        merged = merge_results(
+            [
+                {"checked": 2, "errors": ["a"], "status": "ok", "skipped": False},
+                {"checked": 3, "errors": ["b"], "status": "ok", "skipped": True, "extra": 1},
+            ]
+        )
+        assert merged == {
+            "checked": 5,
+            "errors": ["a", "b"],
+            "status": "ok",
+            "skipped": True,
+            "extra": 1,
+        }
+
+
+class TestShardExecution:
+    def test_shard_filters_vessels_and_writes_nothing(self, db):
+        from app.modules.gap_detector import run_gap_detection
+
+        _seed(db)
+        db.close()
+        # Vessel 2 alone (2 % 2 == 0)
+        result, changes, advances = _run_shard((run_gap_detection, (0, 2), {}))
+        assert result == {"gaps_detected": 1, "vessels_processed": 1}
+        assert [row["vessel_id"] for row in changes.inserts["ais_gap_events"]] == [2]
+        assert advances == []
+        assert _gaps(db) == []
+
+    def test_replayed_shard_matches_serial_run(self, db):
+        from app.models.vessel_scoring_state import VesselScoringState
+        from app.modules.gap_detector import run_gap_detection
+
+        _seed(db)
+        db.close()
+        result, changes, _ = _run_shard((run_gap_detection, (0, 1), {}))
+        _apply_changes(db, [changes])
+        db.commit()
+
+        assert result == {"gaps_detected": 2, "vessels_processed": 3}
+        assert _gaps(db) == [(1, T0 + timedelta(hours=1)), (2, T0)]
+        assert sorted(s.vessel_id for s in db.query(VesselScoringState).all()) == [1, 2]
+        # The serial detector sees the replayed gaps as already recorded
+        assert run_gap_detection(db)["gaps_detected"] == 0
+
+    def test_replay_assigns_ids_in_vessel_order(self, db):
+        from app.models.gap_event import AISGapEvent
+        from app.models.movement_envelope import MovementEnvelope
+        from app.modules.gap_detector import run_gap_detection
+
+        _seed(db)
+        db.close()
+        shards = [_run_shard((run_gap_detection, (i, 2), {}))[1] for i in range(2)]
+        # Both shards drew the same worker id, as concurrent SQLite sessions would
+        for changes in shards:
+            (gap,) = changes.inserts["ais_gap_events"]
+            gap["gap_event_id"] = 900
+            changes.inserts["movement_envelopes"] = [
+                {
+                    "envelope_id": 900,
+                    "gap_event_id": 900,
+                    "max_plausible_distance_nm": gap["vessel_id"],
+                }
+            ]
+        _apply_changes(db, shards)
+        db.commit()
+
+        gaps = db.query(AISGapEvent).order_by(AISGapEvent.gap_event_id).all()
+        assert [g.vessel_id for g in gaps] == [1, 2]
+        envelopes = {
+            e.gap_event_id: e.max_plausible_distance_nm for e in db.query(MovementEnvelope)
+        }
+        assert envelopes == {gaps[0].gap_event_id: 1, gaps[1].gap_event_id: 2}
+
+    def test_checkpoint_advances_are_handed_back(self, db):
+        from app.modules.detector_checkpoints import apply_advance, plan_detector_run
+        from app.modules.loitering_detector import LOITERING_CHECKPOINT, run_loitering_detection
+
+        _seed(db)
+        db.close()
+        _, _, advances = _run_shard((run_loitering_detection, (0, 1), {"incremental": True}))
+        assert [a.detector for a in advances] == ["loitering"]
+        assert plan_detector_run(db, LOITERING_CHECKPOINT, [1, 2, 3]).vessel_ids == [1, 2, 3]
+
+        apply_advance(db, advances[0])
+        db.commit()
+        assert plan_detector_run(db, LOITERING_CHECKPOINT, [1, 2, 3]).vessel_ids == []
+
+    def test_run_sharded_is_serial_on_sqlite(self, db):
+        from app.modules.gap_detector import run_gap_detection
+
+        _seed(db)
+        assert run_sharded(db, run_gap_detection, workers=4) == {
+            "gaps_detected": 2,
+            "vessels_processed": 3,
+        }
+        assert len(_gaps(db)) == 2
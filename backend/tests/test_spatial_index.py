@@ -0,0 +1,221 @@
+"""Tests for the optional spatial index (app.modules.spatial_index)."""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def engine(monkeypatch):
+    import app.models  # noqa: F401 — register all tables
+
+    monkeypatch.setattr("app.config.settings.SPATIAL_INDEX_ENABLED", True)
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _vessel(db, vessel_id: int) -> None:
+    from app.models.vessel import Vessel
+
+    db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    db.flush()
+
+
+def _point(vessel_id: int, hours: float, lat: float, lon: float):
+    from app.models.ais_point import AISPoint
+
+    return AISPoint(
+        vessel_id=vessel_id, timestamp_utc=T0 + timedelta(hours=hours), lat=lat, lon=lon
+    )
+
+
+def _detection(hours: float | None, lat: float | None, lon: float | None, **kw):
+    from app.models.stubs import DarkVesselDetection
+
+    return DarkVesselDetection(
+        detection_time_utc=T0 + timedelta(hours=hours) if hours is not None else None,
+        detection_lat=lat,
+        detection_lon=lon,
+        ais_match_result="unmatched",
+        **kw,
+    )
+
+
+def _rtree_ids(db, table: str) -> set[int]:
+    return set(db.execute(text(f"SELECT id FROM {table}_rtree")).scalars())  # noqa: S608
+
+
+class TestBBoxAround:
+    @pytest.mark.parametrize("lat", [0.0, 45.0, 70.0, -60.0])
+    def test_encloses_radius(self, lat):
+        from app.modules.spatial_index import bbox_around
+        from app.utils.geo import haversine_nm
+
+        box = bbox_around(lat, 10.0, 50.0)
+        for bearing in range(0, 360, 5):
+            # Walk 49.9 nm along each bearing with the direct geodesic formula
+            d = 49.9 / 3440.065
+            phi1, lam1, theta = math.radians(lat), math.radians(10.0), math.radians(bearing)
+            phi2 = math.asin(
+                math.sin(phi1) * math.cos(d) + math.cos(phi1) * math.sin(d) * math.cos(theta)
+            )
+            lam2 = lam1 + math.atan2(
+                math.sin(theta) * math.sin(d) * math.cos(phi1),
+                math.cos(d) - math.sin(phi1) * math.sin(phi2),
+            )
+            p_lat, p_lon = math.degrees(phi2), math.degrees(lam2)
+            assert haversine_nm(lat, 10.0, p_lat, p_lon) <= 50.0
+            assert box.min_lat <= p_lat <= box.max_lat
+            assert box.min_lon <= p_lon <= box.max_lon
+
+    def test_antimeridian_and_pole_use_full_longitude(self):
+        from app.modules.spatial_index import bbox_around
+
+        assert bbox_around(10.0, 179.9, 30.0)[0::2] == (-180.0, 180.0)
+        assert bbox_around(89.9, 0.0, 30.0)[0::2] == (-180.0, 180.0)
+
+
+class TestSqliteRtree:
+    def test_backfills_and_tracks_writes(self, engine, db):
+        from app.modules.spatial_index import ensure_spatial_index
+
+        _vessel(db, 1)
+        first = _point(1, 0, 55.0, 12.0)
+        db.add(first)
+        db.commit()
+
+        ensure_spatial_index(engine)
+        assert _rtree_ids(db, "ais_points") == {first.ais_point_id}
+
+        second = _point(1, 1, 56.0, 13.0)
+        db.add(second)
+        db.commit()
+        assert _rtree_ids(db, "ais_points") == {first.ais_point_id, second.ais_point_id}
+
+        second.lat = 57.0
+        db.commit()
+        box = db.execute(
+            text("SELECT min_lat FROM ais_points_rtree WHERE id = :i"), {"i": second.ais_point_id}
+        ).scalar()
+        assert box == pytest.approx(57.0)
+
+        db.delete(first)
+        db.commit()
+        assert _rtree_ids(db, "ais_points") == {second.ais_point_id}
+
+    def test_detections_without_position_are_not_indexed(self, engine, db):
+        from app.modules.spatial_index import ensure_spatial_index
+
+        ensure_spatial_index(engine)
+        located = _detection(0, 55.0, 12.0)
+        db.add_all([located, _detection(0, None, None)])
+        db.commit()
+        assert _rtree_ids(db, "dark_vessel_detections") == {located.detection_id}
+
+    def test_indexed_query_matches_plain_filter(self, engine, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.spatial_index import (
+            BBox,
+            _index_kind,
+            ensure_spatial_index,
+            points_in_window,
+        )
+
+        ensure_spatial_index(engine)
+        for vid in (1, 2):
+            _vessel(db, vid)
+        db.add_all(
+            _point(vid, h, 54.0 + (h % 7) * 0.5, 10.0 + (h % 5) * 0.7)
+            for vid in (1, 2)
+            for h in range(48)
+        )
+        db.commit()
+
+        box = BBox(min_lon=10.5, min_lat=55.0, max_lon=12.2, max_lat=56.5)
+        start, end = T0 + timedelta(hours=5), T0 + timedelta(hours=30)
+        assert _index_kind(db, "ais_points") == "rtree"
+        indexed = {p.ais_point_id for p in points_in_window(db, box, start, end)}
+
+        expected = set(
+            db.execute(
+                select(AISPoint.ais_point_id).where(
+                    AISPoint.lat.between(55.0, 56.5),
+                    AISPoint.lon.between(10.5, 12.2),
+                    AISPoint.timestamp_utc >= start,
+                    AISPoint.timestamp_utc <= end,
+                )
+            ).scalars()
+        )
+        assert expected
+        assert indexed == expected
+        only_vessel_1 = points_in_window(db, box, start, end, vessel_ids=[1])
+        assert {p.vessel_id for p in only_vessel_1} == {1}
+
+    def test_disabled_uses_plain_predicates(self, engine, db, monkeypatch):
+        from app.modules.spatial_index import (
+            BBox,
+            _index_kind,
+            detections_in_window,
+            ensure_spatial_index,
+        )
+
+        ensure_spatial_index(engine)
+        db.add(_detection(1, 55.0, 12.0))
+        db.commit()
+
+        monkeypatch.setattr("app.config.settings.SPATIAL_INDEX_ENABLED", False)
+        assert _index_kind(db, "dark_vessel_detections") is None
+        found = detections_in_window(db, BBox(11.0, 54.0, 13.0, 56.0), T0, T0 + timedelta(hours=2))
+        assert len(found) == 1
+
+
+class TestCallers:
+    def test_hunt_candidates_use_drift_radius_box(self, engine, db):
+        from app.models.stubs import SearchMission
+        from app.modules.spatial_index import ensure_spatial_index
+        from app.modules.vessel_hunt import find_hunt_candidates
+
+        ensure_spatial_index(engine)
+        _vessel(db, 1)
+        db.add_all(
+            [
+                _detection(2, 55.1, 12.1, scene_id="near"),
+                _detection(2, 58.0, 12.0, scene_id="far"),
+                _detection(40, 55.1, 12.1, scene_id="late"),
+                _detection(None, 55.1, 12.1, scene_id="untimed"),
+            ]
+        )
+        mission = SearchMission(
+            vessel_id=1,
+            search_start_utc=T0,
+            search_end_utc=T0 + timedelta(hours=24),
+            center_lat=55.0,
+            center_lon=12.0,
+            max_radius_nm=60.0,
+        )
+        db.add(mission)
+        db.commit()
+
+        candidates = find_hunt_candidates(mission.mission_id, db)
+        assert [c.satellite_scene_id for c in candidates] == ["near"]
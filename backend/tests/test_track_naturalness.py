@@ -256,6 +256,7 @@ class TestDetectorStraightLine:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = [(1,)]
 
@@ -307,6 +308,7 @@ class TestDetectorAnchored:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = [(1,)]
 
@@ -350,6 +352,7 @@ class TestDetectorShortTrack:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = [(1,)]
 
@@ -389,6 +392,7 @@ class TestDetectorNoVessels:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = []
 
@@ -417,6 +421,7 @@ class TestDetectorBatchLimit:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = []
 
@@ -449,6 +454,7 @@ class TestDetectorDedup:
         vessel_query.filter.return_value = vessel_query
         vessel_query.group_by.return_value = vessel_query
         vessel_query.having.return_value = vessel_query
+        vessel_query.order_by.return_value = vessel_query
         vessel_query.limit.return_value = vessel_query
         vessel_query.all.return_value = [(1,)]
 
@@ -0,0 +1,132 @@
+"""Tests for tiered DB + archive track reads (app.modules.track_reader)."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def db(tmp_path):
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    with (
+        patch("app.config.settings.ARCHIVE_STORAGE_DIR", str(tmp_path / "archives")),
+        patch("app.config.settings.ARCHIVE_BATCH_SIZE", 4),
+    ):
+        yield session
+    session.close()
+    engine.dispose()
+
+
+def _track(db, vessel_id: int, hours: range, sog: float = 10.0) -> None:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    if db.get(Vessel, vessel_id) is None:
+        db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    for h in hours:
+        db.add(
+            AISPoint(
+                vessel_id=vessel_id,
+                timestamp_utc=T0 + timedelta(hours=h),
+                lat=55.0,
+                lon=12.0 + h / 100,
+                sog=sog if h % 2 == 0 else 0.1,
+                source="test",
+            )
+        )
+    db.commit()
+
+
+def _archive(db, before_hours: int):
+    from app.modules.ais_archiver import archive_old_points
+
+    return archive_old_points(db, T0 + timedelta(hours=before_hours))
+
+
+def _hours(points) -> list[float]:
+    return [(p.timestamp_utc - T0).total_seconds() / 3600 for p in points]
+
+
+class TestReadTrack:
+    def test_merges_archived_and_hot_rows(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.track_reader import ArchivedPoint, read_track
+
+        _track(db, 1, range(10))
+        _track(db, 2, range(10))
+        _archive(db, 6)
+        assert db.query(AISPoint).count() == 8
+
+        points = read_track(db, 1)
+        assert _hours(points) == list(range(10))
+        assert all(isinstance(p, ArchivedPoint) for p in points[:6])
+        assert all(isinstance(p, AISPoint) for p in points[6:])
+        assert {p.vessel_id for p in points} == {1}
+        assert points[0].ais_class == "A"
+
+        window = read_track(
+            db, 1, T0 + timedelta(hours=4), (T0 + timedelta(hours=7)).replace(tzinfo=UTC)
+        )
+        assert _hours(window) == [4, 5, 6, 7]
+
+    def test_min_sog_applies_to_both_tiers(self, db):
+        from app.modules.track_reader import read_track
+
+        _track(db, 1, range(8), sog=12.0)
+        _archive(db, 4)
+        assert _hours(read_track(db, 1, min_sog=5.0)) == [0, 2, 4, 6]
+
+    def test_restored_batch_not_double_counted(self, db):
+        from app.modules.ais_archiver import restore_archive_batch
+        from app.modules.track_reader import read_track
+
+        _track(db, 1, range(6))
+        batch = _archive(db, 3)
+        restore_archive_batch(db, batch.batch_id)
+        assert _hours(read_track(db, 1)) == list(range(6))
+
+    def test_disabled_reads_database_only(self, db):
+        from app.modules.track_reader import read_track
+
+        _track(db, 1, range(6))
+        _archive(db, 3)
+        with patch("app.config.settings.ARCHIVE_TIERED_READS", False):
+            assert _hours(read_track(db, 1)) == [3, 4, 5]
+
+
+class TestScanArchives:
+    def test_only_overlapping_files_are_scanned(self, db):
+        from app.modules.track_reader import archive_files, scan_archives
+
+        _track(db, 1, range(4))
+        first = _archive(db, 2)
+        _archive(db, 4)
+        assert len(archive_files(db)) == 2
+        assert archive_files(db, end=T0 + timedelta(hours=1)) == [first.file_path]
+        assert scan_archives(db, start=T0 + timedelta(days=1)) is None
+
+        lf = scan_archives(db, T0 + timedelta(hours=1), T0 + timedelta(hours=2), vessel_ids=[1])
+        assert lf.collect()["ais_point_id"].to_list() == [2, 3]
+
+
+def test_track_export_includes_archived_history(db):
+    from app.modules.track_export import export_track_geojson
+
+    _track(db, 1, range(5))
+    _archive(db, 3)
+    feature = export_track_geojson(db, vessel_id=1)["features"][0]
+    assert feature["properties"]["point_count"] == 5
+    assert len(feature["geometry"]["coordinates"]) == 5
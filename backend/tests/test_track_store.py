@@ -0,0 +1,222 @@
+"""Tests for the shared per-run AIS track store (app.modules.track_store)."""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+DAY = date(2024, 3, 1)
+
+
+@pytest.fixture()
+def engine():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _track(db, vessel_id: int, offsets_min: list[int], **kw) -> None:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    if db.get(Vessel, vessel_id) is None:
+        db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    for i, minutes in enumerate(offsets_min):
+        db.add(
+            AISPoint(
+                vessel_id=vessel_id,
+                timestamp_utc=T0 + timedelta(minutes=minutes, microseconds=i),
+                lat=55.0 + i / 1000,
+                lon=12.0,
+                sog=None if i % 3 == 2 else 10.5,
+                cog=90.0,
+                heading=None if i % 2 else 91.0,
+                nav_status=0 if i % 2 else None,
+                source="test" if i % 2 else "other",
+                draught=None if i % 4 else 12.5,
+                **kw,
+            )
+        )
+    db.commit()
+
+
+def _orm_points(db, vessel_id: int, start: datetime | None, end: datetime | None):
+    from app.models.ais_point import AISPoint
+
+    q = db.query(AISPoint).filter(AISPoint.vessel_id == vessel_id)
+    if start is not None:
+        q = q.filter(AISPoint.timestamp_utc >= start)
+    if end is not None:
+        q = q.filter(AISPoint.timestamp_utc <= end)
+    return q.order_by(AISPoint.timestamp_utc, AISPoint.ais_point_id).all()
+
+
+def _as_tuple(point):
+    from app.modules.track_store import StoredPoint
+
+    return tuple(getattr(point, name) for name in StoredPoint._fields)
+
+
+class TestReads:
+    def test_points_match_orm_rows(self, db):
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0, 30, 60, 600, 24 * 60 - 1, 24 * 60 + 5])
+        _track(db, 2, [10, 20])
+        store = TrackStore.for_dates(db, DAY, DAY)
+
+        start, end = store.start, store.end
+        for vid in (1, 2, 3):
+            expected = [_as_tuple(p) for p in _orm_points(db, vid, start, end)]
+            assert [tuple(p) for p in store.points(vid, start, end)] == expected
+        sub_start, sub_end = T0 + timedelta(minutes=30), T0 + timedelta(minutes=600)
+        assert [p.timestamp_utc for p in store.points(1, sub_start, sub_end)] == [
+            p.timestamp_utc for p in _orm_points(db, 1, sub_start, sub_end)
+        ]
+        assert store.scans == 1
+
+        merged = store.points_many([1, 2], start, end)
+        assert [p.timestamp_utc for p in merged] == sorted(p.timestamp_utc for p in merged)
+        assert len(merged) == 6
+        assert len(store.points_many(None, start, end)) == 6
+        assert store.scans == 1
+
+    def test_out_of_window_reads_fall_through(self, db):
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0, 60, 24 * 60 + 5])
+        store = TrackStore.for_dates(db, DAY, DAY)
+        assert len(store.points(1, store.start, store.end)) == 2
+
+        everything = store.points(1)
+        assert [_as_tuple(p) for p in everything] == [
+            _as_tuple(p) for p in _orm_points(db, 1, None, None)
+        ]
+        assert store.scans == 2
+
+
+class TestInvalidation:
+    def test_orm_writes_reload_the_vessel(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0, 60])
+        _track(db, 2, [30])  # a timestamp vessel 1 does not have
+        store = TrackStore.for_dates(db, DAY, DAY)
+        assert len(store.points(1, store.start, store.end)) == 2
+
+        db.add(AISPoint(vessel_id=1, timestamp_utc=T0 + timedelta(hours=3), lat=55.0, lon=12.0))
+        db.commit()
+        assert len(store.points(1, store.start, store.end)) == 3
+
+        moved = db.query(AISPoint).filter_by(vessel_id=2).one()
+        moved.vessel_id = 1
+        db.commit()
+        assert len(store.points(1, store.start, store.end)) == 4
+        assert store.points(2, store.start, store.end) == []
+
+    def test_bulk_update_drops_everything(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0, 60])
+        _track(db, 2, [30])  # a timestamp vessel 1 does not have
+        store = TrackStore.for_dates(db, DAY, DAY)
+        assert len(store.points(1, store.start, store.end)) == 2
+
+        db.query(AISPoint).filter(AISPoint.vessel_id == 2).update({"vessel_id": 1})
+        db.commit()
+        assert len(store.points(1, store.start, store.end)) == 3
+        assert store.scans == 2
+
+    def test_refresh_picks_up_rows_written_outside_the_session(self, db, engine):
+        from app.models.ais_point import AISPoint
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0])
+        _track(db, 2, [0])
+        store = TrackStore.for_dates(db, DAY, DAY)
+        assert len(store.points(1, store.start, store.end)) == 1
+        assert store.refresh() == 0
+
+        with engine.begin() as conn:
+            conn.execute(
+                insert(AISPoint.__table__),
+                [{"vessel_id": 2, "timestamp_utc": T0 + timedelta(hours=1), "lat": 1, "lon": 2}],
+            )
+        assert store.points(2, store.start, store.end)[-1].lat == 55.0
+        assert store.refresh() == 1
+        assert store.points(2, store.start, store.end)[-1].lat == 1.0
+        assert store.refresh() == 0
+
+    def test_refresh_holds_back_while_writers_in_flight(self, db, engine, monkeypatch):
+        from app.models.ais_point import AISPoint
+        from app.modules import detector_checkpoints
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0])
+        store = TrackStore.for_dates(db, DAY, DAY)
+        assert len(store.points(1, store.start, store.end)) == 1
+
+        with engine.begin() as conn:
+            conn.execute(
+                insert(AISPoint.__table__),
+                [
+                    {
+                        "vessel_id": 1,
+                        "timestamp_utc": T0 + timedelta(hours=1),
+                        "lat": 1,
+                        "lon": 2,
+                        "ingested_at": datetime.now(UTC).replace(tzinfo=None),
+                    }
+                ],
+            )
+        # A lower id may still commit: the mark must not move past this row yet
+        monkeypatch.setattr(detector_checkpoints, "_writers_in_flight", lambda db: True)
+        assert store.refresh() == 0
+        monkeypatch.setattr(detector_checkpoints, "_writers_in_flight", lambda db: False)
+        assert store.refresh() == 1
+
+
+class TestDetectors:
+    def test_gap_detection_reads_the_shared_store(self, db):
+        from app.models.gap_event import AISGapEvent
+        from app.modules.gap_detector import run_gap_detection
+        from app.modules.track_store import TrackStore
+
+        _track(db, 1, [0, 30, 8 * 60, 8 * 60 + 30])
+        _track(db, 2, [0, 10])
+        store = TrackStore.for_dates(db, DAY, DAY)
+
+        result = run_gap_detection(db, date_from=DAY, date_to=DAY, track_store=store)
+        assert result["gaps_detected"] == 1
+        gap = db.query(AISGapEvent).one()
+        points = _orm_points(db, 1, None, None)
+        assert (gap.start_point_id, gap.end_point_id) == (
+            points[1].ais_point_id,
+            points[2].ais_point_id,
+        )
+        assert gap.pre_gap_sog == points[1].sog
+
+        run_gap_detection(db, date_from=DAY, date_to=DAY, track_store=store)
+        assert db.query(AISGapEvent).count() == 1
+        assert store.scans == 1
@@ -0,0 +1,286 @@
+"""Tests for per-vessel track summaries (app.modules.track_summary)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+
+T0 = datetime(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _vessel(db, vessel_id: int) -> None:
+    from app.models.vessel import Vessel
+
+    db.add(Vessel(vessel_id=vessel_id, mmsi=f"21100000{vessel_id}"))
+    db.flush()
+
+
+def _point(vessel_id: int, hours: float, lat: float, lon: float, source: str = "aisstream"):
+    from app.models.ais_point import AISPoint
+
+    return AISPoint(
+        vessel_id=vessel_id,
+        timestamp_utc=T0 + timedelta(hours=hours),
+        lat=lat,
+        lon=lon,
+        sog=10.0,
+        cog=90.0,
+        source=source,
+    )
+
+
+def _summary(db, vessel_id: int):
+    from app.modules.track_summary import load_track_summaries
+
+    return load_track_summaries(db, [vessel_id]).get(vessel_id)
+
+
+def _as_dict(summary) -> dict:
+    return {
+        c: getattr(summary, c)
+        for c in (
+            "point_count",
+            "first_point_utc",
+            "first_lat",
+            "first_lon",
+            "last_point_utc",
+            "last_lat",
+            "last_lon",
+            "last_source",
+            "lat_min",
+            "lat_max",
+            "lon_min",
+            "lon_max",
+            "dominant_source",
+        )
+    }
+
+
+class TestIngestMaintenance:
+    def test_orm_points_update_summary_on_flush(self, db):
+        _vessel(db, 1)
+        db.add_all(
+            [
+                _point(1, 2, 55.0, 12.0),
+                _point(1, 0, 54.5, 11.0, source="csv_import"),
+                _point(1, 1, 56.0, 13.5),
+            ]
+        )
+        db.commit()
+
+        summary = _summary(db, 1)
+        assert summary.point_count == 3
+        assert summary.first_point_utc == T0
+        assert (summary.first_lat, summary.first_lon) == (54.5, 11.0)
+        assert summary.last_point_utc == T0 + timedelta(hours=2)
+        assert (summary.last_lat, summary.last_lon) == (55.0, 12.0)
+        assert (summary.lat_min, summary.lat_max) == (54.5, 56.0)
+        assert (summary.lon_min, summary.lon_max) == (11.0, 13.5)
+        assert summary.dominant_source == "aisstream"
+
+        # A later flush only widens the summary
+        db.add(_point(1, -5, 50.0, 10.0, source="csv_import"))
+        db.add(_point(1, -4, 50.5, 10.5, source="csv_import"))
+        db.commit()
+        summary = _summary(db, 1)
+        assert summary.point_count == 5
+        assert summary.first_point_utc == T0 - timedelta(hours=5)
+        assert summary.last_point_utc == T0 + timedelta(hours=2)
+        assert summary.lat_min == 50.0
+        assert summary.dominant_source == "csv_import"
+
+    def test_core_rows_merge_with_existing_summary(self, db):
+        from app.models.ais_point import AISPoint
+        from app.modules.pg_copy import insert_ais_points
+        from app.modules.track_summary import record_point_rows
+
+        _vessel(db, 1)
+        db.add(_point(1, 0, 55.0, 12.0))
+        db.commit()
+
+        rows = [
+            {
+                "vessel_id": 1,
+                "timestamp_utc": T0 + timedelta(hours=h),
+                "lat": 55.0 + h / 10,
+                "lon": 12.0,
+                "source": "dma",
+            }
+            for h in (1, 2, 3)
+        ]
+        insert_ais_points(db, rows)
+        assert record_point_rows(db, rows) == 1
+        db.commit()
+
+        summary = _summary(db, 1)
+        assert db.query(AISPoint).count() == 4
+        assert summary.point_count == 4
+        assert summary.last_point_utc == T0 + timedelta(hours=3)
+        assert summary.last_source == "dma"
+        assert summary.lat_max == pytest.approx(55.3)
+        assert summary.dominant_source == "dma"
+
+    def test_source_replacement_moves_count(self, db):
+        from app.models.vessel_track_source_count import VesselTrackSourceCount
+
+        _vessel(db, 1)
+        low = _point(1, 0, 55.0, 12.0, source="csv_import")
+        db.add_all([low, _point(1, 1, 55.1, 12.1, source="aisstream")])
+        db.commit()
+
+        low.source = "spire"
+        low.lat = 55.05
+        db.commit()
+
+        counts = dict(
+            db.execute(
+                select(VesselTrackSourceCount.source, VesselTrackSourceCount.point_count).where(
+                    VesselTrackSourceCount.vessel_id == 1
+                )
+            ).all()
+        )
+        assert counts == {"csv_import": 0, "aisstream": 1, "spire": 1}
+        summary = _summary(db, 1)
+        assert summary.point_count == 2
+        assert summary.dominant_source in {"aisstream", "spire"}
+
+    def test_orm_delete_rebuilds(self, db):
+        _vessel(db, 1)
+        first = _point(1, 0, 50.0, 10.0)
+        db.add_all([first, _point(1, 1, 55.0, 12.0), _point(1, 2, 55.5, 12.5)])
+        db.commit()
+
+        db.delete(first)
+        db.commit()
+        summary = _summary(db, 1)
+        assert summary.point_count == 2
+        assert summary.first_point_utc == T0 + timedelta(hours=1)
+        assert summary.lat_min == 55.0
+
+    def test_orm_vessel_reassignment_rebuilds_both(self, db):
+        _vessel(db, 1)
+        _vessel(db, 2)
+        moved = _point(1, 0, 50.0, 10.0)
+        db.add_all([moved, _point(1, 1, 55.0, 12.0), _point(2, 5, 60.0, 20.0)])
+        db.commit()
+
+        moved.vessel_id = 2
+        db.commit()
+        old, new = _summary(db, 1), _summary(db, 2)
+        assert (old.point_count, old.first_point_utc) == (1, T0 + timedelta(hours=1))
+        assert (new.point_count, new.first_point_utc) == (2, T0)
+        assert new.lat_min == 50.0
+
+    def test_disabled_writes_nothing(self, db, monkeypatch):
+        monkeypatch.setattr("app.config.settings.TRACK_SUMMARY_ENABLED", False)
+        _vessel(db, 1)
+        db.add(_point(1, 0, 55.0, 12.0))
+        db.commit()
+        monkeypatch.setattr("app.config.settings.TRACK_SUMMARY_ENABLED", True)
+        assert _summary(db, 1) is None
+
+
+class TestRebuild:
+    def test_rebuild_matches_incremental(self, db):
+        from app.modules.track_summary import rebuild_track_summaries
+
+        for vid in (1, 2):
+            _vessel(db, vid)
+            db.add_all(
+                _point(vid, h, 50.0 + vid + h / 7, 10.0 - h / 3, "csv_import" if h % 3 else "dma")
+                for h in range(10)
+            )
+        db.commit()
+        incremental = {vid: _as_dict(_summary(db, vid)) for vid in (1, 2)}
+
+        assert rebuild_track_summaries(db) == 2
+        db.commit()
+        assert {vid: _as_dict(_summary(db, vid)) for vid in (1, 2)} == incremental
+
+    def test_rebuild_before_cutoff_after_bulk_delete(self, db):
+        from sqlalchemy import delete
+
+        from app.models.ais_point import AISPoint
+        from app.modules.track_summary import rebuild_summaries_before
+
+        _vessel(db, 1)
+        _vessel(db, 2)
+        db.add_all(_point(1, h, 55.0, 12.0) for h in range(5))
+        db.add(_point(2, 0, 40.0, 5.0))
+        db.add(_point(2, 10, 41.0, 6.0))
+        db.commit()
+
+        cutoff = T0 + timedelta(hours=3)
+        db.execute(delete(AISPoint).where(AISPoint.timestamp_utc < cutoff))
+        assert rebuild_summaries_before(db, cutoff) == 2
+        db.commit()
+
+        assert _summary(db, 1).point_count == 2
+        assert _summary(db, 1).first_point_utc == cutoff
+        assert _summary(db, 2).point_count == 1
+        assert (_summary(db, 2).lat_min, _summary(db, 2).lat_max) == (41.0, 41.0)
+
+    def test_merge_rebuilds_both_vessels(self, db, monkeypatch):
+        from app.modules import merge_execution
+
+        monkeypatch.setattr(merge_execution, "_rescore_vessel", lambda *a, **kw: None)
+
+        _vessel(db, 1)
+        _vessel(db, 2)
+        db.add_all(_point(1, h, 55.0, 12.0) for h in range(3))
+        db.add_all(_point(2, h, 56.0, 13.0) for h in range(3, 5))
+        db.commit()
+
+        result = merge_execution.execute_merge(db, 1, 2, reason="test")
+        assert result["success"]
+        assert _summary(db, 1).point_count == 5
+        assert _summary(db, 1).last_lat == 56.0
+        assert _summary(db, 2) is None
+
+
+class TestReaders:
+    def test_may_have_points(self, db):
+        from app.modules.track_summary import may_have_points
+
+        _vessel(db, 1)
+        db.add_all(_point(1, h, 55.0, 12.0) for h in range(4))
+        db.commit()
+        summary = _summary(db, 1)
+
+        assert may_have_points(None, min_points=1000)
+        assert may_have_points(summary, min_points=4, min_span=timedelta(hours=3))
+        assert not may_have_points(summary, min_points=5)
+        assert not may_have_points(summary, min_span=timedelta(hours=4))
+        assert not may_have_points(summary, start=T0 + timedelta(hours=4))
+        assert not may_have_points(summary, end=T0 - timedelta(seconds=1))
+        assert may_have_points(summary, start=T0 + timedelta(hours=3), end=T0 + timedelta(days=1))
+
+    def test_laid_up_skips_short_tracks_without_loading_points(self, db, monkeypatch):
+        from app.modules import loitering_detector
+
+        _vessel(db, 1)
+        db.add_all(_point(1, h, 55.0, 12.0) for h in range(0, 24 * 10, 6))
+        db.commit()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("points loaded for a vessel ruled out by its summary")
+
+        monkeypatch.setattr(loitering_detector.pl, "DataFrame", _fail)
+        assert loitering_detector.detect_laid_up_vessels(db) == {"laid_up_updated": 0}
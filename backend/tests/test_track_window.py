@@ -0,0 +1,185 @@
+"""Tests for the sliding-window track engine (app.modules.track_window)."""
+
+from __future__ import annotations
+
+import random
+import statistics
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.modules.track_window import POSITION_TOLERANCE_DEG, TrackWindow
+from app.utils.geo import haversine_nm
+
+T0 = datetime(2024, 3, 1, 0, 0, 0)
+
+
+class _Point(NamedTuple):
+    timestamp_utc: datetime
+    lat: float
+    lon: float
+    sog: float | None
+    nav_status: int | None
+
+
+def _random_track(seed: int, n: int = 300) -> list[_Point]:
+    rng = random.Random(seed)
+    ts, lat, lon = T0, rng.uniform(-70, 70), rng.uniform(-179, 179)
+    points = []
+    for _ in range(n):
+        ts += timedelta(seconds=rng.choice([0, 10, 60, 600, 3000]))
+        lat += rng.uniform(-0.01, 0.01)
+        lon += rng.uniform(-0.01, 0.01)
+        sog = rng.choice([None, 1.0, 2.5, round(rng.uniform(0, 12), 1)])
+        points.append(_Point(ts, lat, lon, sog, rng.choice([None, 0, 1, 3])))
+    return points
+
+
+class TestTrackWindow:
+    @pytest.mark.parametrize("span_min", [30, 60, 360])
+    def test_aggregates_match_rebuilt_window(self, span_min):
+        span = timedelta(minutes=span_min)
+        for seed in range(5):
+            points = _random_track(seed)
+            values = [random.Random(i).random() for i in range(len(points))]
+            window = TrackWindow(points, span, values)
+            rng = random.Random(seed)
+            i = 0
+            while i < len(points):
+                window.slide(i)
+                end = points[i].timestamp_utc + span
+                expected = [p for p in points[i:] if p.timestamp_utc <= end]
+                assert window.points() == expected
+                assert window.max_value() == max(values[i : i + len(expected)])
+
+                sogs = [p.sog for p in expected if p.sog is not None]
+                if sogs:
+                    assert window.median_sog() == statistics.median(sogs)
+                statuses = [p.nav_status for p in expected if p.nav_status is not None]
+                assert window.status_changes == sum(
+                    a != b for a, b in zip(statuses, statuses[1:], strict=False)
+                )
+                lats = [p.lat for p in expected]
+                lons = [p.lon for p in expected]
+                assert window.mean_lat() == pytest.approx(
+                    statistics.mean(lats), abs=POSITION_TOLERANCE_DEG
+                )
+                if len(expected) >= 2:
+                    assert window.lat_stdev() == pytest.approx(
+                        statistics.stdev(lats), abs=POSITION_TOLERANCE_DEG
+                    )
+                    assert window.lon_stdev() == pytest.approx(
+                        statistics.stdev(lons), abs=POSITION_TOLERANCE_DEG
+                    )
+                if len(expected) <= 40:
+                    farthest = max(
+                        haversine_nm(a.lat, a.lon, b.lat, b.lon) for a in expected for b in expected
+                    )
+                    assert farthest <= window.max_distance_nm()
+                i += rng.choice([1, 1, 2, 9])
+
+    def test_anchors_must_not_decrease(self):
+        window = TrackWindow(_random_track(0, 10), timedelta(hours=1))
+        window.slide(3)
+        with pytest.raises(ValueError):
+            window.slide(2)
+
+
+@pytest.fixture()
+def db():
+    import app.models  # noqa: F401 — register all tables
+
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _seed(db, points: list[_Point]) -> None:
+    from app.models.ais_point import AISPoint
+    from app.models.vessel import Vessel
+
+    db.add(Vessel(vessel_id=1, mmsi="211000001"))
+    db.flush()
+    db.add_all(
+        AISPoint(
+            vessel_id=1,
+            timestamp_utc=p.timestamp_utc,
+            lat=p.lat,
+            lon=p.lon,
+            sog=p.sog,
+            nav_status=p.nav_status,
+        )
+        for p in points
+    )
+    db.commit()
+
+
+class TestSpoofingDetection:
+    def _anomalies(self, db):
+        from app.models.spoofing_anomaly import SpoofingAnomaly
+
+        return db.query(SpoofingAnomaly).order_by(SpoofingAnomaly.start_time_utc).all()
+
+    def test_dense_circle_and_erratic_track(self, db):
+        from app.models.base import SpoofingTypeEnum
+        from app.modules.gap_detector import run_spoofing_detection
+
+        # 7h at 1-minute reports: SOG 8 kn but positions within ~100 m; the first hour
+        # toggles nav_status every minute
+        points = [
+            _Point(
+                T0 + timedelta(minutes=m),
+                45.0 + 0.0005 * (m % 3),
+                -30.0 + 0.0005 * (m % 5),
+                8.0,
+                m % 2 if m < 60 else 0,
+            )
+            for m in range(7 * 60)
+        ]
+        _seed(db, points)
+
+        result = run_spoofing_detection(db, date_from=date(2024, 3, 1), date_to=date(2024, 3, 1))
+        anomalies = self._anomalies(db)
+        assert result["anomalies_detected"] == len(anomalies)
+
+        erratic = [a for a in anomalies if a.anomaly_type == SpoofingTypeEnum.ERRATIC_NAV_STATUS]
+        assert [a.start_time_utc for a in erratic] == [T0]
+        circles = [a for a in anomalies if a.anomaly_type.startswith("circle_spoof")]
+        # Every anchor whose 6h window spans at least 4h (minutes 0-179)
+        assert len(circles) == 3 * 60
+        assert not any(a.anomaly_type == SpoofingTypeEnum.DUAL_TRANSMISSION for a in anomalies)
+
+        again = run_spoofing_detection(db, date_from=date(2024, 3, 1), date_to=date(2024, 3, 1))
+        assert again["anomalies_detected"] == 0
+
+    def test_dual_transmission_one_per_anchor(self, db):
+        from app.models.base import SpoofingTypeEnum
+        from app.modules.gap_detector import run_spoofing_detection
+
+        # Steady 10 kn transit; a second transmitter ~45 nm ahead reports at minute 21
+        points = [
+            _Point(T0 + timedelta(minutes=m), 40.0 + m * (10 / 60 / 60), 5.0, 10.0, 0)
+            for m in range(0, 60, 5)
+        ]
+        points.append(_Point(T0 + timedelta(minutes=21), 40.8, 5.0, 10.0, 0))
+        points.sort()
+        _seed(db, points)
+
+        run_spoofing_detection(db)
+        dual = [
+            a for a in self._anomalies(db) if a.anomaly_type == SpoofingTypeEnum.DUAL_TRANSMISSION
+        ]
+        # Every anchor within 30 min before the outlier, plus the outlier itself
+        assert [a.start_time_utc for a in dual] == [
+            T0 + timedelta(minutes=m) for m in (0, 5, 10, 15, 20, 21)
+        ]